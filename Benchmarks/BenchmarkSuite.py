@@ -0,0 +1,326 @@
+import argparse
+import datetime
+import json
+import numpy
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from Benchmarks.StartupBenchmark import measureStartup
+from Benchmarks.WhiptailStub import *
+
+# Usage: python -m Benchmarks.BenchmarkSuite [--output RESULTS.json] [--compare BASELINE.json]
+# Runs all hot path measurements on the simulated GPIO (MockFactory) and saves
+# the results to a JSON file, so that the results of different runs (commits,
+# boards) can be compared with --compare.
+#
+# Results file:
+# {"format_version": 1, "created": ..., "environment": {...},
+#  "results": {<BENCHMARK>: {<METRIC>: <VALUE>, ...}, ...}}
+
+RESULTS_FORMAT_VERSION = 1
+DEFAULT_RESULTS_FILE = "BenchmarkResults.json"
+
+SWITCHING_ACTIVATIONS_COUNT = 5000
+CATALOG_COLD_REPEATS = 5
+CATALOG_WARM_REPEATS = 50
+CONFIGURATION_REPEATS = 200
+INDEXED_CONFIGURATIONS_COUNT = 500
+
+FILTER_INPUT_SWITCH_GPIO_PINS = [17, 27, 22]
+FILTER_OUTPUT_SWITCH_GPIO_PINS = [0, 5, 6]
+LNA_INPUT_SWITCH_GPIO_PINS = [23, 24]
+LNA_OUTPUT_SWITCH_GPIO_PINS = [16, 26]
+
+BENCHMARK_DEVICE = "rpitx-expansion-board-SP6T-LNA"
+
+# Metrics for which a smaller value is better, for all other metrics a bigger value is better
+LOWER_IS_BETTER_SUFFIXES = ("_us", "_ms", "_mb", "_bytes")
+# Metrics describing the benchmark itself
+NOT_COMPARED_METRICS = ["count", "components_count", "configurations_count"]
+
+def getLatencyMetrics(latencies_ns):
+    latencies_us = numpy.asarray(latencies_ns) / 1e3
+    return {
+        "count": len(latencies_us),
+        "mean_us": float(numpy.mean(latencies_us)),
+        "p50_us": float(numpy.percentile(latencies_us, 50)),
+        "p99_us": float(numpy.percentile(latencies_us, 99)),
+        "max_us": float(numpy.max(latencies_us)),
+        "switches_per_second": float(1e6 / numpy.mean(latencies_us))
+    }
+
+def getDurationMetrics(durations_ns):
+    durations_ms = numpy.asarray(durations_ns) / 1e6
+    return {
+        "count": len(durations_ms),
+        "mean_ms": float(numpy.mean(durations_ms)),
+        "p50_ms": float(numpy.percentile(durations_ms, 50)),
+        "min_ms": float(numpy.min(durations_ms))
+    }
+
+def benchmarkEnableFilter():
+    from ControlApplication.RFSwitch import FilterSwitch, RFSwitch
+
+    filter_switch = FilterSwitch(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS,
+                                 RFSwitch.SP6T_SWITCH_TRUTH_TABLE, True)
+    latencies = []
+
+    for activation_number in range(SWITCHING_ACTIVATIONS_COUNT):
+        # Every activation changes the RF path
+        filter_number = activation_number % 6 + 1
+        start_time = time.perf_counter_ns()
+        filter_switch.enableFilter(filter_number)
+        latencies.append(time.perf_counter_ns() - start_time)
+
+    return getLatencyMetrics(latencies)
+
+def benchmarkToggleLNA():
+    from ControlApplication.RFSwitch import LNASwitch, RFSwitch
+
+    lna_switch = LNASwitch(LNA_INPUT_SWITCH_GPIO_PINS, LNA_OUTPUT_SWITCH_GPIO_PINS,
+                           RFSwitch.SPDT_SWITCH_TRUTH_TABLE, True)
+    latencies = []
+
+    for _ in range(SWITCHING_ACTIVATIONS_COUNT):
+        start_time = time.perf_counter_ns()
+        lna_switch.toggleLNA()
+        latencies.append(time.perf_counter_ns() - start_time)
+
+    return getLatencyMetrics(latencies)
+
+def copyCatalogs(source_dir, application_dir):
+    for models_subdir in ("FiltersList", "AmplifiersList"):
+        destination_dir = os.path.join(application_dir, models_subdir)
+        shutil.copytree(os.path.join(source_dir, models_subdir), destination_dir)
+        # Dumps are built by the benchmarks
+        for filename in os.listdir(destination_dir):
+            if not filename.endswith(".csv"):
+                os.remove(os.path.join(destination_dir, filename))
+
+def benchmarkComponentsList(application_dir, model_type, models_subdir, dump_filename):
+    from ControlApplication.Components import ComponentsList
+
+    models_dir = os.path.join(application_dir, models_subdir)
+    dump_file_path = os.path.join(models_dir, dump_filename)
+    results = {}
+
+    # pandas is imported by the first cold construction, its import time is
+    # a part of the startup measurement
+    ComponentsList(model_type, models_dir, dump_filename)
+
+    cold_durations = []
+    for _ in range(CATALOG_COLD_REPEATS):
+        os.remove(dump_file_path)
+        start_time = time.perf_counter_ns()
+        components_list = ComponentsList(model_type, models_dir, dump_filename)
+        cold_durations.append(time.perf_counter_ns() - start_time)
+    results["cold"] = {**getDurationMetrics(cold_durations), "components_count": len(components_list.data)}
+
+    warm_durations = []
+    for _ in range(CATALOG_WARM_REPEATS):
+        start_time = time.perf_counter_ns()
+        components_list = ComponentsList(model_type, models_dir, dump_filename)
+        warm_durations.append(time.perf_counter_ns() - start_time)
+    results["warm"] = {**getDurationMetrics(warm_durations), "components_count": len(components_list.data)}
+
+    return results
+
+def loadBenchmarkCatalogs(application_dir):
+    from ControlApplication.Components import ComponentsList
+
+    filters_list = ComponentsList(ComponentsList.FILTER, os.path.join(application_dir, "FiltersList"), "FiltersListDump.bin")
+    amplifiers_list = ComponentsList(ComponentsList.AMPLIFIER, os.path.join(application_dir, "AmplifiersList"), "AmplifierDump.bin")
+    return filters_list.data, amplifiers_list.data
+
+def createBenchmarkDevice(application_dir):
+    from ControlApplication.Device import Device
+
+    filters_catalog, amplifiers_catalog = loadBenchmarkCatalogs(application_dir)
+
+    # The board uses the first low pass filters (DC - 435 MHz and up), the
+    # benchmarks switch them by the transmit frequency. The order of the
+    # catalog rows does not depend on the order of the .csv files
+    filter_types = filters_catalog.categories["filter_type"][filters_catalog.columns["filter_type"]]
+    low_pass_indexes = numpy.flatnonzero(filter_types == "Low Pass")
+
+    device = Device(BENCHMARK_DEVICE)
+    device.filters = [filters_catalog.getReference(int(index)) for index in low_pass_indexes[:Device.DEVICE_TYPE_MAPPING[BENCHMARK_DEVICE][0]]]
+    device.lna = [amplifiers_catalog.getReference(0)]
+    return device
+
+def benchmarkDeviceConfiguration(application_dir):
+    import ControlApplication.UserInterface as user_interface_module
+
+    # Configurations are saved to the temporary directory, dialogs are answered by the stub
+    user_interface_module.CONFIGS_DIR = os.path.join(application_dir, "SavedConfiguration")
+    user_interface = user_interface_module.UserInterface()
+    device = createBenchmarkDevice(application_dir)
+    filters_catalog, amplifiers_catalog = loadBenchmarkCatalogs(application_dir)
+
+    save_durations = []
+    for _ in range(CONFIGURATION_REPEATS):
+        start_time = time.perf_counter_ns()
+        user_interface.saveDeviceConfiguration(device)
+        save_durations.append(time.perf_counter_ns() - start_time)
+
+    configuration_path = user_interface.saveDeviceConfiguration(device)
+    configuration_size = os.path.getsize(configuration_path)
+
+    load_durations = []
+    for _ in range(CONFIGURATION_REPEATS):
+        # The saved configuration is chosen in the configuration picker
+        WhiptailStub.menu_choices = [os.path.splitext(os.path.basename(configuration_path))[0]]
+        start_time = time.perf_counter_ns()
+        loaded_device = user_interface.loadDeviceConfiguration(filters_catalog, amplifiers_catalog)
+        load_durations.append(time.perf_counter_ns() - start_time)
+
+    if loaded_device is None or loaded_device.model_name != device.model_name:
+        raise RuntimeError("Saved device configuration was not loaded")
+
+    return {
+        "save": {**getDurationMetrics(save_durations), "file_size_bytes": configuration_size},
+        "load": getDurationMetrics(load_durations),
+        "index": benchmarkConfigurationIndex(os.path.join(application_dir, "IndexedConfiguration"), device)
+    }
+
+def benchmarkConfigurationIndex(configs_dir, device):
+    # Listing of the configurations for the picker: "cold" - the index is
+    # rebuilt from the configuration files, "warm" - the index is up to date
+    from ControlApplication.DeviceConfiguration import ConfigurationIndex, DeviceConfiguration
+
+    for configuration_number in range(INDEXED_CONFIGURATIONS_COUNT):
+        DeviceConfiguration.fromDevice(device, f"configuration-{configuration_number}").save(configs_dir)
+    configuration_index = ConfigurationIndex(configs_dir)
+
+    cold_durations = []
+    for _ in range(5):
+        os.remove(configuration_index.index_path)
+        start_time = time.perf_counter_ns()
+        configuration_index.getConfigurations()
+        cold_durations.append(time.perf_counter_ns() - start_time)
+
+    warm_durations = []
+    for _ in range(50):
+        start_time = time.perf_counter_ns()
+        configurations = configuration_index.getConfigurations()
+        warm_durations.append(time.perf_counter_ns() - start_time)
+
+    cold_metrics = getDurationMetrics(cold_durations)
+    warm_metrics = getDurationMetrics(warm_durations)
+    return {
+        "configurations_count": len(configurations),
+        "cold_p50_ms": cold_metrics["p50_ms"],
+        "warm_p50_ms": warm_metrics["p50_ms"]
+    }
+
+def benchmarkStartup(application_dir):
+    # Separate processes: the first run builds the dumps, the second one uses them
+    results = {}
+    for path_name in ("cold", "warm"):
+        measurement = measureStartup(application_dir)
+        results[path_name] = {
+            "startup_time_ms": measurement["startup_time_ms"],
+            "peak_rss_mb": measurement["peak_rss_mb"],
+            "loaded_modules": measurement["loaded_modules"]
+        }
+    return results
+
+def runBenchmarks():
+    import ControlApplication
+    source_dir = os.path.dirname(os.path.abspath(ControlApplication.__file__))
+    results = {}
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(source_dir, application_dir)
+        # Startup is measured first, while the catalog dumps do not exist yet
+        startup_results = benchmarkStartup(application_dir)
+        for path_name, metrics in startup_results.items():
+            results[f"startup.{path_name}"] = metrics
+
+    installWhiptailStub()
+
+    results["switching.enable_filter"] = benchmarkEnableFilter()
+    results["switching.toggle_lna"] = benchmarkToggleLNA()
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(source_dir, application_dir)
+
+        from ControlApplication.Components import ComponentsList
+        for model_type, models_subdir, dump_filename, benchmark_name in [
+            (ComponentsList.FILTER, "FiltersList", "FiltersListDump.bin", "filters"),
+            (ComponentsList.AMPLIFIER, "AmplifiersList", "AmplifierDump.bin", "amplifiers")
+        ]:
+            for path_name, metrics in benchmarkComponentsList(application_dir, model_type, models_subdir, dump_filename).items():
+                results[f"catalog.{benchmark_name}.{path_name}"] = metrics
+
+        for operation, metrics in benchmarkDeviceConfiguration(application_dir).items():
+            results[f"configuration.{operation}"] = metrics
+
+    return results
+
+def getEnvironment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__
+    }
+
+def printResults(results):
+    for benchmark_name, metrics in results.items():
+        metrics_info = ", ".join(f"{metric} {value:.1f}" if isinstance(value, float) else f"{metric} {value}"
+                                 for metric, value in metrics.items())
+        print(f"{benchmark_name:>28}: {metrics_info}")
+
+def compareResults(baseline, current):
+    # Relative change of every numeric metric present in both runs
+    print(f"{'Benchmark':>28} | {'Metric':>20} | {'Baseline':>12} | {'Current':>12} | {'Change':>8}")
+    for benchmark_name, metrics in current["results"].items():
+        baseline_metrics = baseline["results"].get(benchmark_name, {})
+        for metric, value in metrics.items():
+            baseline_value = baseline_metrics.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(baseline_value, (int, float)) or metric in NOT_COMPARED_METRICS:
+                continue
+
+            change = (value - baseline_value) / baseline_value * 100 if baseline_value else 0.0
+            is_worse = change > 0 if metric.endswith(LOWER_IS_BETTER_SUFFIXES) else change < 0
+            marker = " !" if is_worse and abs(change) >= 10 else ""
+            print(f"{benchmark_name:>28} | {metric:>20} | {baseline_value:>12.2f} | {value:>12.2f} | {change:>+7.1f}%{marker}")
+
+def main():
+    parser = argparse.ArgumentParser(description="rpitx-expansion-board control application benchmarks")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_FILE, help="JSON file the results are written to")
+    parser.add_argument("--compare", help="JSON file with the results of a previous run")
+    arguments = parser.parse_args()
+
+    run = {
+        "format_version": RESULTS_FORMAT_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": getEnvironment(),
+        "results": runBenchmarks()
+    }
+
+    with open(arguments.output, "w") as results_file:
+        json.dump(run, results_file, indent=2)
+
+    printResults(run["results"])
+    print(f"Results saved: {arguments.output}")
+
+    if arguments.compare:
+        with open(arguments.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("format_version") != RESULTS_FORMAT_VERSION:
+            print(f"Results format of {arguments.compare} is not supported!")
+            return 1
+        compareResults(baseline, run)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import ControlApplication
+import os
+import pickle
+import shutil
+import statistics
+import tempfile
+import time
+from Benchmarks.SyntheticCatalog import *
+from ControlApplication.CatalogCache import *
+from ControlApplication.Components import *
+
+# Usage: python -m Benchmarks.CatalogCacheBenchmark
+
+APPLICATION_DIR = os.path.dirname(os.path.abspath(ControlApplication.__file__))
+REPEATS = 5
+SYNTHETIC_CATALOG_SIZE = 100000
+CACHE_FILENAME = "CatalogCache.bin"
+PICKLE_FILENAME = "CatalogDump.pkl"
+
+def measure(function):
+    # Median of several runs, in milliseconds
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1e3)
+    return statistics.median(timings)
+
+def benchmarkCatalog(name, model_type, models_dir):
+    cache_file_path = os.path.join(models_dir, CACHE_FILENAME)
+    pickle_file_path = os.path.join(models_dir, PICKLE_FILENAME)
+
+    def coldStart():
+        if os.path.exists(cache_file_path):
+            os.remove(cache_file_path)
+        return ComponentsList(model_type, models_dir, CACHE_FILENAME)
+
+    cold_time = measure(coldStart)
+    warm_time = measure(lambda: ComponentsList(model_type, models_dir, CACHE_FILENAME))
+    mmap_time = measure(lambda: CatalogCache.load(cache_file_path))
+
+    # Dump format used by the previous versions of the application: a pickled list of component objects
+    with open(pickle_file_path, "wb") as pickle_file:
+        pickle.dump(list(ComponentsList(model_type, models_dir, CACHE_FILENAME).data), pickle_file)
+
+    def pickleLoad():
+        with open(pickle_file_path, "rb") as pickle_file:
+            return pickle.load(pickle_file)
+
+    pickle_time = measure(pickleLoad)
+
+    print(f"{name:>20} | {cold_time:>10.1f} | {warm_time:>10.1f} | {mmap_time:>10.2f} | {pickle_time:>10.1f} | "
+          f"{os.path.getsize(cache_file_path) / 1024:>10.0f} | {os.path.getsize(pickle_file_path) / 1024:>11.0f}")
+
+def runBenchmark():
+    print(f"{'Catalog':>20} | {'Cold (ms)':>10} | {'Warm (ms)':>10} | {'mmap (ms)':>10} | {'Pickle (ms)':>10} | "
+          f"{'Cache (KB)':>10} | {'Pickle (KB)':>11}")
+
+    with tempfile.TemporaryDirectory() as benchmark_dir:
+        # Copies of the catalogs are used, the application dumps are not touched
+        for name, model_type, models_subdir in [("FiltersList", ComponentsList.FILTER, "FiltersList"), 
+                                                ("AmplifiersList", ComponentsList.AMPLIFIER, "AmplifiersList")]:
+            models_dir = os.path.join(benchmark_dir, models_subdir)
+            shutil.copytree(os.path.join(APPLICATION_DIR, models_subdir), models_dir)
+            benchmarkCatalog(name, model_type, models_dir)
+
+        synthetic_dir = os.path.join(benchmark_dir, "Synthetic")
+        os.makedirs(synthetic_dir)
+        createFilterDataFrame(SYNTHETIC_CATALOG_SIZE).to_csv(os.path.join(synthetic_dir, "Filters.csv"), index=False)
+        benchmarkCatalog(f"Synthetic {SYNTHETIC_CATALOG_SIZE // 1000}k", ComponentsList.FILTER, synthetic_dir)
+
+if __name__ == "__main__":
+    runBenchmark()
@@ -0,0 +1,88 @@
+import sys
+import time
+from Benchmarks.SyntheticCatalog import *
+from ControlApplication.Components import *
+
+# Usage: python -m Benchmarks.ComponentSearchBenchmark
+# Component picker on synthetic catalogs: the case style menus built from
+# the catalog indexes are compared with the passes over all components, the
+# search index with a substring scan of all component texts. Exits with
+# code 1 if the index and the scan find different components.
+
+CATALOG_SIZES = [1000, 10000, 100000]
+SEARCH_RESULTS_LIMIT = 200
+# Text queries are checked against the scan, word prefixes and frequencies are not
+# found by the scan
+TEXT_QUERIES = ["syn-4", "syn-12345+", "cs042", "band stop", "pass filter,", "ynthetic hig", "no-such-part"]
+FREQUENCY_QUERIES = ["cs 1", "145", "433.92mhz", "low pass 1296"]
+# The passes over all components are slow, they are measured on fewer menus
+CASE_STYLE_MENUS_COUNT = 5
+
+def measure(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return (time.perf_counter() - start) / repeats * 1e3, result
+
+def scanCaseStyleMenu(catalog, case_style):
+    # What the picker did before: a pass for the case styles, another one for the models
+    sorted(set(component.case_style for component in catalog))
+    return [component.model_number for component in catalog if component.case_style == case_style]
+
+def indexCaseStyleMenu(catalog, case_style):
+    catalog.getCaseStyles()
+    return [catalog.columns["model_number"][index] for index in catalog.getCaseStyleIndexes(case_style)]
+
+def scanSearch(catalog, query):
+    # Substring scan of the same text that is indexed
+    terms = query.lower().split()
+    found_indexes = []
+    for index in range(len(catalog)):
+        text = (f"{catalog.columns['model_number'][index]} {catalog.getCategory('case_style', index)} "
+                f"{catalog.columns['description'][index]}").lower()
+        if all(term in text for term in terms):
+            found_indexes.append(index)
+    return found_indexes
+
+def runBenchmark():
+    mismatches = 0
+
+    print(f"{'Catalog size':>12} | {'Build (ms)':>10} | {'Case menu scan (ms)':>19} | {'Case menu index (ms)':>20} | "
+          f"{'Query':>16} | {'Scan (ms)':>9} | {'Index (ms)':>10} | {'Found':>6}")
+
+    for catalog_size in CATALOG_SIZES:
+        catalog = ComponentsCatalog.fromCsvColumns(ComponentsList.FILTER, createFilterDataFrame(catalog_size))
+
+        start = time.perf_counter()
+        catalog.search("")
+        build_time = (time.perf_counter() - start) * 1e3
+
+        case_style = CASE_STYLES[42]
+        scan_menu_time, scan_models = measure(lambda: scanCaseStyleMenu(catalog, case_style), CASE_STYLE_MENUS_COUNT)
+        index_menu_time, index_models = measure(lambda: indexCaseStyleMenu(catalog, case_style), CASE_STYLE_MENUS_COUNT * 20)
+        if scan_models != index_models:
+            print(f"MISMATCH: models of {case_style}")
+            mismatches += 1
+
+        for query in TEXT_QUERIES + FREQUENCY_QUERIES:
+            index_time, found_indexes = measure(lambda: catalog.search(query, SEARCH_RESULTS_LIMIT), 20)
+            all_found_count = len(catalog.search(query))
+            if query in TEXT_QUERIES:
+                scan_time, scan_indexes = measure(lambda: scanSearch(catalog, query), 1)
+                if sorted(catalog.search(query)) != scan_indexes:
+                    print(f"MISMATCH: {query}")
+                    mismatches += 1
+                scan_column = f"{scan_time:>9.1f}"
+            else:
+                scan_column = f"{'-':>9}"
+
+            print(f"{catalog_size:>12} | {build_time:>10.0f} | {scan_menu_time:>19.1f} | {index_menu_time:>20.2f} | "
+                  f"{query:>16} | {scan_column} | {index_time:>10.2f} | {all_found_count:>6}")
+
+    if mismatches:
+        print(f"MISMATCHES: {mismatches}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,90 @@
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+from Benchmarks.BenchmarkSuite import copyCatalogs, loadBenchmarkCatalogs
+
+# Usage: python -m Benchmarks.ComponentsMemoryBenchmark
+# Memory taken by the component records of the full FiltersList and
+# AmplifiersList catalogs loaded from the dumps (the catalog columns are not
+# counted, the text values decoded for the records are):
+#   Dict records - classes with __dict__ and not interned text values, as
+#                  the component records of the previous versions
+#   Slotted      - Filter / Amplifier records with __slots__ and interned
+#                  case style, filter type and description
+#   References   - ComponentReference objects held by the devices
+
+FILTER_ATTRIBUTES = ["model_number", "case_style", "description", "filter_type", "passband_f1", "passband_f2",
+                     "stopband_f3", "stopband_f4", "rejection_f3", "rejection_f4"]
+AMPLIFIER_ATTRIBUTES = ["model_number", "case_style", "description", "f_low", "f_high", "gain"]
+
+class DictBaseModel:
+    def __init__(self, model_number, case_style, description):
+        self.model_number = model_number
+        self.case_style = case_style
+        self.description = description
+
+class DictFilter(DictBaseModel):
+    def __init__(self, model_number, case_style, description, filter_type, passband_f1, passband_f2, stopband_f3, stopband_f4,
+                 rejection_f3 = None, rejection_f4 = None):
+        super().__init__(model_number, case_style, description)
+        self.filter_type = filter_type
+        self.passband_f1 = passband_f1
+        self.passband_f2 = passband_f2
+        self.stopband_f3 = stopband_f3
+        self.stopband_f4 = stopband_f4
+        self.rejection_f3 = rejection_f3
+        self.rejection_f4 = rejection_f4
+
+class DictAmplifier(DictBaseModel):
+    def __init__(self, model_number, case_style, description, f_low, f_high, gain):
+        super().__init__(model_number, case_style, description)
+        self.f_low = f_low
+        self.f_high = f_high
+        self.gain = gain
+
+def createDictRecord(catalog, index):
+    # Same values as Filter / Amplifier records, without interning
+    if catalog.model_type == "Filter":
+        record_class, attribute_names = DictFilter, FILTER_ATTRIBUTES
+    else:
+        record_class, attribute_names = DictAmplifier, AMPLIFIER_ATTRIBUTES
+    return record_class(*[catalog.getComponentValue(index, attribute_name) for attribute_name in attribute_names])
+
+def measureRecords(catalog, create_record):
+    # Bytes allocated per record while the records of the whole catalog are alive
+    gc.collect()
+    tracemalloc.start()
+    start_size = tracemalloc.get_traced_memory()[0]
+    records = [create_record(catalog, index) for index in range(len(catalog))]
+    records_size = tracemalloc.get_traced_memory()[0] - start_size
+    tracemalloc.stop()
+    del records
+    return records_size / len(catalog)
+
+def runBenchmark():
+    import ControlApplication
+    source_dir = os.path.dirname(os.path.abspath(ControlApplication.__file__))
+    methods = [
+        ("Dict records", createDictRecord),
+        ("Slotted", lambda catalog, index: catalog.getComponent(index)),
+        ("References", lambda catalog, index: catalog.getReference(index))
+    ]
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(source_dir, application_dir)
+        # Catalogs are built from the .csv files and then loaded from the 
+        # memory-mapped dumps, as on every start of the application
+        loadBenchmarkCatalogs(application_dir)
+        catalogs = loadBenchmarkCatalogs(application_dir)
+
+        print(f"{'Catalog':>10} | {'Records':>7} | " + " | ".join(f"{method_name + ' (B)':>16}" for method_name, _ in methods))
+        for catalog in catalogs:
+            record_sizes = [measureRecords(catalog, create_record) for _, create_record in methods]
+            print(f"{catalog.model_type:>10} | {len(catalog):>7} | " + " | ".join(f"{record_size:>16.0f}" for record_size in record_sizes))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,99 @@
+import numpy
+import os
+import sys
+import tempfile
+import threading
+import time
+from Benchmarks.BenchmarkSuite import BENCHMARK_DEVICE, copyCatalogs, createBenchmarkDevice
+from ControlApplication.ControlServer import *
+from ControlApplication.DeviceRegistry import *
+
+# Usage: python -m Benchmarks.ControlServerBenchmark
+# Throughput of the rpitx-control daemon command API on the simulated GPIO
+# (MockFactory): the commands are sent by a local client one at a time
+# (round trip per command) and pipelined. Exits with code 1 if any of the
+# commands fails.
+
+COMMANDS_COUNT = 10000
+FILTER_INPUT_SWITCH_GPIO_PINS = [17, 27, 22]
+FILTER_OUTPUT_SWITCH_GPIO_PINS = [0, 5, 6]
+LNA_INPUT_SWITCH_GPIO_PINS = [23, 24]
+LNA_OUTPUT_SWITCH_GPIO_PINS = [16, 26]
+
+def createCommands(device):
+    # Every command changes the state of the board
+    filters_count = len(device.filters)
+    commands = []
+    for command_number in range(COMMANDS_COUNT):
+        command_type = command_number % 4
+        if command_type == 0:
+            commands.append(f"filter {command_number // 4 % filters_count + 1}")
+        elif command_type == 1:
+            commands.append("lna on" if command_number // 4 % 2 else "lna off")
+        elif command_type == 2:
+            commands.append(f"freq {50 + command_number % 400}")
+        else:
+            commands.append("state")
+    return commands
+
+def measureSequential(control_client, commands):
+    latencies = []
+    responses = []
+    for command in commands:
+        start_time = time.perf_counter_ns()
+        responses.append(control_client.sendCommand(command))
+        latencies.append(time.perf_counter_ns() - start_time)
+    return responses, latencies
+
+def measurePipelined(control_client, commands):
+    start_time = time.perf_counter_ns()
+    responses = control_client.sendCommands(commands)
+    return responses, [time.perf_counter_ns() - start_time]
+
+def runBenchmark():
+    import ControlApplication
+    source_dir = os.path.dirname(os.path.abspath(ControlApplication.__file__))
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(source_dir, application_dir)
+        device = createBenchmarkDevice(application_dir)
+        device.initFilterRFSwitches(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS, True)
+        device.initLNA(LNA_INPUT_SWITCH_GPIO_PINS, LNA_OUTPUT_SWITCH_GPIO_PINS, True)
+
+        device_registry = DeviceRegistry()
+        device_registry.addDevice(BENCHMARK_DEVICE, device)
+        control_server = ControlServer(device_registry, os.path.join(application_dir, "rpitx-control.sock"))
+        control_server.start()
+        server_thread = threading.Thread(target=control_server.serveForever, daemon=True)
+        server_thread.start()
+
+        commands = createCommands(device)
+        failed_commands = 0
+
+        print(f"{BENCHMARK_DEVICE}, {COMMANDS_COUNT} commands")
+        print(f"{'Mode':>12} | {'Commands/s':>10} | {'p50 (us)':>8} | {'p99 (us)':>8}")
+
+        try:
+            with ControlClient(control_server.socket_path) as control_client:
+                for mode_name, measure in [("Sequential", measureSequential), ("Pipelined", measurePipelined)]:
+                    responses, latencies = measure(control_client, commands)
+                    failed_commands += sum(1 for response in responses if not response.startswith("OK"))
+
+                    commands_per_second = len(commands) / (sum(latencies) / 1e9)
+                    if len(latencies) > 1:
+                        latencies_us = numpy.asarray(latencies) / 1e3
+                        percentiles = f"{numpy.percentile(latencies_us, 50):>8.1f} | {numpy.percentile(latencies_us, 99):>8.1f}"
+                    else:
+                        percentiles = f"{'-':>8} | {'-':>8}"
+                    print(f"{mode_name:>12} | {commands_per_second:>10.0f} | {percentiles}")
+        finally:
+            control_server.shutdown()
+            server_thread.join()
+
+    if failed_commands:
+        print(f"FAILED COMMANDS: {failed_commands}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,116 @@
+import functools
+import numpy
+import os
+import sys
+import tempfile
+import time
+from Benchmarks.BenchmarkSuite import BENCHMARK_DEVICE, copyCatalogs, createBenchmarkDevice
+from ControlApplication.DeviceRegistry import *
+
+# Usage: python -m Benchmarks.DeviceRegistryBenchmark
+# Time to apply a filter and LNA change to 1, 4 and 16 boards of a device
+# registry: the boards are switched one after another and all at the same
+# time by the registry. Two kinds of simulated pins are used: MockFactory
+# pins (pure Python writes, serialized by the GIL) and MockFactory pins
+# whose every write waits EXPANDER_WRITE_TIME like a write to a GPIO
+# expander over I2C. Exits with code 1 if any of the changes fails.
+
+BOARDS_COUNTS = [1, 4, 16]
+APPLY_REPEATS = {"MockFactory": 200, "Expander": 50}
+# Duration of one pin write of the simulated GPIO expander, s
+EXPANDER_WRITE_TIME = 100e-6
+DEFAULT_PINOUT = {
+    "filter_input": [17, 27, 22],
+    "filter_output": [0, 5, 6],
+    "lna_input": [23, 24],
+    "lna_output": [16, 26]
+}
+
+def createExpanderPinClass():
+    from gpiozero.pins.mock import MockPin
+
+    class ExpanderPin(MockPin):
+        # The write releases the GIL while the (simulated) bus transfer is in progress
+        def _set_state(self, value):
+            time.sleep(EXPANDER_WRITE_TIME)
+            super()._set_state(value)
+
+    return ExpanderPin
+
+def createDeviceRegistry(application_dir, boards_count, pin_class):
+    import gpiozero.pins.mock
+
+    mock_factory = gpiozero.pins.mock.MockFactory
+    # RF switches create their MockFactory when they are initialized
+    if pin_class is not None:
+        gpiozero.pins.mock.MockFactory = functools.partial(mock_factory, pin_class=pin_class)
+    try:
+        device_registry = DeviceRegistry()
+        for board_number in range(boards_count):
+            device = createBenchmarkDevice(application_dir)
+            # Every board has its own simulated pin factories, the default pinout is used by all of them
+            device.initRFSwitches(DEFAULT_PINOUT, True)
+            device_registry.addDevice(f"board{board_number + 1}", device)
+    finally:
+        gpiozero.pins.mock.MockFactory = mock_factory
+
+    return device_registry
+
+def measureApply(device_registry, repeats, is_parallel):
+    filters_count = len(device_registry.getDevice(device_registry.getDeviceNames()[0]).filters)
+    durations = []
+    failed_changes = 0
+
+    for repeat_number in range(repeats):
+        # Every change switches both the filter and the LNA
+        filter_number = repeat_number % filters_count + 1
+        lna_state = bool(repeat_number % 2)
+
+        start_time = time.perf_counter_ns()
+        if is_parallel:
+            results = device_registry.applyState(filter_number, lna_state)
+        else:
+            results = {}
+            for device_name in device_registry.getDeviceNames():
+                results.update(device_registry.applyState(filter_number, lna_state, device_names=[device_name]))
+        durations.append(time.perf_counter_ns() - start_time)
+
+        failed_changes += sum(1 for is_successful in results.values() if not is_successful)
+
+    return numpy.asarray(durations) / 1e3, failed_changes
+
+def runBenchmark():
+    import ControlApplication
+    source_dir = os.path.dirname(os.path.abspath(ControlApplication.__file__))
+    failed_changes = 0
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(source_dir, application_dir)
+
+        print(f"{BENCHMARK_DEVICE}, filter + LNA change, expander pin write {EXPANDER_WRITE_TIME * 1e6:.0f} us")
+        print(f"{'Pins':>11} | {'Boards':>6} | {'Sequential p50 (us)':>19} | {'Parallel p50 (us)':>17} | "
+              f"{'Parallel p99 (us)':>17} | {'Speedup':>7}")
+
+        for pins_name, pin_class in [("MockFactory", None), ("Expander", createExpanderPinClass())]:
+            repeats = APPLY_REPEATS[pins_name]
+            for boards_count in BOARDS_COUNTS:
+                device_registry = createDeviceRegistry(application_dir, boards_count, pin_class)
+                try:
+                    sequential_durations, sequential_failed = measureApply(device_registry, repeats, False)
+                    parallel_durations, parallel_failed = measureApply(device_registry, repeats, True)
+                finally:
+                    device_registry.close()
+                failed_changes += sequential_failed + parallel_failed
+
+                sequential_p50 = numpy.percentile(sequential_durations, 50)
+                parallel_p50 = numpy.percentile(parallel_durations, 50)
+                print(f"{pins_name:>11} | {boards_count:>6} | {sequential_p50:>19.1f} | {parallel_p50:>17.1f} | "
+                      f"{numpy.percentile(parallel_durations, 99):>17.1f} | {sequential_p50 / parallel_p50:>6.1f}x")
+
+    if failed_changes:
+        print(f"FAILED CHANGES: {failed_changes}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,145 @@
+import ControlApplication
+import itertools
+import math
+import numpy
+import os
+import sys
+import tempfile
+import time
+from Benchmarks.BenchmarkSuite import copyCatalogs, loadBenchmarkCatalogs
+from Benchmarks.SyntheticCatalog import *
+from ControlApplication.Components import *
+from ControlApplication.FilterSetOptimizer import *
+
+# Usage: python -m Benchmarks.FilterSetOptimizerBenchmark
+# Choice of the board filters covering the target bands (FilterSetOptimizer):
+#   - the sets found in the shipped catalog and in a small synthetic catalog
+#     are compared with all combinations of the filters covering a band point
+#   - the search of the 6 filters in a large synthetic catalog is measured in
+#     the calling process and in the process pool (one worker per core, at
+#     least two)
+# Exits with code 1 if a found set covers fewer points or uses more filters
+# than the best combination, or if the pool finds another coverage.
+
+# (<CATALOG>, <BANDS>, <FILTERS>), the combinations are checked up to 3 filters
+CHECKED_CASES = [
+    ("shipped", "28-29.7 144-146 430-440 1240-1300", 3),
+    ("shipped", "1.8-2 3.5-3.8 7-7.2 14-14.35 21-21.45 28-29.7", 3),
+    ("synthetic", "50-500 1000-3000", 3),
+    ("synthetic", "10-30 144-146 430-440", 3)
+]
+CHECKED_SYNTHETIC_SIZE = 400
+LARGE_SYNTHETIC_SIZE = 20000
+LARGE_BANDS = "50-500 1000-3000"
+LARGE_FILTERS_COUNT = 6
+
+def loopCoverage(catalog, points):
+    # Bit sets of the points covered by each filter, every filter is checked at every point
+    columns = catalog.columns
+
+    def getRejection(index, frequency):
+        rejection = 0.0
+        for stopband in ("f3", "f4"):
+            if columns[f"stopband_{stopband}_low_mhz"][index] <= frequency <= columns[f"stopband_{stopband}_high_mhz"][index]:
+                rejection = max(rejection, float(numpy.nan_to_num(columns[f"rejection_{stopband}_db"][index])))
+        return rejection
+
+    masks = []
+    for index in range(len(catalog)):
+        mask = 0
+        for point_number, frequency in enumerate(points):
+            if not columns["passband_low_mhz"][index] <= frequency <= columns["passband_high_mhz"][index]:
+                continue
+            if any(columns[f"stopband_{stopband}_low_mhz"][index] <= frequency <= columns[f"stopband_{stopband}_high_mhz"][index]
+                   for stopband in ("f3", "f4")):
+                continue
+            if min(getRejection(index, frequency * harmonic) for harmonic in FilterSetOptimizer.HARMONICS) >= FilterSetOptimizer.MIN_REJECTION_DB:
+                mask |= 1 << point_number
+        if mask:
+            masks.append(mask)
+    return masks
+
+def bruteForce(masks, filters_count):
+    # (<COVERED POINTS>, <FILTERS>) of the best combination
+    best = (0, 0)
+    for combination_size in range(1, filters_count + 1):
+        for combination in itertools.combinations(masks, combination_size):
+            covered_mask = 0
+            for mask in combination:
+                covered_mask |= mask
+            best = max(best, (bin(covered_mask).count("1"), -combination_size))
+    return best[0], -best[1]
+
+def getCoveredPoints(filter_set):
+    return round(sum(filter_set.bands_coverage) * FilterSetOptimizer.POINTS_PER_BAND)
+
+def createSyntheticCatalog(models_dir, catalog_size):
+    createFilterDataFrame(catalog_size, 1).to_csv(os.path.join(models_dir, "Filters.csv"), index=False)
+    return ComponentsList(ComponentsList.FILTER, models_dir, "FiltersListDump.bin").data
+
+def measure(function):
+    start = time.perf_counter()
+    result = function()
+    return (time.perf_counter() - start) * 1e3, result
+
+def runBenchmark():
+    mismatches = 0
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(os.path.dirname(os.path.abspath(ControlApplication.__file__)), application_dir)
+        synthetic_dir = os.path.join(application_dir, "Synthetic")
+        os.makedirs(synthetic_dir)
+        catalogs = {
+            "shipped": loadBenchmarkCatalogs(application_dir)[0],
+            "synthetic": createSyntheticCatalog(synthetic_dir, CHECKED_SYNTHETIC_SIZE)
+        }
+
+        print(f"Sets of up to 3 filters compared with all combinations, {FilterSetOptimizer.POINTS_PER_BAND} points per band")
+        print(f"{'Catalog':>9} | {'Bands, MHz':>44} | {'Combinations':>12} | {'Brute force (ms)':>16} | "
+              f"{'Optimizer (ms)':>14} | {'Points':>9} | {'Filters':>7}")
+        for catalog_name, bands_text, filters_count in CHECKED_CASES:
+            catalog = catalogs[catalog_name]
+            bands = FilterSetOptimizer.parseBands(bands_text)
+            points = numpy.concatenate([numpy.linspace(low, high, FilterSetOptimizer.POINTS_PER_BAND) for low, high in bands])
+
+            masks = loopCoverage(catalog, points)
+            brute_force_time, (best_covered, best_filters_count) = measure(lambda: bruteForce(masks, filters_count))
+            optimizer_time, filter_set = measure(lambda: FilterSetOptimizer(catalog).optimize(bands, filters_count, max_workers=1))
+            covered = getCoveredPoints(filter_set)
+
+            combinations_count = sum(math.comb(len(masks), size) for size in range(1, filters_count + 1))
+            print(f"{catalog_name:>9} | {bands_text:>44} | {combinations_count:>12} | {brute_force_time:>16.0f} | "
+                  f"{optimizer_time:>14.1f} | {covered:>4}/{best_covered:<4} | {len(filter_set.model_numbers)}/{best_filters_count:<5}")
+            if covered != best_covered or len(filter_set.model_numbers) != best_filters_count:
+                print(f"MISMATCH: {catalog_name} {bands_text}: {covered} points with {len(filter_set.model_numbers)} filters, "
+                      f"best {best_covered} points with {best_filters_count} filters")
+                mismatches += 1
+
+        large_dir = os.path.join(application_dir, "Large")
+        os.makedirs(large_dir)
+        catalog = createSyntheticCatalog(large_dir, LARGE_SYNTHETIC_SIZE)
+        filter_set_optimizer = FilterSetOptimizer(catalog)
+        bands = FilterSetOptimizer.parseBands(LARGE_BANDS)
+        # The pool is measured with two workers at least, on one core it shows its overhead
+        workers_count = max(os.cpu_count() or 1, 2)
+
+        print(f"\n{LARGE_SYNTHETIC_SIZE} synthetic filters, bands {LARGE_BANDS} MHz, {LARGE_FILTERS_COUNT} filters, {os.cpu_count()} CPU cores")
+        print(f"{'Search':>22} | {'Time (ms)':>9} | {'Candidates':>10} | {'Searched':>8} | {'Sets of 6':>10} | {'Evaluated':>9} | {'Covered':>7}")
+        covered_points = []
+        for search_name, max_workers in [("calling process", 1), (f"pool, {workers_count} workers", workers_count)]:
+            search_time, filter_set = measure(lambda: filter_set_optimizer.optimize(bands, LARGE_FILTERS_COUNT, max_workers=max_workers))
+            covered_points.append(getCoveredPoints(filter_set))
+            print(f"{search_name:>22} | {search_time:>9.0f} | {filter_set.candidates_count:>10} | {filter_set.searched_count:>8} | "
+                  f"{math.comb(filter_set.searched_count, LARGE_FILTERS_COUNT):>10.2e} | {filter_set.evaluated_sets:>9} | "
+                  f"{filter_set.getCoverage() * 100:>6.1f}%")
+        if len(set(covered_points)) != 1:
+            print(f"MISMATCH: the process pool covers {covered_points[1]} points, the calling process {covered_points[0]}")
+            mismatches += 1
+
+    if mismatches:
+        print(f"MISMATCHES: {mismatches}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,67 @@
+import numpy
+import re
+import time
+from Benchmarks.SyntheticCatalog import *
+from ControlApplication.Components import *
+from ControlApplication.FrequencyIndex import *
+
+# Usage: python -m Benchmarks.FrequencyIndexBenchmark
+
+CATALOG_SIZES = [1000, 10000, 100000]
+QUERIES_COUNT = 2000
+# The loop over component objects is slow, it is measured on fewer queries
+OBJECT_SCAN_QUERIES_COUNT = 20
+HARMONICS = (2, 3)
+
+def linearScan(columns, frequency, harmonics):
+    # Vectorized evaluation of the whole catalog for a single query
+    def inStopband(point):
+        return (((columns["stopband_f3_low_mhz"] <= point) & (point <= columns["stopband_f3_high_mhz"])) |
+                ((columns["stopband_f4_low_mhz"] <= point) & (point <= columns["stopband_f4_high_mhz"])))
+
+    mask = (columns["passband_low_mhz"] <= frequency) & (frequency <= columns["passband_high_mhz"])
+    mask &= ~inStopband(frequency)
+    for harmonic in harmonics:
+        mask &= inStopband(frequency * harmonic)
+    return numpy.flatnonzero(mask)
+
+def objectScan(catalog, frequency):
+    # What band-planning scripts did before: a pass over every component object
+    # parsing the passband text (harmonics are not checked, the pass alone is slower)
+    found = []
+    for component in catalog:
+        range_parts = re.match(ComponentsCatalog.FREQUENCY_RANGE_PATTERN, str(component.passband_f1).replace(" ", ""))
+        if not range_parts or not range_parts["high"]:
+            continue
+        low = 0.0 if range_parts["low"] == "DC" else float(range_parts["low"])
+        if low <= frequency <= float(range_parts["high"]):
+            found.append(component)
+    return found
+
+def measure(function, queries):
+    start = time.perf_counter()
+    for frequency in queries:
+        function(frequency)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+def runBenchmark():
+    queries = 10 ** numpy.random.default_rng(1).uniform(0, 4, QUERIES_COUNT)
+
+    print(f"{'Catalog size':>12} | {'Build (ms)':>10} | {'Index (us)':>10} | {'Scan (us)':>10} | {'Objects (us)':>12} | {'Found':>7}")
+
+    for catalog_size in CATALOG_SIZES:
+        catalog = ComponentsCatalog.fromCsvColumns(ComponentsList.FILTER, createFilterDataFrame(catalog_size))
+
+        start = time.perf_counter()
+        frequency_index = FilterFrequencyIndex(catalog)
+        build_time = (time.perf_counter() - start) * 1e3
+
+        index_time = measure(lambda frequency: frequency_index.findFilters(frequency, HARMONICS), queries)
+        scan_time = measure(lambda frequency: linearScan(catalog.columns, frequency, HARMONICS), queries)
+        object_time = measure(lambda frequency: objectScan(catalog, frequency), queries[:OBJECT_SCAN_QUERIES_COUNT])
+        average_found = numpy.mean([len(frequency_index.findFilters(frequency, HARMONICS)) for frequency in queries])
+
+        print(f"{catalog_size:>12} | {build_time:>10.1f} | {index_time:>10.1f} | {scan_time:>10.1f} | {object_time:>12.0f} | {average_found:>7.1f}")
+
+if __name__ == "__main__":
+    runBenchmark()
@@ -0,0 +1,107 @@
+import mmap
+import numpy
+import os
+import sys
+import tempfile
+from ControlApplication.RFSwitch import *
+
+# Usage: python -m Benchmarks.GPIOBackendBenchmark
+# RF path switching latency and skew between the input and output switches
+# with the gpiozero backend (MockFactory) and the memory-mapped GPIO register
+# backend. A plain file stands in for /dev/gpiomem: after every activation
+# the GPSET0/GPCLR0 values written to the file are applied to the simulated
+# pin levels, which are checked against the truth table. Exits with code 1
+# if the pin levels do not match.
+
+ACTIVATIONS_COUNT = 5000
+FILTER_INPUT_SWITCH_GPIO_PINS = [17, 27, 22]
+FILTER_OUTPUT_SWITCH_GPIO_PINS = [0, 5, 6]
+
+class RegistersFile:
+    # The registers file seen by the benchmark, separately from the backend
+    def __init__(self, registers_path):
+        with open(registers_path, "wb") as registers_file:
+            registers_file.write(bytes(MemoryMappedGPIOBackend.MAP_SIZE))
+        with open(registers_path, "r+b") as registers_file:
+            self.registers_map = mmap.mmap(registers_file.fileno(), MemoryMappedGPIOBackend.MAP_SIZE)
+        self.registers = memoryview(self.registers_map).cast("I")
+        # Pins are initialized with HIGH
+        self.pin_levels = 0
+
+    def clearWrites(self):
+        self.registers[MemoryMappedGPIOBackend.GPSET0] = 0
+        self.registers[MemoryMappedGPIOBackend.GPCLR0] = 0
+
+    def applyWrites(self):
+        self.pin_levels |= self.registers[MemoryMappedGPIOBackend.GPSET0]
+        self.pin_levels &= ~self.registers[MemoryMappedGPIOBackend.GPCLR0]
+
+    def isOutput(self, gpio_number):
+        function_register = self.registers[MemoryMappedGPIOBackend.GPFSEL0 + gpio_number // 10]
+        return function_register >> (gpio_number % 10 * 3) & MemoryMappedGPIOBackend.FUNCTION_MASK == MemoryMappedGPIOBackend.FUNCTION_OUTPUT
+
+    def getPinsState(self, gpio_numbers):
+        return tuple(bool(self.pin_levels >> gpio_number & 1) for gpio_number in gpio_numbers)
+
+    def close(self):
+        self.registers.release()
+        self.registers_map.close()
+
+def measure(filter_switch, registers_file = None):
+    latencies = []
+    skews = []
+    wrong_states = 0
+
+    if registers_file:
+        registers_file.applyWrites()
+        gpio_numbers = FILTER_INPUT_SWITCH_GPIO_PINS + FILTER_OUTPUT_SWITCH_GPIO_PINS
+        wrong_states += sum(1 for gpio_number in gpio_numbers if not registers_file.isOutput(gpio_number))
+
+    for activation_number in range(ACTIVATIONS_COUNT):
+        # Every activation changes the RF path
+        rf_path_index = activation_number % 6 + 1
+        if registers_file:
+            registers_file.clearWrites()
+
+        filter_switch.enableFilter(rf_path_index)
+        latencies.append(filter_switch.last_switching_report.getLatency() / 1e3)
+        skews.append(filter_switch.last_switching_report.getSkew() / 1e3)
+
+        if registers_file:
+            registers_file.applyWrites()
+            expected_state = RFSwitch.SP6T_SWITCH_TRUTH_TABLE[rf_path_index]
+            for gpio_numbers in (FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS):
+                wrong_states += registers_file.getPinsState(gpio_numbers) != expected_state
+
+    return latencies, skews, wrong_states
+
+def formatPercentiles(values):
+    return f"{numpy.percentile(values, 50):>8.2f} | {numpy.percentile(values, 99):>8.2f}"
+
+def runBenchmark():
+    wrong_states = 0
+    print(f"{'Backend':>12} | {'p50 (us)':>8} | {'p99 (us)':>8} | {'Skew p50':>8} | {'Skew p99':>8} | {'Switches/s':>10}")
+
+    with tempfile.TemporaryDirectory() as registers_dir:
+        registers_file = RegistersFile(os.path.join(registers_dir, "gpiomem"))
+        gpio_backend = MemoryMappedGPIOBackend.getBackend(os.path.join(registers_dir, "gpiomem"))
+
+        for backend_name, backend, backend_registers_file in [("gpiozero", GPIOZeroBackend(True), None),
+                                                              ("Registers", gpio_backend, registers_file)]:
+            filter_switch = FilterSwitch(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS,
+                                         RFSwitch.SP6T_SWITCH_TRUTH_TABLE, True, gpio_backend=backend)
+            latencies, skews, backend_wrong_states = measure(filter_switch, backend_registers_file)
+            wrong_states += backend_wrong_states
+            print(f"{backend_name:>12} | {formatPercentiles(latencies)} | {formatPercentiles(skews)} | "
+                  f"{1e6 / numpy.mean(latencies):>10.0f}")
+
+        gpio_backend.close()
+        registers_file.close()
+
+    if wrong_states:
+        print(f"WRONG PIN STATES: {wrong_states}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,100 @@
+import ControlApplication
+import os
+import sys
+import tempfile
+import time
+from Benchmarks.BenchmarkSuite import BENCHMARK_DEVICE, copyCatalogs, loadBenchmarkCatalogs
+from ControlApplication.DeviceConfiguration import *
+from ControlApplication.HarmonicCoverage import *
+
+# Usage: python -m Benchmarks.HarmonicCoverageBenchmark
+# Harmonic coverage map of a 6 filter HF-UHF configuration from 0 to 1.5 GHz:
+# the sweep evaluating all filters at all points at once is compared with
+# a loop over the frequencies checking every filter at every point. Exits
+# with code 1 if both choose different filters or give different rejection.
+
+FILTER_MODEL_NUMBERS = ["SCLF-25+", "SXLP-90+", "RLP-176+", "LFCG-42+", "LFCG-800+", "LFCN-2600D+"]
+LNA_MODEL_NUMBERS = ["PHA-13LN+"]
+# Frequency steps in MHz, the loop is measured only on the coarse ones
+STEPS = [1, 0.1, 0.025]
+LOOP_STEPS = [1, 0.1]
+OPERATING_BANDS = [(28, 29.7), (144, 146), (430, 440), (1240, 1300)]
+
+def loopCoverage(device, frequencies, harmonics):
+    # What a per-frequency analysis does: every filter is checked at every point
+    filter_numbers, filters_catalog = device.getInstalledFilters()
+    columns = filters_catalog.columns
+
+    def getRejection(catalog_index, frequency):
+        rejection = 0.0
+        for stopband in ("f3", "f4"):
+            if (columns[f"stopband_{stopband}_low_mhz"][catalog_index] <= frequency <= columns[f"stopband_{stopband}_high_mhz"][catalog_index]):
+                rejection = max(rejection, float(numpy.nan_to_num(columns[f"rejection_{stopband}_db"][catalog_index])))
+        return rejection
+
+    chosen_filters = []
+    chosen_rejection = []
+    for frequency in frequencies:
+        best_filter = (Device.NO_FILTER, None)
+        best_score = -numpy.inf
+        for catalog_index, filter_number in enumerate(filter_numbers):
+            if frequency >= Device.FREQUENCY_TABLE_MAX_MHZ:
+                # Above the frequency table of the device
+                break
+            in_stopband = any(columns[f"stopband_{stopband}_low_mhz"][catalog_index] <= frequency <= columns[f"stopband_{stopband}_high_mhz"][catalog_index]
+                              for stopband in ("f3", "f4"))
+            if not (columns["passband_low_mhz"][catalog_index] <= frequency <= columns["passband_high_mhz"][catalog_index]) or in_stopband:
+                continue
+            table_rejection = [getRejection(catalog_index, frequency * harmonic) for harmonic in Device.FREQUENCY_TABLE_HARMONICS]
+            score = min(table_rejection) * 1000 + sum(table_rejection)
+            if score > best_score:
+                best_score = score
+                best_filter = (filter_number, catalog_index)
+
+        filter_number, catalog_index = best_filter
+        chosen_filters.append(filter_number)
+        chosen_rejection.append([numpy.nan if catalog_index is None else getRejection(catalog_index, frequency * harmonic) 
+                                 for harmonic in harmonics])
+    return numpy.array(chosen_filters), numpy.array(chosen_rejection).T
+
+def runBenchmark():
+    mismatches = 0
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(os.path.dirname(os.path.abspath(ControlApplication.__file__)), application_dir)
+        filters_catalog, amplifiers_catalog = loadBenchmarkCatalogs(application_dir)
+        device = DeviceConfiguration("coverage", BENCHMARK_DEVICE, FILTER_MODEL_NUMBERS, LNA_MODEL_NUMBERS).createDevice(
+            filters_catalog, amplifiers_catalog)
+
+        print(f"{BENCHMARK_DEVICE}: {', '.join(FILTER_MODEL_NUMBERS)}, 0 - {HarmonicCoverage.MAX_FREQUENCY_MHZ} MHz")
+        print(f"{'Step (MHz)':>10} | {'Points':>7} | {'Loop (ms)':>9} | {'Vectorized (ms)':>15} | {'Speedup':>7} | {'Bands':>5} | {'Gaps':>4}")
+
+        for step in STEPS:
+            start = time.perf_counter()
+            harmonic_coverage = HarmonicCoverage(device, resolution=1 / step)
+            vectorized_time = (time.perf_counter() - start) * 1e3
+
+            if step in LOOP_STEPS:
+                start = time.perf_counter()
+                loop_filters, loop_rejection = loopCoverage(device, harmonic_coverage.frequencies, harmonic_coverage.harmonics)
+                loop_time = (time.perf_counter() - start) * 1e3
+                if (not numpy.array_equal(loop_filters, harmonic_coverage.filter_numbers) or
+                    not numpy.array_equal(loop_rejection, harmonic_coverage.harmonics_rejection, equal_nan=True)):
+                    print(f"MISMATCH: step {step} MHz")
+                    mismatches += 1
+                loop_columns = f"{loop_time:>9.0f} | {vectorized_time:>15.1f} | {loop_time / vectorized_time:>6.0f}x"
+            else:
+                loop_columns = f"{'-':>9} | {vectorized_time:>15.1f} | {'-':>7}"
+
+            print(f"{step:>10g} | {len(harmonic_coverage.frequencies):>7} | {loop_columns} | "
+                  f"{len(harmonic_coverage.bands):>5} | {len(harmonic_coverage.getGaps()):>4}")
+
+        print(harmonic_coverage.getSummary(OPERATING_BANDS))
+
+    if mismatches:
+        print(f"MISMATCHES: {mismatches}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,141 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from Benchmarks.SyntheticCatalog import *
+from ControlApplication.CatalogWatcher import *
+from ControlApplication.Components import *
+
+# Usage: python -m Benchmarks.IncrementalCatalogBenchmark
+# Catalog ingestion on a directory of synthetic vendor exports:
+#   - a new or changed .csv file merged into the existing dump compared
+#     with the full rebuild that was done before
+#   - peak memory of a large .csv file parsed in chunks compared with the
+#     whole file read into one DataFrame
+#   - time from a new .csv file appearing in the directory to the catalog
+#     update by CatalogWatcher
+# Exits with code 1 if the merged catalog differs from the rebuilt one.
+
+FILES_COUNT = 10
+FILE_ROWS = 20000
+LARGE_FILE_ROWS = 200000
+DUMP_FILENAME = "FiltersListDump.bin"
+WATCH_TIMEOUT = 10
+
+def measure(function):
+    start = time.perf_counter()
+    result = function()
+    return (time.perf_counter() - start) * 1e3, result
+
+def writeCsvFile(models_dir, filename, rows_count, seed):
+    data_frame = createFilterDataFrame(rows_count, seed)
+    # Model numbers are unique across the files
+    data_frame["Model Number"] = data_frame["Model Number"].str.replace("SYN-", f"SYN-{seed}-", regex=False)
+    # The file appears in the directory at once, as a copied vendor export
+    temporary_path = os.path.join(models_dir, f"{filename}.part")
+    data_frame.to_csv(temporary_path, index=False)
+    os.replace(temporary_path, os.path.join(models_dir, filename))
+
+def rebuild(models_dir):
+    os.remove(os.path.join(models_dir, DUMP_FILENAME))
+    return ComponentsList(ComponentsList.FILTER, models_dir, DUMP_FILENAME)
+
+def getSortedRows(catalog):
+    # Catalog rows in the model number order, the merged catalog keeps the order of the unchanged files
+    order = numpy.argsort(numpy.array(list(catalog.columns["model_number"]), dtype=str))
+    return ([str(catalog.columns["model_number"][index]) for index in order],
+            catalog.categories["case_style"][catalog.columns["case_style"][order]].tolist(),
+            catalog.columns["passband_high_mhz"][order])
+
+def isSameCatalog(first_catalog, second_catalog):
+    first_model_numbers, first_case_styles, first_frequencies = getSortedRows(first_catalog)
+    second_model_numbers, second_case_styles, second_frequencies = getSortedRows(second_catalog)
+    return (first_model_numbers == second_model_numbers and first_case_styles == second_case_styles and
+            numpy.array_equal(first_frequencies, second_frequencies, equal_nan=True))
+
+def measurePeakMemory(models_dir, chunk_rows):
+    # Peak of the memory allocated while the catalog is built, MB
+    ComponentsList.CSV_CHUNK_ROWS = chunk_rows
+    dump_file_path = os.path.join(models_dir, DUMP_FILENAME)
+    if os.path.exists(dump_file_path):
+        os.remove(dump_file_path)
+
+    tracemalloc.start()
+    try:
+        ComponentsList(ComponentsList.FILTER, models_dir, DUMP_FILENAME)
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+def measureHotReload(models_dir):
+    components_list = ComponentsList(ComponentsList.FILTER, models_dir, DUMP_FILENAME)
+    catalog_watcher = CatalogWatcher([components_list]).start()
+    watch_mode = "inotify" if catalog_watcher.inotify_fd is not None else "polling"
+    catalog = components_list.data
+
+    # The file is moved to the directory at the end of writeCsvFile
+    writeCsvFile(models_dir, "Filters_Watched.csv", FILE_ROWS, FILES_COUNT + 2)
+    start = time.perf_counter()
+    while components_list.data is catalog and time.perf_counter() - start < WATCH_TIMEOUT:
+        time.sleep(0.005)
+    reload_time = (time.perf_counter() - start) * 1e3
+    catalog_watcher.stop()
+
+    if components_list.data is catalog:
+        return watch_mode, None, len(catalog)
+    return watch_mode, reload_time, len(components_list.data)
+
+def runBenchmark():
+    mismatches = 0
+
+    with tempfile.TemporaryDirectory() as models_dir:
+        for file_number in range(FILES_COUNT):
+            writeCsvFile(models_dir, f"Filters_{file_number:02d}.csv", FILE_ROWS, file_number)
+
+        print(f"{FILES_COUNT} .csv files x {FILE_ROWS} filters")
+        print(f"{'Change':>28} | {'Full rebuild (ms)':>17} | {'Incremental (ms)':>16} | {'Components':>10}")
+
+        cold_time, _ = measure(lambda: ComponentsList(ComponentsList.FILTER, models_dir, DUMP_FILENAME))
+        warm_time, components_list = measure(lambda: ComponentsList(ComponentsList.FILTER, models_dir, DUMP_FILENAME))
+        print(f"{'none (dump up to date)':>28} | {cold_time:>17.0f} | {warm_time:>16.1f} | {len(components_list.data):>10}")
+
+        changes = [
+            ("new file", lambda: writeCsvFile(models_dir, "Filters_New.csv", FILE_ROWS, FILES_COUNT)),
+            ("changed file", lambda: writeCsvFile(models_dir, "Filters_03.csv", FILE_ROWS // 2, FILES_COUNT + 1)),
+            ("removed file", lambda: os.remove(os.path.join(models_dir, "Filters_05.csv")))
+        ]
+        for change_name, applyChange in changes:
+            applyChange()
+            incremental_time, components_list = measure(lambda: ComponentsList(ComponentsList.FILTER, models_dir, DUMP_FILENAME))
+            rebuild_time, rebuilt_list = measure(lambda: rebuild(models_dir))
+            if not isSameCatalog(components_list.data, rebuilt_list.data):
+                print(f"MISMATCH: {change_name}")
+                mismatches += 1
+            print(f"{change_name:>28} | {rebuild_time:>17.0f} | {incremental_time:>16.0f} | {len(components_list.data):>10}")
+
+        watch_mode, reload_time, components_count = measureHotReload(models_dir)
+        if reload_time is None:
+            print(f"MISMATCH: new file not picked up by CatalogWatcher ({watch_mode})")
+            mismatches += 1
+        else:
+            print(f"{'CatalogWatcher (' + watch_mode + ')':>28} | {'-':>17} | {reload_time:>16.0f} | {components_count:>10}")
+
+    with tempfile.TemporaryDirectory() as models_dir:
+        writeCsvFile(models_dir, "Filters_Large.csv", LARGE_FILE_ROWS, 0)
+        chunk_rows = ComponentsList.CSV_CHUNK_ROWS
+        whole_file_memory = measurePeakMemory(models_dir, LARGE_FILE_ROWS)
+        chunked_memory = measurePeakMemory(models_dir, chunk_rows)
+        ComponentsList.CSV_CHUNK_ROWS = chunk_rows
+
+        print(f"\n{LARGE_FILE_ROWS} filters in one .csv file ({os.path.getsize(os.path.join(models_dir, 'Filters_Large.csv')) / 1024 / 1024:.0f} MB)")
+        print(f"{'Whole file, peak (MB)':>28} | {whole_file_memory:>8.0f}")
+        print(f"{f'Chunks of {chunk_rows} rows, peak (MB)':>28} | {chunked_memory:>8.0f}")
+
+    if mismatches:
+        print(f"MISMATCHES: {mismatches}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,159 @@
+import numpy
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from ControlApplication.Metrics import *
+from ControlApplication.RFSwitch import *
+
+# Usage: python -m Benchmarks.MetricsBenchmark
+# Runtime metrics (MetricsRegistry) on the simulated GPIO (MockFactory):
+#   - filter switching latency with the metrics recorded and with the
+#     recording replaced by a no-op
+#   - counter increments per second from several threads: values added to
+#     per-thread shards compared with one registry lock per increment
+#   - the exported switch counters are compared with the activations done,
+#     the text served at /metrics and written to the metrics file with the
+#     text of the registry
+# Exits with code 1 if an exported value differs from the expected one.
+
+ACTIVATIONS_COUNT = 5000
+# Activations of the already active filter and failed activations
+REDUNDANT_ACTIVATIONS_COUNT = 300
+FAILED_ACTIVATIONS_COUNT = 20
+RECORDING_THREADS_COUNT = 4
+THREAD_INCREMENTS_COUNT = 200000
+FILTER_INPUT_SWITCH_GPIO_PINS = [17, 27, 22]
+FILTER_OUTPUT_SWITCH_GPIO_PINS = [0, 5, 6]
+
+class NoMetrics:
+    def incrementCounter(self, *args):
+        pass
+
+    def observe(self, *args):
+        pass
+
+class LockedCounters:
+    # Every increment takes the lock of the registry
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def incrementCounter(self, metric_name, labels = (), value = 1):
+        with self.lock:
+            metric_key = (metric_name, labels)
+            self.values[metric_key] = self.values.get(metric_key, 0) + value
+
+def setMetrics(filter_switch, metrics):
+    filter_switch.metrics = metrics
+    filter_switch.input_switch.metrics = metrics
+    filter_switch.output_switch.metrics = metrics
+
+def measureSwitching(filter_switch):
+    latencies = []
+    for activation_number in range(ACTIVATIONS_COUNT):
+        # Every activation changes the RF path
+        start_time = time.perf_counter_ns()
+        filter_switch.enableFilter(activation_number % 6 + 1)
+        latencies.append((time.perf_counter_ns() - start_time) / 1e3)
+    return latencies
+
+def measureRecording(metrics):
+    labels = (("gpio", "17,27,22"), ("rf_output", "1"))
+
+    def recordValues():
+        for _ in range(THREAD_INCREMENTS_COUNT):
+            metrics.incrementCounter("rpitx_rf_switch_activations_total", labels)
+
+    recording_threads = [threading.Thread(target=recordValues) for _ in range(RECORDING_THREADS_COUNT)]
+    start_time = time.perf_counter()
+    for recording_thread in recording_threads:
+        recording_thread.start()
+    for recording_thread in recording_threads:
+        recording_thread.join()
+    return RECORDING_THREADS_COUNT * THREAD_INCREMENTS_COUNT / (time.perf_counter() - start_time)
+
+def failWrites(*args):
+    raise OSError("GPIO write failed")
+
+def getValue(metrics_text, sample_name):
+    for line in metrics_text.splitlines():
+        if line.startswith(sample_name + " "):
+            return float(line.split()[-1])
+    return None
+
+def runBenchmark():
+    mismatches = 0
+    filter_switch = FilterSwitch(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS, RFSwitch.SP6T_SWITCH_TRUTH_TABLE, True)
+    metrics = MetricsRegistry.getRegistry()
+    # Transitions are compiled and the code is warmed up before the measurements
+    setMetrics(filter_switch, NoMetrics())
+    measureSwitching(filter_switch)
+
+    print(f"{ACTIVATIONS_COUNT} filter activations")
+    print(f"{'Metrics':>12} | {'p50 (us)':>8} | {'p99 (us)':>8}")
+    for metrics_name, switch_metrics in [("not recorded", NoMetrics()), ("recorded", metrics)]:
+        setMetrics(filter_switch, switch_metrics)
+        latencies = measureSwitching(filter_switch)
+        print(f"{metrics_name:>12} | {numpy.percentile(latencies, 50):>8.1f} | {numpy.percentile(latencies, 99):>8.1f}")
+
+    print(f"\nCounter increments from {RECORDING_THREADS_COUNT} threads, {os.cpu_count()} CPU cores")
+    print(f"{'Recording':>20} | {'Increments/s':>12}")
+    for recording_name, recording_metrics in [("registry lock", LockedCounters()), ("per-thread shards", MetricsRegistry())]:
+        print(f"{recording_name:>20} | {measureRecording(recording_metrics):>12.0f}")
+
+    # Recorded values: ACTIVATIONS_COUNT switches through the RF paths 1..6
+    # in turn, then the redundant and the failed activations
+    last_rf_path = (ACTIVATIONS_COUNT - 1) % 6 + 1
+    for _ in range(REDUNDANT_ACTIVATIONS_COUNT):
+        filter_switch.enableFilter(last_rf_path)
+    filter_switch.gpio_backend.applyWrites = failWrites
+    for activation_number in range(FAILED_ACTIVATIONS_COUNT):
+        filter_switch.enableFilter(activation_number % 6 + 1)
+    del filter_switch.gpio_backend.applyWrites
+
+    metrics_text = metrics.getPrometheusText()
+    input_gpio = ",".join(str(gpio_number) for gpio_number in FILTER_INPUT_SWITCH_GPIO_PINS)
+    expected_values = {
+        f'rpitx_rf_path_switch_latency_seconds_count{{switch="filter",gpio="{input_gpio}"}}': ACTIVATIONS_COUNT,
+        f'rpitx_rf_path_switches_total{{switch="filter",gpio="{input_gpio}",rf_path="1"}}': len(range(0, ACTIVATIONS_COUNT, 6)),
+        f'rpitx_rf_switch_activations_total{{gpio="{input_gpio}",rf_output="{last_rf_path}"}}': len(range(last_rf_path - 1, ACTIVATIONS_COUNT, 6)),
+        f'rpitx_rf_switch_redundant_activations_total{{gpio="{input_gpio}"}}': REDUNDANT_ACTIVATIONS_COUNT,
+        f'rpitx_rf_switch_failed_activations_total{{gpio="{input_gpio}"}}': FAILED_ACTIVATIONS_COUNT
+    }
+    print(f"\n{'Exported value':>90} | {'Value':>6} | {'Expected':>8}")
+    for sample_name, expected_value in expected_values.items():
+        value = getValue(metrics_text, sample_name)
+        print(f"{sample_name:>90} | {value if value is None else int(value):>6} | {expected_value:>8}")
+        if value != expected_value:
+            print(f"MISMATCH: {sample_name}")
+            mismatches += 1
+
+    # The registry is not changed while the exported texts are compared
+    metrics_server = MetricsServer(0).start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{metrics_server.port}/metrics", timeout=5) as response:
+            served_text = response.read().decode("utf-8")
+    finally:
+        metrics_server.stop()
+    with tempfile.TemporaryDirectory() as metrics_dir:
+        metrics_file_writer = MetricsFileWriter(os.path.join(metrics_dir, "rpitx.prom"))
+        metrics_file_writer.write()
+        with open(metrics_file_writer.file_path) as metrics_file:
+            written_text = metrics_file.read()
+    for export_name, exported_text in [("/metrics", served_text), ("metrics file", written_text)]:
+        if exported_text != metrics_text:
+            print(f"MISMATCH: {export_name} differs from the registry")
+            mismatches += 1
+    filter_switch.input_switch.release()
+    filter_switch.output_switch.release()
+
+    if mismatches:
+        print(f"MISMATCHES: {mismatches}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,79 @@
+import math
+import sys
+import time
+from Benchmarks.SyntheticCatalog import *
+from ControlApplication.Components import *
+from ControlApplication.ParametricQuery import *
+
+# Usage: python -m Benchmarks.ParametricQueryBenchmark
+# Parametric amplifier queries on synthetic catalogs: the vectorized
+# evaluation over the catalog columns is compared with a loop over one
+# record (dict of parameters) per component. Exits with code 1 if both
+# find different components in a different order.
+
+CATALOG_SIZES = [1000, 10000, 100000]
+QUERIES = [
+    "nf<1 gain>15 430mhz current<60 sort:-oip3",
+    "p1db>=20 vswr_in<1.5 sort:nf",
+    "144-146mhz sort:nf sort:-gain",
+    "voltage=5 current<100"
+]
+QUERY_REPEATS = 20
+# The loop is slow, it is measured on fewer repeats
+LOOP_REPEATS = 2
+
+def measure(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = function()
+    return (time.perf_counter() - start) / repeats * 1e3, result
+
+def loopQuery(records, parametric_query):
+    # What a per-component filter does: every condition is checked on every record
+    comparisons = {
+        "<": lambda a, b: a < b, "<=": lambda a, b: a <= b, ">": lambda a, b: a > b,
+        ">=": lambda a, b: a >= b, "=": lambda a, b: a == b
+    }
+    found_indexes = []
+    for index, record in enumerate(records):
+        if not all(comparisons[operator](record[column_name], value) for column_name, operator, value in parametric_query.conditions):
+            continue
+        if not all(record["f_low_mhz"] <= low and record["f_high_mhz"] >= high for low, high in parametric_query.frequency_ranges):
+            continue
+        found_indexes.append(index)
+
+    # Stable sorts from the last key to the primary one, unknown values last
+    for column_name, descending in reversed(parametric_query.sort_keys):
+        found_indexes.sort(key=lambda index: (math.isnan(records[index][column_name]), 
+                                              -records[index][column_name] if descending else records[index][column_name]))
+    return found_indexes
+
+def runBenchmark():
+    mismatches = 0
+    print(f"{'Catalog size':>12} | {'Query':>42} | {'Loop (ms)':>9} | {'Vectorized (ms)':>15} | {'Speedup':>7} | {'Found':>6}")
+
+    for catalog_size in CATALOG_SIZES:
+        catalog = ComponentsCatalog.fromCsvColumns(ComponentsList.AMPLIFIER, createAmplifierDataFrame(catalog_size))
+        numeric_columns = [column_name for column_name, column in catalog.columns.items() 
+                           if column.dtype.kind == "f"]
+        records = [{column_name: float(catalog.columns[column_name][index]) for column_name in numeric_columns}
+                   for index in range(catalog_size)]
+
+        for query in QUERIES:
+            parametric_query = ParametricQuery.parse(query, catalog.model_type)
+            loop_time, loop_indexes = measure(lambda: loopQuery(records, parametric_query), LOOP_REPEATS)
+            vectorized_time, found_indexes = measure(lambda: catalog.query(parametric_query), QUERY_REPEATS)
+            if found_indexes != loop_indexes:
+                print(f"MISMATCH: {query}")
+                mismatches += 1
+
+            print(f"{catalog_size:>12} | {query:>42} | {loop_time:>9.1f} | {vectorized_time:>15.2f} | "
+                  f"{loop_time / vectorized_time:>6.0f}x | {len(found_indexes):>6}")
+
+    if mismatches:
+        print(f"MISMATCHES: {mismatches}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,82 @@
+import numpy
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from Benchmarks.BenchmarkSuite import copyCatalogs, createBenchmarkDevice
+from ControlApplication.DeviceConfiguration import *
+
+# Usage: python -m Benchmarks.ProcessWrapperBenchmark
+# Overhead of "rpitx-control run" over a direct launch of the transmitter on
+# the simulated GPIO (MockFactory). A shell script stands in for sendiq and
+# prints its arguments. The filter is switched by the running daemon or by
+# the wrapper itself (--config). Exits with code 1 if the stand-in was not
+# started with the expected arguments.
+
+LAUNCHES_COUNT = 20
+TRANSMITTER_ARGUMENTS = ["-f", "145.5e6", "-s", "48000", "-t", "float", "-i", "iq.bin"]
+
+FAKE_TRANSMITTER = """#!/bin/sh
+echo "sendiq $@"
+"""
+
+def measureLaunches(command, environment):
+    durations = []
+    for _ in range(LAUNCHES_COUNT):
+        start_time = time.perf_counter_ns()
+        result = subprocess.run(command, env=environment, capture_output=True, text=True)
+        durations.append(time.perf_counter_ns() - start_time)
+        if result.returncode != 0 or result.stdout.strip() != " ".join(["sendiq"] + TRANSMITTER_ARGUMENTS):
+            raise RuntimeError(f"Unexpected result of {command}: {result.stdout}{result.stderr}")
+    return numpy.median(durations) / 1e6
+
+def runBenchmark():
+    import ControlApplication
+    source_dir = os.path.dirname(os.path.abspath(ControlApplication.__file__))
+    repository_dir = os.path.dirname(source_dir)
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(source_dir, application_dir)
+        configuration_path = DeviceConfiguration.fromDevice(createBenchmarkDevice(application_dir), "benchmark").save(application_dir)
+
+        transmitter_path = os.path.join(application_dir, "sendiq")
+        with open(transmitter_path, "w") as transmitter_file:
+            transmitter_file.write(FAKE_TRANSMITTER)
+        os.chmod(transmitter_path, 0o755)
+
+        environment = dict(os.environ, PATH=f"{application_dir}{os.pathsep}{os.environ['PATH']}",
+                           PYTHONPATH=repository_dir)
+        socket_path = os.path.join(application_dir, "rpitx-control.sock")
+        application = [sys.executable, "-m", "ControlApplication.main"]
+
+        daemon = subprocess.Popen(application + ["daemon", configuration_path, "--socket", socket_path], env=environment)
+        try:
+            while not os.path.exists(socket_path):
+                if daemon.poll() is not None:
+                    raise RuntimeError("rpitx-control daemon has not started")
+                time.sleep(0.01)
+
+            python_startup = measureLaunches([sys.executable, "-c", "import subprocess, sys; "
+                                              "sys.exit(subprocess.run(sys.argv[1:]).returncode)", "sendiq"] + TRANSMITTER_ARGUMENTS,
+                                             environment)
+            launches = [
+                ("Direct", measureLaunches(["sendiq"] + TRANSMITTER_ARGUMENTS, environment)),
+                ("Python only", python_startup),
+                ("Via daemon", measureLaunches(application + ["run", "--socket", socket_path, "--", "sendiq"] + TRANSMITTER_ARGUMENTS,
+                                               environment)),
+                ("--config", measureLaunches(application + ["run", "--config", configuration_path, "--", "sendiq"] + TRANSMITTER_ARGUMENTS,
+                                             environment))
+            ]
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    direct_launch = launches[0][1]
+    print(f"{'Launch':>12} | {'Median (ms)':>11} | {'Overhead (ms)':>13}")
+    for launch_name, duration in launches:
+        print(f"{launch_name:>12} | {duration:>11.1f} | {duration - direct_launch:>13.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+from Benchmarks.BenchmarkSuite import BENCHMARK_DEVICE, copyCatalogs, createBenchmarkDevice
+from ControlApplication.Scheduler import *
+
+# Usage: python -m Benchmarks.SchedulerBenchmark
+# Jitter of the frequency-hopping schedule executor on the simulated GPIO
+# (MockFactory): the timing loop that only sleeps until the step is compared
+# with the loop that sleeps and then polls the clock for the last
+# SPIN_THRESHOLD_NS. Exits with code 1 if any of the steps fails.
+
+STEPS_COUNT = 500
+STEP_INTERVAL = 0.004
+FILTER_INPUT_SWITCH_GPIO_PINS = [17, 27, 22]
+FILTER_OUTPUT_SWITCH_GPIO_PINS = [0, 5, 6]
+LNA_INPUT_SWITCH_GPIO_PINS = [23, 24]
+LNA_OUTPUT_SWITCH_GPIO_PINS = [16, 26]
+
+def createSchedule(device):
+    filters_count = len(device.filters)
+    schedule_lines = []
+    for step_number in range(STEPS_COUNT):
+        lna_state = "on" if step_number % 2 else "off"
+        # The first step is not counted from the moment the thread is started
+        schedule_lines.append(f"{(step_number + 1) * STEP_INTERVAL:.6f} filter {step_number % filters_count + 1} lna {lna_state}")
+    return HoppingScheduler.parseSchedule(schedule_lines, device)
+
+def runBenchmark():
+    import ControlApplication
+    source_dir = os.path.dirname(os.path.abspath(ControlApplication.__file__))
+    failed_steps = 0
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(source_dir, application_dir)
+        device = createBenchmarkDevice(application_dir)
+        device.initFilterRFSwitches(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS, True)
+        device.initLNA(LNA_INPUT_SWITCH_GPIO_PINS, LNA_OUTPUT_SWITCH_GPIO_PINS, True)
+        steps = createSchedule(device)
+
+        print(f"{BENCHMARK_DEVICE}, {STEPS_COUNT} steps every {STEP_INTERVAL * 1e3:.0f} ms")
+        print(f"{'Timing loop':>12} | {'p50 (us)':>8} | {'p90 (us)':>8} | {'p99 (us)':>8} | {'max (us)':>8} | {'Realtime':>8}")
+
+        for loop_name, spin_threshold in [("Sleep", 0), ("Sleep+spin", HoppingScheduler.SPIN_THRESHOLD_NS)]:
+            scheduler = HoppingScheduler(device, steps)
+            scheduler.SPIN_THRESHOLD_NS = spin_threshold
+            schedule_report = scheduler.run()
+            failed_steps += schedule_report.getFailedStepsCount()
+
+            jitter = schedule_report.getJitterStatistics()
+            print(f"{loop_name:>12} | {jitter['p50_us']:>8.1f} | {jitter['p90_us']:>8.1f} | {jitter['p99_us']:>8.1f} | "
+                  f"{jitter['max_us']:>8.1f} | {'yes' if schedule_report.is_realtime_priority else 'no':>8}")
+
+    if failed_steps:
+        print(f"FAILED STEPS: {failed_steps}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
@@ -0,0 +1,113 @@
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from Benchmarks.WhiptailStub import *
+
+# Usage: python -m Benchmarks.StartupBenchmark
+# Measures the application startup up to the first menu (whiptail is replaced
+# with a stub) for the cold path (catalogs are built from the .csv files) and
+# the warm path (catalogs are loaded from the dumps). Exits with code 1 if
+# one of the thresholds below is exceeded.
+
+# <PATH> : (<STARTUP TIME LIMIT, MS>, <PEAK RSS LIMIT, MB>)
+THRESHOLDS = {
+    "cold": (3000, 150),
+    "warm": (1000, 60)
+}
+# Modules that must not be imported before the first menu on the warm path
+WARM_PATH_FORBIDDEN_MODULES = ["pandas", "colorama", "gpiozero"]
+# Modules whose import time is reported
+REPORTED_MODULES = ["numpy", "pandas", "gpiozero", "colorama", "ControlApplication.main"]
+
+def runApplication(application_dir):
+    # Child process: start the application on copies of the catalogs
+    start = time.perf_counter()
+    installWhiptailStub()
+
+    import ControlApplication.main as application
+    application.FILTER_MODELS_DIR = os.path.join(application_dir, "FiltersList")
+    application.AMPLIFIER_MODELS_DIR = os.path.join(application_dir, "AmplifiersList")
+    # No board is resumed, the application starts with the first menu
+    application.SWITCH_STATE_DIR = os.path.join(application_dir, "SwitchState")
+    application.LOG_FILENAME = os.path.join(application_dir, "DebugInfo.log") if application.LOG_FILENAME else None
+    application.UI_BACKEND = application.WhiptailBackend.NAME
+
+    try:
+        application.main([])
+    except FirstMenuReached:
+        pass
+
+    print(json.dumps({
+        "startup_time_ms": (time.perf_counter() - start) * 1e3,
+        # ru_maxrss is reported in KB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "loaded_modules": [module for module in WARM_PATH_FORBIDDEN_MODULES if module in sys.modules]
+    }))
+
+def parseImportTime(import_time_log):
+    # Cumulative import time (ms) of the top-level imports from the -X importtime output
+    import_times = {}
+    for line in import_time_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_time, module_name = line.split("|")
+        module_name = module_name.rstrip()
+        if module_name.strip() in REPORTED_MODULES and module_name.strip() not in import_times:
+            import_times[module_name.strip()] = int(cumulative_time) / 1e3
+    return import_times
+
+def measureStartup(application_dir):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "Benchmarks.StartupBenchmark", "--child", application_dir],
+        capture_output=True, text=True, check=True
+    )
+    measurement = json.loads(result.stdout.strip().splitlines()[-1])
+    measurement["import_time_ms"] = parseImportTime(result.stderr)
+    return measurement
+
+def checkThresholds(path_name, measurement):
+    time_limit, rss_limit = THRESHOLDS[path_name]
+    errors = []
+
+    if measurement["startup_time_ms"] > time_limit:
+        errors.append(f"{path_name}: startup time {measurement['startup_time_ms']:.0f} ms > {time_limit} ms")
+    if measurement["peak_rss_mb"] > rss_limit:
+        errors.append(f"{path_name}: peak RSS {measurement['peak_rss_mb']:.1f} MB > {rss_limit} MB")
+    if path_name == "warm" and measurement["loaded_modules"]:
+        errors.append(f"{path_name}: modules loaded before the first menu: {measurement['loaded_modules']}")
+
+    return errors
+
+def runBenchmark():
+    import ControlApplication
+    source_dir = os.path.dirname(os.path.abspath(ControlApplication.__file__))
+    errors = []
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        for models_subdir in ("FiltersList", "AmplifiersList"):
+            shutil.copytree(os.path.join(source_dir, models_subdir), os.path.join(application_dir, models_subdir))
+
+        # The first run builds the dumps, the second one uses them
+        for path_name in ("cold", "warm"):
+            measurement = measureStartup(application_dir)
+            errors += checkThresholds(path_name, measurement)
+
+            import_times = ", ".join(f"{module} {import_time:.0f} ms" for module, import_time in measurement["import_time_ms"].items())
+            print(f"{path_name:>5}: startup {measurement['startup_time_ms']:.0f} ms, peak RSS {measurement['peak_rss_mb']:.1f} MB, "
+                  f"modules {measurement['loaded_modules']}\n       imports: {import_times}")
+
+    for error in errors:
+        print(f"THRESHOLD EXCEEDED: {error}")
+
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        runApplication(sys.argv[2])
+    else:
+        sys.exit(runBenchmark())
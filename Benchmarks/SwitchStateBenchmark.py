@@ -0,0 +1,139 @@
+import ControlApplication
+import json
+import numpy
+import os
+import sys
+import tempfile
+import time
+from Benchmarks.BenchmarkSuite import BENCHMARK_DEVICE, copyCatalogs, createBenchmarkDevice
+from Benchmarks.WhiptailStub import *
+
+# Usage: python -m Benchmarks.SwitchStateBenchmark
+# Persisted filter and LNA state (SwitchStateStore) on the simulated GPIO:
+#   - the board used last is resumed without dialogs, the pins are checked
+#     to be created in the saved state: the state of each pin changes once,
+#     the RF path is not switched through the default (all HIGH) state as
+#     it was with the RF path activated after the initialization
+#   - filter switching latency with and without the state saved on each
+#     change (the file is written and synced before the switching returns)
+# Exits with code 1 if the resumed state or the saved file is not the last
+# applied state, or if a pin passes through another state.
+
+CONFIGURATION_NAME = "resume"
+SAVED_FILTER = 4
+SWITCHING_ACTIVATIONS_COUNT = 5000
+
+def getPinStates(device):
+    # <GPIO NAME> : [<PIN STATES SINCE CREATION>], MockPin starts as a LOW input
+    pin_states = {}
+    for rf_switch_wrapper in (device.filter_switch, device.lna_switch):
+        for rf_switch in (rf_switch_wrapper.input_switch, rf_switch_wrapper.output_switch):
+            for output_device in rf_switch.switch_control:
+                pin_states[f"{output_device.pin}"] = [pin_state.state for pin_state in output_device.pin.states[1:]]
+    return pin_states
+
+def countIntermediateStates(pin_states, device):
+    # States of the pins other than the final state of the pin
+    intermediate_states = 0
+    for rf_switch_wrapper in (device.filter_switch, device.lna_switch):
+        for rf_switch in (rf_switch_wrapper.input_switch, rf_switch_wrapper.output_switch):
+            for output_device in rf_switch.switch_control:
+                intermediate_states += sum(state != output_device.value for state in pin_states[f"{output_device.pin}"])
+    return intermediate_states
+
+def measureSwitching(device):
+    latencies = []
+    for activation_number in range(SWITCHING_ACTIVATIONS_COUNT):
+        # Every activation changes the RF path
+        start_time = time.perf_counter_ns()
+        device.filter_switch.enableFilter(activation_number % 6 + 1)
+        latencies.append((time.perf_counter_ns() - start_time) / 1e3)
+    return latencies
+
+def runBenchmark():
+    mismatches = 0
+    installWhiptailStub()
+    import ControlApplication.main as application
+    import ControlApplication.UserInterface as user_interface_module
+    from ControlApplication.DeviceConfiguration import DeviceConfiguration
+    from ControlApplication.SwitchState import SwitchStateStore
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(os.path.dirname(os.path.abspath(ControlApplication.__file__)), application_dir)
+        application.FILTER_MODELS_DIR = os.path.join(application_dir, "FiltersList")
+        application.AMPLIFIER_MODELS_DIR = os.path.join(application_dir, "AmplifiersList")
+        application.SWITCH_STATE_DIR = os.path.join(application_dir, "SwitchState")
+        application.LOG_FILENAME = None
+        application.IS_MOCK_GPIO_USED = True
+        user_interface_module.CONFIGS_DIR = os.path.join(application_dir, "SavedConfiguration")
+        components_lists = application.loadComponentsLists()
+        filters_catalog, amplifiers_catalog = (components_list.data for components_list in components_lists)
+
+        DeviceConfiguration.fromDevice(createBenchmarkDevice(application_dir), CONFIGURATION_NAME).save(user_interface_module.CONFIGS_DIR)
+
+        # First run: the filter and the LNA are switched and saved
+        device = application.loadDevice(CONFIGURATION_NAME, components_lists)
+        device.filter_switch.enableFilter(SAVED_FILTER)
+        device.lna_switch.toggleLNA()
+        state_path = device.switch_state.state_path
+        device.releaseRFSwitches()
+
+        # Initialization used before: all pins HIGH, then the RF paths are activated
+        start_time = time.perf_counter_ns()
+        default_device = DeviceConfiguration.load(os.path.join(user_interface_module.CONFIGS_DIR, os.path.basename(state_path))).createDevice(
+            filters_catalog, amplifiers_catalog)
+        default_device.initRFSwitches(application.DEFAULT_PINOUT, True)
+        default_device.filter_switch.enableFilter(SAVED_FILTER)
+        default_device.lna_switch.setLNAState(True)
+        default_time = (time.perf_counter_ns() - start_time) / 1e6
+        default_intermediate_states = countIntermediateStates(getPinStates(default_device), default_device)
+        default_device.releaseRFSwitches()
+
+        # Second run: the last board is resumed in the saved state
+        start_time = time.perf_counter_ns()
+        resumed_device = application.resumeLastDevice(filters_catalog, amplifiers_catalog)
+        resume_time = (time.perf_counter_ns() - start_time) / 1e6
+
+        print(f"{BENCHMARK_DEVICE}, saved state: filter {SAVED_FILTER}, LNA active")
+        print(f"{'Initialization':>28} | {'Time (ms)':>9} | {'Intermediate pin states':>23}")
+        print(f"{'default state, then RF path':>28} | {default_time:>9.1f} | {default_intermediate_states:>23}")
+        if resumed_device is None:
+            print("MISMATCH: the last device is not resumed")
+            return 1
+        resumed_intermediate_states = countIntermediateStates(getPinStates(resumed_device), resumed_device)
+        print(f"{'resumed':>28} | {resume_time:>9.1f} | {resumed_intermediate_states:>23}")
+        if resumed_device.filter_switch.getActiveRFPath() != SAVED_FILTER or not resumed_device.lna_switch.is_active:
+            print(f"MISMATCH: resumed filter {resumed_device.filter_switch.getActiveRFPath()}, "
+                  f"LNA active {resumed_device.lna_switch.is_active}")
+            mismatches += 1
+        if resumed_intermediate_states:
+            print(f"MISMATCH: pins of the resumed device passed through another state: {getPinStates(resumed_device)}")
+            mismatches += 1
+
+        print(f"\n{SWITCHING_ACTIVATIONS_COUNT} filter activations")
+        print(f"{'State':>10} | {'p50 (us)':>8} | {'p99 (us)':>8}")
+        listener = resumed_device.filter_switch.rf_path_listener
+        for state_name, rf_path_listener in [("not saved", None), ("saved", listener)]:
+            resumed_device.filter_switch.rf_path_listener = rf_path_listener
+            latencies = measureSwitching(resumed_device)
+            print(f"{state_name:>10} | {numpy.percentile(latencies, 50):>8.1f} | {numpy.percentile(latencies, 99):>8.1f}")
+
+        with open(state_path) as state_file:
+            saved_state = json.load(state_file)
+        active_filter = resumed_device.filter_switch.getActiveRFPath()
+        if saved_state["filter"] != active_filter or saved_state["lna"] is not True:
+            print(f"MISMATCH: saved state {saved_state}, active filter {active_filter}")
+            mismatches += 1
+        resumed_device.releaseRFSwitches()
+
+        if SwitchStateStore.findLatest(application.SWITCH_STATE_DIR) != state_path:
+            print(f"MISMATCH: latest state file {SwitchStateStore.findLatest(application.SWITCH_STATE_DIR)}")
+            mismatches += 1
+
+    if mismatches:
+        print(f"MISMATCHES: {mismatches}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(runBenchmark())
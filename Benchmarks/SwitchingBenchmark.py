@@ -0,0 +1,55 @@
+import numpy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ControlApplication.RFSwitch import *
+
+# Usage: python -m Benchmarks.SwitchingBenchmark
+# RF path switching latency on the simulated GPIO (MockFactory)
+
+ACTIVATIONS_COUNT = 5000
+FILTER_INPUT_SWITCH_GPIO_PINS = [17, 27, 22]
+FILTER_OUTPUT_SWITCH_GPIO_PINS = [0, 5, 6]
+
+def activateWithThreadPool(filter_switch, rf_path_index):
+    # RF path activation used before the SwitchingEngine: a new pool of two
+    # threads for every activation
+    start_time = time.perf_counter_ns()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        input_switch_future = executor.submit(filter_switch.input_switch.activateRFOutput, rf_path_index)
+        output_switch_future = executor.submit(filter_switch.output_switch.activateRFOutput, rf_path_index)
+    input_switch_future.result()
+    output_switch_future.result()
+    return time.perf_counter_ns() - start_time, None
+
+def activateWithEngine(filter_switch, rf_path_index):
+    filter_switch.enableFilter(rf_path_index)
+    return filter_switch.last_switching_report.getLatency(), filter_switch.last_switching_report.getSkew()
+
+def measure(activate):
+    filter_switch = FilterSwitch(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS, 
+                                 RFSwitch.SP6T_SWITCH_TRUTH_TABLE, True)
+    latencies = []
+    skews = []
+
+    for activation_number in range(ACTIVATIONS_COUNT):
+        # Every activation changes the RF path
+        latency, skew = activate(filter_switch, activation_number % 6 + 1)
+        latencies.append(latency / 1e3)
+        if skew is not None:
+            skews.append(skew / 1e3)
+
+    return latencies, skews
+
+def formatPercentiles(values):
+    if not values:
+        return f"{'-':>8} | {'-':>8}"
+    return f"{numpy.percentile(values, 50):>8.1f} | {numpy.percentile(values, 99):>8.1f}"
+
+def runBenchmark():
+    print(f"{'Method':>12} | {'p50 (us)':>8} | {'p99 (us)':>8} | {'Skew p50':>8} | {'Skew p99':>8} | {'Switches/s':>10}")
+    for method_name, activate in [("ThreadPool", activateWithThreadPool), ("Engine", activateWithEngine)]:
+        latencies, skews = measure(activate)
+        print(f"{method_name:>12} | {formatPercentiles(latencies)} | {formatPercentiles(skews)} | {1e6 / numpy.mean(latencies):>10.0f}")
+
+if __name__ == "__main__":
+    runBenchmark()
@@ -0,0 +1,90 @@
+import numpy
+import pandas
+
+# Synthetic component catalogs with the same layout as the FiltersList/*.csv
+# files, used to measure scaling far beyond the size of the real catalog
+
+FILTER_CSV_COLUMNS = [
+    "Model Number", "Case Style", "Description", "Passband F1 (MHz)", "Passband F2 (MHz)",
+    "Stopband F3 (MHz)", "Rejection @ F3 (dB)", "Stopband F4 (MHz)", "Rejection @ F4 (dB)",
+    "Filter Type", "Technology", "Interface", "Impedance (O)"
+]
+
+FILTER_TYPES = ["Low Pass", "High Pass", "Band Pass", "Band Stop"]
+CASE_STYLES = [f"CS{case_number:03d}" for case_number in range(100)]
+
+def formatFrequency(value):
+    return f"{value:.6g}"
+
+def createFilterRow(row_number, filter_type, center, case_style, rejection):
+    f = formatFrequency
+    if filter_type == "Low Pass":
+        frequencies = (f"DC-{f(center)}", f(center * 1.1), f"{f(center * 1.5)}-{f(center * 3)}", 
+                       f"{f(center * 3)}-{f(center * 8)}")
+    elif filter_type == "High Pass":
+        frequencies = (f"{f(center)}-{f(center * 4)}", f(center * 0.8), f"DC-{f(center * 0.6)}", "-")
+    elif filter_type == "Band Pass":
+        frequencies = (f(center * 0.9), f(center * 1.1), f"DC-{f(center * 0.7)}", 
+                       f"{f(center * 1.4)}-{f(center * 5)}")
+    else:
+        frequencies = (f"DC-{f(center * 0.7)}", f"{f(center * 1.3)}-{f(center * 5)}", 
+                       f(center * 0.9), f(center * 1.1))
+
+    return [
+        f"SYN-{row_number}+", case_style, f"Synthetic {filter_type} Filter, {f(center)} MHz",
+        frequencies[0], frequencies[1], frequencies[2], str(rejection), frequencies[3],
+        "-" if frequencies[3] == "-" else str(rejection + 10), filter_type, "LTCC", "SMT", "50"
+    ]
+
+def createFilterDataFrame(catalog_size, seed = 0):
+    generator = numpy.random.default_rng(seed)
+    filter_types = generator.choice(FILTER_TYPES, catalog_size)
+    # Log-uniform distribution of cutoff frequencies between 1 MHz and 10 GHz
+    centers = 10 ** generator.uniform(0, 4, catalog_size)
+    case_styles = generator.choice(CASE_STYLES, catalog_size)
+    rejections = generator.integers(15, 60, catalog_size)
+
+    rows = [createFilterRow(row_number, filter_types[row_number], centers[row_number], 
+                            case_styles[row_number], rejections[row_number]) 
+            for row_number in range(catalog_size)]
+
+    return pandas.DataFrame(rows, columns=FILTER_CSV_COLUMNS, dtype=str)
+
+AMPLIFIER_CSV_COLUMNS = [
+    "Model Number", "Case Style", "Subcategories", "F Low (MHz)", "F High (MHz)", "Gain (dB) Typ.",
+    "NF (dB) Typ.", "Power Out (dBm) @ 1dB Comp. Typ.", "Out. IP3 (dBm) Typ.", "Input VSWR (:1) Typ.",
+    "Output VSWR (:1) Typ.", "Voltage (V)", "DC Current (mA)", "Connector Type", "Option", "Interface",
+    "Impedance (Ohms)"
+]
+
+def createAmplifierRow(row_number, f_low, f_high, case_style, parameters):
+    f = formatFrequency
+    gain, nf, p1db, oip3, input_vswr, output_vswr, current = parameters
+    # Every fifth amplifier has two operating points, as some of the real ones
+    voltage, dc_current = ("5/3", f"{current:.0f}/{current / 2:.0f}") if row_number % 5 == 0 else ("5", f"{current:.0f}")
+    return [
+        f"SYN-AMP-{row_number}+", case_style, "Low Noise Amplifier", f(f_low), f(f_high), f"{gain:.1f}",
+        "-" if row_number % 50 == 0 else f"{nf:.2f}", f"{p1db:.1f}", f"{oip3:.1f}", f"{input_vswr:.2f}",
+        f"{output_vswr:.2f}", voltage, dc_current, "-", "-", "SMT", "50"
+    ]
+
+def createAmplifierDataFrame(catalog_size, seed = 0):
+    generator = numpy.random.default_rng(seed)
+    f_lows = 10 ** generator.uniform(0, 3, catalog_size)
+    f_highs = f_lows * generator.uniform(2, 100, catalog_size)
+    case_styles = generator.choice(CASE_STYLES, catalog_size)
+    parameters = numpy.column_stack((
+        generator.uniform(5, 35, catalog_size),
+        generator.uniform(0.3, 5, catalog_size),
+        generator.uniform(-5, 30, catalog_size),
+        generator.uniform(10, 45, catalog_size),
+        generator.uniform(1, 2, catalog_size),
+        generator.uniform(1, 2, catalog_size),
+        generator.uniform(10, 300, catalog_size)
+    ))
+
+    rows = [createAmplifierRow(row_number, f_lows[row_number], f_highs[row_number], case_styles[row_number], 
+                               parameters[row_number])
+            for row_number in range(catalog_size)]
+
+    return pandas.DataFrame(rows, columns=AMPLIFIER_CSV_COLUMNS, dtype=str)
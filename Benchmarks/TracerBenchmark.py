@@ -0,0 +1,132 @@
+import ControlApplication
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from Benchmarks.BenchmarkSuite import copyCatalogs
+from Benchmarks.WhiptailStub import *
+
+# Usage: python -m Benchmarks.TracerBenchmark
+# Tracing of the application (RPITX_TRACE): the catalogs are built from the
+# .csv files, the filters are switched and a dialog is shown (whiptail is
+# replaced with a stub) in a child process with and without the variable:
+#   - catalog build time and filter switching latency without tracing (the
+#     functions are not wrapped) and with the spans recorded
+#   - spans of the parallel parts in the saved trace: the time the spans of
+#     each thread pool take together compared with the time from the first
+#     start to the last end (1.0 - the threads did not run at the same time)
+# Exits with code 1 if the functions are wrapped without the variable or a
+# span is missing in the trace.
+
+ACTIVATIONS_COUNT = 5000
+FILTER_INPUT_SWITCH_GPIO_PINS = [17, 27, 22]
+FILTER_OUTPUT_SWITCH_GPIO_PINS = [0, 5, 6]
+EXPECTED_SPANS = [
+    "ComponentsList.__init__",
+    "ComponentsList.__processCsvFile",
+    "ComponentsList.__loadDump",
+    "RFSwitchWrapper.activateRFPath",
+    "RFSwitch.activateRFOutput",
+    "WhiptailBackend.menu"
+]
+# <POOL> : <SPANS OF THE POOL THREADS>
+PARALLEL_SPANS = {
+    "loadComponentsLists": "ComponentsList.__init__",
+    "ComponentsList .csv files": "ComponentsList.__processCsvFile"
+}
+
+def runApplication(application_dir):
+    # Child process: the catalogs are built from the .csv files copied to application_dir
+    installWhiptailStub(["Load device configuration"])
+    import ControlApplication.main as application
+    from ControlApplication.RFSwitch import FilterSwitch, RFSwitch
+    from ControlApplication.UIBackend import WhiptailBackend
+
+    application.FILTER_MODELS_DIR = os.path.join(application_dir, "FiltersList")
+    application.AMPLIFIER_MODELS_DIR = os.path.join(application_dir, "AmplifiersList")
+    application.LOG_FILENAME = None
+
+    start_time = time.perf_counter()
+    application.loadComponentsLists()
+    catalog_time = (time.perf_counter() - start_time) * 1e3
+    # The second load reads the dumps
+    application.loadComponentsLists()
+
+    filter_switch = FilterSwitch(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS, RFSwitch.SP6T_SWITCH_TRUTH_TABLE, True)
+    latencies = []
+    for activation_number in range(ACTIVATIONS_COUNT):
+        start_time = time.perf_counter_ns()
+        filter_switch.enableFilter(activation_number % 6 + 1)
+        latencies.append((time.perf_counter_ns() - start_time) / 1e3)
+    WhiptailBackend("TracerBenchmark").menu("Choose an action:", application.APPLICATION_ACTIONS)
+
+    print(json.dumps({
+        "catalog_time_ms": catalog_time,
+        "switch_p50_us": sorted(latencies)[len(latencies) // 2],
+        "is_wrapped": hasattr(RFSwitch.activateRFOutput, "__wrapped__")
+    }))
+
+def measureApplication(trace_path):
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(os.path.dirname(os.path.abspath(ControlApplication.__file__)), application_dir)
+        environment = dict(os.environ)
+        environment.pop("RPITX_TRACE", None)
+        if trace_path:
+            environment["RPITX_TRACE"] = trace_path
+        result = subprocess.run([sys.executable, "-m", "Benchmarks.TracerBenchmark", "--child", application_dir],
+                                capture_output=True, text=True, check=True, env=environment)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def getOverlap(trace_events, span_name):
+    # (<SPANS>, <THREADS>, <BUSY / WALL TIME>) of the first group of the spans
+    # running at the same time
+    spans = sorted((trace_event["ts"], trace_event["ts"] + trace_event["dur"], trace_event["tid"])
+                   for trace_event in trace_events if trace_event["ph"] == "X" and trace_event["name"] == span_name)
+    group = spans[:1]
+    for span in spans[1:]:
+        if span[0] > max(end for _, end, _ in group):
+            break
+        group.append(span)
+    if not group:
+        return 0, 0, 0.0
+    wall_time = max(end for _, end, _ in group) - min(start for start, _, _ in group)
+    busy_time = sum(end - start for start, end, _ in group)
+    return len(group), len({thread_id for _, _, thread_id in group}), busy_time / wall_time if wall_time else 0.0
+
+def runBenchmark():
+    errors = []
+
+    with tempfile.TemporaryDirectory() as trace_dir:
+        trace_path = os.path.join(trace_dir, "rpitx-trace.json")
+        measurements = {"disabled": measureApplication(None), "enabled": measureApplication(trace_path)}
+        with open(trace_path) as trace_file:
+            trace_events = json.load(trace_file)["traceEvents"]
+
+    print(f"{'Tracing':>8} | {'Catalogs from .csv (ms)':>23} | {'Switch p50 (us)':>15} | {'Wrapped':>7}")
+    for tracing_name, measurement in measurements.items():
+        print(f"{tracing_name:>8} | {measurement['catalog_time_ms']:>23.0f} | {measurement['switch_p50_us']:>15.1f} | "
+              f"{str(measurement['is_wrapped']):>7}")
+    if measurements["disabled"]["is_wrapped"]:
+        errors.append("functions are wrapped without RPITX_TRACE")
+
+    span_counts = {span_name: sum(1 for trace_event in trace_events if trace_event.get("name") == span_name)
+                   for span_name in EXPECTED_SPANS}
+    print(f"\n{len(trace_events)} trace events: " + ", ".join(f"{span_name} {count}" for span_name, count in span_counts.items()))
+    errors += [f"no {span_name} spans in the trace" for span_name, count in span_counts.items() if not count]
+
+    print(f"{'Thread pool':>26} | {'Spans':>5} | {'Threads':>7} | {'Busy / wall time':>16}")
+    for pool_name, span_name in PARALLEL_SPANS.items():
+        spans_count, threads_count, overlap = getOverlap(trace_events, span_name)
+        print(f"{pool_name:>26} | {spans_count:>5} | {threads_count:>7} | {overlap:>16.2f}")
+
+    for error in errors:
+        print(f"MISMATCH: {error}")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        runApplication(sys.argv[2])
+    else:
+        sys.exit(runBenchmark())
@@ -0,0 +1,187 @@
+import fcntl
+import json
+import numpy
+import os
+import pty
+import select
+import shutil
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import termios
+import threading
+import time
+from Benchmarks.BenchmarkSuite import BENCHMARK_DEVICE, copyCatalogs, createBenchmarkDevice
+
+# Usage: python -m Benchmarks.UIBackendBenchmark
+# Screen transitions per second of the board menu (UserInterface.chooseBoardAction)
+# for each UI backend. The application runs in a child process on a pseudo
+# terminal, the keys choosing the filters and the LNA are written to the
+# terminal in advance. A transition is one action: the menu, the switching
+# and the displayed result (whiptail also needs the result to be confirmed).
+# whiptail is measured only if it is installed, otherwise the cost of
+# starting one process per dialog is shown as its lower bound. Exits with
+# code 1 if a backend does not complete the transitions.
+
+TRANSITIONS_COUNT = 300
+TERMINAL_ROWS = 24
+TERMINAL_COLUMNS = 80
+CHILD_TIMEOUT = 120
+FILTER_INPUT_SWITCH_GPIO_PINS = [17, 27, 22]
+FILTER_OUTPUT_SWITCH_GPIO_PINS = [0, 5, 6]
+LNA_INPUT_SWITCH_GPIO_PINS = [23, 24]
+LNA_OUTPUT_SWITCH_GPIO_PINS = [16, 26]
+
+ENTER_KEY = b"\r"
+
+class TransitionsDone(Exception):
+    pass
+
+def runChild(ui_backend_name, application_dir, result_path):
+    # Child process: the board menu on the pseudo terminal
+    fcntl.ioctl(sys.stdout.fileno(), termios.TIOCSWINSZ, struct.pack("HHHH", TERMINAL_ROWS, TERMINAL_COLUMNS, 0, 0))
+    from ControlApplication.UserInterface import UserInterface
+
+    device = createBenchmarkDevice(application_dir)
+    device.initFilterRFSwitches(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS, True)
+    device.initLNA(LNA_INPUT_SWITCH_GPIO_PINS, LNA_OUTPUT_SWITCH_GPIO_PINS, True)
+    user_interface = UserInterface(None, ui_backend_name)
+
+    # The end of each transition is the displayed result
+    transition_times = []
+    show_status = user_interface.ui_backend.showStatus
+    def showStatus(text):
+        show_status(text)
+        transition_times.append(time.perf_counter_ns())
+        if len(transition_times) == TRANSITIONS_COUNT:
+            raise TransitionsDone()
+    user_interface.ui_backend.showStatus = showStatus
+
+    try:
+        user_interface.chooseBoardAction(device)
+    except TransitionsDone:
+        pass
+    finally:
+        user_interface.ui_backend.close()
+
+    with open(result_path, "w") as result_file:
+        json.dump({"backend": type(user_interface.ui_backend).NAME, "transition_times": transition_times}, result_file)
+
+def getDownKey():
+    # Sequence sent by the Down key of the terminal in the keypad mode, e.g. "\x1bOB"
+    import curses
+    curses.setupterm(os.environ.get("TERM", "xterm"), sys.stdout.fileno() if sys.stdout.isatty() else -1)
+    return curses.tigetstr("kcud1")
+
+def createKeyFeed(ui_backend_name, actions_count):
+    # Action i % actions_count is chosen in each transition, the menu starts at the first action
+    down_key = getDownKey()
+    key_feed = b""
+    for transition_number in range(TRANSITIONS_COUNT):
+        key_feed += down_key * (transition_number % actions_count) + ENTER_KEY
+        if ui_backend_name == "whiptail":
+            # The result message box
+            key_feed += ENTER_KEY
+    return key_feed
+
+def measureBackend(ui_backend_name, application_dir, actions_count):
+    import ControlApplication.UserInterface as user_interface_module
+
+    result_path = os.path.join(application_dir, f"{ui_backend_name}.json")
+    child_pid, terminal_fd = pty.fork()
+    if child_pid == 0:
+        os.execv(sys.executable, [sys.executable, "-m", "Benchmarks.UIBackendBenchmark", "--child",
+                                  ui_backend_name, application_dir, result_path])
+
+    # The keys are written once the first screen is drawn (the terminal is set up)
+    screen_output = b""
+    key_writer = None
+    deadline = time.monotonic() + CHILD_TIMEOUT
+    while time.monotonic() < deadline:
+        # The child waiting for the keys that do not come is stopped at the deadline
+        if not select.select([terminal_fd], [], [], 1.0)[0]:
+            continue
+        try:
+            output = os.read(terminal_fd, 65536)
+        except OSError:
+            # The child process has exited
+            break
+        if not output:
+            break
+        screen_output += output
+        if key_writer is None and user_interface_module.APPLICATION_TITLE.encode() in screen_output:
+            key_writer = threading.Thread(target=os.write, args=(terminal_fd, createKeyFeed(ui_backend_name, actions_count)))
+            key_writer.start()
+
+    if time.monotonic() >= deadline:
+        os.kill(child_pid, signal.SIGKILL)
+    os.waitpid(child_pid, 0)
+    os.close(terminal_fd)
+    if not os.path.exists(result_path):
+        return None
+
+    with open(result_path) as result_file:
+        result = json.load(result_file)
+    if len(result["transition_times"]) != TRANSITIONS_COUNT:
+        return None
+    return result
+
+def measureProcessSpawn():
+    # Lower bound of a whiptail transition: two processes (menu and message box)
+    start = time.perf_counter_ns()
+    for _ in range(TRANSITIONS_COUNT):
+        subprocess.run(["true"])
+        subprocess.run(["true"])
+    return TRANSITIONS_COUNT / ((time.perf_counter_ns() - start) / 1e9)
+
+def isWhiptailAvailable():
+    try:
+        import whiptail
+    except ImportError:
+        return False
+    return shutil.which("whiptail") is not None
+
+def runBenchmark():
+    import ControlApplication
+    # The same terminal type is used by the child processes
+    os.environ.setdefault("TERM", "xterm")
+    source_dir = os.path.dirname(os.path.abspath(ControlApplication.__file__))
+    failed_backends = []
+
+    with tempfile.TemporaryDirectory() as application_dir:
+        copyCatalogs(source_dir, application_dir)
+        device = createBenchmarkDevice(application_dir)
+        # 6 filters and the LNA
+        actions_count = len(device.filters) + len(device.lna)
+
+        print(f"{BENCHMARK_DEVICE}, {TRANSITIONS_COUNT} transitions, {TERMINAL_COLUMNS}x{TERMINAL_ROWS} terminal")
+        print(f"{'Backend':>34} | {'Transitions/s':>13} | {'p50 (ms)':>8} | {'p99 (ms)':>8}")
+
+        ui_backend_names = ["curses"] + (["whiptail"] if isWhiptailAvailable() else [])
+        for ui_backend_name in ui_backend_names:
+            result = measureBackend(ui_backend_name, application_dir, actions_count)
+            if result is None or result["backend"] != ui_backend_name:
+                print(f"{ui_backend_name:>34} | FAILED")
+                failed_backends.append(ui_backend_name)
+                continue
+
+            transition_durations = numpy.diff(result["transition_times"]) / 1e6
+            transitions_per_second = len(transition_durations) / (numpy.sum(transition_durations) / 1e3)
+            print(f"{ui_backend_name:>34} | {transitions_per_second:>13.0f} | {numpy.percentile(transition_durations, 50):>8.2f} | "
+                  f"{numpy.percentile(transition_durations, 99):>8.2f}")
+
+        if "whiptail" not in ui_backend_names:
+            print(f"{'whiptail not installed, spawn only':>34} | {measureProcessSpawn():>13.0f} | {'-':>8} | {'-':>8}")
+
+    if failed_backends:
+        print(f"FAILED BACKENDS: {', '.join(failed_backends)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        runChild(*sys.argv[2:5])
+    else:
+        sys.exit(runBenchmark())
@@ -0,0 +1,48 @@
+import sys
+import types
+
+# Replacement of the whiptail module used by the benchmarks: dialogs are not
+# displayed, menu choices are taken from a script
+
+class FirstMenuReached(Exception):
+    pass
+
+class WhiptailStub:
+    # Menu choices returned by the next menu() calls (None - the <Cancel>
+    # button), when the script is over FirstMenuReached is raised
+    menu_choices = []
+    # Prompts of all menus shown since the stub has been installed
+    menu_prompts = []
+    # Values entered in the next inputbox() calls, the default value is
+    # used when the script is over
+    input_values = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def msgbox(self, *args, **kwargs):
+        pass
+
+    def menu(self, prompt, items, *args, **kwargs):
+        WhiptailStub.menu_prompts.append(prompt)
+        if not WhiptailStub.menu_choices:
+            raise FirstMenuReached()
+        menu_choice = WhiptailStub.menu_choices.pop(0)
+        if menu_choice is None:
+            # ("", <CANCEL BUTTON>)
+            return "", 1
+        # (<USER CHOICE>, <OK BUTTON>)
+        return menu_choice, 0
+
+    def inputbox(self, prompt, default = "", *args, **kwargs):
+        if not WhiptailStub.input_values:
+            return default, 0
+        return WhiptailStub.input_values.pop(0), 0
+
+def installWhiptailStub(menu_choices = None, input_values = None):
+    WhiptailStub.menu_choices = list(menu_choices or [])
+    WhiptailStub.input_values = list(input_values or [])
+    WhiptailStub.menu_prompts = []
+    whiptail_module = types.ModuleType("whiptail")
+    whiptail_module.Whiptail = WhiptailStub
+    sys.modules["whiptail"] = whiptail_module
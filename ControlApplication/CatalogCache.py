@@ -0,0 +1,193 @@
+import hashlib
+import json
+import mmap
+import numpy
+import os
+import struct
+import tempfile
+
+class TextColumn:
+    # Text column stored in the cache file as UTF-8 data and an array of
+    # offsets, a value is decoded only when it is requested
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return bytes(self.buffer[self.offsets[index]:self.offsets[index + 1]]).decode("utf-8")
+
+    def getData(self):
+        # (<UTF-8 DATA>, <OFFSETS FROM 0>) of all values
+        first_offset = int(self.offsets[0])
+        return self.buffer[first_offset:int(self.offsets[-1])], self.offsets - first_offset
+
+    def take(self, indexes):
+        # Column with the values at the indexes, the bytes are copied without decoding
+        indexes = numpy.asarray(indexes, dtype=numpy.int64)
+        starts = self.offsets[indexes]
+        lengths = self.offsets[indexes + 1] - starts
+        offsets = numpy.zeros(len(indexes) + 1, dtype="<i8")
+        numpy.cumsum(lengths, out=offsets[1:])
+        # Position of every copied byte in the source data
+        byte_positions = numpy.repeat(starts - offsets[:-1], lengths) + numpy.arange(offsets[-1])
+        data = numpy.frombuffer(self.buffer, dtype=numpy.uint8)[byte_positions]
+        return TextColumn(memoryview(data.tobytes()), offsets)
+
+    @staticmethod
+    def fromValues(values):
+        # Missing values are stored as empty strings
+        encoded_values = [TextColumn.__toText(values[index]).encode("utf-8") for index in range(len(values))]
+        offsets = numpy.zeros(len(encoded_values) + 1, dtype="<i8")
+        offsets[1:] = numpy.cumsum([len(value) for value in encoded_values])
+        return TextColumn(memoryview(b"".join(encoded_values)), offsets)
+
+    @staticmethod
+    def concatenate(columns):
+        # TextColumns or sequences of values, one TextColumn with all values in the same order
+        data_parts = []
+        offsets_parts = [numpy.zeros(1, dtype="<i8")]
+        data_length = 0
+        for column in columns:
+            data, offsets = (column if isinstance(column, TextColumn) else TextColumn.fromValues(column)).getData()
+            data_parts.append(data)
+            offsets_parts.append(offsets[1:] + data_length)
+            data_length += int(offsets[-1])
+        return TextColumn(memoryview(b"".join(data_parts)), numpy.concatenate(offsets_parts))
+
+    @staticmethod
+    def __toText(value):
+        if value is None or (isinstance(value, float) and numpy.isnan(value)):
+            return ""
+        return str(value)
+
+class CatalogCache:
+
+    # Cache file layout:
+    # <MAGIC> <FORMAT VERSION: uint32> <HEADER LENGTH: uint32> <HEADER: JSON> <PADDING> <DATA BLOCKS>
+    # Header describes the position of every column relative to the first data 
+    # block, data blocks are aligned to 8 bytes so that the columns can be used 
+    # directly from mmap
+    MAGIC = b"RPXCACHE"
+    FORMAT_VERSION = 1
+    PREFIX_FORMAT = "<8sII"
+    ALIGNMENT = 8
+
+    @staticmethod
+    def getFingerprint(file_paths):
+        # Any change of the file set, file size or modification time gives a new fingerprint
+        fingerprint = hashlib.sha256()
+        for file_path in sorted(file_paths):
+            file_stat = os.stat(file_path)
+            fingerprint.update(f"{os.path.basename(file_path)}:{file_stat.st_size}:{file_stat.st_mtime_ns}\n".encode("utf-8"))
+        return fingerprint.hexdigest()
+
+    @staticmethod
+    def load(cache_file_path, fingerprint = None):
+        # Returns (columns, categories, header) or None if the cache is missing,
+        # corrupted, has another format or does not match the fingerprint.
+        # If fingerprint is None, the cache is used without validation
+        try:
+            with open(cache_file_path, "rb") as cache_file:
+                cache_buffer = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        prefix_size = struct.calcsize(CatalogCache.PREFIX_FORMAT)
+        if len(cache_buffer) < prefix_size:
+            return None
+
+        magic, format_version, header_length = struct.unpack_from(CatalogCache.PREFIX_FORMAT, cache_buffer)
+        if magic != CatalogCache.MAGIC or format_version != CatalogCache.FORMAT_VERSION:
+            return None
+
+        try:
+            header = json.loads(bytes(cache_buffer[prefix_size:prefix_size + header_length]).decode("utf-8"))
+
+            if fingerprint is not None and header["fingerprint"] != fingerprint:
+                return None
+
+            # Offsets in the header are relative to the first (aligned) data block
+            data_start = prefix_size + header_length
+            data_start += -data_start % CatalogCache.ALIGNMENT
+
+            # Columns are views of the read-only mapping: nothing is copied and the
+            # pages are shared between all processes using the same cache file
+            buffer_view = memoryview(cache_buffer)
+            columns = {}
+            for column_name, column_info in header["columns"].items():
+                if column_info["kind"] == "text":
+                    offsets = numpy.frombuffer(cache_buffer, dtype="<i8", count=header["size"] + 1,
+                                               offset=data_start + column_info["offsets_offset"])
+                    data_offset = data_start + column_info["data_offset"]
+                    columns[column_name] = TextColumn(buffer_view[data_offset:data_offset + column_info["data_length"]], offsets)
+                else:
+                    columns[column_name] = numpy.frombuffer(cache_buffer, dtype=column_info["dtype"],
+                                                            count=header["size"], offset=data_start + column_info["offset"])
+
+            categories = {column_name: numpy.array(values, dtype=object) for column_name, values in header["categories"].items()}
+
+        except (ValueError, KeyError, TypeError):
+            # Truncated or damaged cache file
+            return None
+
+        return columns, categories, header
+
+    @staticmethod
+    def save(cache_file_path, columns, categories, size, fingerprint, metadata):
+        blocks = []
+        column_info = {}
+        data_length = 0
+
+        def addBlock(block):
+            nonlocal data_length
+            block_offset = data_length
+            padding = -len(block) % CatalogCache.ALIGNMENT
+            blocks.append(block + b"\0" * padding)
+            data_length += len(block) + padding
+            return block_offset
+
+        for column_name, column in columns.items():
+            if isinstance(column, numpy.ndarray) and column.dtype != object:
+                column_info[column_name] = {
+                    "kind": "array",
+                    "dtype": column.dtype.newbyteorder("<").str,
+                    "offset": addBlock(column.astype(column.dtype.newbyteorder("<")).tobytes())
+                }
+            else:
+                # Text columns read from a cache file are written without decoding
+                data, offsets = (column if isinstance(column, TextColumn) else TextColumn.fromValues(column)).getData()
+                column_info[column_name] = {
+                    "kind": "text",
+                    "offsets_offset": addBlock(offsets.astype("<i8").tobytes()),
+                    "data_length": int(offsets[-1])
+                }
+                column_info[column_name]["data_offset"] = addBlock(bytes(data))
+
+        header = {
+            **metadata,
+            "fingerprint": fingerprint,
+            "size": size,
+            "categories": {column_name: [str(value) for value in values] for column_name, values in categories.items()},
+            "columns": column_info
+        }
+
+        encoded_header = json.dumps(header).encode("utf-8")
+        header_padding = -(struct.calcsize(CatalogCache.PREFIX_FORMAT) + len(encoded_header)) % CatalogCache.ALIGNMENT
+
+        # The file is replaced atomically: processes that have already mapped
+        # the previous version of the cache continue to use it safely
+        cache_dir = os.path.dirname(os.path.abspath(cache_file_path))
+        with tempfile.NamedTemporaryFile("wb", dir=cache_dir, delete=False) as cache_file:
+            cache_file.write(struct.pack(CatalogCache.PREFIX_FORMAT, CatalogCache.MAGIC,
+                                         CatalogCache.FORMAT_VERSION, len(encoded_header)))
+            cache_file.write(encoded_header)
+            cache_file.write(b"\0" * header_padding)
+            for block in blocks:
+                cache_file.write(block)
+            temporary_file_path = cache_file.name
+
+        os.chmod(temporary_file_path, 0o644)
+        os.replace(temporary_file_path, cache_file_path)
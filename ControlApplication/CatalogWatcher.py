@@ -0,0 +1,126 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from ControlApplication.Logger import *
+
+class CatalogWatcher:
+    # Keeps the components lists of a long-running process up to date with
+    # their directories: added, changed and removed .csv files are merged by
+    # ComponentsList.reload() without a restart. The directories are watched
+    # with inotify (Linux), on other systems they are checked every
+    # POLL_INTERVAL seconds. Changes made within SETTLE_TIME seconds (several
+    # files copied at once) are merged together
+    POLL_INTERVAL = 2.0
+    SETTLE_TIME = 0.5
+    CSV_EXTENSION = b".csv"
+
+    # inotify constants, <sys/inotify.h>
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+    # struct inotify_event: wd, mask, cookie, len, followed by the name
+    EVENT_FORMAT = "iIII"
+    EVENT_SIZE = struct.calcsize(EVENT_FORMAT)
+    EVENTS_BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, components_lists, log_filename = None):
+        self.components_lists = components_lists
+        if log_filename:
+            self.logger = Logger.getLogger(log_filename)
+        else:
+            self.logger = None
+
+        self.stop_event = threading.Event()
+        # <WATCH DESCRIPTOR> : <COMPONENTS LIST>
+        self.watched_lists = {}
+        self.inotify_fd = self.__createInotify()
+        self.watcher_thread = threading.Thread(target=self.__watch, name="CatalogWatcher", daemon=True)
+
+    def start(self):
+        self.watcher_thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.watcher_thread.is_alive():
+            self.watcher_thread.join()
+        if self.inotify_fd is not None:
+            os.close(self.inotify_fd)
+            self.inotify_fd = None
+
+    def __createInotify(self):
+        # inotify descriptor watching all components directories, None if
+        # inotify is not available
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            inotify_fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if inotify_fd < 0:
+            return None
+
+        for components_list in self.components_lists:
+            watch_descriptor = libc.inotify_add_watch(inotify_fd, os.fsencode(components_list.models_dir), self.WATCH_MASK)
+            if watch_descriptor < 0:
+                os.close(inotify_fd)
+                self.watched_lists = {}
+                return None
+            self.watched_lists[watch_descriptor] = components_list
+
+        if self.logger:
+            self.logger.logMessage("Components directories are watched with inotify", Logger.LogLevel.DEBUG)
+        return inotify_fd
+
+    def __watch(self):
+        while not self.stop_event.is_set():
+            if self.inotify_fd is None:
+                self.stop_event.wait(self.POLL_INTERVAL)
+                # A list without changes is checked with a single directory listing
+                changed_lists = self.components_lists
+            else:
+                changed_lists = self.__readEvents(self.POLL_INTERVAL)
+                if changed_lists:
+                    self.stop_event.wait(self.SETTLE_TIME)
+                    changed_lists += self.__readEvents(0)
+
+            for components_list in dict.fromkeys(changed_lists):
+                if self.stop_event.is_set():
+                    return
+                try:
+                    components_list.reload()
+                except Exception as error:
+                    # The watcher keeps running, the list is reloaded on the next change
+                    if self.logger:
+                        self.logger.logMessage(f"{components_list.model_type} catalog reload error: {error!r}", Logger.LogLevel.ERROR)
+
+    def __readEvents(self, timeout):
+        # Components lists with changed .csv files
+        if not select.select([self.inotify_fd], [], [], timeout)[0]:
+            return []
+        try:
+            events_buffer = os.read(self.inotify_fd, self.EVENTS_BUFFER_SIZE)
+        except BlockingIOError:
+            return []
+
+        changed_lists = []
+        offset = 0
+        while offset + self.EVENT_SIZE <= len(events_buffer):
+            watch_descriptor, event_mask, _, name_length = struct.unpack_from(self.EVENT_FORMAT, events_buffer, offset)
+            name = events_buffer[offset + self.EVENT_SIZE:offset + self.EVENT_SIZE + name_length].rstrip(b"\0")
+            offset += self.EVENT_SIZE + name_length
+
+            if event_mask & self.IN_Q_OVERFLOW:
+                # Events have been lost, all lists are checked
+                return list(self.components_lists)
+            # The dumps saved in the same directories are not .csv files
+            if name.endswith(self.CSV_EXTENSION) and watch_descriptor in self.watched_lists:
+                changed_lists.append(self.watched_lists[watch_descriptor])
+        return changed_lists
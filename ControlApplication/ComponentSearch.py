@@ -0,0 +1,156 @@
+import numpy
+import re
+from ControlApplication.FrequencyIndex import *
+
+class ComponentSearchIndex:
+    # Search of the catalog components by model number, case style,
+    # description and frequency. The query is split into terms, a component
+    # matches the query if it matches every term:
+    #   - terms shorter than TRIGRAM_LENGTH bytes match the beginning of a
+    #     word ("cs" finds "CS042", "21" finds "ZX75LP-216-S+")
+    #   - longer terms match any part of the text ("lp-216")
+    #   - numbers ("145", "433.92", "145MHz") also match the components
+    #     whose frequency range contains the frequency (MHz), numbers with
+    #     the MHz unit match only by frequency
+    # Components whose model number starts with the query are listed first.
+    # Both text indexes are built from the matrices of text bytes of
+    # INDEX_CHUNK_SIZE components at a time and are stored as sorted keys (word prefixes / trigrams
+    # packed into integers) with the sorted component indexes of each key
+    # (postings), so a query term is resolved with a few binary searches
+
+    TRIGRAM_LENGTH = 3
+    # Components whose texts are converted to a byte matrix at once
+    INDEX_CHUNK_SIZE = 4096
+    FREQUENCY_TERM_PATTERN = re.compile(r"^(?P<frequency>\d+(?:\.\d+)?)(?P<unit>mhz)?$")
+    # Columns with the frequency range of each component type, MHz
+    # <MODEL TYPE> : (<LOW COLUMN>, <HIGH COLUMN>)
+    FREQUENCY_COLUMNS = {
+        "Filter": ("passband_low_mhz", "passband_high_mhz"),
+        "Amplifier": ("f_low_mhz", "f_high_mhz")
+    }
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.texts = numpy.array([self.__getText(index) for index in range(len(catalog))], dtype=object)
+
+        # The keys are taken from INDEX_CHUNK_SIZE components at a time, the
+        # byte matrices of a chunk are small next to the catalog
+        chunk_pairs = [self.__getChunkPairs(chunk_start) for chunk_start in range(0, len(self.texts), self.INDEX_CHUNK_SIZE)]
+        self.prefixes, self.prefix_offsets, self.prefix_postings = self.__buildPostings(
+            [prefix_pairs for prefix_pairs, _ in chunk_pairs])
+        self.trigrams, self.trigram_offsets, self.trigram_postings = self.__buildPostings(
+            [trigram_pairs for _, trigram_pairs in chunk_pairs])
+
+        # Lowercase model numbers in sorted order, the components whose model
+        # number starts with the query form one range
+        model_numbers = numpy.array([str(model_number).lower() for model_number in catalog.columns["model_number"]], dtype=str)
+        self.model_number_order = numpy.argsort(model_numbers, kind="stable").astype(numpy.int32)
+        self.sorted_model_numbers = model_numbers[self.model_number_order]
+
+        low_column, high_column = self.FREQUENCY_COLUMNS[catalog.model_type]
+        self.frequency_tree = IntervalTree(catalog.columns[low_column], catalog.columns[high_column])
+
+    def __getText(self, index):
+        catalog = self.catalog
+        return (f"{catalog.columns['model_number'][index]} {catalog.getCategory('case_style', index)} "
+                f"{catalog.columns['description'][index]}").lower()
+
+    def __getChunkPairs(self, chunk_start):
+        # (<PREFIX PAIRS>, <TRIGRAM PAIRS>) of the components chunk_start..chunk_start + INDEX_CHUNK_SIZE,
+        # unique (code, component) pairs packed into code * <COMPONENTS COUNT> + component
+        chunk_texts = self.texts[chunk_start:chunk_start + self.INDEX_CHUNK_SIZE]
+        # One row of UTF-8 bytes per component, padded with zero bytes
+        encoded_texts = numpy.array([text.encode("utf-8") for text in chunk_texts], dtype=bytes)
+        text_bytes = encoded_texts.view(numpy.uint8).reshape(len(encoded_texts), -1)
+        # Two zero columns: every trigram / word prefix can be read without bounds checks
+        text_bytes = numpy.pad(text_bytes, ((0, 0), (0, 2)))
+        components = numpy.broadcast_to(numpy.arange(chunk_start, chunk_start + len(encoded_texts), dtype=numpy.uint32)[:, None],
+                                        text_bytes.shape)
+
+        # Words start after a space and letters or digits start after any
+        # other character, the prefix key is the first two bytes of the word
+        is_alphanumeric = numpy.isin(text_bytes, numpy.frombuffer(b"abcdefghijklmnopqrstuvwxyz0123456789", dtype=numpy.uint8))
+        is_separator = (text_bytes == ord(" ")) | (text_bytes == 0)
+        previous_is_separator = numpy.pad(is_separator[:, :-1], ((0, 0), (1, 0)), constant_values=True)
+        previous_is_alphanumeric = numpy.pad(is_alphanumeric[:, :-1], ((0, 0), (1, 0)))
+        is_word_start = (~is_separator & (previous_is_separator | (is_alphanumeric & ~previous_is_alphanumeric)))[:, :-1]
+        text_codes = text_bytes.astype(numpy.uint32)
+        prefix_codes = text_codes[:, :-1] << 8 | text_codes[:, 1:]
+        is_trigram = text_bytes[:, 2:] != 0
+        trigram_codes = text_codes[:, :-2] << 16 | text_codes[:, 1:-1] << 8 | text_codes[:, 2:]
+
+        return (self.__getUniquePairs(prefix_codes[is_word_start], components[:, :-1][is_word_start]),
+                self.__getUniquePairs(trigram_codes[is_trigram], components[:, :-2][is_trigram]))
+
+    def __getUniquePairs(self, codes, components):
+        pairs = numpy.sort(codes.astype(numpy.int64) * len(self.texts) + components)
+        return pairs[numpy.append(True, pairs[1:] != pairs[:-1])]
+
+    def __buildPostings(self, chunk_pairs):
+        # Pairs of all chunks sorted by code, then by component: the postings
+        # of keys[i] are postings[offsets[i]:offsets[i + 1]]
+        components_count = max(len(self.texts), 1)
+        pairs = numpy.concatenate(chunk_pairs) if chunk_pairs else numpy.empty(0, dtype=numpy.int64)
+        pairs.sort()
+        # The pairs are split in place, without temporary arrays of the pairs size
+        postings = numpy.empty(len(pairs), dtype=numpy.int32)
+        numpy.remainder(pairs, components_count, out=postings, casting="unsafe")
+        codes = numpy.floor_divide(pairs, components_count, out=pairs)
+        starts = numpy.flatnonzero(numpy.append(True, codes[1:] != codes[:-1]))
+        return codes[starts], numpy.append(starts, len(codes)), postings
+
+    def search(self, query, limit = None):
+        # Catalog indexes of the components matching all query terms
+        found_indexes = numpy.arange(len(self.texts), dtype=numpy.int32)
+        for term in query.lower().split():
+            found_indexes = numpy.intersect1d(found_indexes, self.__findTerm(term), assume_unique=True)
+            if not len(found_indexes):
+                return []
+
+        model_number_prefix = query.strip().lower()
+        if model_number_prefix:
+            start, end = numpy.searchsorted(self.sorted_model_numbers, [model_number_prefix, model_number_prefix + "\U0010ffff"])
+            is_prefix_match = numpy.isin(found_indexes, self.model_number_order[start:end])
+            found_indexes = numpy.concatenate((found_indexes[is_prefix_match], found_indexes[~is_prefix_match]))
+        return found_indexes[:limit].tolist()
+
+    def __findTerm(self, term):
+        frequency_match = self.FREQUENCY_TERM_PATTERN.match(term)
+        if frequency_match and frequency_match["unit"]:
+            return self.__findFrequency(float(frequency_match["frequency"]))
+
+        term_indexes = self.__findText(term)
+        if frequency_match:
+            term_indexes = numpy.union1d(term_indexes, self.__findFrequency(float(frequency_match["frequency"])))
+        return term_indexes
+
+    def __findFrequency(self, frequency):
+        return numpy.unique(self.frequency_tree.stab(frequency).astype(numpy.int32))
+
+    def __findText(self, term):
+        term_bytes = list(term.encode("utf-8"))
+        if len(term_bytes) < self.TRIGRAM_LENGTH:
+            # A one byte prefix matches all keys from <BYTE>00 to <BYTE>FF
+            first_code = term_bytes[0] << 8 | (term_bytes[1] if len(term_bytes) > 1 else 0)
+            last_code = first_code if len(term_bytes) > 1 else first_code | 0xFF
+            start, end = numpy.searchsorted(self.prefixes, [first_code, last_code + 1])
+            return numpy.unique(self.prefix_postings[self.prefix_offsets[start]:self.prefix_offsets[end]])
+
+        # Components containing all trigrams of the term, the rarest trigram first
+        term_trigrams = numpy.unique([term_bytes[position] << 16 | term_bytes[position + 1] << 8 | term_bytes[position + 2]
+                                      for position in range(len(term_bytes) - 2)])
+        trigram_positions = numpy.searchsorted(self.trigrams, term_trigrams)
+        if (trigram_positions == len(self.trigrams)).any() or (self.trigrams[trigram_positions] != term_trigrams).any():
+            return numpy.empty(0, dtype=numpy.int32)
+
+        postings = sorted((self.trigram_postings[self.trigram_offsets[position]:self.trigram_offsets[position + 1]]
+                           for position in trigram_positions), key=len)
+        candidates = postings[0]
+        for trigram_postings in postings[1:]:
+            candidates = numpy.intersect1d(candidates, trigram_postings, assume_unique=True)
+
+        # The trigrams may be found in a different order or in different places
+        if len(term_trigrams) > 1 and len(candidates):
+            candidates = candidates[numpy.fromiter((term in text for text in self.texts[candidates]),
+                                                   dtype=bool, count=len(candidates))]
+        return candidates
@@ -1,115 +1,666 @@
+import numpy
 import os
-import pandas
-import pickle
 import sys
-from colorama import Fore, Style
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
+from ControlApplication.CatalogCache import *
+from ControlApplication.FrequencyIndex import *
 from ControlApplication.Logger import *
+from ControlApplication.Metrics import *
+from ControlApplication.Tracer import *
 
 class BaseModel:
+    # Records have no per-instance __dict__. Text values repeated in many 
+    # records (case style, filter type, description, frequencies such as 
+    # "DC" or "-") are interned, all records share one copy of each of them. 
+    # Model numbers are unique and are not interned
+    __slots__ = ("model_number", "case_style", "description")
+
     def __init__(self, model_number, case_style, description):
         self.model_number = model_number
-        self.case_style = case_style
-        self.description = description
+        self.case_style = BaseModel.intern(case_style)
+        self.description = BaseModel.intern(description)
+
+    @staticmethod
+    def intern(value):
+        return sys.intern(value) if type(value) is str else value
+
+    def __setstate__(self, state):
+        # Records pickled by the previous versions of the application (with 
+        # __dict__) are loaded by the configuration migration
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        for attribute_name, value in state.items():
+            setattr(self, attribute_name, value)
 
 class Filter(BaseModel):
-    def __init__(self, model_number, case_style, description, filter_type, passband_f1, passband_f2, stopband_f3, stopband_f4):
+    __slots__ = ("filter_type", "passband_f1", "passband_f2", "stopband_f3", "stopband_f4", "rejection_f3", "rejection_f4")
+
+    def __init__(self, model_number, case_style, description, filter_type, passband_f1, passband_f2, stopband_f3, stopband_f4,
+                 rejection_f3 = None, rejection_f4 = None):
         super().__init__(model_number, case_style, description)
-        self.filter_type = filter_type
-        self.passband_f1 = passband_f1
-        self.passband_f2 = passband_f2
-        self.stopband_f3 = stopband_f3
-        self.stopband_f4 = stopband_f4
+        self.filter_type = BaseModel.intern(filter_type)
+        self.passband_f1 = BaseModel.intern(passband_f1)
+        self.passband_f2 = BaseModel.intern(passband_f2)
+        self.stopband_f3 = BaseModel.intern(stopband_f3)
+        self.stopband_f4 = BaseModel.intern(stopband_f4)
+        self.rejection_f3 = BaseModel.intern(rejection_f3)
+        self.rejection_f4 = BaseModel.intern(rejection_f4)
 
 class Amplifier(BaseModel):
+    __slots__ = ("f_low", "f_high", "gain")
+
     def __init__(self, model_number, case_style, description, f_low, f_high, gain):
         super().__init__(model_number, case_style, description)
-        self.f_low = f_low
-        self.f_high = f_high
-        self.gain = gain
+        self.f_low = BaseModel.intern(f_low)
+        self.f_high = BaseModel.intern(f_high)
+        self.gain = BaseModel.intern(gain)
+
+class ComponentReference:
+    # Component held by a device: only the catalog, the index of the 
+    # component in it and its model number are stored, other values are read 
+    # from the catalog columns when they are requested. Has the same 
+    # attributes as Filter / Amplifier
+    __slots__ = ("catalog", "catalog_index", "model_number")
+
+    def __init__(self, catalog, catalog_index):
+        self.catalog = catalog
+        self.catalog_index = catalog_index
+        self.model_number = catalog.columns["model_number"][catalog_index]
+
+    def __getattr__(self, attribute_name):
+        # Called only for the attributes that are not slots
+        if attribute_name in ComponentReference.__slots__:
+            raise AttributeError(attribute_name)
+        return self.catalog.getComponentValue(self.catalog_index, attribute_name)
+
+    def getComponent(self):
+        return self.catalog.getComponent(self.catalog_index)
+
+class ComponentsCatalog:
+
+    # Frequency values are stored in the .csv files as text: "DC", "475",
+    # "DC-5800", "DC -435", "140-1000", "210 - 1000" or "-" if the value
+    # is not specified. DC is treated as 0 MHz.
+    FREQUENCY_RANGE_PATTERN = r"^(?P<low>DC|\d+(?:\.\d+)?)(?:-(?P<high>\d+(?:\.\d+)?))?$"
+
+    # Columns (.csv column name -> catalog column name) whose text is kept
+    # as is, they are used to create component objects on demand
+    FILTER_TEXT_COLUMNS = {
+        "Model Number": "model_number",
+        "Description": "description",
+        "Passband F1 (MHz)": "passband_f1",
+        "Passband F2 (MHz)": "passband_f2",
+        "Stopband F3 (MHz)": "stopband_f3",
+        "Stopband F4 (MHz)": "stopband_f4",
+        "Rejection @ F3 (dB)": "rejection_f3",
+        "Rejection @ F4 (dB)": "rejection_f4"
+    }
+    AMPLIFIER_TEXT_COLUMNS = {
+        "Model Number": "model_number",
+        "Subcategories": "description",
+        "F Low (MHz)": "f_low",
+        "F High (MHz)": "f_high",
+        "Gain (dB) Typ.": "gain"
+    }
+
+    # Columns with a small number of unique values are stored as integer
+    # codes pointing to the list of categories
+    FILTER_CATEGORICAL_COLUMNS = {
+        "Case Style": "case_style",
+        "Filter Type": "filter_type"
+    }
+    AMPLIFIER_CATEGORICAL_COLUMNS = {
+        "Case Style": "case_style"
+    }
+
+    # Amplifier parameters stored as numbers, NaN if the value is not
+    # specified or the .csv file does not have the column
+    AMPLIFIER_NUMERIC_COLUMNS = {
+        "NF (dB) Typ.": "nf_db",
+        "Power Out (dBm) @ 1dB Comp. Typ.": "p1db_dbm",
+        "Out. IP3 (dBm) Typ.": "oip3_dbm",
+        "Input VSWR (:1) Typ.": "input_vswr",
+        "Output VSWR (:1) Typ.": "output_vswr",
+        "Impedance (Ohms)": "impedance_ohm"
+    }
+    # Parameters of the amplifiers with several operating points ("5/3" V, 
+    # "143/73" mA) are stored as the lowest and the highest listed value
+    # .csv column name -> (<MIN COLUMN NAME>, <MAX COLUMN NAME>)
+    AMPLIFIER_OPERATING_POINT_COLUMNS = {
+        "Voltage (V)": ("voltage_min_v", "voltage_v"),
+        "DC Current (mA)": ("dc_current_min_ma", "dc_current_ma")
+    }
+    OPERATING_POINT_SEPARATOR = "/"
+
+    # Attributes of the component objects
+    FILTER_ATTRIBUTE_NAMES = frozenset([*FILTER_TEXT_COLUMNS.values(), *FILTER_CATEGORICAL_COLUMNS.values()])
+    AMPLIFIER_ATTRIBUTE_NAMES = frozenset([*AMPLIFIER_TEXT_COLUMNS.values(), *AMPLIFIER_CATEGORICAL_COLUMNS.values()])
+
+    BAND_STOP_FILTER_TYPE = "Band Stop"
+    LOW_PASS_FILTER_TYPE = "Low Pass"
+
+    # Changed every time the set of catalog columns changes, catalogs of other 
+    # versions are rebuilt from the .csv files
+    CATALOG_VERSION = 3
+
+    def __init__(self, model_type, columns, categories):
+        self.model_type = model_type
+        # <COLUMN NAME> : <NUMPY ARRAY WITH ONE VALUE PER COMPONENT>
+        self.columns = columns
+        # <CATEGORICAL COLUMN NAME> : <NUMPY ARRAY OF UNIQUE VALUES>
+        self.categories = categories
+        # <MODEL NUMBER> : <COMPONENT INDEX>, built on the first lookup
+        self.model_number_indexes = None
+        # <CASE STYLE CODE> : <COMPONENT INDEXES>, built on the first lookup
+        self.case_style_indexes = None
+        # Text and frequency search index, built on the first search
+        self.search_index = None
+
+    def __len__(self):
+        return len(self.columns["model_number"])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.getComponent(index)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Component index out of range")
+        return self.getComponent(index)
+
+    def getCategory(self, column_name, index):
+        return self.categories[column_name][self.columns[column_name][index]]
+
+    def getReference(self, index):
+        return ComponentReference(self, index)
+
+    def getComponentValue(self, index, attribute_name):
+        # Value of a Filter / Amplifier attribute of the component
+        if attribute_name in self.categories:
+            return self.getCategory(attribute_name, index)
+        if attribute_name in self.getAttributeNames():
+            return self.columns[attribute_name][index]
+        raise AttributeError(f"{self.model_type} has no attribute {attribute_name}")
+
+    def getAttributeNames(self):
+        if self.model_type == ComponentsList.FILTER:
+            return self.FILTER_ATTRIBUTE_NAMES
+        return self.AMPLIFIER_ATTRIBUTE_NAMES
+
+    def getSubset(self, indexes):
+        # Catalog of the components with the given indexes, in the same order
+        indexes = numpy.asarray(indexes, dtype=numpy.int64)
+        columns = {}
+        for column_name, column in self.columns.items():
+            if isinstance(column, numpy.ndarray):
+                columns[column_name] = column[indexes]
+            else:
+                # Text columns read from the dump
+                columns[column_name] = column.take(indexes)
+        return ComponentsCatalog(self.model_type, columns, self.categories)
+
+    def findComponentIndex(self, model_number):
+        # Index of the component with the model number or None
+        if self.model_number_indexes is None:
+            model_numbers = self.columns["model_number"]
+            self.model_number_indexes = {model_numbers[index]: index for index in range(len(self))}
+        return self.model_number_indexes.get(model_number)
+
+    def getCaseStyles(self):
+        # Sorted case styles used by the components
+        return [str(case_style) for case_style in self.categories["case_style"][numpy.unique(self.columns["case_style"])]]
+
+    def getCaseStyleIndexes(self, case_style):
+        # Indexes of the components with the case style, in the catalog order
+        if self.case_style_indexes is None:
+            case_style_codes = self.columns["case_style"]
+            component_indexes = numpy.argsort(case_style_codes, kind="stable")
+            unique_codes, starts = numpy.unique(case_style_codes[component_indexes], return_index=True)
+            self.case_style_indexes = dict(zip(unique_codes.tolist(), numpy.split(component_indexes, starts[1:])))
+
+        case_style_code = numpy.searchsorted(self.categories["case_style"], case_style)
+        if case_style_code >= len(self.categories["case_style"]) or self.categories["case_style"][case_style_code] != case_style:
+            return numpy.empty(0, dtype=numpy.int64)
+        return self.case_style_indexes.get(int(case_style_code), numpy.empty(0, dtype=numpy.int64))
+
+    def search(self, query, limit = None):
+        # Indexes of the components matching the query, see ComponentSearchIndex
+        if self.search_index is None:
+            from ControlApplication.ComponentSearch import ComponentSearchIndex
+            self.search_index = ComponentSearchIndex(self)
+        return self.search_index.search(query, limit)
+
+    def query(self, parametric_query, limit = None):
+        # Indexes of the components matching the parametric query (text or
+        # ParametricQuery), raises ValueError if the query is not valid
+        from ControlApplication.ParametricQuery import ParametricQuery
+        if isinstance(parametric_query, str):
+            parametric_query = ParametricQuery.parse(parametric_query, self.model_type)
+        return parametric_query.evaluate(self, limit)
+
+    def getComponent(self, index):
+        # Component objects are not stored in the catalog, they are created only 
+        # when a specific component is requested
+        columns = self.columns
+        if self.model_type == ComponentsList.FILTER:
+            return Filter(
+                columns["model_number"][index],
+                self.getCategory("case_style", index),
+                columns["description"][index],
+                self.getCategory("filter_type", index),
+                columns["passband_f1"][index],
+                columns["passband_f2"][index],
+                columns["stopband_f3"][index],
+                columns["stopband_f4"][index],
+                columns["rejection_f3"][index],
+                columns["rejection_f4"][index]
+            )
+        elif self.model_type == ComponentsList.AMPLIFIER:
+            return Amplifier(
+                columns["model_number"][index],
+                self.getCategory("case_style", index),
+                columns["description"][index],
+                columns["f_low"][index],
+                columns["f_high"][index],
+                columns["gain"][index]
+            )
+
+    @staticmethod
+    def toText(raw_values, missing_value = "-"):
+        # Missing values (None, NaN) are replaced, everything else is converted to str
+        raw_values = numpy.asarray(raw_values, dtype=object)
+        is_missing = numpy.equal(raw_values, None) | numpy.not_equal(raw_values, raw_values)
+        return numpy.where(is_missing, missing_value, raw_values).astype(str)
+
+    @staticmethod
+    def parseNumber(raw_values):
+        # Vectorized conversion of text values to float ("2.4", "-1.5"), 
+        # unparsable values are converted to NaN
+        text_values = numpy.char.strip(ComponentsCatalog.toText(raw_values))
+        unsigned_values = numpy.char.lstrip(text_values, "+-")
+        has_single_sign = numpy.char.str_len(text_values) - numpy.char.str_len(unsigned_values) <= 1
+        is_number = numpy.char.isdigit(numpy.char.replace(unsigned_values, ".", "", 1)) & has_single_sign
+
+        numbers = numpy.full(len(text_values), numpy.nan)
+        numbers[is_number] = text_values[is_number].astype(numpy.float64)
+        return numbers
+
+    @staticmethod
+    def parseNumberList(raw_values, separator):
+        # Vectorized conversion of the lists of numbers ("5/3", "5.0/3/0") to
+        # (min, max) arrays, a single number is converted to min == max
+        remaining_text = numpy.char.replace(ComponentsCatalog.toText(raw_values), " ", "")
+        values = []
+        while True:
+            list_parts = numpy.char.partition(remaining_text, separator)
+            values.append(ComponentsCatalog.parseNumber(list_parts[:, 0]))
+            if not (list_parts[:, 1] != "").any():
+                break
+            remaining_text = numpy.where(list_parts[:, 1] != "", list_parts[:, 2], "")
+
+        # NaN values (missing parts) are ignored
+        values = numpy.vstack(values)
+        return numpy.fmin.reduce(values, axis=0), numpy.fmax.reduce(values, axis=0)
+
+    @staticmethod
+    def parseFrequencyRange(raw_values):
+        # Vectorized conversion of frequency text values to (low, high) arrays 
+        # in MHz. A single frequency value is converted to a range where 
+        # low == high, unparsable values ("-") are converted to NaN
+        text_values = numpy.char.upper(numpy.char.replace(ComponentsCatalog.toText(raw_values), " ", ""))
+        range_parts = numpy.char.partition(text_values, "-")
+        low_text = numpy.where(range_parts[:, 0] == "DC", "0", range_parts[:, 0])
+
+        low = ComponentsCatalog.parseNumber(low_text)
+        high = ComponentsCatalog.parseNumber(range_parts[:, 2])
+        high = numpy.where(range_parts[:, 1] == "", low, high)
+
+        return low, high
+
+    @staticmethod
+    def fromComponents(model_type, components):
+        # Catalog built from component objects, e.g. the filters installed on a device
+        if model_type == ComponentsList.FILTER:
+            csv_columns = {**ComponentsCatalog.FILTER_TEXT_COLUMNS, **ComponentsCatalog.FILTER_CATEGORICAL_COLUMNS}
+        else:
+            csv_columns = {**ComponentsCatalog.AMPLIFIER_TEXT_COLUMNS, **ComponentsCatalog.AMPLIFIER_CATEGORICAL_COLUMNS}
+
+        return ComponentsCatalog.fromCsvColumns(model_type, {
+            csv_column: [getattr(component, attribute_name, None) for component in components]
+            for csv_column, attribute_name in csv_columns.items()
+        })
+
+    @staticmethod
+    def concatenate(model_type, catalogs):
+        # Catalog with the components of all catalogs in the same order, the 
+        # categorical codes are converted to the union of the categories
+        columns = {}
+        categories = {}
+
+        for column_name in catalogs[0].columns:
+            if column_name in catalogs[0].categories:
+                categories[column_name] = numpy.unique(numpy.concatenate([catalog.categories[column_name] for catalog in catalogs]))
+                columns[column_name] = numpy.concatenate([
+                    numpy.searchsorted(categories[column_name], catalog.categories[column_name])[catalog.columns[column_name]]
+                    for catalog in catalogs]).astype(numpy.int32)
+            elif all(isinstance(catalog.columns[column_name], numpy.ndarray) for catalog in catalogs):
+                columns[column_name] = numpy.concatenate([catalog.columns[column_name] for catalog in catalogs])
+            else:
+                # Text columns read from the dump are joined without decoding their values
+                columns[column_name] = TextColumn.concatenate([catalog.columns[column_name] for catalog in catalogs])
+
+        return ComponentsCatalog(model_type, columns, categories)
+
+    @staticmethod
+    def fromCsvColumns(model_type, csv_columns):
+        # csv_columns: .csv column name -> values, e.g. pandas.DataFrame or dict of lists
+        if model_type == ComponentsList.FILTER:
+            text_columns = ComponentsCatalog.FILTER_TEXT_COLUMNS
+            categorical_columns = ComponentsCatalog.FILTER_CATEGORICAL_COLUMNS
+        else:
+            text_columns = ComponentsCatalog.AMPLIFIER_TEXT_COLUMNS
+            categorical_columns = ComponentsCatalog.AMPLIFIER_CATEGORICAL_COLUMNS
+
+        columns = {}
+        categories = {}
+
+        for csv_column, column_name in text_columns.items():
+            columns[column_name] = numpy.asarray(csv_columns[csv_column], dtype=object)
+
+        for csv_column, column_name in categorical_columns.items():
+            unique_values, codes = numpy.unique(ComponentsCatalog.toText(csv_columns[csv_column]), return_inverse=True)
+            categories[column_name] = unique_values.astype(object)
+            columns[column_name] = codes.astype(numpy.int32)
+
+        if model_type == ComponentsList.FILTER:
+            ComponentsCatalog.__addFilterFrequencyColumns(csv_columns, columns, categories)
+        else:
+            columns["f_low_mhz"], _ = ComponentsCatalog.parseFrequencyRange(csv_columns["F Low (MHz)"])
+            _, columns["f_high_mhz"] = ComponentsCatalog.parseFrequencyRange(csv_columns["F High (MHz)"])
+            columns["gain_db"] = ComponentsCatalog.parseNumber(csv_columns["Gain (dB) Typ."])
+            ComponentsCatalog.__addAmplifierParameterColumns(csv_columns, columns)
+
+        return ComponentsCatalog(model_type, columns, categories)
+
+    @staticmethod
+    def __addAmplifierParameterColumns(csv_columns, columns):
+        components_count = len(columns["model_number"])
+        def getCsvColumn(csv_column):
+            return csv_columns[csv_column] if csv_column in csv_columns else [None] * components_count
+
+        for csv_column, column_name in ComponentsCatalog.AMPLIFIER_NUMERIC_COLUMNS.items():
+            columns[column_name] = ComponentsCatalog.parseNumber(getCsvColumn(csv_column))
+
+        for csv_column, (min_column_name, max_column_name) in ComponentsCatalog.AMPLIFIER_OPERATING_POINT_COLUMNS.items():
+            columns[min_column_name], columns[max_column_name] = ComponentsCatalog.parseNumberList(
+                getCsvColumn(csv_column), ComponentsCatalog.OPERATING_POINT_SEPARATOR)
+
+    @staticmethod
+    def __addFilterFrequencyColumns(csv_columns, columns, categories):
+        f1_low, f1_high = ComponentsCatalog.parseFrequencyRange(csv_columns["Passband F1 (MHz)"])
+        f2_low, f2_high = ComponentsCatalog.parseFrequencyRange(csv_columns["Passband F2 (MHz)"])
+        f3_low, f3_high = ComponentsCatalog.parseFrequencyRange(csv_columns["Stopband F3 (MHz)"])
+        f4_low, f4_high = ComponentsCatalog.parseFrequencyRange(csv_columns["Stopband F4 (MHz)"])
+        rejection_f3 = ComponentsCatalog.parseNumber(csv_columns["Rejection @ F3 (dB)"])
+        rejection_f4 = ComponentsCatalog.parseNumber(csv_columns["Rejection @ F4 (dB)"])
+
+        filter_types = categories["filter_type"][columns["filter_type"]]
+        is_band_stop = filter_types == ComponentsCatalog.BAND_STOP_FILTER_TYPE
+        is_low_pass = filter_types == ComponentsCatalog.LOW_PASS_FILTER_TYPE
+
+        # Passband is either a range in the F1 column ("DC-435", "1400-3900") 
+        # or is specified by the F1 and F2 columns ("6500", "7500")
+        f1_is_range = f1_high > f1_low
+        passband_low = f1_low.copy()
+        passband_high = numpy.where(f1_is_range, f1_high, f2_high)
+
+        # Band stop filters have two passbands: F1 below the stopband and F2 
+        # above it. Stopband is specified by the F3 and F4 columns
+        passband_low[is_band_stop] = numpy.where(f1_is_range, f1_low, 0.0)[is_band_stop]
+        passband_high[is_band_stop] = numpy.where(numpy.isnan(f2_high), f1_high, f2_high)[is_band_stop]
+        f3_high[is_band_stop] = f4_low[is_band_stop]
+        rejection_f3[is_band_stop] = numpy.fmin(rejection_f3, rejection_f4)[is_band_stop]
+        f4_low[is_band_stop] = numpy.nan
+        f4_high[is_band_stop] = numpy.nan
+        rejection_f4[is_band_stop] = numpy.nan
+
+        # Low pass filter rejection only grows between the single F3 frequency 
+        # and the F4 range, so F3 is extended up to the start of F4
+        extend_f3 = is_low_pass & (f3_high == f3_low) & (f4_low > f3_high)
+        f3_high[extend_f3] = f4_low[extend_f3]
+
+        columns["passband_low_mhz"] = passband_low
+        columns["passband_high_mhz"] = passband_high
+        columns["stopband_f3_low_mhz"] = f3_low
+        columns["stopband_f3_high_mhz"] = f3_high
+        columns["rejection_f3_db"] = rejection_f3
+        columns["stopband_f4_low_mhz"] = f4_low
+        columns["stopband_f4_high_mhz"] = f4_high
+        columns["rejection_f4_db"] = rejection_f4
 
 class ComponentsList:
 
     FILTER = "Filter"
     AMPLIFIER = "Amplifier"
 
+    # Rows of a .csv file converted to catalog columns at once: large vendor
+    # exports are parsed chunk by chunk and never held in memory as a whole
+    CSV_CHUNK_ROWS = 50000
+
+    @Tracer.traced("catalog")
     def __init__(self, model_type, models_dir, dump_filename, log_filename = None):
+        start_time = time.perf_counter()
         self.model_type = model_type
+        self.models_dir = models_dir
+        self.dump_file_path = os.path.join(models_dir, dump_filename)
         if log_filename:
-            self.logger = Logger(log_filename)
+            self.logger = Logger.getLogger(log_filename)
         else:
             self.logger = None
-        
-        dump_file_path = os.path.join(models_dir, dump_filename)
-        
-        if os.path.exists(dump_file_path):
-            self.data = self.__loadDump(dump_file_path)
-        else:
-            self.data = self.__getModelsList(models_dir)
-            if self.data is not None:
-                self.__saveDump(dump_file_path)
-            else:
-                init_error_info = (
-                    f"{Fore.RED}{model_type} components initialization error!{Style.RESET_ALL}\n"
-                    f"Make sure that the {Fore.YELLOW}{models_dir}{Style.RESET_ALL} directory contains .csv files describing the available components!" 
-                )
-                print(init_error_info)
-                exit(1)
 
-    def __getModelsList(self, models_dir):
-        models = []
+        # Catalog is replaced as a whole by reload(), objects referring to the
+        # previous catalog continue to use it
+        self.data = None
+        # <CSV FILENAME> : {"size": ..., "mtime_ns": ..., "rows": <ROWS IN THE CATALOG>}, 
+        # in the order of the catalog rows
+        self.csv_files = {}
+        # (<CATALOG>, <FREQUENCY INDEX>), the index is built once on the first 
+        # frequency query, so it does not slow down the application startup
+        self.frequency_index = None
+        self.reload_lock = threading.Lock()
+        self.metrics = MetricsRegistry.getRegistry()
+
+        csv_file_stats = self.__getCsvFileStats()
+        self.data, self.csv_files = self.__loadDump()
+
+        # The dump is valid only for the .csv files from which it was built. If there 
+        # are no .csv files, the existing dump is used without checking. Otherwise
+        # only new and changed .csv files are parsed
+        if self.data is not None and (not csv_file_stats or self.__isUpToDate(csv_file_stats)):
+            self.__observeLoadTime("dump", start_time)
+            return
+
+        catalog, csv_files = self.__updateCatalog(csv_file_stats)
+        if catalog is None:
+            from colorama import Fore, Style
 
-        file_list = [filename for filename in os.listdir(models_dir) if filename.endswith('.csv')]
+            init_error_info = (
+                f"{Fore.RED}{model_type} components initialization error!{Style.RESET_ALL}\n"
+                f"Make sure that the {Fore.YELLOW}{models_dir}{Style.RESET_ALL} directory contains .csv files describing the available components!" 
+            )
+            print(init_error_info)
+            exit(1)
 
-        if not file_list:
+        self.data, self.csv_files = catalog, csv_files
+        self.__saveDump()
+        self.__observeLoadTime("csv", start_time)
+
+    def reload(self):
+        # Merges new, changed and removed .csv files into the catalog, returns
+        # True if the catalog has been replaced. If all .csv files are removed,
+        # the current catalog is kept
+        start_time = time.perf_counter()
+        with self.reload_lock:
+            csv_file_stats = self.__getCsvFileStats()
+            if self.__isUpToDate(csv_file_stats):
+                return False
+
+            catalog, csv_files = self.__updateCatalog(csv_file_stats)
+            if catalog is None:
+                return False
+
+            self.data, self.csv_files = catalog, csv_files
+            self.__saveDump()
+            self.__observeLoadTime("reload", start_time)
+            if self.logger:
+                self.logger.logMessage(f"{self.model_type} catalog reloaded: {len(catalog)} components", Logger.LogLevel.INFO)
+            return True
+
+    def __observeLoadTime(self, source, start_time):
+        # source: "dump" - the dump is up to date, "csv" - the catalog is built 
+        # or updated from the .csv files, "reload" - updated by reload()
+        self.metrics.observe("rpitx_catalog_load_seconds", time.perf_counter() - start_time,
+                             (("model_type", self.model_type), ("source", source)))
+
+    def findFilterIndexes(self, frequency, harmonics = ()):
+        # Catalog indexes of the filters whose passband contains the frequency 
+        # (MHz) and whose stopbands cover the given harmonics, e.g. (2, 3)
+        return self.__getFrequencyIndex(self.data).findFilters(frequency, harmonics)
+
+    def findFilters(self, frequency, harmonics = ()):
+        # The indexes and the filters are taken from the same catalog even if
+        # it is reloaded at the same time
+        catalog = self.data
+        return [catalog[index] for index in self.__getFrequencyIndex(catalog).findFilters(frequency, harmonics)]
+
+    def __getFrequencyIndex(self, catalog):
+        frequency_index = self.frequency_index
+        if frequency_index is None or frequency_index[0] is not catalog:
+            frequency_index = (catalog, FilterFrequencyIndex(catalog))
+            self.frequency_index = frequency_index
+        return frequency_index[1]
+
+    def __getCsvFileStats(self):
+        # <CSV FILENAME> : (<SIZE>, <MODIFICATION TIME NS>) from a single directory listing
+        csv_file_stats = {}
+        with os.scandir(self.models_dir) as directory_entries:
+            for directory_entry in directory_entries:
+                if directory_entry.name.endswith(".csv") and directory_entry.is_file():
+                    file_stat = directory_entry.stat()
+                    csv_file_stats[directory_entry.name] = (file_stat.st_size, file_stat.st_mtime_ns)
+        return csv_file_stats
+
+    def __isUpToDate(self, csv_file_stats):
+        return csv_file_stats == {filename: (csv_file["size"], csv_file["mtime_ns"]) for filename, csv_file in self.csv_files.items()}
+
+    def __updateCatalog(self, csv_file_stats):
+        # (<CATALOG>, <CSV FILES>) built from the rows of the unchanged files of
+        # the current catalog and the parsed new and changed files, (None, None)
+        # if there are no components
+        if not csv_file_stats:
             if self.logger:
                 self.logger.logMessage(f"{self.model_type} model .csv files are missing!", Logger.LogLevel.ERROR)
-            return None 
+            return None, None
+
+        # Rows of the unchanged files keep their order, new and changed files are appended
+        kept_indexes = []
+        csv_files = {}
+        first_row = 0
+        for filename, csv_file in self.csv_files.items():
+            if csv_file_stats.get(filename) == (csv_file["size"], csv_file["mtime_ns"]):
+                kept_indexes.append(numpy.arange(first_row, first_row + csv_file["rows"]))
+                csv_files[filename] = csv_file
+            first_row += csv_file["rows"]
 
+        parsed_filenames = sorted(filename for filename in csv_file_stats if filename not in csv_files)
         with ThreadPoolExecutor() as executor:
-            for model_list in executor.map(self.__processCsvFile, [os.path.join(models_dir, filename) for filename in file_list]):
-                models.extend(model_list)
+            parsed_catalogs = list(executor.map(self.__processCsvFile, 
+                                                [os.path.join(self.models_dir, filename) for filename in parsed_filenames]))
 
-        return models
+        catalogs = []
+        kept_rows_count = sum(len(indexes) for indexes in kept_indexes)
+        if self.data is not None and kept_rows_count == len(self.data):
+            # Only new files are added, the current catalog is used as is
+            catalogs.append(self.data)
+        elif kept_rows_count:
+            catalogs.append(self.data.getSubset(numpy.concatenate(kept_indexes)))
 
-    def __loadDump(self, dump_file_path):
-        with open(dump_file_path, 'rb') as model_list_dump_file:
-            if self.logger:
-                self.logger.logMessage(f"Dump loaded: {dump_file_path}", Logger.LogLevel.INFO)
-            return pickle.load(model_list_dump_file)
+        for filename, parsed_catalog in zip(parsed_filenames, parsed_catalogs):
+            size, mtime_ns = csv_file_stats[filename]
+            csv_files[filename] = {"size": size, "mtime_ns": mtime_ns, "rows": 0 if parsed_catalog is None else len(parsed_catalog)}
+            if parsed_catalog is not None:
+                catalogs.append(parsed_catalog)
+                if self.logger:
+                    self.logger.logMessage(f"Parsed: {filename}, {len(parsed_catalog)} components", Logger.LogLevel.INFO)
+
+        catalogs = [catalog for catalog in catalogs if len(catalog)]
+        if not catalogs:
+            return None, None
+        return ComponentsCatalog.concatenate(self.model_type, catalogs), csv_files
+
+    @Tracer.traced("catalog")
+    def __loadDump(self):
+        # (<CATALOG>, <CSV FILES>) or (None, {}). The dump is memory-mapped, catalog 
+        # columns are read directly from it
+        cached_catalog = CatalogCache.load(self.dump_file_path)
+
+        if cached_catalog is None:
+            return None, {}
+
+        columns, categories, header = cached_catalog
+        if header.get("catalog_version") != ComponentsCatalog.CATALOG_VERSION or header.get("model_type") != self.model_type:
+            return None, {}
+
+        if self.logger:
+            self.logger.logMessage(f"Dump loaded: {self.dump_file_path}", Logger.LogLevel.INFO)
 
+        # Dumps saved by the previous versions have no .csv files list and are rebuilt
+        return ComponentsCatalog(self.model_type, columns, categories), header.get("csv_files", {})
+
+    @Tracer.traced("catalog")
     def __processCsvFile(self, csv_file_path):
-        models_list = []
-
-        df = pandas.read_csv(csv_file_path)
-        for _, row in df.iterrows():
-            if (self.model_type == self.FILTER):
-                model = Filter(
-                    row['Model Number'],
-                    row['Case Style'],
-                    row['Description'],
-                    row['Filter Type'],
-                    row['Passband F1 (MHz)'],
-                    row['Passband F2 (MHz)'],
-                    row['Stopband F3 (MHz)'],
-                    row['Stopband F4 (MHz)']
-                )
-            elif (self.model_type == self.AMPLIFIER):
-                model = Amplifier(
-                    row['Model Number'],
-                    row['Case Style'],
-                    row['Subcategories'],
-                    row['F Low (MHz)'],
-                    row['F High (MHz)'],
-                    row['Gain (dB) Typ.']
-                )
-
-            models_list.append(model)
-        
-        return models_list
-
-    def __saveDump(self, dump_file_path):
-        with open(dump_file_path, 'wb') as model_list_dump_file:
-            pickle.dump(self.data, model_list_dump_file)
+        # Catalog of the components from the .csv file, None if the file has no
+        # components or can not be parsed (the file is skipped until it changes)
+        import pandas
+
+        # Values are read as text, numeric columns are parsed by ComponentsCatalog.
+        # Only one chunk of CSV_CHUNK_ROWS rows is kept as text at a time
+        try:
+            with pandas.read_csv(csv_file_path, dtype=str, chunksize=self.CSV_CHUNK_ROWS) as csv_chunks:
+                chunk_catalogs = [self.__compactTextColumns(ComponentsCatalog.fromCsvColumns(self.model_type, csv_chunk))
+                                  for csv_chunk in csv_chunks if len(csv_chunk)]
+        except (OSError, ValueError, KeyError) as error:
             if self.logger:
-                self.logger.logMessage(f"Dump saved: {dump_file_path}", Logger.LogLevel.INFO)
+                self.logger.logMessage(f"Unable to parse {csv_file_path}: {error!r}", Logger.LogLevel.ERROR)
+            return None
+
+        if not chunk_catalogs:
+            return None
+        return ComponentsCatalog.concatenate(self.model_type, chunk_catalogs)
+
+    def __compactTextColumns(self, catalog):
+        # Text values are kept as UTF-8 data with offsets (as in the dump), not as
+        # one str object per value
+        for column_name, column in catalog.columns.items():
+            if column.dtype == object:
+                catalog.columns[column_name] = TextColumn.fromValues(column)
+        return catalog
+
+    def __saveDump(self):
+        csv_file_paths = [os.path.join(self.models_dir, filename) for filename in self.csv_files]
+        try:
+            # The fingerprint is kept for the tools reading the dump header
+            dump_fingerprint = CatalogCache.getFingerprint(csv_file_paths)
+        except OSError:
+            # A .csv file has been removed after it was parsed
+            dump_fingerprint = None
+
+        CatalogCache.save(self.dump_file_path, self.data.columns, self.data.categories, len(self.data), dump_fingerprint,
+                          {"catalog_version": ComponentsCatalog.CATALOG_VERSION, "model_type": self.model_type,
+                           "csv_files": self.csv_files})
+        if self.logger:
+            self.logger.logMessage(f"Dump saved: {self.dump_file_path}", Logger.LogLevel.INFO)
@@ -0,0 +1,302 @@
+import math
+import os
+import socket
+import socketserver
+import threading
+from ControlApplication.Logger import *
+
+# Default location of the control socket of the rpitx-control daemon
+DEFAULT_SOCKET_PATH = "/tmp/rpitx-control.sock"
+
+class ControlRequestHandler(socketserver.BaseRequestHandler):
+    # One connected client. Commands are newline-terminated text lines, every
+    # non-empty line gets exactly one response line in the same order, so a
+    # client may send many commands without waiting for the responses
+    # (pipelining). All responses to the commands received in one chunk are
+    # sent back with a single write
+    RECEIVE_BUFFER_SIZE = 65536
+    MAX_COMMAND_LENGTH = 1024
+
+    def handle(self):
+        control_server = self.server.control_server
+        pending_data = b""
+
+        while True:
+            try:
+                received_data = self.request.recv(self.RECEIVE_BUFFER_SIZE)
+            except OSError:
+                break
+            if not received_data:
+                break
+
+            command_lines = (pending_data + received_data).split(b"\n")
+            # The last element is an incomplete command (or b"" if the chunk ends with "\n")
+            pending_data = command_lines.pop()
+
+            responses = [control_server.executeCommand(command_line.decode("utf-8", errors="replace"))
+                         for command_line in command_lines if command_line.strip()]
+
+            if len(pending_data) > self.MAX_COMMAND_LENGTH:
+                responses.append("ERROR command is too long")
+                pending_data = b""
+
+            if responses:
+                try:
+                    self.request.sendall(("\n".join(responses) + "\n").encode("utf-8"))
+                except OSError:
+                    break
+
+class ControlSocketServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, control_server):
+        self.control_server = control_server
+        super().__init__(socket_path, ControlRequestHandler)
+
+class ControlServer:
+    # Headless control of the devices of a registry over a local Unix socket. 
+    # Device configurations are loaded and their RF switches are initialized 
+    # once, each command only changes the state of the GPIO pins.
+    #
+    # Commands:
+    #   filter <N>       - activate filter N
+    #   lna <on|off>     - enable or disable the LNA
+    #   freq <MHz>       - activate the best filter for the frequency
+    #   state            - board type, active filter and LNA state
+    # A command is applied to all boards at the same time, it can be sent 
+    # to some of them with a prefix: @<NAME>[,<NAME>...] <COMMAND>
+    # Responses:
+    #   OK <RESULT>
+    #   ERROR <DESCRIPTION>
+    # With several boards the results are given per board: 
+    #   OK filter tx1=2 tx2=5
+    #   ERROR tx2: no filter for 1200.0 MHz
+
+    TARGET_PREFIX = "@"
+
+    def __init__(self, device_registry, socket_path = DEFAULT_SOCKET_PATH, log_filename = None):
+        self.device_registry = device_registry
+        self.socket_path = socket_path
+        self.socket_server = None
+        # Commands from different clients are executed one at a time
+        self.lock = threading.Lock()
+        # <COMMAND> : <HANDLER>
+        self.command_handlers = {
+            "filter": self.__enableFilter,
+            "lna": self.__setLNAState,
+            "freq": self.__enableFilterForFrequency,
+            "state": self.__getState
+        }
+
+        if log_filename:
+            self.logger = Logger.getLogger(log_filename)
+        else:
+            self.logger = None
+
+    def start(self):
+        # A socket left by a previous daemon that was not stopped correctly is removed
+        if os.path.exists(self.socket_path):
+            if self.__isSocketInUse():
+                raise OSError(f"Control socket {self.socket_path} is used by another process!")
+            os.remove(self.socket_path)
+
+        self.socket_server = ControlSocketServer(self.socket_path, self)
+        os.chmod(self.socket_path, 0o660)
+
+        if self.logger:
+            self.logger.logMessage(f"Control server started: {self.socket_path}, devices: "
+                                   f"{', '.join(self.device_registry.getDeviceNames())}", Logger.LogLevel.INFO, True, True)
+
+    def serveForever(self):
+        if self.socket_server is None:
+            self.start()
+        try:
+            self.socket_server.serve_forever()
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self.socket_server is None:
+            return
+
+        self.socket_server.server_close()
+        self.socket_server = None
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+        if self.logger:
+            self.logger.logMessage(f"Control server stopped: {self.socket_path}", Logger.LogLevel.INFO, True, True)
+
+    def shutdown(self):
+        # Stops serveForever() running in another thread
+        if self.socket_server is not None:
+            self.socket_server.shutdown()
+
+    def executeCommand(self, command_line):
+        command_arguments = command_line.split()
+        if not command_arguments:
+            return "ERROR empty command"
+
+        device_names = None
+        if command_arguments[0].startswith(self.TARGET_PREFIX):
+            device_names = command_arguments[0][len(self.TARGET_PREFIX):].split(",")
+            unknown_names = [device_name for device_name in device_names if self.device_registry.getDevice(device_name) is None]
+            if unknown_names:
+                return f"ERROR unknown device: {', '.join(unknown_names)}"
+            command_arguments = command_arguments[1:]
+            if not command_arguments:
+                return "ERROR empty command"
+
+        command_handler = self.command_handlers.get(command_arguments[0].lower())
+        if command_handler is None:
+            return f"ERROR unknown command: {command_arguments[0]}"
+
+        with self.lock:
+            try:
+                response = command_handler(command_arguments[1:], device_names)
+            except Exception as error:
+                # The client gets a response and its connection is kept
+                if self.logger:
+                    self.logger.logMessage(f"Control command '{command_line.strip()}' failed: {error!r}", Logger.LogLevel.ERROR)
+                response = f"ERROR {command_arguments[0].lower()} failed: {error}"
+
+        if self.logger and self.logger.isEnabled(Logger.LogLevel.DEBUG):
+            self.logger.logMessage(f"Control command '{command_line.strip()}': {response}", Logger.LogLevel.DEBUG)
+
+        return response
+
+    def __isSocketInUse(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as test_socket:
+            try:
+                test_socket.connect(self.socket_path)
+            except OSError:
+                return False
+        return True
+
+    def __applyCommand(self, command_name, device_action, device_names):
+        # device_action(device) returns (<IS SUCCESSFUL>, <RESULT OR ERROR DESCRIPTION>)
+        results = self.device_registry.apply(device_action, device_names)
+        failed_results = [(device_name, result) for device_name, (is_successful, result) in results.items() if not is_successful]
+
+        if len(results) == 1:
+            is_successful, result = next(iter(results.values()))
+            return f"OK {command_name} {result}" if is_successful else f"ERROR {result}"
+
+        if failed_results:
+            return "ERROR " + "; ".join(f"{device_name}: {result}" for device_name, result in failed_results)
+        return f"OK {command_name} " + " ".join(f"{device_name}={result}" for device_name, (_, result) in results.items())
+
+    def __enableFilter(self, arguments, device_names):
+        # isdigit() also accepts "²" and other digits int() does not parse
+        if len(arguments) != 1 or not (arguments[0].isascii() and arguments[0].isdecimal()) or int(arguments[0]) < 1:
+            return "ERROR usage: filter <N>"
+        filter_number = int(arguments[0])
+
+        def enableFilter(device):
+            if filter_number > len(device.filters) or device.filters[filter_number - 1].model_number is None:
+                return False, f"filter {filter_number} is not installed"
+            if not device.filter_switch.enableFilter(filter_number):
+                return False, f"filter {filter_number} switching failed"
+            return True, filter_number
+
+        return self.__applyCommand("filter", enableFilter, device_names)
+
+    def __setLNAState(self, arguments, device_names):
+        if len(arguments) != 1 or arguments[0].lower() not in ("on", "off"):
+            return "ERROR usage: lna <on|off>"
+        lna_state = arguments[0].lower()
+
+        def setLNAState(device):
+            if device.lna_switch is None:
+                return False, "board has no LNA"
+            if not device.lna_switch.setLNAState(lna_state == "on"):
+                return False, "LNA switching failed"
+            return True, lna_state
+
+        return self.__applyCommand("lna", setLNAState, device_names)
+
+    def __enableFilterForFrequency(self, arguments, device_names):
+        try:
+            frequency = float(arguments[0]) if len(arguments) == 1 else None
+        except ValueError:
+            frequency = None
+        if frequency is None or not math.isfinite(frequency):
+            return "ERROR usage: freq <MHz>"
+
+        def enableFilterForFrequency(device):
+            filter_number = device.enableFilterForFrequency(frequency)
+            if filter_number is None:
+                return False, f"no filter for {frequency} MHz"
+            return True, filter_number
+
+        return self.__applyCommand("filter", enableFilterForFrequency, device_names)
+
+    def __getState(self, arguments, device_names):
+        results = self.device_registry.apply(self.__getDeviceState, device_names)
+        if len(results) == 1:
+            return f"OK {next(iter(results.values()))}"
+        return "OK " + "; ".join(f"name={device_name} {device_state}" for device_name, device_state in results.items())
+
+    def __getDeviceState(self, device):
+        active_filter = device.filter_switch.getActiveRFPath()
+
+        if device.lna_switch is None:
+            lna_state = "none"
+        elif device.lna_switch.getActiveRFPath() is None:
+            lna_state = "unknown"
+        else:
+            lna_state = "on" if device.lna_switch.is_active else "off"
+
+        return f"board={device.model_name} filter={active_filter or 'none'} lna={lna_state}"
+
+class ControlClient:
+    # Client of the rpitx-control daemon. Commands passed to sendCommands() 
+    # are sent in batches of PIPELINE_DEPTH commands with a single write, the 
+    # responses of a batch are read before the next one is sent, so neither 
+    # side can block on a full socket buffer
+    RECEIVE_BUFFER_SIZE = 65536
+    PIPELINE_DEPTH = 1000
+
+    def __init__(self, socket_path = DEFAULT_SOCKET_PATH):
+        self.client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.client_socket.connect(socket_path)
+        self.received_data = b""
+
+    def sendCommand(self, command):
+        return self.sendCommands([command])[0]
+
+    def sendCommands(self, commands):
+        commands = [command.strip() for command in commands]
+        if any(not command or "\n" in command for command in commands):
+            raise ValueError("Commands must be non-empty single lines!")
+
+        responses = []
+        for batch_start in range(0, len(commands), self.PIPELINE_DEPTH):
+            batch = commands[batch_start:batch_start + self.PIPELINE_DEPTH]
+            self.client_socket.sendall(("\n".join(batch) + "\n").encode("utf-8"))
+            responses += self.__receiveLines(len(batch))
+        return responses
+
+    def close(self):
+        self.client_socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception_info):
+        self.close()
+
+    def __receiveLines(self, lines_count):
+        received_chunks = [self.received_data]
+        received_lines_count = self.received_data.count(b"\n")
+
+        while received_lines_count < lines_count:
+            received_data = self.client_socket.recv(self.RECEIVE_BUFFER_SIZE)
+            if not received_data:
+                raise ConnectionError("Connection closed by the rpitx-control daemon!")
+            received_chunks.append(received_data)
+            received_lines_count += received_data.count(b"\n")
+
+        lines = b"".join(received_chunks).split(b"\n")
+        self.received_data = b"\n".join(lines[lines_count:])
+        return [line.decode("utf-8") for line in lines[:lines_count]]
@@ -1,3 +1,7 @@
+import math
+import numpy
+from ControlApplication.Components import *
+from ControlApplication.GPIOBackend import *
 from ControlApplication.RFSwitch import * 
 
 class Device:
@@ -27,6 +31,16 @@ class Device:
     FILTERS_SWITCH_TRUTH_TABLE = 1
     LNA_SWITCH_TRUTH_TABLE = 2
 
+    # Frequency to filter lookup table covers the rpitx frequency range 
+    # with the step of 1 / FREQUENCY_TABLE_RESOLUTION MHz (10 kHz)
+    FREQUENCY_TABLE_MAX_MHZ = 1500
+    FREQUENCY_TABLE_RESOLUTION = 100
+    # Harmonics whose rejection is used to choose between filters
+    # passing the same frequency
+    FREQUENCY_TABLE_HARMONICS = (2, 3)
+    # Value of the lookup table if none of the filters pass the frequency
+    NO_FILTER = 0
+
     def __init__(self, model_name, log_filename = None):
         self.model_name = model_name
         self.filters = []
@@ -34,19 +48,226 @@ class Device:
         self.lna = []
         self.lna_switch = None
         self.log_filename = log_filename
+        self.frequency_table = None
+        self.switching_engine = None
+        # Pin factory shared by all RF switches of the device
+        self.gpio_backend = None
+        # Name of the loaded configuration and its GPIO pinout:
+        # {"filter_input": [...], "filter_output": [...], "lna_input": [...], "lna_output": [...]}
+        # or None if the default pinout is used
+        self.configuration_name = None
+        self.pinout = None
+        # SwitchStateStore of the initialized RF switches, None if the state is not saved
+        self.switch_state = None
+
+    def getSwitchingEngine(self):
+        # The engine is created together with the first RF switch, it is not 
+        # a part of the saved device configuration
+        if getattr(self, "switching_engine", None) is None:
+            self.switching_engine = SwitchingEngine()
+        return self.switching_engine
 
-    def initFilterRFSwitches(self, input_switch_pinout, output_switch_pinout, use_mock_gpio = False):
+    def getGPIOBackend(self, use_mock_gpio = False, gpiomem_path = None):
+        # gpiomem_path (e.g. /dev/gpiomem): pins are written through the 
+        # memory-mapped GPIO registers, not used with the simulated GPIO. 
+        # Raises OSError if the registers can not be mapped
+        if getattr(self, "gpio_backend", None) is None:
+            if gpiomem_path and not use_mock_gpio:
+                self.gpio_backend = MemoryMappedGPIOBackend.getBackend(gpiomem_path, self.log_filename)
+            else:
+                self.gpio_backend = GPIOZeroBackend(use_mock_gpio, self.log_filename)
+        return self.gpio_backend
+
+    def initFilterRFSwitches(self, input_switch_pinout, output_switch_pinout, use_mock_gpio = False, filter_number = None):
+        # filter_number: filter enabled when the pins are created
         if self.filter_switch is None:
             self.filter_switch = FilterSwitch(input_switch_pinout, output_switch_pinout, 
                                               Device.DEVICE_TYPE_MAPPING[self.model_name][self.FILTERS_SWITCH_TRUTH_TABLE], 
-                                              use_mock_gpio, self.log_filename)
+                                              use_mock_gpio, self.log_filename, self.getSwitchingEngine(),
+                                              self.getGPIOBackend(use_mock_gpio), filter_number)
+            # The lookup table depends only on the installed filters, so it is 
+            # built once together with the filter switch
+            self.frequency_table = self.buildFrequencyTable()
+
+    def buildFrequencyTable(self):
+        # Table cell i describes the frequencies [i, i + 1) / FREQUENCY_TABLE_RESOLUTION MHz 
+        # and contains the number of the filter (RF path) that passes the whole cell 
+        # and gives the deepest rejection of the harmonics, or NO_FILTER
+        cell_count = self.FREQUENCY_TABLE_MAX_MHZ * self.FREQUENCY_TABLE_RESOLUTION
+        cell_low = numpy.arange(cell_count) / self.FREQUENCY_TABLE_RESOLUTION
+        cell_high = (numpy.arange(cell_count) + 1) / self.FREQUENCY_TABLE_RESOLUTION
+
+        frequency_table = numpy.full(cell_count, self.NO_FILTER, dtype=numpy.int8)
+        best_rejection = numpy.full(cell_count, -numpy.inf)
+
+        filter_numbers, filters_catalog = self.getInstalledFilters()
+        if not filter_numbers:
+            return frequency_table
+
+        columns = filters_catalog.columns
+
+        for catalog_index, filter_number in enumerate(filter_numbers):
+            passes_cell = ((columns["passband_low_mhz"][catalog_index] <= cell_low) & 
+                           (cell_high <= columns["passband_high_mhz"][catalog_index]) &
+                           ~self.inStopband(columns, catalog_index, cell_low, cell_high))
+
+            harmonics_rejection = numpy.array([
+                self.getRejection(columns, catalog_index, cell_low * harmonic, cell_high * harmonic)
+                for harmonic in self.FREQUENCY_TABLE_HARMONICS
+            ])
+            rejection_score = self.getRejectionScore(harmonics_rejection)
+
+            is_better = passes_cell & (rejection_score > best_rejection)
+            frequency_table[is_better] = filter_number
+            best_rejection[is_better] = rejection_score[is_better]
+
+        return frequency_table
+
+    def getInstalledFilters(self):
+        # (<FILTER NUMBERS>, <CATALOG WITH ONE ROW PER INSTALLED FILTER>), filters 
+        # are not installed in the skipped slots (BaseModel(None, None, None))
+        installed_filters = [(filter_number, filter_obj) for filter_number, filter_obj in enumerate(self.filters, start=1) 
+                             if filter_obj.model_number is not None]
+        if not installed_filters:
+            return [], None
+        return ([filter_number for filter_number, _ in installed_filters], 
+                self.__getFiltersCatalog([filter_obj for _, filter_obj in installed_filters]))
+
+    def __getFiltersCatalog(self, filters):
+        # Filters referenced from one catalog are taken from its parsed columns, 
+        # other filter objects are parsed again
+        catalogs = {id(filter_obj.catalog) for filter_obj in filters if isinstance(filter_obj, ComponentReference)}
+        if len(catalogs) == 1 and all(isinstance(filter_obj, ComponentReference) for filter_obj in filters):
+            return filters[0].catalog.getSubset([filter_obj.catalog_index for filter_obj in filters])
+        return ComponentsCatalog.fromComponents(ComponentsList.FILTER, filters)
+
+    # The functions below accept the catalog indexes and frequencies as arrays, 
+    # e.g. indexes of shape (<FILTERS>, 1) and frequencies of shape (<POINTS>,) 
+    # give the values for every filter at every point
+
+    @staticmethod
+    def inStopband(columns, catalog_index, low, high):
+        # Frequency range [low, high] intersects one of the stopbands
+        return (((columns["stopband_f3_low_mhz"][catalog_index] <= high) & (low <= columns["stopband_f3_high_mhz"][catalog_index])) |
+                ((columns["stopband_f4_low_mhz"][catalog_index] <= high) & (low <= columns["stopband_f4_high_mhz"][catalog_index])))
+
+    @staticmethod
+    def getRejection(columns, catalog_index, low, high):
+        # Rejection guaranteed over the whole range [low, high], 0 dB outside the stopbands
+        rejection = numpy.zeros(len(low))
+        for stopband in ("f3", "f4"):
+            stopband_rejection = numpy.nan_to_num(columns[f"rejection_{stopband}_db"][catalog_index])
+            covers_range = ((columns[f"stopband_{stopband}_low_mhz"][catalog_index] <= low) & 
+                            (high <= columns[f"stopband_{stopband}_high_mhz"][catalog_index]))
+            rejection = numpy.where(covers_range, numpy.maximum(rejection, stopband_rejection), rejection)
+        return rejection
 
-    def initLNA(self, input_switch_pinout, output_switch_pinout, use_mock_gpio = False):
+    @staticmethod
+    def getRejectionScore(harmonics_rejection):
+        # harmonics_rejection: one row per harmonic. The weakest rejected harmonic 
+        # limits the filter, the total rejection resolves ties between filters
+        return harmonics_rejection.min(axis=0) * 1000 + harmonics_rejection.sum(axis=0)
+
+    def getFilterForFrequency(self, frequency):
+        # Number of the best filter for the frequency (MHz) or None
+        if self.frequency_table is None:
+            self.frequency_table = self.buildFrequencyTable()
+
+        # NaN and infinity are outside the table, int() can not convert them
+        if not math.isfinite(frequency):
+            return None
+        table_index = int(frequency * self.FREQUENCY_TABLE_RESOLUTION)
+        if not 0 <= table_index < len(self.frequency_table):
+            return None
+
+        filter_number = int(self.frequency_table[table_index])
+        return None if filter_number == self.NO_FILTER else filter_number
+
+    def enableFilterForFrequency(self, frequency):
+        # Activates the best filter for the transmit frequency (MHz).
+        # Returns the number of the activated filter or None
+        filter_number = self.getFilterForFrequency(frequency)
+
+        if filter_number is None or not self.filter_switch.enableFilter(filter_number):
+            return None
+
+        return filter_number
+
+    def initLNA(self, input_switch_pinout, output_switch_pinout, use_mock_gpio = False, is_lna_active = None):
+        # is_lna_active: LNA state set when the pins are created
         switch_truth_table = Device.DEVICE_TYPE_MAPPING[self.model_name][self.LNA_SWITCH_TRUTH_TABLE]
         if switch_truth_table and self.lna_switch is None:
             self.lna_switch = LNASwitch(input_switch_pinout, output_switch_pinout, 
                                         switch_truth_table, use_mock_gpio,
-                                        self.log_filename)
+                                        self.log_filename, self.getSwitchingEngine(),
+                                        self.getGPIOBackend(use_mock_gpio), is_lna_active)
+
+    def initRFSwitches(self, default_pinout, use_mock_gpio = False, gpiomem_path = None, switch_state = None):
+        # The switches whose pins are not set in the device configuration 
+        # use default_pinout (same keys as Device.pinout). Raises ValueError 
+        # if a pin is used by two switches. switch_state (SwitchStateStore): 
+        # the pins are created in the saved filter and LNA state, without 
+        # switching through the default state, and every later change is saved
+        pinout = dict(default_pinout)
+        pinout.update(self.pinout or {})
+
+        switch_truth_tables = Device.DEVICE_TYPE_MAPPING[self.model_name]
+        used_pins = pinout["filter_input"] + pinout["filter_output"]
+        if switch_truth_tables[self.LNA_SWITCH_TRUTH_TABLE]:
+            used_pins += pinout["lna_input"] + pinout["lna_output"]
+        if len(set(used_pins)) != len(used_pins):
+            raise ValueError(f"GPIO used by several switches: {sorted(pin for pin in set(used_pins) if used_pins.count(pin) > 1)}")
+
+        self.getGPIOBackend(use_mock_gpio, gpiomem_path)
+
+        filter_number, is_lna_active = switch_state.load() if switch_state else (None, None)
+        # The saved filter may have been removed from the configuration since
+        if filter_number is not None and filter_number not in self.getInstalledFilters()[0]:
+            if self.log_filename:
+                Logger.getLogger(self.log_filename).logMessage(f"Saved filter {filter_number} is not installed, "
+                                                               "the filter switch is not restored", Logger.LogLevel.ERROR)
+            filter_number = None
+
+        try:
+            self.initFilterRFSwitches(pinout["filter_input"], pinout["filter_output"], use_mock_gpio, filter_number)
+            # The LNA will only be initialized if the board supports it
+            self.initLNA(pinout["lna_input"], pinout["lna_output"], use_mock_gpio, is_lna_active)
+        except Exception:
+            self.releaseRFSwitches()
+            raise
+
+        if switch_state:
+            self.switch_state = switch_state
+            switch_state.markUsed()
+            self.filter_switch.rf_path_listener = switch_state.setFilter
+            if self.lna_switch:
+                self.lna_switch.rf_path_listener = lambda rf_path_index: switch_state.setLNAState(rf_path_index == LNASwitch.LNA_RF_PATH)
+
+    def releaseRFSwitches(self):
+        # GPIO pins of the device can be used by another device
+        for rf_switch_wrapper in (self.filter_switch, self.lna_switch):
+            if rf_switch_wrapper is not None:
+                rf_switch_wrapper.input_switch.release()
+                rf_switch_wrapper.output_switch.release()
+        self.filter_switch = None
+        self.lna_switch = None
+        # Changes made after the pins are released to another device are not saved
+        if getattr(self, "switch_state", None) is not None:
+            self.switch_state.close()
+            self.switch_state = None
+
+    def getUsedPins(self):
+        # (<PIN FACTORY>, <GPIO NUMBER>) of the initialized RF switches. The 
+        # same GPIO number of different factories (e.g. GPIO expanders, 
+        # simulated ports) is a different pin
+        used_pins = []
+        for rf_switch_wrapper in (self.filter_switch, self.lna_switch):
+            if rf_switch_wrapper is None:
+                continue
+            for rf_switch in (rf_switch_wrapper.input_switch, rf_switch_wrapper.output_switch):
+                if rf_switch.switch_control:
+                    used_pins += rf_switch.gpio_backend.getUsedPins(rf_switch.switch_control, rf_switch.switch_pinout)
+        return used_pins
 
     def getConfigurationInfo(self):
         delimiter = "=" * 60
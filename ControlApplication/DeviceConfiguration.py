@@ -0,0 +1,329 @@
+import json
+import os
+import pickle
+import re
+import tempfile
+from ControlApplication.Components import *
+from ControlApplication.Device import *
+
+class DeviceConfiguration:
+
+    # Configuration file (JSON):
+    # {"schema_version": 1, "name": "2m-70cm", "board": "rpitx-expansion-board-SP6T-LNA",
+    #  "filters": ["ZX75LP-216-S+", null, ...], "lna": ["ZX60-3018G-S+"],
+    #  "pinout": {"filter_input": [17, 27, 22], "filter_output": [0, 5, 6], ...}}
+    # Components are stored by model number (null - the filter is not
+    # installed) and are taken from the components catalogs when the
+    # configuration is loaded. Several configurations with different
+    # names can be saved for the same board. "pinout" is optional, the
+    # switches whose pins are not set use the default pinout
+    SCHEMA_VERSION = 1
+    FILE_EXTENSION = ".json"
+    LEGACY_FILE_EXTENSION = ".pkl"
+    MIGRATED_FILE_EXTENSION = ".migrated"
+    DEFAULT_NAME = "default"
+    # Name of a migrated <BOARD>.pkl configuration saved by the previous versions
+    LEGACY_NAME = "legacy"
+    # <PINOUT KEY> : <TRUTH TABLE OF THE SWITCH (Device.DEVICE_TYPE_MAPPING INDEX)>
+    PINOUT_SWITCHES = {
+        "filter_input": Device.FILTERS_SWITCH_TRUTH_TABLE,
+        "filter_output": Device.FILTERS_SWITCH_TRUTH_TABLE,
+        "lna_input": Device.LNA_SWITCH_TRUTH_TABLE,
+        "lna_output": Device.LNA_SWITCH_TRUTH_TABLE
+    }
+
+    def __init__(self, name, model_name, filter_model_numbers, lna_model_numbers, pinout = None):
+        self.name = name
+        self.model_name = model_name
+        self.filter_model_numbers = filter_model_numbers
+        self.lna_model_numbers = lna_model_numbers
+        self.pinout = pinout
+
+    @staticmethod
+    def fromDevice(device, name):
+        return DeviceConfiguration(name, device.model_name,
+                                   [filter_obj.model_number for filter_obj in device.filters],
+                                   [lna.model_number for lna in device.lna],
+                                   getattr(device, "pinout", None))
+
+    @staticmethod
+    def getFilename(model_name, name):
+        # Characters that are not allowed in file names are replaced
+        return f"{model_name}_{re.sub(r'[^A-Za-z0-9._-]+', '-', name).strip('-.') or DeviceConfiguration.DEFAULT_NAME}" \
+               f"{DeviceConfiguration.FILE_EXTENSION}"
+
+    @staticmethod
+    def load(configuration_path):
+        # Raises OSError if the file can not be read and ValueError if it is not
+        # a valid configuration
+        with open(configuration_path) as configuration_file:
+            return DeviceConfiguration.fromDict(json.load(configuration_file))
+
+    @staticmethod
+    def fromDict(configuration_data):
+        if not isinstance(configuration_data, dict):
+            raise ValueError("Configuration must be a JSON object")
+        if configuration_data.get("schema_version") != DeviceConfiguration.SCHEMA_VERSION:
+            raise ValueError(f"Unsupported configuration schema version: {configuration_data.get('schema_version')}")
+
+        model_name = configuration_data.get("board")
+        if model_name not in Device.SUPPORTED_DEVICES:
+            raise ValueError(f"Unsupported board: {model_name}")
+
+        filters_count, _, lna_truth_table = Device.DEVICE_TYPE_MAPPING[model_name]
+        filter_model_numbers = configuration_data.get("filters")
+        lna_model_numbers = configuration_data.get("lna", [])
+
+        if not isinstance(filter_model_numbers, list) or len(filter_model_numbers) != filters_count:
+            raise ValueError(f"{model_name} configuration must contain {filters_count} filters")
+        if not isinstance(lna_model_numbers, list) or len(lna_model_numbers) != (1 if lna_truth_table else 0):
+            raise ValueError(f"Wrong number of LNA for {model_name}")
+        if not all(model_number is None or isinstance(model_number, str) for model_number in filter_model_numbers + lna_model_numbers):
+            raise ValueError("Model numbers must be strings or null")
+        if all(model_number is None for model_number in filter_model_numbers):
+            raise ValueError("Configuration does not contain any installed filter")
+
+        pinout = configuration_data.get("pinout")
+        if pinout is not None:
+            DeviceConfiguration.__checkPinout(model_name, pinout)
+
+        return DeviceConfiguration(str(configuration_data.get("name") or DeviceConfiguration.DEFAULT_NAME), model_name,
+                                   filter_model_numbers, lna_model_numbers, pinout)
+
+    @staticmethod
+    def __checkPinout(model_name, pinout):
+        if not isinstance(pinout, dict):
+            raise ValueError("Pinout must be a JSON object")
+
+        for pinout_key, switch_pins in pinout.items():
+            if pinout_key not in DeviceConfiguration.PINOUT_SWITCHES:
+                raise ValueError(f"Unknown pinout key: {pinout_key}")
+
+            switch_truth_table = Device.DEVICE_TYPE_MAPPING[model_name][DeviceConfiguration.PINOUT_SWITCHES[pinout_key]]
+            if switch_truth_table is None:
+                raise ValueError(f"{model_name} has no {pinout_key} switch")
+
+            pins_count = len(next(iter(switch_truth_table.values())))
+            if (not isinstance(switch_pins, list) or len(switch_pins) != pins_count or
+                not all(isinstance(pin, int) and not isinstance(pin, bool) and pin >= 0 for pin in switch_pins)):
+                raise ValueError(f"{pinout_key} pinout must be a list of {pins_count} GPIO numbers")
+
+        all_pins = [pin for switch_pins in pinout.values() for pin in switch_pins]
+        if len(set(all_pins)) != len(all_pins):
+            raise ValueError("Each GPIO can be used only once in the pinout")
+
+    def toDict(self):
+        configuration_data = {
+            "schema_version": self.SCHEMA_VERSION,
+            "name": self.name,
+            "board": self.model_name,
+            "filters": self.filter_model_numbers,
+            "lna": self.lna_model_numbers
+        }
+        if self.pinout is not None:
+            configuration_data["pinout"] = self.pinout
+        return configuration_data
+
+    def save(self, configs_dir, replace_existing = True):
+        # A saved configuration with the same name and board is replaced. 
+        # Raises ValueError if the file belongs to a configuration with 
+        # another name (names differing only in the replaced characters, e.g. 
+        # "a b" and "a-b") and FileExistsError if the file exists and 
+        # replace_existing is False
+        os.makedirs(configs_dir, exist_ok=True)
+
+        filename = self.getFilename(self.model_name, self.name)
+        configuration_path = os.path.join(configs_dir, filename)
+        if os.path.exists(configuration_path):
+            if not replace_existing:
+                raise FileExistsError(f"Configuration file {configuration_path} already exists")
+            try:
+                saved_name = DeviceConfiguration.load(configuration_path).name
+            except (OSError, ValueError):
+                # Invalid file is replaced
+                saved_name = self.name
+            if saved_name != self.name:
+                raise ValueError(f"Name '{self.name}' uses the file of the configuration '{saved_name}' ({filename}), "
+                                 "choose another name")
+        DeviceConfiguration.writeJson(configuration_path, self.toDict())
+        ConfigurationIndex(configs_dir).update(filename, self)
+
+        return configuration_path
+
+    def createDevice(self, filters_catalog, amplifiers_catalog, log_filename = None):
+        # Raises ValueError if a component is missing in the catalog
+        device = Device(self.model_name, log_filename)
+        device.filters = [self.__findComponent(filters_catalog, model_number) for model_number in self.filter_model_numbers]
+        device.lna = [self.__findComponent(amplifiers_catalog, model_number) for model_number in self.lna_model_numbers]
+        device.configuration_name = self.name
+        device.pinout = self.pinout
+        return device
+
+    def __findComponent(self, catalog, model_number):
+        if model_number is None:
+            return BaseModel(None, None, None)
+
+        component_index = catalog.findComponentIndex(model_number)
+        if component_index is None:
+            raise ValueError(f"{catalog.model_type} {model_number} not found in the components list")
+
+        # The device refers to the catalog record, values are not copied
+        return catalog.getReference(component_index)
+
+    @staticmethod
+    def writeJson(file_path, data):
+        # The file is replaced atomically, a reader never sees a partially written file
+        with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(os.path.abspath(file_path)), delete=False) as json_file:
+            json.dump(data, json_file, indent=2)
+            # The data reaches the storage before the file is replaced, a power
+            # loss leaves either the old or the new file
+            json_file.flush()
+            os.fsync(json_file.fileno())
+            temporary_file_path = json_file.name
+
+        os.chmod(temporary_file_path, 0o644)
+        os.replace(temporary_file_path, file_path)
+        # The new directory entry is synced as well, the replaced file survives a power loss
+        directory_fd = os.open(os.path.dirname(os.path.abspath(file_path)), os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+    @staticmethod
+    def findLegacyConfigurations(configs_dir):
+        # Paths of the configurations pickled by the previous versions, the files are not opened
+        if not os.path.isdir(configs_dir):
+            return []
+        return sorted(os.path.join(configs_dir, filename) for filename in os.listdir(configs_dir)
+                      if filename.endswith(DeviceConfiguration.LEGACY_FILE_EXTENSION))
+
+    @staticmethod
+    def getLegacyName(legacy_filename, model_name):
+        # <BOARD>.pkl saved by the previous versions is named LEGACY_NAME, the
+        # rest of other file names is used as the name (e.g. a copy renamed 
+        # to <BOARD>-70cm.pkl is named "70cm")
+        name = os.path.splitext(os.path.basename(legacy_filename))[0]
+        if name.startswith(model_name):
+            name = name[len(model_name):].strip("-_. ")
+        return name or DeviceConfiguration.LEGACY_NAME
+
+    @staticmethod
+    def migrateLegacyConfigurations(configs_dir):
+        # Configurations pickled by the previous versions of the application are
+        # converted by the "migrate" command, the .pkl file is renamed to 
+        # .pkl.migrated. Only the files created by this application on the same 
+        # station must be left in the directory: unpickling a file from an 
+        # untrusted source is unsafe. Existing JSON configurations are not 
+        # replaced. Returns (<[(LEGACY PATH, CONFIGURATION PATH)]>, <[(LEGACY PATH, ERROR)]>)
+        migrated_configurations = []
+        failed_configurations = []
+        for legacy_path in DeviceConfiguration.findLegacyConfigurations(configs_dir):
+            try:
+                with open(legacy_path, "rb") as legacy_file:
+                    device = pickle.load(legacy_file)
+                configuration = DeviceConfiguration.fromDevice(device, DeviceConfiguration.getLegacyName(legacy_path, device.model_name))
+                DeviceConfiguration.fromDict(configuration.toDict())
+                configuration_path = configuration.save(configs_dir, replace_existing=False)
+            except Exception as error:
+                # Damaged files and files whose configuration already exists are left as is
+                failed_configurations.append((legacy_path, str(error) or type(error).__name__))
+                continue
+
+            os.replace(legacy_path, legacy_path + DeviceConfiguration.MIGRATED_FILE_EXTENSION)
+            migrated_configurations.append((legacy_path, configuration_path))
+
+        return migrated_configurations, failed_configurations
+
+class ConfigurationIndex:
+
+    # index.json in the configurations directory:
+    # {"schema_version": 1, "configurations": {<FILENAME>: {"name": ..., "board": ...,
+    #                                                       "size": ..., "mtime_ns": ...}}}
+    # Entries are checked against the size and modification time from a
+    # single listing of the directory, only new and changed configuration
+    # files are opened
+    INDEX_FILENAME = "index.json"
+    SCHEMA_VERSION = 1
+
+    def __init__(self, configs_dir):
+        self.configs_dir = configs_dir
+        self.index_path = os.path.join(configs_dir, self.INDEX_FILENAME)
+
+    def getConfigurations(self):
+        # Sorted list of (<FILENAME>, {"name": ..., "board": ...})
+        if not os.path.isdir(self.configs_dir):
+            return []
+
+        entries = self.__loadEntries()
+        is_changed = False
+        configuration_files = {}
+
+        with os.scandir(self.configs_dir) as directory_entries:
+            for directory_entry in directory_entries:
+                if (directory_entry.name.endswith(DeviceConfiguration.FILE_EXTENSION) and
+                    directory_entry.name != self.INDEX_FILENAME and directory_entry.is_file()):
+                    configuration_files[directory_entry.name] = directory_entry.stat()
+
+        # Removed configuration files
+        for filename in [filename for filename in entries if filename not in configuration_files]:
+            del entries[filename]
+            is_changed = True
+
+        for filename, file_stat in configuration_files.items():
+            entry = entries.get(filename)
+            if entry and entry.get("size") == file_stat.st_size and entry.get("mtime_ns") == file_stat.st_mtime_ns:
+                continue
+
+            try:
+                configuration = DeviceConfiguration.load(os.path.join(self.configs_dir, filename))
+            except (OSError, ValueError):
+                # Invalid files are not shown in the configuration picker
+                entries.pop(filename, None)
+                continue
+
+            entries[filename] = self.__createEntry(configuration, file_stat)
+            is_changed = True
+
+        if is_changed:
+            self.__saveEntries(entries)
+
+        return sorted(entries.items())
+
+    def update(self, filename, configuration):
+        entries = self.__loadEntries()
+        entries[filename] = self.__createEntry(configuration, os.stat(os.path.join(self.configs_dir, filename)))
+        self.__saveEntries(entries)
+
+    def findConfiguration(self, name):
+        # Filename of the configuration with the name, None if there is no
+        # such configuration or the name is used for several boards
+        filenames = [filename for filename, entry in self.getConfigurations() if entry["name"] == name]
+        return filenames[0] if len(filenames) == 1 else None
+
+    def __createEntry(self, configuration, file_stat):
+        return {
+            "name": configuration.name,
+            "board": configuration.model_name,
+            "size": file_stat.st_size,
+            "mtime_ns": file_stat.st_mtime_ns
+        }
+
+    def __loadEntries(self):
+        try:
+            with open(self.index_path) as index_file:
+                index_data = json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+
+        if not isinstance(index_data, dict) or index_data.get("schema_version") != self.SCHEMA_VERSION:
+            return {}
+        return dict(index_data.get("configurations", {}))
+
+    def __saveEntries(self, entries):
+        # The index can always be rebuilt from the configuration files, so
+        # a failed write (e.g. read-only directory) is not an error
+        try:
+            DeviceConfiguration.writeJson(self.index_path, {"schema_version": self.SCHEMA_VERSION, "configurations": entries})
+        except OSError:
+            pass
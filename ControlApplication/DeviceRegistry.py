@@ -0,0 +1,99 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ControlApplication.Logger import *
+
+class DeviceRegistry:
+    # Several boards controlled from one process (e.g. boards stacked through 
+    # GPIO expanders, one per transmit chain). Every device has its own RF 
+    # switches and switching engine, so a change applied to all boards is 
+    # started on each of them at the same time from a pool of threads created 
+    # once with the registry. Switching is concurrent as long as the pin 
+    # writes release the GIL (I/O to the expanders, the GPIO character 
+    # device), writes of the simulated pins (MockFactory) are pure Python and 
+    # are still executed one after another
+
+    def __init__(self, log_filename = None):
+        # <DEVICE NAME> : <DEVICE>, in the order the devices were added
+        self.devices = {}
+        self.executor = None
+        self.lock = threading.Lock()
+
+        if log_filename:
+            self.logger = Logger.getLogger(log_filename)
+        else:
+            self.logger = None
+
+    def addDevice(self, name, device):
+        # Raises ValueError if the name is already used or the board shares 
+        # GPIO pins with another board of the registry
+        with self.lock:
+            if name in self.devices:
+                raise ValueError(f"Device name {name} is already used!")
+
+            used_pins = set(device.getUsedPins())
+            for device_name, registered_device in self.devices.items():
+                shared_pins = used_pins.intersection(registered_device.getUsedPins())
+                if shared_pins:
+                    raise ValueError(f"GPIO {sorted(gpio_number for _, gpio_number in shared_pins)} of {name} "
+                                     f"are already used by {device_name}!")
+
+            self.devices[name] = device
+            # The pool grows with the number of boards, each board gets its own thread
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+        if self.logger:
+            self.logger.logMessage(f"Device {name} ({device.model_name}) added to the registry, "
+                                   f"GPIO: {sorted(gpio_number for _, gpio_number in used_pins)}", Logger.LogLevel.INFO)
+
+    def getDevice(self, name):
+        return self.devices.get(name)
+
+    def getDeviceNames(self):
+        return list(self.devices)
+
+    def apply(self, device_action, device_names = None):
+        # Calls device_action(device) for each device (all by default) and 
+        # returns {<DEVICE NAME> : <RESULT>} in the registry order. Raises 
+        # KeyError for an unknown device name
+        if device_names is None:
+            device_names = list(self.devices)
+        devices = [(device_name, self.devices[device_name]) for device_name in device_names]
+
+        # A single board is switched from the calling thread
+        if len(devices) == 1:
+            device_name, device = devices[0]
+            return {device_name: device_action(device)}
+
+        executor = self.__getExecutor()
+        futures = [(device_name, executor.submit(device_action, device)) for device_name, device in devices]
+        return {device_name: future.result() for device_name, future in futures}
+
+    def applyState(self, filter_number = None, lna_state = None, frequency = None, device_names = None):
+        # Activates filter_number (or the best filter for the frequency, MHz) 
+        # and sets the LNA state (True/False) on the devices, None - not 
+        # changed. Returns {<DEVICE NAME> : <True if all changes succeeded>}
+        def applyDeviceState(device):
+            is_successful = True
+            if frequency is not None:
+                is_successful = device.enableFilterForFrequency(frequency) is not None
+            elif filter_number is not None:
+                is_successful = device.filter_switch.enableFilter(filter_number)
+            if lna_state is not None:
+                is_successful = (device.lna_switch is not None and device.lna_switch.setLNAState(lna_state)) and is_successful
+            return is_successful
+
+        return self.apply(applyDeviceState, device_names)
+
+    def close(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+    def __getExecutor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=len(self.devices), thread_name_prefix="DeviceRegistry")
+            return self.executor
@@ -0,0 +1,369 @@
+import concurrent.futures
+import heapq
+import itertools
+import multiprocessing
+import numpy
+import os
+import re
+from ControlApplication.Components import *
+from ControlApplication.Device import *
+from ControlApplication.FrequencyIndex import *
+from ControlApplication.Logger import *
+
+class FilterSet:
+    # Filters chosen by FilterSetOptimizer, ordered by the passband
+    def __init__(self, catalog, catalog_indexes, bands, bands_coverage, rejection_db, candidates_count, searched_count, evaluated_sets):
+        self.catalog = catalog
+        self.catalog_indexes = catalog_indexes
+        self.model_numbers = [str(catalog.columns["model_number"][index]) for index in catalog_indexes]
+        # [(<LOW MHz>, <HIGH MHz>), ...]
+        self.bands = bands
+        # Part of each band (0 - 1) passed by one of the filters with the minimum rejection of the harmonics
+        self.bands_coverage = bands_coverage
+        # Mean of the weakest harmonic rejection over the covered points, dB
+        self.rejection_db = rejection_db
+        # Filters of the allowed case styles passing a band point with the stopbands
+        # covering the harmonics, the ones left for the search after pruning
+        self.candidates_count = candidates_count
+        self.searched_count = searched_count
+        # Nodes of the search tree that have been evaluated
+        self.evaluated_sets = evaluated_sets
+
+    def getCoverage(self):
+        return sum(self.bands_coverage) / len(self.bands_coverage) if self.bands_coverage else 0.0
+
+    def isComplete(self):
+        return all(band_coverage == 1.0 for band_coverage in self.bands_coverage)
+
+    def getFilters(self, filters_count):
+        # Filters of the device slots, the slots left free are not installed
+        return ([self.catalog.getReference(int(index)) for index in self.catalog_indexes] +
+                [BaseModel(None, None, None) for _ in range(filters_count - len(self.catalog_indexes))])
+
+    def getFilterModelNumbers(self, filters_count):
+        # Model numbers of the device slots as saved in DeviceConfiguration
+        return self.model_numbers + [None] * (filters_count - len(self.model_numbers))
+
+    def getDescription(self):
+        description = "\n".join(f"Filter {filter_number}: {model_number}, {self.catalog.getCategory('case_style', index)}, "
+                                f"{self.catalog.columns['description'][index]}"
+                                for filter_number, (model_number, index) in enumerate(zip(self.model_numbers, self.catalog_indexes), start=1))
+        description += "".join(f"\nBand {low:g} - {high:g} MHz: {band_coverage * 100:.0f}% covered"
+                               for (low, high), band_coverage in zip(self.bands, self.bands_coverage))
+        if self.rejection_db is not None:
+            description += f"\nMean rejection of the weakest harmonic: {self.rejection_db:.0f} dB"
+        return description
+
+class FilterSetSearch:
+    # Branch and bound over the sets of up to filters_count candidates. masks[i]
+    # is the bit set of the band points covered by candidate i, the candidates
+    # are ordered by the number of covered points. A set is extended only with
+    # the candidates following its last one, and a branch is cut when the
+    # covered points together with the largest gains of the remaining slots
+    # can not beat the best set found so far. The best coverage can be shared
+    # by the process pool workers through a multiprocessing.Value, each worker
+    # then cuts its branches by the sets found by the others
+
+    # Search of the process pool worker, created by initWorker
+    worker_search = None
+
+    def __init__(self, masks, filters_count, points_count, best_covered = 0, shared_best = None):
+        self.masks = masks
+        self.filters_count = filters_count
+        self.points_count = points_count
+        self.best_covered = best_covered
+        self.shared_best = shared_best
+        # (<COVERED POINTS>, <CANDIDATES>) of the best set found by this search
+        self.best_set = None
+        self.evaluated_sets = 0
+
+    @staticmethod
+    def initWorker(masks, filters_count, points_count, shared_best):
+        FilterSetSearch.worker_search = FilterSetSearch(masks, filters_count, points_count, shared_best.value, shared_best)
+
+    @staticmethod
+    def searchWorkerBranch(first_candidate):
+        worker_search = FilterSetSearch.worker_search
+        worker_search.best_set = None
+        worker_search.evaluated_sets = 0
+        return worker_search.searchBranch(first_candidate), worker_search.evaluated_sets
+
+    def searchBranch(self, first_candidate):
+        # Best set starting with the candidate, None if it is not better than the known one
+        self.__extend(first_candidate + 1, [first_candidate], self.masks[first_candidate], self.filters_count - 1)
+        return self.best_set
+
+    def search(self):
+        for first_candidate in range(len(self.masks)):
+            self.searchBranch(first_candidate)
+        return self.best_set
+
+    def __getBestCovered(self):
+        if self.shared_best is not None:
+            self.best_covered = max(self.best_covered, self.shared_best.value)
+        return self.best_covered
+
+    def __setBestSet(self, covered, candidates):
+        self.best_covered = covered
+        self.best_set = (covered, list(candidates))
+        if self.shared_best is not None:
+            with self.shared_best.get_lock():
+                self.shared_best.value = max(self.shared_best.value, covered)
+
+    def __extend(self, next_candidate, candidates, covered_mask, free_slots):
+        self.evaluated_sets += 1
+        covered = bin(covered_mask).count("1")
+        if covered > self.__getBestCovered():
+            self.__setBestSet(covered, candidates)
+        if free_slots == 0 or covered == self.points_count:
+            return
+
+        # Points that each following candidate adds to the set
+        gains = [bin(mask & ~covered_mask).count("1") for mask in self.masks[next_candidate:]]
+        if covered + sum(heapq.nlargest(free_slots, gains)) <= self.__getBestCovered():
+            return
+
+        # Largest gain of the candidates from each one to the last one, the gains
+        # of the following candidates only decrease as the set is extended
+        max_gains = list(itertools.accumulate(reversed(gains), max))[::-1] + [0]
+        for offset, gain in enumerate(gains):
+            best_covered = self.__getBestCovered()
+            if covered + free_slots * max_gains[offset] <= best_covered:
+                break
+            if gain == 0 or covered + gain + (free_slots - 1) * max_gains[offset + 1] <= best_covered:
+                continue
+            candidate = next_candidate + offset
+            self.__extend(candidate + 1, candidates + [candidate], covered_mask | self.masks[candidate], free_slots - 1)
+
+class FilterSetOptimizer:
+    # Chooses the filters of a board (3, 4 or 6 slots) covering the target bands.
+    # Every band is sampled at POINTS_PER_BAND points, a point is covered by a
+    # filter passing it whose stopbands reject each harmonic by at least
+    # min_rejection_db. The set covering the largest part of the bands (each
+    # band has the same weight) with the fewest filters is searched:
+    #   - candidates are the filters found by FilterFrequencyIndex at the band
+    #     points, in the allowed case styles
+    #   - a candidate covering a subset of the points of another one is not used
+    #   - the sets are searched by FilterSetSearch, the top-level branches are
+    #     spread over a process pool (one worker per core). The greedy set is
+    #     the initial bound
+    #   - the filters of the found set are replaced with the ones covering the
+    #     same points with deeper rejection of the harmonics
+    # With the default harmonics (Device.FREQUENCY_TABLE_HARMONICS) a covered
+    # point is switched by the device to a filter meeting the minimum rejection
+    POINTS_PER_BAND = 200
+    HARMONICS = Device.FREQUENCY_TABLE_HARMONICS
+    MIN_REJECTION_DB = 20
+    # Smaller searches are done in the calling process, starting the workers takes longer
+    PARALLEL_MIN_CANDIDATES = 24
+    TASKS_PER_WORKER = 8
+    # "144-146", "28-29.7MHz", bands are separated by spaces or commas
+    BAND_PATTERN = re.compile(r"^(?P<low>\d+(?:\.\d+)?)-(?P<high>\d+(?:\.\d+)?)(?:mhz)?$")
+
+    def __init__(self, filters_catalog, frequency_index = None, log_filename = None):
+        self.catalog = filters_catalog
+        self.frequency_index = frequency_index if frequency_index is not None else FilterFrequencyIndex(filters_catalog)
+        if log_filename:
+            self.logger = Logger.getLogger(log_filename)
+        else:
+            self.logger = None
+
+    @staticmethod
+    def parseBands(text):
+        # Raises ValueError if a band is not set as <LOW>-<HIGH> MHz
+        bands = []
+        for band_text in re.split(r"[\s,]+", text.strip().lower()):
+            band_match = FilterSetOptimizer.BAND_PATTERN.match(band_text)
+            if not band_match or float(band_match["low"]) > float(band_match["high"]) or float(band_match["high"]) <= 0:
+                raise ValueError(f"Invalid band: {band_text}, bands are set as <LOW>-<HIGH> MHz")
+            bands.append((float(band_match["low"]), float(band_match["high"])))
+        return bands
+
+    def optimize(self, bands, filters_count, case_styles = None, min_rejection_db = MIN_REJECTION_DB,
+                 harmonics = HARMONICS, max_workers = None):
+        # Best FilterSet of up to filters_count filters. case_styles - allowed
+        # case styles (None - all). Raises ValueError if the constraints are not valid
+        if not bands or filters_count < 1:
+            raise ValueError("At least one band and one filter slot are needed")
+        if not harmonics or any(harmonic < 2 for harmonic in harmonics):
+            raise ValueError("Harmonics start from 2")
+
+        points = numpy.concatenate([numpy.linspace(low, high, self.POINTS_PER_BAND) for low, high in bands])
+        candidates = self.__findCandidates(points, case_styles, harmonics)
+        rejection = self.__getCleanRejection(candidates, points, harmonics, min_rejection_db)
+        candidate_rows, masks = self.__pruneCandidates(rejection)
+
+        if self.logger:
+            self.logger.logMessage(f"Filter set search: {len(candidates)} candidates, {len(candidate_rows)} after pruning, "
+                                   f"{len(points)} band points", Logger.LogLevel.DEBUG)
+
+        chosen_rows, evaluated_sets = self.__search(masks, filters_count, len(points), max_workers)
+        chosen_rows = self.__improveRejection([int(candidate_rows[row]) for row in chosen_rows], rejection)
+        return self.__createFilterSet(candidates, chosen_rows, rejection, bands, len(candidate_rows), evaluated_sets)
+
+    def __findCandidates(self, points, case_styles, harmonics):
+        # Catalog indexes of the filters passing at least one point with the
+        # stopbands covering the harmonics
+        found_indexes = [self.frequency_index.findFilters(point, harmonics) for point in points]
+        candidates = numpy.unique(numpy.concatenate(found_indexes)) if found_indexes else numpy.empty(0, dtype=numpy.int64)
+
+        if case_styles:
+            case_style_codes = []
+            for case_style in case_styles:
+                case_style_indexes = self.catalog.getCaseStyleIndexes(case_style)
+                if not len(case_style_indexes):
+                    raise ValueError(f"Unknown case style: {case_style}")
+                case_style_codes.append(self.catalog.columns["case_style"][case_style_indexes[0]])
+            candidates = candidates[numpy.isin(self.catalog.columns["case_style"][candidates], case_style_codes)]
+        return candidates
+
+    def __getCleanRejection(self, candidates, points, harmonics, min_rejection_db):
+        # Weakest harmonic rejection of every candidate at every point, (<CANDIDATES>, <POINTS>),
+        # -inf where the candidate does not cover the point
+        columns = self.catalog.columns
+        catalog_indexes = candidates[:, None]
+        passes_point = ((columns["passband_low_mhz"][catalog_indexes] <= points) &
+                        (points <= columns["passband_high_mhz"][catalog_indexes]) &
+                        ~Device.inStopband(columns, catalog_indexes, points, points))
+        rejection = numpy.array([Device.getRejection(columns, catalog_indexes, points * harmonic, points * harmonic)
+                                 for harmonic in harmonics]).min(axis=0)
+        return numpy.where(passes_point & (rejection >= min_rejection_db), rejection, -numpy.inf)
+
+    def __pruneCandidates(self, rejection):
+        # (<ROWS OF THE CANDIDATES USED IN THE SEARCH>, <THEIR POINT BIT SETS>), ordered by
+        # the number of covered points and the rejection. Candidates covering no points,
+        # the same points or a subset of the points of a preceding candidate are removed
+        is_covered = numpy.isfinite(rejection)
+        covered_counts = is_covered.sum(axis=1)
+        total_rejection = numpy.where(is_covered, rejection, 0).sum(axis=1)
+        # numpy.lexsort sorts by the last key first
+        order = numpy.lexsort((-total_rejection, -covered_counts))
+
+        candidate_rows = []
+        masks = []
+        for row in order:
+            if covered_counts[row] == 0:
+                break
+            mask = int.from_bytes(numpy.packbits(is_covered[row], bitorder="little").tobytes(), "little")
+            if any(mask & ~kept_mask == 0 for kept_mask in masks):
+                continue
+            candidate_rows.append(row)
+            masks.append(mask)
+        return candidate_rows, masks
+
+    def __search(self, masks, filters_count, points_count, max_workers):
+        # (<ROWS OF THE BEST SET IN masks>, <EVALUATED SETS>): the most covered
+        # points with up to filters_count filters, then the fewest filters covering them
+        best_rows, best_covered = self.__getGreedySet(masks, filters_count)
+        evaluated_sets = 0
+
+        if best_covered < points_count:
+            best_set, evaluated_sets = self.__runSearch(masks, filters_count, points_count, best_covered, max_workers)
+            if best_set is not None:
+                best_covered, best_rows = best_set
+
+        # Sets found by the search are extended only by the filters adding points,
+        # but a filter may be covered by the ones added after it
+        best_rows = self.__removeRedundantRows(masks, best_rows)
+        if best_covered < points_count:
+            return best_rows, evaluated_sets
+
+        for search_filters_count in range(1, len(best_rows)):
+            # All points are covered, only a set covering them all can be found
+            best_set, search_evaluated_sets = self.__runSearch(masks, search_filters_count, points_count, best_covered - 1, max_workers)
+            evaluated_sets += search_evaluated_sets
+            if best_set is not None:
+                best_rows = best_set[1]
+                break
+        return best_rows, evaluated_sets
+
+    def __runSearch(self, masks, filters_count, points_count, best_covered, max_workers):
+        # (<(COVERED POINTS, ROWS) OF A SET COVERING MORE THAN best_covered POINTS OR None>, <EVALUATED SETS>)
+        max_workers = max_workers or os.cpu_count() or 1
+        if max_workers == 1 or len(masks) < self.PARALLEL_MIN_CANDIDATES:
+            filter_set_search = FilterSetSearch(masks, filters_count, points_count, best_covered)
+            return filter_set_search.search(), filter_set_search.evaluated_sets
+
+        shared_best = multiprocessing.Value("q", best_covered)
+        with concurrent.futures.ProcessPoolExecutor(max_workers, initializer=FilterSetSearch.initWorker,
+                                                    initargs=(masks, filters_count, points_count, shared_best)) as executor:
+            # The first branches are the largest ones, several small tasks per worker balance the load
+            results = list(executor.map(FilterSetSearch.searchWorkerBranch, range(len(masks)),
+                                        chunksize=max(len(masks) // (max_workers * self.TASKS_PER_WORKER), 1)))
+
+        # Ties go to the earlier branch
+        best_sets = [best_set for best_set, _ in results if best_set is not None]
+        evaluated_sets = sum(branch_sets for _, branch_sets in results)
+        if not best_sets:
+            return None, evaluated_sets
+        return max(best_sets, key=lambda best_set: best_set[0]), evaluated_sets
+
+    def __removeRedundantRows(self, masks, rows):
+        # Rows whose points are covered by the other rows of the set are removed
+        rows = list(rows)
+        for row in list(reversed(rows)):
+            other_mask = 0
+            for other_row in rows:
+                if other_row != row:
+                    other_mask |= masks[other_row]
+            if masks[row] & ~other_mask == 0:
+                rows.remove(row)
+        return rows
+
+    def __getGreedySet(self, masks, filters_count):
+        # Candidates adding the most points one by one
+        greedy_rows = []
+        covered_mask = 0
+        for _ in range(filters_count):
+            gains = [bin(mask & ~covered_mask).count("1") for mask in masks]
+            if not gains or max(gains) == 0:
+                break
+            best_row = gains.index(max(gains))
+            greedy_rows.append(best_row)
+            covered_mask |= masks[best_row]
+        return greedy_rows, bin(covered_mask).count("1")
+
+    def __improveRejection(self, chosen_rows, rejection):
+        # Each chosen filter is replaced with the candidate that keeps the covered
+        # points and gives the largest total rejection, until nothing changes
+        def getScore(rows):
+            best_rejection = rejection[rows].max(axis=0)
+            is_covered = numpy.isfinite(best_rejection)
+            return is_covered.sum(), best_rejection[is_covered].sum()
+
+        if not chosen_rows:
+            return chosen_rows
+        covered, total_rejection = getScore(chosen_rows)
+        is_improved = True
+        while is_improved:
+            is_improved = False
+            for slot in range(len(chosen_rows)):
+                other_rows = chosen_rows[:slot] + chosen_rows[slot + 1:]
+                # Rejection of the set with every candidate in the slot, (<CANDIDATES>, <POINTS>)
+                base_rejection = rejection[other_rows].max(axis=0) if other_rows else numpy.full(rejection.shape[1], -numpy.inf)
+                slot_rejection = numpy.maximum(rejection, base_rejection)
+                is_covered = numpy.isfinite(slot_rejection)
+                slot_covered = is_covered.sum(axis=1)
+                slot_total = numpy.where(is_covered, slot_rejection, 0).sum(axis=1)
+                slot_total[(slot_covered < covered) | numpy.isin(numpy.arange(len(rejection)), other_rows)] = -numpy.inf
+
+                best_row = int(numpy.argmax(slot_total))
+                if slot_total[best_row] > total_rejection:
+                    chosen_rows[slot] = best_row
+                    total_rejection = slot_total[best_row]
+                    is_improved = True
+        return chosen_rows
+
+    def __createFilterSet(self, candidates, chosen_rows, rejection, bands, searched_count, evaluated_sets):
+        # Filters are placed in the slots from the lowest passband
+        catalog_indexes = sorted((int(candidates[row]) for row in chosen_rows),
+                                 key=lambda index: (self.catalog.columns["passband_high_mhz"][index], self.catalog.columns["passband_low_mhz"][index], index))
+        if chosen_rows:
+            best_rejection = rejection[chosen_rows].max(axis=0)
+        else:
+            best_rejection = numpy.full(len(bands) * self.POINTS_PER_BAND, -numpy.inf)
+        is_covered = numpy.isfinite(best_rejection)
+
+        bands_coverage = [float(band_covered.mean()) for band_covered in numpy.split(is_covered, len(bands))]
+        rejection_db = float(best_rejection[is_covered].mean()) if is_covered.any() else None
+        return FilterSet(self.catalog, catalog_indexes, list(bands), bands_coverage, rejection_db, len(candidates), searched_count, evaluated_sets)
@@ -0,0 +1,145 @@
+import itertools
+import numpy
+
+class IntervalTree:
+
+    # Index of the missing child node
+    NO_NODE = -1
+
+    def __init__(self, low, high, ids = None):
+        # Closed intervals [low, high], intervals with NaN edges are not indexed.
+        # ids allows several intervals to point to the same catalog row
+        low = numpy.asarray(low, dtype=numpy.float64)
+        high = numpy.asarray(high, dtype=numpy.float64)
+        self.ids = numpy.arange(len(low)) if ids is None else numpy.asarray(ids)
+
+        # <NODE> : (<CENTER>, <LEFT NODE>, <RIGHT NODE>, <LOWS SORTED>, <IDS BY LOW>, <HIGHS SORTED>, <IDS BY HIGH>)
+        self.nodes = []
+
+        valid_intervals = numpy.flatnonzero(~(numpy.isnan(low) | numpy.isnan(high)))
+        self.root = self.__buildNode(low, high, valid_intervals)
+
+    def __buildNode(self, low, high, intervals):
+        if len(intervals) == 0:
+            return self.NO_NODE
+
+        # The median of all interval edges splits the intervals into two halves
+        center = numpy.median(numpy.concatenate((low[intervals], high[intervals])))
+
+        is_left = high[intervals] < center
+        is_right = low[intervals] > center
+        overlapping = intervals[~(is_left | is_right)]
+
+        by_low = overlapping[numpy.argsort(low[overlapping], kind="stable")]
+        by_high = overlapping[numpy.argsort(high[overlapping], kind="stable")]
+
+        node_index = len(self.nodes)
+        self.nodes.append(None)
+
+        left_node = self.__buildNode(low, high, intervals[is_left])
+        right_node = self.__buildNode(low, high, intervals[is_right])
+
+        self.nodes[node_index] = (center, left_node, right_node,
+                                  low[by_low], self.ids[by_low],
+                                  high[by_high], self.ids[by_high])
+
+        return node_index
+
+    def stab(self, point):
+        # Returns the ids of all intervals containing the point.
+        # Only one node per tree level is visited: O(log n + k)
+        found = []
+        node_index = self.root
+
+        while node_index != self.NO_NODE:
+            center, left_node, right_node, lows, ids_by_low, highs, ids_by_high = self.nodes[node_index]
+
+            if point < center:
+                # All intervals of the node end after the point
+                found.append(ids_by_low[:numpy.searchsorted(lows, point, side="right")])
+                node_index = left_node
+            elif point > center:
+                # All intervals of the node start before the point
+                found.append(ids_by_high[numpy.searchsorted(highs, point, side="left"):])
+                node_index = right_node
+            else:
+                found.append(ids_by_low)
+                break
+
+        if not found:
+            return numpy.empty(0, dtype=self.ids.dtype)
+
+        return numpy.concatenate(found)
+
+class FilterFrequencyIndex:
+
+    # Sets of harmonics for which the index is built together with the catalog,
+    # index for any other set is built on the first query and then reused
+    PREBUILT_HARMONICS = [(), (2,), (2, 3)]
+
+    def __init__(self, catalog):
+        self.columns = catalog.columns
+        # <HARMONICS> : <TREE OF FUNDAMENTAL FREQUENCY INTERVALS SUITABLE FOR THE FILTER>
+        self.harmonics_trees = {}
+
+        for harmonics in self.PREBUILT_HARMONICS:
+            self.__getHarmonicsTree(harmonics)
+
+    def __getHarmonicsTree(self, harmonics):
+        harmonics = tuple(sorted(set(harmonics)))
+        if harmonics not in self.harmonics_trees:
+            self.harmonics_trees[harmonics] = self.__buildHarmonicsTree(harmonics)
+        return self.harmonics_trees[harmonics]
+
+    def __buildHarmonicsTree(self, harmonics):
+        # Harmonic h*f is covered by the stopband [low, high] when the fundamental 
+        # f is inside [low / h, high / h]. Intersecting the passband with such 
+        # intervals gives the fundamental frequencies for which the filter meets 
+        # all conditions, so a single stabbing query returns only matching filters.
+        # Each harmonic may be covered by any of the two stopbands, so up to 
+        # 2 ** len(harmonics) intervals are stored for a filter
+        stopbands = [
+            (self.columns["stopband_f3_low_mhz"], self.columns["stopband_f3_high_mhz"]),
+            (self.columns["stopband_f4_low_mhz"], self.columns["stopband_f4_high_mhz"])
+        ]
+
+        interval_lows = []
+        interval_highs = []
+        interval_ids = []
+
+        for covering_stopbands in itertools.product(stopbands, repeat=len(harmonics)):
+            low = self.columns["passband_low_mhz"]
+            high = self.columns["passband_high_mhz"]
+
+            for harmonic, (stopband_low, stopband_high) in zip(harmonics, covering_stopbands):
+                # NaN (missing stopband) propagates and the interval is not indexed
+                low = numpy.maximum(low, stopband_low / harmonic)
+                high = numpy.minimum(high, stopband_high / harmonic)
+
+            is_valid = low <= high
+            interval_lows.append(low[is_valid])
+            interval_highs.append(high[is_valid])
+            interval_ids.append(numpy.flatnonzero(is_valid))
+
+        return IntervalTree(numpy.concatenate(interval_lows), numpy.concatenate(interval_highs), 
+                            numpy.concatenate(interval_ids))
+
+    def inStopband(self, filter_indexes, frequency):
+        return (((self.columns["stopband_f3_low_mhz"][filter_indexes] <= frequency) & 
+                 (frequency <= self.columns["stopband_f3_high_mhz"][filter_indexes])) |
+                ((self.columns["stopband_f4_low_mhz"][filter_indexes] <= frequency) & 
+                 (frequency <= self.columns["stopband_f4_high_mhz"][filter_indexes])))
+
+    def findFilters(self, frequency, harmonics = ()):
+        # Filters whose passband contains the frequency and whose stopbands cover 
+        # each of the requested harmonics (2 -> 2f, 3 -> 3f, ...)
+        filter_indexes = self.__getHarmonicsTree(harmonics).stab(frequency)
+
+        # Several intervals of one filter may contain the frequency
+        if len(harmonics) > 0:
+            filter_indexes = numpy.unique(filter_indexes)
+        else:
+            filter_indexes = numpy.sort(filter_indexes)
+
+        # The stopband of a band stop filter lies between its two passbands
+        return filter_indexes[~self.inStopband(filter_indexes, frequency)]
@@ -0,0 +1,208 @@
+import mmap
+import os
+import threading
+from ControlApplication.Logger import *
+
+class GPIOZeroBackend():
+    # GPIO pins of all RF switches of a device are created through one gpiozero
+    # pin factory: MockFactory to simulate GPIO ports (used to run and debug
+    # the application on non-Raspberry Pi devices) or the default factory.
+    # Pin writes go directly to the pin objects, without the OutputDevice
+    # value property
+    IS_BATCHED = False
+
+    def __init__(self, use_mock_gpio = False, log_filename = None):
+        if log_filename:
+            self.logger = Logger.getLogger(log_filename)
+        else:
+            self.logger = None
+
+        if use_mock_gpio:
+            # gpiozero is imported only when the pins are used
+            from gpiozero.pins.mock import MockFactory
+            self.pin_factory = MockFactory()
+
+            if self.logger:
+                self.logger.logMessage("gpiozero used MockFactory for GPIO operation!", Logger.LogLevel.INFO)
+        else:
+            self.pin_factory = None
+
+    def createOutputs(self, gpio_numbers, initial_values):
+        # initial_values: level of each pin set when the output is created.
+        # Returns the output devices or None if the pin factory is not
+        # available (the application is not running on a Raspberry Pi)
+        from gpiozero import BadPinFactory, OutputDevice
+
+        try:
+            return [OutputDevice(pin=gpio_number, initial_value=initial_value, pin_factory=self.pin_factory)
+                    for gpio_number, initial_value in zip(gpio_numbers, initial_values)]
+        except BadPinFactory:
+            return None
+
+    def releaseOutputs(self, outputs):
+        for output_device in outputs:
+            output_device.close()
+
+    def getUsedPins(self, outputs, gpio_numbers):
+        # (<PIN FACTORY>, <GPIO NUMBER>): the default factory is shared by all backends
+        return [(output_device.pin_factory, gpio_number) for output_device, gpio_number in zip(outputs, gpio_numbers)]
+
+    def compileWrites(self, outputs, pin_writes):
+        # pin_writes: ordered list of (<PIN INDEX>, <GPIO STATE>), the pins
+        # are written one at a time in this order
+        return [(outputs[pin_index].pin, gpio_state) for pin_index, gpio_state in pin_writes]
+
+    def applyWrites(self, compiled_writes):
+        for pin, gpio_state in compiled_writes:
+            pin.state = gpio_state
+
+    def beginBatch(self):
+        pass
+
+    def endBatch(self):
+        pass
+
+class MemoryMappedGPIOBackend():
+    # Switch pins are written through the GPIO registers of the BCM2835-BCM2711
+    # (Raspberry Pi 1-4) mapped from /dev/gpiomem: all pins of a bank that are
+    # set HIGH are written with one GPSETn write, the pins set LOW with one
+    # GPCLRn write. Both writes take a few nanoseconds, much less than the
+    # switching time of the RF switches, so the order of the pin writes is not
+    # used. Between beginBatch() and endBatch() the writes of several switches
+    # (the input and output switches of an RF path) are collected and applied
+    # together. A plain file of at least MAP_SIZE bytes can be used instead of
+    # /dev/gpiomem: the register values are written to the file.
+    # One backend is created for each registers file and shared by all 
+    # devices (getBackend()), so a pin can not be used by two boards
+    IS_BATCHED = True
+
+    DEFAULT_GPIOMEM_PATH = "/dev/gpiomem"
+    MAP_SIZE = 4096
+    # Register offsets (32-bit words)
+    GPFSEL0 = 0x00 // 4
+    GPSET0 = 0x1C // 4
+    GPCLR0 = 0x28 // 4
+    # 54 GPIO pins: GPFSEL0-5 with 10 pins each, banks 0 (GPIO 0-31) and 1 (GPIO 32-53)
+    GPIO_COUNT = 54
+    PINS_PER_BANK = 32
+    PINS_PER_FUNCTION_REGISTER = 10
+    FUNCTION_OUTPUT = 0b001
+    FUNCTION_MASK = 0b111
+
+    # <REGISTERS FILE PATH> : <BACKEND>
+    backends = {}
+    backends_lock = threading.Lock()
+
+    @staticmethod
+    def getBackend(gpiomem_path = DEFAULT_GPIOMEM_PATH, log_filename = None):
+        gpiomem_path = os.path.realpath(gpiomem_path)
+        with MemoryMappedGPIOBackend.backends_lock:
+            if gpiomem_path not in MemoryMappedGPIOBackend.backends:
+                MemoryMappedGPIOBackend.backends[gpiomem_path] = MemoryMappedGPIOBackend(gpiomem_path, log_filename)
+            return MemoryMappedGPIOBackend.backends[gpiomem_path]
+
+    def __init__(self, gpiomem_path = DEFAULT_GPIOMEM_PATH, log_filename = None):
+        # Raises OSError if the registers can not be mapped
+        if log_filename:
+            self.logger = Logger.getLogger(log_filename)
+        else:
+            self.logger = None
+
+        self.gpiomem_path = os.path.realpath(gpiomem_path)
+        gpiomem_fd = os.open(gpiomem_path, os.O_RDWR | os.O_SYNC)
+        try:
+            self.gpiomem = mmap.mmap(gpiomem_fd, self.MAP_SIZE, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        except ValueError:
+            raise OSError(f"{gpiomem_path} is smaller than {self.MAP_SIZE} bytes!") from None
+        finally:
+            os.close(gpiomem_fd)
+        self.registers = memoryview(self.gpiomem).cast("I")
+        self.used_gpio_numbers = set()
+        self.lock = threading.Lock()
+        # Writes collected between beginBatch() and endBatch() by each thread 
+        # (boards of a registry are switched from different threads):
+        # batch_state.writes - list of (<BANK>, <SET MASK>, <CLEAR MASK>) or None
+        self.batch_state = threading.local()
+
+        if self.logger:
+            self.logger.logMessage(f"GPIO registers mapped from {gpiomem_path}", Logger.LogLevel.INFO)
+
+    def createOutputs(self, gpio_numbers, initial_values):
+        # Outputs are the GPIO numbers. Raises ValueError if a pin is not
+        # available or is already used by another switch
+        with self.lock:
+            for gpio_number in gpio_numbers:
+                if not 0 <= gpio_number < self.GPIO_COUNT:
+                    raise ValueError(f"GPIO{gpio_number} is not available!")
+                if gpio_number in self.used_gpio_numbers:
+                    raise ValueError(f"GPIO{gpio_number} is already used!")
+
+            for gpio_number, initial_value in zip(gpio_numbers, initial_values):
+                # The output level is written before the pin is switched to the
+                # output mode, so the pin does not glitch to the previous level
+                self.__writeBanks(self.__getBankMasks([(gpio_number, initial_value)]))
+
+                function_register = self.GPFSEL0 + gpio_number // self.PINS_PER_FUNCTION_REGISTER
+                function_shift = gpio_number % self.PINS_PER_FUNCTION_REGISTER * 3
+                self.registers[function_register] = ((self.registers[function_register] & ~(self.FUNCTION_MASK << function_shift)) |
+                                                     self.FUNCTION_OUTPUT << function_shift)
+                self.used_gpio_numbers.add(gpio_number)
+
+        return list(gpio_numbers)
+
+    def releaseOutputs(self, outputs):
+        # The pins keep their function and level
+        with self.lock:
+            self.used_gpio_numbers.difference_update(outputs)
+
+    def getUsedPins(self, outputs, gpio_numbers):
+        return [(self, gpio_number) for gpio_number in outputs]
+
+    def compileWrites(self, outputs, pin_writes):
+        # [(<BANK>, <SET MASK>, <CLEAR MASK>)]
+        return self.__getBankMasks([(outputs[pin_index], gpio_state) for pin_index, gpio_state in pin_writes])
+
+    def applyWrites(self, compiled_writes):
+        batch_writes = getattr(self.batch_state, "writes", None)
+        if batch_writes is None:
+            self.__writeBanks(compiled_writes)
+        else:
+            batch_writes += compiled_writes
+
+    def beginBatch(self):
+        self.batch_state.writes = []
+
+    def endBatch(self):
+        batch_writes = getattr(self.batch_state, "writes", None)
+        self.batch_state.writes = None
+        if not batch_writes:
+            return
+
+        # Writes of the same bank are merged
+        bank_masks = {}
+        for bank, set_mask, clear_mask in batch_writes:
+            bank_mask = bank_masks.setdefault(bank, [0, 0])
+            bank_mask[0] |= set_mask
+            bank_mask[1] |= clear_mask
+        self.__writeBanks([(bank, set_mask, clear_mask) for bank, (set_mask, clear_mask) in bank_masks.items()])
+
+    def close(self):
+        with MemoryMappedGPIOBackend.backends_lock:
+            if MemoryMappedGPIOBackend.backends.get(self.gpiomem_path) is self:
+                del MemoryMappedGPIOBackend.backends[self.gpiomem_path]
+        self.registers.release()
+        self.gpiomem.close()
+
+    def __getBankMasks(self, gpio_writes):
+        bank_masks = {}
+        for gpio_number, gpio_state in gpio_writes:
+            bank_mask = bank_masks.setdefault(gpio_number // self.PINS_PER_BANK, [0, 0])
+            bank_mask[0 if gpio_state else 1] |= 1 << gpio_number % self.PINS_PER_BANK
+        return [(bank, set_mask, clear_mask) for bank, (set_mask, clear_mask) in sorted(bank_masks.items())]
+
+    def __writeBanks(self, bank_masks):
+        for bank, set_mask, clear_mask in bank_masks:
+            if set_mask:
+                self.registers[self.GPSET0 + bank] = set_mask
+            if clear_mask:
+                self.registers[self.GPCLR0 + bank] = clear_mask
@@ -0,0 +1,131 @@
+import numpy
+from ControlApplication.Device import *
+
+class CoverageBand:
+    # Continuous frequency range [low_mhz, high_mhz] of the sweep passed by
+    # the same filter (filter_number is Device.NO_FILTER for a gap)
+    def __init__(self, low_mhz, high_mhz, filter_number, model_number, harmonics_rejection, is_clean):
+        self.low_mhz = low_mhz
+        self.high_mhz = high_mhz
+        self.filter_number = filter_number
+        self.model_number = model_number
+        # <HARMONIC> : <LOWEST REJECTION IN THE BAND, dB>
+        self.harmonics_rejection = harmonics_rejection
+        # Every harmonic is rejected by at least the minimum rejection
+        self.is_clean = is_clean
+
+    def isGap(self):
+        return self.filter_number == Device.NO_FILTER
+
+    def getDescription(self):
+        frequencies = f"{self.low_mhz:.2f} - {self.high_mhz:.2f} MHz"
+        if self.isGap():
+            return f"{frequencies}: no filter"
+        rejection = ", ".join(f"H{harmonic} {rejection:.0f} dB" for harmonic, rejection in self.harmonics_rejection.items())
+        return f"{frequencies}: filter {self.filter_number} ({self.model_number}), {rejection}{'' if self.is_clean else ', WEAK'}"
+
+class HarmonicCoverage:
+    # Sweep of the fundamental frequency from 0 to max_frequency_mhz with the
+    # step of 1 / resolution MHz. At every point the filter the device
+    # switches to is the one passing the point with the deepest rejection of
+    # Device.FREQUENCY_TABLE_HARMONICS (the rule of Device.buildFrequencyTable),
+    # its rejection of each analyzed harmonic is taken from the stopband
+    # columns of the catalog (0 dB outside the stopbands). All filters are
+    # evaluated at all points at once, ranges narrower than the step may be
+    # missed. The device does not switch to any filter above the end of its
+    # frequency table (Device.getFilterForFrequency), these points are gaps
+    MAX_FREQUENCY_MHZ = Device.FREQUENCY_TABLE_MAX_MHZ
+    # Points per MHz (100 kHz step)
+    RESOLUTION = 10
+    HARMONICS = (2, 3, 4, 5)
+    # A covered range is clean if every harmonic is rejected at least this much
+    MIN_REJECTION_DB = 20
+
+    def __init__(self, device, max_frequency_mhz = MAX_FREQUENCY_MHZ, resolution = RESOLUTION,
+                 harmonics = HARMONICS, min_rejection_db = MIN_REJECTION_DB):
+        self.device = device
+        self.harmonics = tuple(harmonics)
+        self.min_rejection_db = min_rejection_db
+        self.frequencies = numpy.arange(int(round(max_frequency_mhz * resolution)) + 1) / resolution
+        # Filter number at every point, Device.NO_FILTER if no filter passes it
+        self.filter_numbers = numpy.full(len(self.frequencies), Device.NO_FILTER, dtype=numpy.int8)
+        # Rejection of each harmonic by the chosen filter, (<HARMONICS>, <POINTS>), NaN in the gaps
+        self.harmonics_rejection = numpy.full((len(self.harmonics), len(self.frequencies)), numpy.nan)
+        self.model_numbers = {}
+
+        filter_numbers, filters_catalog = device.getInstalledFilters()
+        if filter_numbers:
+            self.__analyze(filter_numbers, filters_catalog)
+        self.bands = self.__getBands()
+
+    def __analyze(self, filter_numbers, filters_catalog):
+        columns = filters_catalog.columns
+        self.model_numbers = {filter_number: filters_catalog.columns["model_number"][catalog_index]
+                              for catalog_index, filter_number in enumerate(filter_numbers)}
+        # (<FILTERS>, 1) against (<POINTS>,): one row per installed filter
+        catalog_indexes = numpy.arange(len(filter_numbers))[:, None]
+        frequencies = self.frequencies
+
+        passes_point = ((columns["passband_low_mhz"][catalog_indexes] <= frequencies) &
+                        (frequencies <= columns["passband_high_mhz"][catalog_indexes]) &
+                        ~Device.inStopband(columns, catalog_indexes, frequencies, frequencies))
+
+        # Rejection of every harmonic used by the device or analyzed, (<HARMONICS>, <FILTERS>, <POINTS>)
+        all_harmonics = sorted(set(self.harmonics) | set(Device.FREQUENCY_TABLE_HARMONICS))
+        rejection = numpy.array([Device.getRejection(columns, catalog_indexes, frequencies * harmonic, frequencies * harmonic)
+                                 for harmonic in all_harmonics])
+
+        # Ties are resolved to the lower filter number, as in the device frequency table
+        rejection_score = Device.getRejectionScore(rejection[[all_harmonics.index(harmonic) for harmonic in Device.FREQUENCY_TABLE_HARMONICS]])
+        best_filters = numpy.argmax(numpy.where(passes_point, rejection_score, -numpy.inf), axis=0)
+        is_covered = passes_point.any(axis=0) & (frequencies < Device.FREQUENCY_TABLE_MAX_MHZ)
+
+        self.filter_numbers[is_covered] = numpy.array(filter_numbers, dtype=numpy.int8)[best_filters[is_covered]]
+        harmonic_rows = numpy.array([all_harmonics.index(harmonic) for harmonic in self.harmonics], dtype=numpy.int64)
+        harmonics_rejection = rejection[harmonic_rows[:, None], best_filters, numpy.arange(len(frequencies))]
+        self.harmonics_rejection[:, is_covered] = harmonics_rejection[:, is_covered]
+
+    def __getBands(self):
+        # Bands start where the filter or the clean state changes
+        if self.harmonics_rejection.shape[0]:
+            is_clean = numpy.nan_to_num(self.harmonics_rejection.min(axis=0), nan=-numpy.inf) >= self.min_rejection_db
+        else:
+            is_clean = numpy.ones(len(self.frequencies), dtype=bool)
+        is_clean &= self.filter_numbers != Device.NO_FILTER
+        band_starts = numpy.flatnonzero(numpy.concatenate(([True], (self.filter_numbers[1:] != self.filter_numbers[:-1]) |
+                                                                   (is_clean[1:] != is_clean[:-1]))))
+        band_ends = numpy.append(band_starts[1:], len(self.frequencies)) - 1
+
+        # Lowest rejection of each harmonic in every band
+        band_rejection = numpy.fmin.reduceat(self.harmonics_rejection, band_starts, axis=1) if self.harmonics else None
+
+        bands = []
+        for band_number, (band_start, band_end) in enumerate(zip(band_starts, band_ends)):
+            filter_number = int(self.filter_numbers[band_start])
+            harmonics_rejection = ({} if filter_number == Device.NO_FILTER or band_rejection is None else
+                                   {harmonic: float(band_rejection[harmonic_number, band_number])
+                                    for harmonic_number, harmonic in enumerate(self.harmonics)})
+            bands.append(CoverageBand(float(self.frequencies[band_start]), float(self.frequencies[band_end]), filter_number,
+                                      self.model_numbers.get(filter_number), harmonics_rejection, bool(is_clean[band_start])))
+        return bands
+
+    def getGaps(self, low_mhz = None, high_mhz = None):
+        # Gaps and weak (not clean) ranges overlapping [low_mhz, high_mhz], clipped to it
+        low_mhz = self.frequencies[0] if low_mhz is None else low_mhz
+        high_mhz = self.frequencies[-1] if high_mhz is None else high_mhz
+        return [CoverageBand(max(band.low_mhz, low_mhz), min(band.high_mhz, high_mhz), band.filter_number, band.model_number,
+                             band.harmonics_rejection, band.is_clean)
+                for band in self.bands if not band.is_clean and band.low_mhz <= high_mhz and low_mhz <= band.high_mhz]
+
+    def getSummary(self, operating_bands = ()):
+        # operating_bands: [(<LOW MHz>, <HIGH MHz>), ...], their gaps are listed separately
+        step = self.frequencies[1] - self.frequencies[0] if len(self.frequencies) > 1 else 0
+        summary = (f"{self.device.model_name}: 0 - {self.frequencies[-1]:.0f} MHz, step {step * 1e3:.0f} kHz, "
+                   f"harmonics {', '.join(map(str, self.harmonics))}, clean >= {self.min_rejection_db:g} dB\n")
+        summary += "Band map:\n" + "\n".join(f"  {band.getDescription()}" for band in self.bands)
+
+        for low_mhz, high_mhz in operating_bands:
+            gaps = self.getGaps(low_mhz, high_mhz)
+            summary += f"\nOperating band {low_mhz:g} - {high_mhz:g} MHz: {'covered cleanly' if not gaps else 'GAPS'}"
+            summary += "".join(f"\n  {gap.getDescription()}" for gap in gaps)
+        return summary
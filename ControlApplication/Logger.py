@@ -1,18 +1,82 @@
+import atexit
 import datetime
+import os
+import queue
+import threading
+import time
 from enum import Enum
 
 class Logger:
 
     class LogLevel(Enum):
-        ERROR = 1,
+        ERROR = 1
         INFO = 2
+        DEBUG = 3
 
     DELIMITER = "-" * 60
 
-    def __init__(self, log_filename):
+    # Messages are written to the file by a background thread, the file
+    # buffer is flushed at least once per FLUSH_INTERVAL seconds
+    FLUSH_INTERVAL = 1.0
+    # The log file is rotated when it grows beyond MAX_FILE_SIZE bytes,
+    # BACKUP_COUNT previous files (DebugInfo.log.1, ...) are kept
+    MAX_FILE_SIZE = 5 * 1024 * 1024
+    BACKUP_COUNT = 3
+
+    # Message that stops the background thread
+    STOP_WRITING = None
+
+    # <LOG FILENAME> : <LOGGER>
+    __loggers = {}
+    __loggers_lock = threading.Lock()
+
+    @staticmethod
+    def getLogger(log_filename, log_level = None):
+        # All application objects writing to the same file share one logger.
+        # log_level is applied only when the logger is created
+        with Logger.__loggers_lock:
+            if log_filename not in Logger.__loggers:
+                Logger.__loggers[log_filename] = Logger(log_filename, log_level or Logger.LogLevel.DEBUG)
+            return Logger.__loggers[log_filename]
+
+    @staticmethod
+    def closeAll():
+        # Writes all queued messages, used before the process is replaced by exec
+        with Logger.__loggers_lock:
+            loggers = list(Logger.__loggers.values())
+        for logger in loggers:
+            logger.close()
+
+    @staticmethod
+    def __unregisterLogger(logger):
+        # getLogger() creates a new logger for the file of a closed logger
+        with Logger.__loggers_lock:
+            if Logger.__loggers.get(logger.log_filename) is logger:
+                del Logger.__loggers[logger.log_filename]
+
+    def __init__(self, log_filename, log_level = LogLevel.DEBUG):
         self.log_filename = log_filename
+        self.log_level = log_level
+        self.message_queue = queue.SimpleQueue()
+        # After close() the messages are written by the calling thread (e.g. 
+        # an error of exec after Logger.closeAll()), the file is opened for 
+        # each message
+        self.is_closed = False
+        self.close_lock = threading.Lock()
+
+        self.writer_thread = threading.Thread(target=self.__writeMessages, name="Logger", daemon=True)
+        self.writer_thread.start()
+        # Messages remaining in the queue are written when the application exits
+        atexit.register(self.close)
+
+    def isEnabled(self, level):
+        # Messages without a level are treated as INFO messages
+        return (level or Logger.LogLevel.INFO).value <= self.log_level.value
 
     def logMessage(self, message, level = None, use_delimiter = False, timestamp = False):
+        if not self.isEnabled(level):
+            return
+
         log_message = message
 
         if timestamp:
@@ -22,5 +86,121 @@ class Logger:
         if use_delimiter:
             log_message = f"{self.DELIMITER}\n" + log_message + f"\n{self.DELIMITER}"
 
-        with open(self.log_filename, "a") as file:
-            file.write(f"{log_message}\n")
\ No newline at end of file
+        if self.is_closed:
+            self.__writeClosed(f"{log_message}\n")
+        else:
+            self.message_queue.put(f"{log_message}\n")
+
+    def flush(self):
+        # Blocks until all messages logged before the call are written to the file
+        if not self.is_closed and self.writer_thread.is_alive():
+            flushed = threading.Event()
+            self.message_queue.put(flushed)
+            flushed.wait()
+
+    def close(self):
+        with self.close_lock:
+            if self.is_closed:
+                return
+            if self.writer_thread.is_alive():
+                self.message_queue.put(self.STOP_WRITING)
+                self.writer_thread.join()
+            self.is_closed = True
+        Logger.__unregisterLogger(self)
+
+        # Messages queued after the background thread was stopped
+        try:
+            while True:
+                message = self.message_queue.get_nowait()
+                if isinstance(message, threading.Event):
+                    message.set()
+                elif message is not self.STOP_WRITING:
+                    self.__writeClosed(message)
+        except queue.Empty:
+            pass
+
+    def __writeClosed(self, message):
+        with self.close_lock:
+            log_file = self.__writeMessage(None, message)
+            if log_file is not None:
+                try:
+                    log_file.close()
+                except OSError:
+                    pass
+
+    def __writeMessages(self):
+        log_file = None
+        last_flush_time = time.monotonic()
+        has_unflushed_messages = False
+        is_running = True
+
+        while is_running:
+            # Waiting for new messages, but not longer than until the next scheduled flush
+            if has_unflushed_messages:
+                timeout = max(0.0, last_flush_time + self.FLUSH_INTERVAL - time.monotonic())
+            else:
+                timeout = None
+
+            batch = []
+            try:
+                batch.append(self.message_queue.get(timeout=timeout))
+                # Everything queued in the meantime is written in the same batch
+                while True:
+                    batch.append(self.message_queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            flush_requests = []
+            for item in batch:
+                if item is self.STOP_WRITING:
+                    is_running = False
+                elif isinstance(item, threading.Event):
+                    flush_requests.append(item)
+                else:
+                    log_file = self.__writeMessage(log_file, item)
+                    has_unflushed_messages = True
+
+            if has_unflushed_messages and (flush_requests or not is_running or
+                                           time.monotonic() - last_flush_time >= self.FLUSH_INTERVAL):
+                self.__flushFile(log_file)
+                last_flush_time = time.monotonic()
+                has_unflushed_messages = False
+
+            for flushed in flush_requests:
+                flushed.set()
+
+        if log_file is not None:
+            log_file.close()
+
+    def __writeMessage(self, log_file, message):
+        # Errors of writing to the log file must not stop the application
+        try:
+            if log_file is None:
+                log_file = open(self.log_filename, "a")
+
+            log_file.write(message)
+
+            if log_file.tell() >= self.MAX_FILE_SIZE:
+                log_file.close()
+                log_file = None
+                self.__rotateFiles()
+                log_file = open(self.log_filename, "a")
+        except OSError:
+            pass
+
+        return log_file
+
+    def __flushFile(self, log_file):
+        try:
+            if log_file is not None:
+                log_file.flush()
+        except OSError:
+            pass
+
+    def __rotateFiles(self):
+        # DebugInfo.log -> DebugInfo.log.1 -> DebugInfo.log.2 -> ...
+        for backup_number in range(self.BACKUP_COUNT - 1, 0, -1):
+            backup_filename = f"{self.log_filename}.{backup_number}"
+            if os.path.exists(backup_filename):
+                os.replace(backup_filename, f"{self.log_filename}.{backup_number + 1}")
+        os.replace(self.log_filename, f"{self.log_filename}.1")
@@ -0,0 +1,240 @@
+import atexit
+import bisect
+import collections
+import math
+import os
+import tempfile
+import threading
+from ControlApplication.Logger import *
+
+class MetricsRegistry:
+    # Counters and fixed-bucket histograms of the application, exported in the
+    # Prometheus text format. Values are recorded without a lock: each thread
+    # adds to its own shard, the shards are summed only when the metrics are
+    # exported. Shards of the finished threads (pool workers, daemon client
+    # threads) are merged into one when a new thread starts recording
+    COUNTER = "counter"
+    HISTOGRAM = "histogram"
+
+    # Bucket upper bounds, seconds
+    SWITCH_LATENCY_BUCKETS = (5e-6, 10e-6, 25e-6, 50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 2.5e-3, 10e-3)
+    CATALOG_LOAD_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    # <METRIC NAME> : (<TYPE>, <HELP>, <BUCKETS>)
+    METRICS = {
+        "rpitx_rf_path_switches_total":
+            (COUNTER, "RF path activations of a filter or LNA switch that changed the RF path", None),
+        "rpitx_rf_path_switch_latency_seconds":
+            (HISTOGRAM, "Time from the RF path activation call until both switches are applied", SWITCH_LATENCY_BUCKETS),
+        "rpitx_rf_switch_activations_total":
+            (COUNTER, "RF outputs activated by writing the switch pins", None),
+        "rpitx_rf_switch_failed_activations_total":
+            (COUNTER, "RF output activations that failed while writing the switch pins", None),
+        "rpitx_rf_switch_redundant_activations_total":
+            (COUNTER, "Activations of the already active RF output, the pins are not written", None),
+        "rpitx_catalog_load_seconds":
+            (HISTOGRAM, "Components catalog load time: from the dump, built from the .csv files or reloaded", CATALOG_LOAD_BUCKETS)
+    }
+
+    __registry = None
+    __registry_lock = threading.Lock()
+
+    @staticmethod
+    def getRegistry():
+        # All application objects record to one registry
+        with MetricsRegistry.__registry_lock:
+            if MetricsRegistry.__registry is None:
+                MetricsRegistry.__registry = MetricsRegistry()
+            return MetricsRegistry.__registry
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread_local = threading.local()
+        # (<THREAD>, <SHARD>), a shard is {(<METRIC NAME>, <LABELS>) : <VALUE>},
+        # labels are ((<NAME>, <VALUE>), ...)
+        self.thread_shards = []
+        # Values of the finished threads
+        self.finished_shard = {}
+
+    def incrementCounter(self, metric_name, labels = (), value = 1):
+        try:
+            shard = self.thread_local.shard
+        except AttributeError:
+            shard = self.__createShard()
+        shard[(metric_name, labels)] += value
+
+    def observe(self, metric_name, value, labels = ()):
+        # Histogram value is a list: count of each bucket (the last one is +Inf)
+        # followed by the sum of the observed values
+        try:
+            shard = self.thread_local.shard
+        except AttributeError:
+            shard = self.__createShard()
+        metric_key = (metric_name, labels)
+        histogram = shard.get(metric_key)
+        buckets = self.METRICS[metric_name][2]
+        if histogram is None:
+            histogram = shard[metric_key] = [0] * (len(buckets) + 2)
+        histogram[bisect.bisect_left(buckets, value)] += 1
+        histogram[-1] += value
+
+    def __createShard(self):
+        # Missing counters are 0
+        shard = self.thread_local.shard = collections.defaultdict(int)
+        with self.lock:
+            finished_shards = [thread_shard for thread, thread_shard in self.thread_shards if not thread.is_alive()]
+            for finished_shard in finished_shards:
+                self.__mergeShard(self.finished_shard, finished_shard)
+            self.thread_shards = [(thread, thread_shard) for thread, thread_shard in self.thread_shards if thread.is_alive()]
+            self.thread_shards.append((threading.current_thread(), shard))
+        return shard
+
+    @staticmethod
+    def __mergeShard(target_shard, shard):
+        # dict.copy() and list() are done at once under the GIL, a shard can
+        # be copied while its thread records new values
+        for metric_key, value in shard.copy().items():
+            if isinstance(value, list):
+                target_value = target_shard.get(metric_key)
+                value = list(value)
+                target_shard[metric_key] = value if target_value is None else [a + b for a, b in zip(target_value, value)]
+            else:
+                target_shard[metric_key] = target_shard.get(metric_key, 0) + value
+
+    def getValues(self):
+        # {(<METRIC NAME>, <LABELS>) : <VALUE>} summed over all threads
+        values = {}
+        with self.lock:
+            self.__mergeShard(values, self.finished_shard)
+            for _, shard in self.thread_shards:
+                self.__mergeShard(values, shard)
+        return values
+
+    def getPrometheusText(self):
+        values = self.getValues()
+        lines = []
+        for metric_name, (metric_type, metric_help, buckets) in self.METRICS.items():
+            lines.append(f"# HELP {metric_name} {metric_help}")
+            lines.append(f"# TYPE {metric_name} {metric_type}")
+            for (value_name, labels), value in sorted(values.items(), key=lambda item: (item[0][0], item[0][1])):
+                if value_name != metric_name:
+                    continue
+                if metric_type == self.COUNTER:
+                    lines.append(f"{metric_name}{self.__formatLabels(labels)} {value}")
+                    continue
+                cumulative_count = 0
+                for upper_bound, bucket_count in zip(list(buckets) + [math.inf], value):
+                    cumulative_count += bucket_count
+                    bucket_bound = "+Inf" if upper_bound == math.inf else f"{upper_bound:g}"
+                    lines.append(f"{metric_name}_bucket{self.__formatLabels(labels + (('le', bucket_bound),))} {cumulative_count}")
+                lines.append(f"{metric_name}_sum{self.__formatLabels(labels)} {value[-1]:.9g}")
+                lines.append(f"{metric_name}_count{self.__formatLabels(labels)} {cumulative_count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def __formatLabels(labels):
+        if not labels:
+            return ""
+        escaped_labels = [(name, str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")) for name, value in labels]
+        return "{" + ",".join(f"{name}=\"{value}\"" for name, value in escaped_labels) + "}"
+
+class MetricsServer:
+    # Metrics of the registry served at http://<ADDRESS>:<PORT>/metrics, by
+    # default only to the local host (a Prometheus scraper or node_exporter
+    # proxy running on the station)
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, port, address = "127.0.0.1", metrics_registry = None, log_filename = None):
+        self.port = port
+        self.address = address
+        self.metrics_registry = metrics_registry or MetricsRegistry.getRegistry()
+        self.http_server = None
+        self.server_thread = None
+        if log_filename:
+            self.logger = Logger.getLogger(log_filename)
+        else:
+            self.logger = None
+
+    def start(self):
+        # Raises OSError if the port can not be used
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics_registry = self.metrics_registry
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics_registry.getPrometheusText().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", MetricsServer.CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                # Requests are not written to stderr
+                pass
+
+        self.http_server = ThreadingHTTPServer((self.address, self.port), MetricsRequestHandler)
+        self.http_server.daemon_threads = True
+        # Port 0 - a free port is chosen
+        self.port = self.http_server.server_address[1]
+        self.server_thread = threading.Thread(target=self.http_server.serve_forever, name="MetricsServer", daemon=True)
+        self.server_thread.start()
+
+        if self.logger:
+            self.logger.logMessage(f"Metrics served at http://{self.address}:{self.port}/metrics", Logger.LogLevel.INFO)
+        return self
+
+    def stop(self):
+        if self.http_server is not None:
+            self.http_server.shutdown()
+            self.http_server.server_close()
+            self.http_server = None
+
+class MetricsFileWriter:
+    # Metrics of the registry written to a file every WRITE_INTERVAL seconds
+    # and when the application exits (node_exporter textfile collector: the
+    # file name must end with .prom). The file is replaced atomically
+    WRITE_INTERVAL = 15.0
+
+    def __init__(self, file_path, metrics_registry = None, log_filename = None):
+        self.file_path = file_path
+        self.metrics_registry = metrics_registry or MetricsRegistry.getRegistry()
+        self.stop_event = threading.Event()
+        self.writer_thread = threading.Thread(target=self.__writeMetrics, name="MetricsFileWriter", daemon=True)
+        if log_filename:
+            self.logger = Logger.getLogger(log_filename)
+        else:
+            self.logger = None
+
+    def start(self):
+        self.writer_thread.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        if not self.stop_event.is_set():
+            self.stop_event.set()
+            if self.writer_thread.is_alive():
+                self.writer_thread.join()
+
+    def write(self):
+        try:
+            with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(os.path.abspath(self.file_path)),
+                                             prefix=".metrics-", delete=False) as metrics_file:
+                metrics_file.write(self.metrics_registry.getPrometheusText())
+                temporary_file_path = metrics_file.name
+            os.chmod(temporary_file_path, 0o644)
+            os.replace(temporary_file_path, self.file_path)
+        except OSError as error:
+            if self.logger:
+                self.logger.logMessage(f"Metrics not written to {self.file_path}: {error}", Logger.LogLevel.ERROR)
+
+    def __writeMetrics(self):
+        while not self.stop_event.wait(self.WRITE_INTERVAL):
+            self.write()
+        # The values recorded before the exit
+        self.write()
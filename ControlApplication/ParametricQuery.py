@@ -0,0 +1,138 @@
+import numpy
+import re
+from ControlApplication.ComponentSearch import *
+
+class ParametricQuery:
+    # Selection of the catalog components by the ranges of their numeric
+    # parameters with ranking of the found components, e.g. the LNA with
+    # NF < 1 dB and gain > 15 dB covering 430 MHz and drawing under 60 mA,
+    # the highest OIP3 first:
+    #   ParametricQuery.parse("nf<1 gain>15 430mhz current<60 sort:-oip3", "Amplifier")
+    #   ParametricQuery().where("nf_db", "<", 1).where("gain_db", ">", 15).covering(430)
+    #                    .where("dc_current_ma", "<", 60).orderBy("oip3_dbm", descending=True)
+    # Each condition is evaluated on the whole numeric column at once.
+    # Components with an unknown (NaN) value do not pass the conditions on
+    # this parameter and are ranked last
+    OPERATORS = {
+        "<": numpy.less,
+        "<=": numpy.less_equal,
+        ">": numpy.greater,
+        ">=": numpy.greater_equal,
+        "=": numpy.equal
+    }
+    # Short parameter names of the text queries, the catalog column names
+    # can be used as well
+    # <MODEL TYPE> : {<PARAMETER NAME> : <COLUMN NAME>}
+    PARAMETER_ALIASES = {
+        "Filter": {
+            "passband_low": "passband_low_mhz",
+            "passband_high": "passband_high_mhz",
+            "rejection_f3": "rejection_f3_db",
+            "rejection_f4": "rejection_f4_db"
+        },
+        "Amplifier": {
+            "f_low": "f_low_mhz",
+            "f_high": "f_high_mhz",
+            "gain": "gain_db",
+            "nf": "nf_db",
+            "p1db": "p1db_dbm",
+            "oip3": "oip3_dbm",
+            "vswr_in": "input_vswr",
+            "vswr_out": "output_vswr",
+            "voltage": "voltage_v",
+            "current": "dc_current_ma"
+        }
+    }
+    CONDITION_PATTERN = re.compile(r"^(?P<parameter>[a-z][a-z0-9_]*)(?P<operator><=|>=|<|>|=)(?P<value>[+-]?\d+(?:\.\d+)?)$")
+    # "430mhz" - the frequency range contains 430 MHz, "420-450mhz" - the whole range
+    FREQUENCY_PATTERN = re.compile(r"^(?P<low>\d+(?:\.\d+)?)(?:-(?P<high>\d+(?:\.\d+)?))?mhz$")
+    # "sort:nf" - ascending, "sort:-oip3" - descending
+    SORT_PATTERN = re.compile(r"^sort:(?P<descending>-)?(?P<parameter>[a-z][a-z0-9_]*)$")
+
+    def __init__(self):
+        # (<COLUMN NAME>, <OPERATOR>, <VALUE>)
+        self.conditions = []
+        # (<LOW FREQUENCY>, <HIGH FREQUENCY>), MHz
+        self.frequency_ranges = []
+        # (<COLUMN NAME>, <DESCENDING>), the first key is the primary one
+        self.sort_keys = []
+
+    def where(self, column_name, operator, value):
+        if operator not in self.OPERATORS:
+            raise ValueError(f"Unknown operator: {operator}")
+        self.conditions.append((column_name, operator, float(value)))
+        return self
+
+    def covering(self, low_frequency, high_frequency = None):
+        self.frequency_ranges.append((float(low_frequency), float(low_frequency if high_frequency is None else high_frequency)))
+        return self
+
+    def orderBy(self, column_name, descending = False):
+        self.sort_keys.append((column_name, descending))
+        return self
+
+    def getColumnNames(self):
+        # Columns used by the conditions and the ranking, in the query order
+        column_names = [column_name for column_name, _, _ in self.conditions] + [column_name for column_name, _ in self.sort_keys]
+        return list(dict.fromkeys(column_names))
+
+    @staticmethod
+    def isParametric(text):
+        # Text search queries do not contain conditions or sort keys
+        return any(ParametricQuery.CONDITION_PATTERN.match(term) or ParametricQuery.SORT_PATTERN.match(term)
+                   for term in text.lower().split())
+
+    @staticmethod
+    def parse(text, model_type):
+        # Raises ValueError if a term of the query is not recognized
+        parametric_query = ParametricQuery()
+        aliases = ParametricQuery.PARAMETER_ALIASES.get(model_type, {})
+
+        for term in text.lower().split():
+            condition_match = ParametricQuery.CONDITION_PATTERN.match(term)
+            frequency_match = ParametricQuery.FREQUENCY_PATTERN.match(term)
+            sort_match = ParametricQuery.SORT_PATTERN.match(term)
+
+            if condition_match:
+                parametric_query.where(aliases.get(condition_match["parameter"], condition_match["parameter"]),
+                                       condition_match["operator"], condition_match["value"])
+            elif frequency_match:
+                parametric_query.covering(frequency_match["low"], frequency_match["high"])
+            elif sort_match:
+                parametric_query.orderBy(aliases.get(sort_match["parameter"], sort_match["parameter"]),
+                                         sort_match["descending"] is not None)
+            else:
+                raise ValueError(f"Unknown query term: {term}")
+
+        return parametric_query
+
+    def evaluate(self, catalog, limit = None):
+        # Indexes of the matching components, ranked by the sort keys (catalog
+        # order if there are none). Raises ValueError if a parameter is not a
+        # numeric column of the catalog
+        is_found = numpy.ones(len(catalog), dtype=bool)
+
+        for column_name, operator, value in self.conditions:
+            # Comparisons with NaN are always False
+            is_found &= self.OPERATORS[operator](self.__getColumn(catalog, column_name), value)
+
+        if self.frequency_ranges:
+            low_column, high_column = ComponentSearchIndex.FREQUENCY_COLUMNS[catalog.model_type]
+            for low_frequency, high_frequency in self.frequency_ranges:
+                is_found &= (catalog.columns[low_column] <= low_frequency) & (catalog.columns[high_column] >= high_frequency)
+
+        found_indexes = numpy.flatnonzero(is_found)
+        if self.sort_keys and len(found_indexes):
+            # numpy.lexsort sorts by the last key first, NaN values are sorted to the end
+            sort_values = [self.__getColumn(catalog, column_name)[found_indexes] * (-1 if descending else 1)
+                           for column_name, descending in reversed(self.sort_keys)]
+            found_indexes = found_indexes[numpy.lexsort(sort_values)]
+
+        return found_indexes[:limit].tolist()
+
+    def __getColumn(self, catalog, column_name):
+        column = catalog.columns.get(column_name)
+        if (column_name in catalog.categories or not isinstance(column, numpy.ndarray) or
+            not numpy.issubdtype(column.dtype, numpy.floating)):
+            raise ValueError(f"{catalog.model_type} has no numeric parameter {column_name}")
+        return column
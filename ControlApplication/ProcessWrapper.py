@@ -0,0 +1,154 @@
+import math
+import os
+import subprocess
+import sys
+import time
+from ControlApplication.Logger import *
+from ControlApplication.Tracer import *
+
+class ProcessWrapper:
+    # Starts rpitx programs after switching to the filter for their transmit
+    # frequency. Several commands can be chained with COMMAND_SEPARATOR, the
+    # filter is switched before each of them. The last command replaces the
+    # wrapper process (exec), so the wrapper does not stay between the
+    # caller and the transmitter.
+
+    COMMAND_SEPARATOR = ";"
+
+    HZ = 1e-6
+    KHZ = 1e-3
+    MHZ = 1.0
+
+    # Programs with the frequency set by an option
+    # <PROGRAM> : (<OPTION>, <UNIT>)
+    FREQUENCY_OPTIONS = {
+        "sendiq": ("-f", HZ),
+        "tune": ("-f", HZ),
+        "pocsag": ("-f", HZ),
+        "pifmrds": ("-freq", MHZ),
+        "rpitx": ("-f", KHZ)
+    }
+    # Programs with the frequency set by a positional argument
+    # <PROGRAM> : (<POSITION>, <UNIT>)
+    FREQUENCY_POSITIONS = {
+        "pichirp": (1, HZ),
+        "morse": (1, HZ),
+        "pisstv": (2, HZ),
+        "spectrumpaint": (2, HZ)
+    }
+    # Options checked for any other program, values above
+    # UNKNOWN_UNIT_HZ_THRESHOLD are treated as Hz, the rest as MHz
+    GENERIC_FREQUENCY_OPTIONS = ["-f", "--frequency", "-freq"]
+    UNKNOWN_UNIT_HZ_THRESHOLD = 1e5
+
+    def __init__(self, enable_filter_for_frequency, log_filename = None):
+        # enable_filter_for_frequency(frequency in MHz) returns the number of
+        # the activated filter or None
+        self.enable_filter_for_frequency = enable_filter_for_frequency
+
+        if log_filename:
+            self.logger = Logger.getLogger(log_filename)
+        else:
+            self.logger = None
+
+    @staticmethod
+    def splitCommands(arguments):
+        commands = [[]]
+        for argument in arguments:
+            if argument == ProcessWrapper.COMMAND_SEPARATOR:
+                commands.append([])
+            else:
+                commands[-1].append(argument)
+        return [command for command in commands if command]
+
+    @staticmethod
+    def getFrequency(command):
+        # Transmit frequency of the command (MHz) or None if it is not found
+        program_name = os.path.basename(command[0])
+        arguments = command[1:]
+
+        if program_name in ProcessWrapper.FREQUENCY_POSITIONS:
+            position, unit = ProcessWrapper.FREQUENCY_POSITIONS[program_name]
+            positional_arguments = [argument for argument in arguments if not argument.startswith("-")]
+            if len(positional_arguments) >= position:
+                return ProcessWrapper.__parseFrequency(positional_arguments[position - 1], unit)
+            return None
+
+        if program_name in ProcessWrapper.FREQUENCY_OPTIONS:
+            frequency_options = [ProcessWrapper.FREQUENCY_OPTIONS[program_name]]
+        else:
+            frequency_options = [(option, None) for option in ProcessWrapper.GENERIC_FREQUENCY_OPTIONS]
+
+        for option, unit in frequency_options:
+            for argument_index, argument in enumerate(arguments):
+                if argument == option and argument_index + 1 < len(arguments):
+                    return ProcessWrapper.__parseFrequency(arguments[argument_index + 1], unit)
+                if argument.startswith(f"{option}="):
+                    return ProcessWrapper.__parseFrequency(argument.split("=", 1)[1], unit)
+
+        return None
+
+    @staticmethod
+    def __parseFrequency(value, unit):
+        try:
+            frequency = float(value)
+        except ValueError:
+            return None
+        # "inf" and "nan" are parsed by float(), they are not frequencies
+        if not math.isfinite(frequency) or frequency <= 0:
+            return None
+        if unit is None:
+            unit = ProcessWrapper.HZ if frequency > ProcessWrapper.UNKNOWN_UNIT_HZ_THRESHOLD else ProcessWrapper.MHZ
+        # Rounded to 1 Hz: 433.92e6 Hz -> 433.92 MHz
+        return round(frequency * unit, 6)
+
+    def run(self, commands, frequency = None):
+        # frequency (MHz) overrides the frequency found in the commands.
+        # Returns the exit code if the last command could not be started
+        # or one of the chained commands failed, otherwise does not return
+        for command_index, command in enumerate(commands):
+            command_frequency = frequency if frequency is not None else self.getFrequency(command)
+            if command_frequency is None:
+                self.__logError(f"Transmit frequency of '{' '.join(command)}' not found, use --freq!")
+                return 2
+
+            start_time = time.perf_counter_ns()
+            filter_number = self.enable_filter_for_frequency(command_frequency)
+            if filter_number is None:
+                self.__logError(f"No filter for {command_frequency} MHz, '{' '.join(command)}' not started!")
+                return 1
+
+            if self.logger:
+                self.logger.logMessage(f"Filter {filter_number} enabled for {command_frequency} MHz in "
+                                       f"{(time.perf_counter_ns() - start_time) / 1e3:.1f} us: {' '.join(command)}",
+                                       Logger.LogLevel.INFO)
+
+            if command_index == len(commands) - 1:
+                return self.__execCommand(command)
+
+            # The next command is started only if the previous one succeeded
+            try:
+                exit_code = subprocess.run(command).returncode
+            except OSError as error:
+                self.__logError(f"Unable to start '{command[0]}': {error}")
+                return 127
+            if exit_code != 0:
+                return exit_code
+
+        return 0
+
+    def __execCommand(self, command):
+        # atexit handlers are not called by exec, messages must be written now
+        Logger.closeAll()
+        Tracer.write()
+        sys.stdout.flush()
+        try:
+            os.execvp(command[0], command)
+        except OSError as error:
+            print(f"Unable to start '{command[0]}': {error}")
+            return 127
+
+    def __logError(self, message):
+        print(message)
+        if self.logger:
+            self.logger.logMessage(message, Logger.LogLevel.ERROR)
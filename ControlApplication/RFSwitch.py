@@ -1,9 +1,11 @@
-from concurrent.futures import ThreadPoolExecutor
-from gpiozero.pins.mock import MockFactory
-from gpiozero import OutputDevice
-from gpiozero import BadPinFactory
+from ControlApplication.GPIOBackend import *
 from ControlApplication.Logger import *
+from ControlApplication.Metrics import *
+from ControlApplication.Tracer import *
+import itertools
 import sys
+import threading
+import time
 
 # Aliases for high and low logic levels
 HIGH = True
@@ -38,61 +40,158 @@ class RFSwitch():
             6: (HIGH, LOW, HIGH),   #RF common to RF6
     }
 
-    def __init__(self, switch_pinout, switch_truth_table, use_mock_gpio = False, log_filename = None):
+    # Transitions changing more pins are written in the natural pin order, 
+    # the number of possible write orders grows as a factorial
+    MAX_ORDERED_TRANSITION_PINS = 6
 
+    def __init__(self, switch_pinout, switch_truth_table, use_mock_gpio = False, log_filename = None, gpio_backend = None,
+                 initial_rf_output = None):
+        # gpio_backend is shared by all switches of a device, by default the 
+        # switch creates its own gpiozero backend. gpiozero is imported only 
+        # when the switches are initialized, truth tables of this class are 
+        # available without it. initial_rf_output: RF output whose pin states 
+        # are set when the pins are created (the state restored after a 
+        # restart), no other state is written to the pins
         if log_filename:
-            self.logger = Logger(log_filename)
+            self.logger = Logger.getLogger(log_filename)
         else:
             self.logger = None
 
-        if use_mock_gpio:
-            # Use of MockFactory to simulate GPIO ports (used to run 
-            # and debug the application on non-Raspberry Pi devices)
-            used_pin_factory = MockFactory()
-
-            if self.logger:
-                self.logger.logMessage("gpiozero used MockFactory for GPIO operation!", Logger.LogLevel.INFO)
-        else:
-            used_pin_factory = None
-        
+        self.gpio_backend = gpio_backend if gpio_backend else GPIOZeroBackend(use_mock_gpio, log_filename)
         self.switch_pinout = switch_pinout
         self.switch_truth_table = switch_truth_table
+        # Switches are told apart by their pins in the metrics, the labels are built once
+        self.metrics = MetricsRegistry.getRegistry()
+        self.metrics_labels = (("gpio", ",".join(str(gpio_number) for gpio_number in switch_pinout)),)
+        self.rf_output_metrics_labels = {rf_output: self.metrics_labels + (("rf_output", str(rf_output)),)
+                                         for rf_output in switch_truth_table}
         self.active_rf_output = None
+        # RF output whose writes are collected by a batched GPIO backend and 
+        # are not applied yet (see activateRFOutput())
+        self.pending_rf_output = None
 
-        try:
-            self.switch_control = [
-                OutputDevice(pin=gpio_number, initial_value=HIGH, pin_factory=used_pin_factory)
-                for gpio_number in self.switch_pinout
-            ]
-            
+        # Truth table compiled into bitmasks: bit i is the state of the pin switch_pinout[i]
+        # <RF OUTPUT> : <PINS STATE MASK>
+        self.rf_output_masks = {
+            rf_output: sum(1 << pin_index for pin_index, gpio_state in enumerate(pins_state) if gpio_state == HIGH)
+            for rf_output, pins_state in switch_truth_table.items()
+        }
+        if initial_rf_output is not None and initial_rf_output not in self.rf_output_masks:
             if self.logger:
-                self.logger.logMessage(f"RFSwitch initialized on GPIO: {switch_pinout}", Logger.LogLevel.INFO)
-
-        except BadPinFactory:
-            self.switch_control = None
+                self.logger.logMessage(f"RF path {initial_rf_output} is not available for GPIO {switch_pinout}, "
+                                       "the pins are initialized with HIGH!", Logger.LogLevel.ERROR)
+            initial_rf_output = None
+        # Current state of the pins, without initial_rf_output all pins are 
+        # initialized with HIGH. None if the pins may have been left in an 
+        # intermediate state
+        if initial_rf_output is None:
+            self.pins_state_mask = (1 << len(switch_pinout)) - 1
+        else:
+            self.pins_state_mask = self.rf_output_masks[initial_rf_output]
+        # <(CURRENT MASK, TARGET MASK)> : <LIST OF (PIN INDEX, GPIO STATE) WRITES>
+        self.transitions = {}
+        # <(CURRENT MASK, TARGET MASK)> : <WRITES COMPILED BY THE GPIO BACKEND>
+        self.compiled_transitions = {}
 
+        self.switch_control = self.gpio_backend.createOutputs(self.switch_pinout, 
+                                                              [bool(self.pins_state_mask >> pin_index & 1) for pin_index in range(len(switch_pinout))])
+        if self.switch_control is None:
             if self.logger:
                 self.logger.logMessage(f"RFSwitch not initialized on GPIO: {switch_pinout}", Logger.LogLevel.ERROR)
+        else:
+            self.active_rf_output = initial_rf_output
+            for current_mask, target_mask in itertools.permutations(self.rf_output_masks.values(), 2):
+                self.__getCompiledTransition(current_mask, target_mask)
+
+            if self.logger:
+                self.logger.logMessage(f"RFSwitch initialized on GPIO: {switch_pinout}", Logger.LogLevel.INFO)
             
-    def activateRFOutput(self, rf_output):
+    def release(self):
+        # The pins can be used by another switch
+        if self.switch_control:
+            self.gpio_backend.releaseOutputs(self.switch_control)
+        self.switch_control = None
+        self.active_rf_output = None
+
+    def __getTransition(self, current_mask, target_mask):
+        # Only the pins whose state differs (current_mask XOR target_mask) are 
+        # written. The write order is chosen so that the intermediate pin states 
+        # match as few other RF outputs as possible: each such state would 
+        # briefly route the signal through an unintended RF path
+        transition_key = (current_mask, target_mask)
+
+        if transition_key not in self.transitions:
+            changed_pins = [pin_index for pin_index in range(len(self.switch_pinout)) 
+                            if (current_mask ^ target_mask) >> pin_index & 1]
+            unintended_masks = set(self.rf_output_masks.values()) - {current_mask, target_mask}
+
+            def countUnintendedStates(write_order):
+                intermediate_mask = current_mask
+                unintended_states = 0
+                for pin_index in write_order[:-1]:
+                    intermediate_mask ^= 1 << pin_index
+                    unintended_states += intermediate_mask in unintended_masks
+                return unintended_states
+
+            if len(changed_pins) <= self.MAX_ORDERED_TRANSITION_PINS:
+                # The first of the equally good orders (the natural one if possible) is used
+                write_order = min(itertools.permutations(changed_pins), key=countUnintendedStates)
+            else:
+                write_order = changed_pins
+
+            self.transitions[transition_key] = [(pin_index, bool(target_mask >> pin_index & 1)) for pin_index in write_order]
+
+        return self.transitions[transition_key]
+
+    def __getCompiledTransition(self, current_mask, target_mask):
+        transition_key = (current_mask, target_mask)
+
+        if transition_key not in self.compiled_transitions:
+            if current_mask is None:
+                # The state of the pins is unknown, all of them are written
+                transition = [(pin_index, bool(target_mask >> pin_index & 1)) for pin_index in range(len(self.switch_pinout))]
+                self.transitions[transition_key] = transition
+            else:
+                transition = self.__getTransition(current_mask, target_mask)
+            self.compiled_transitions[transition_key] = self.gpio_backend.compileWrites(self.switch_control, transition)
+
+        return self.compiled_transitions[transition_key]
+
+    @Tracer.traced("gpio")
+    def activateRFOutput(self, rf_output, is_batched = False):
+        # is_batched: the writes are collected by the GPIO backend between 
+        # beginBatch() and endBatch(), the state of the switch is changed by 
+        # commitRFOutput() once endBatch() has applied them, or forgotten by 
+        # discardRFOutput() if it failed
+        if (self.switch_control and rf_output not in self.rf_output_masks):
+            if self.logger:
+                self.logger.logMessage(f"RF path {rf_output} is not available for GPIO {self.switch_pinout}!", 
+                                       Logger.LogLevel.ERROR)
+            return False
+
         if (self.switch_control and (self.active_rf_output != rf_output or self.active_rf_output == None)):
             try:
-                self.active_rf_output = rf_output
-
-                if self.logger:
+                # Messages are formatted only if their level is written
+                if self.logger and self.logger.isEnabled(Logger.LogLevel.INFO):
                     self.logger.logMessage(f"RF path {rf_output} activated!", Logger.LogLevel.INFO, True)
                     self.logger.logMessage("START OF CNANGING GPIO STATE PROCESS", Logger.LogLevel.INFO)
 
-                for output_gpio_obj, gpio_state in zip(self.switch_control, self.switch_truth_table[rf_output]):
-                    output_gpio_obj.value = gpio_state
-                    
-                    if self.logger:
-                        self.logger.logMessage(f"{output_gpio_obj.pin}: {gpio_state}")
+                target_mask = self.rf_output_masks[rf_output]
+                self.gpio_backend.applyWrites(self.__getCompiledTransition(self.pins_state_mask, target_mask))
+
+                # The state of each pin is logged only in the DEBUG mode
+                if self.logger and self.logger.isEnabled(Logger.LogLevel.DEBUG):
+                    for pin_index, gpio_state in self.transitions[(self.pins_state_mask, target_mask)]:
+                        self.logger.logMessage(f"GPIO{self.switch_pinout[pin_index]}: {gpio_state}", Logger.LogLevel.DEBUG)
+
+                if is_batched:
+                    self.pending_rf_output = rf_output
+                else:
+                    self.__setActiveRFOutput(rf_output)
                 
             except Exception:
+                self.__forgetPinsState(rf_output)
                 if self.logger:
-                    self.logger.logMessage(f"Unable to set state {gpio_state} for {output_gpio_obj.pin}!", 
-                                           Logger.LogLevel.ERROR)
                     self.logger.logMessage("END OF CHANGING GPIO STATE PROCESS", Logger.LogLevel.INFO, True)
                 
                 return False
@@ -109,20 +208,137 @@ class RFSwitch():
             return False
 
         elif (self.active_rf_output == rf_output):
-            if self.logger:
+            self.metrics.incrementCounter("rpitx_rf_switch_redundant_activations_total", self.metrics_labels)
+            if self.logger and self.logger.isEnabled(Logger.LogLevel.INFO):
                 self.logger.logMessage(f"Trying to activate already active RF path {rf_output}!", Logger.LogLevel.INFO)
             return True
 
+    def commitRFOutput(self):
+        # The batched writes of the pending RF output have been applied
+        if self.pending_rf_output is not None:
+            self.__setActiveRFOutput(self.pending_rf_output)
+            self.pending_rf_output = None
+
+    def discardRFOutput(self):
+        # The batched writes of the pending RF output have not been applied or 
+        # have been applied partially
+        if self.pending_rf_output is not None:
+            self.__forgetPinsState(self.pending_rf_output)
+            self.pending_rf_output = None
+
+    def __setActiveRFOutput(self, rf_output):
+        self.pins_state_mask = self.rf_output_masks[rf_output]
+        self.active_rf_output = rf_output
+        self.metrics.incrementCounter("rpitx_rf_switch_activations_total", self.rf_output_metrics_labels[rf_output])
+
+    def __forgetPinsState(self, rf_output):
+        # The pins may be left in an intermediate state, the next activation 
+        # of any RF path must not be skipped and writes all pins
+        self.pins_state_mask = None
+        self.active_rf_output = None
+        self.metrics.incrementCounter("rpitx_rf_switch_failed_activations_total", self.metrics_labels)
+
+        if self.logger:
+            self.logger.logMessage(f"Unable to set the state of GPIO {self.switch_pinout} for RF path {rf_output}!", 
+                                   Logger.LogLevel.ERROR)
+
+class SwitchingReport():
+    # Result of the RF path activation with the time (time.perf_counter_ns()) 
+    # when the activation started and when each of the switches was applied
+    def __init__(self, rf_path_index, start_time, applied_times, is_successful):
+        self.rf_path_index = rf_path_index
+        self.start_time = start_time
+        self.applied_times = applied_times
+        self.is_successful = is_successful
+
+    def getLatency(self):
+        # Time from the call until the last switch was applied, ns
+        return max(self.applied_times) - self.start_time
+
+    def getSkew(self):
+        # Time between the first and the last applied switch, ns
+        return max(self.applied_times) - min(self.applied_times)
+
+class SwitchingEngine():
+    # Created once per device and used by all its RF switches. Switches are 
+    # driven from the calling thread one right after another: no threads are 
+    # created per activation, and because of the GIL two threads would not 
+    # write to the GPIO pins at the same time anyway. The lock keeps the 
+    # activations requested from different threads from interleaving. GPIO 
+    # backends that collect the writes (IS_BATCHED) apply the writes of all 
+    # switches of the RF path at once, the switches change at the same time
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def activateRFPath(self, rf_switches, rf_path_index, gpio_backend = None):
+        # gpio_backend: backend shared by all rf_switches, if it collects the 
+        # writes, the switches are applied with one write
+        applied_times = []
+        activation_results = []
+
+        with self.lock:
+            start_time = time.perf_counter_ns()
+            if gpio_backend is not None and gpio_backend.IS_BATCHED:
+                gpio_backend.beginBatch()
+                # activateRFOutput() does not raise, the batch is always ended
+                activation_results = [rf_switch.activateRFOutput(rf_path_index, True) for rf_switch in rf_switches]
+                try:
+                    gpio_backend.endBatch()
+                    is_applied = True
+                except Exception:
+                    is_applied = False
+                # The switches take the new state only if the writes have been applied
+                for rf_switch in rf_switches:
+                    if is_applied:
+                        rf_switch.commitRFOutput()
+                    else:
+                        rf_switch.discardRFOutput()
+                if not is_applied:
+                    activation_results = [False]
+                applied_times = [time.perf_counter_ns()] * len(rf_switches)
+            else:
+                for rf_switch in rf_switches:
+                    activation_results.append(rf_switch.activateRFOutput(rf_path_index))
+                    applied_times.append(time.perf_counter_ns())
+
+        return SwitchingReport(rf_path_index, start_time, applied_times, all(activation_results))
+
 class RFSwitchWrapper():
-    def __init__(self, input_switch_pinout, output_switch_pinout, switch_truth_table, use_mock_gpio = False, log_filename = None):
-        self.input_switch = RFSwitch(input_switch_pinout, switch_truth_table, use_mock_gpio, log_filename)
-        self.output_switch = RFSwitch(output_switch_pinout, switch_truth_table, use_mock_gpio, log_filename)
+    # Name of the switch in the metrics
+    METRICS_NAME = "rf_path"
+
+    def __init__(self, input_switch_pinout, output_switch_pinout, switch_truth_table, use_mock_gpio = False, log_filename = None,
+                 switching_engine = None, gpio_backend = None, initial_rf_path = None):
+        # Both switches use the same GPIO backend (pin factory). initial_rf_path: 
+        # RF path both switches are initialized to (see RFSwitch)
+        if gpio_backend is None:
+            gpio_backend = GPIOZeroBackend(use_mock_gpio, log_filename)
+        self.gpio_backend = gpio_backend
+        self.input_switch = RFSwitch(input_switch_pinout, switch_truth_table, use_mock_gpio, log_filename, gpio_backend,
+                                     initial_rf_path)
+        try:
+            self.output_switch = RFSwitch(output_switch_pinout, switch_truth_table, use_mock_gpio, log_filename, gpio_backend,
+                                          initial_rf_path)
+        except Exception:
+            self.input_switch.release()
+            raise
+        self.switching_engine = switching_engine if switching_engine else SwitchingEngine()
+        # Timing information of the last RF path activation
+        self.last_switching_report = None
+        # Called with the RF path index after each activation changing the RF path
+        self.rf_path_listener = None
+        self.metrics = MetricsRegistry.getRegistry()
+        self.metrics_labels = (("switch", self.METRICS_NAME), 
+                               ("gpio", ",".join(str(gpio_number) for gpio_number in input_switch_pinout)))
+        self.rf_path_metrics_labels = {rf_path_index: self.metrics_labels + (("rf_path", str(rf_path_index)),)
+                                       for rf_path_index in switch_truth_table}
         
         if log_filename:
-            self.logger = Logger(log_filename)
+            self.logger = Logger.getLogger(log_filename)
         else:
             self.logger = None
     
+    @Tracer.traced("gpio")
     def activateRFPath(self, rf_path_index):
         # We activate two switches at the same time because we need to create a 
         # path for the signal to pass through a particular filter. This is 
@@ -130,32 +346,68 @@ class RFSwitchWrapper():
         # it through a filter and then exiting through the output switch
         if self.logger:
             self.logger.logMessage("RFSwitchWrapper.activateRFPath() function called!", Logger.LogLevel.INFO)
-            self.logger.logMessage("Changing the state of the GPIO ports for each of the "
-                           "RFSwitch is performed in a separate thread!", Logger.LogLevel.INFO)
     
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            input_switch_state_change_thread = executor.submit(self.input_switch.activateRFOutput, rf_path_index)
-            output_switch_state_change_thread = executor.submit(self.output_switch.activateRFOutput, rf_path_index)
+        previous_rf_path = self.getActiveRFPath()
+        self.last_switching_report = self.switching_engine.activateRFPath((self.input_switch, self.output_switch), rf_path_index,
+                                                                           self.gpio_backend)
+        if self.last_switching_report.is_successful and previous_rf_path != rf_path_index:
+            self.metrics.incrementCounter("rpitx_rf_path_switches_total", self.rf_path_metrics_labels[rf_path_index])
+            self.metrics.observe("rpitx_rf_path_switch_latency_seconds", self.last_switching_report.getLatency() / 1e9, self.metrics_labels)
+            if self.rf_path_listener:
+                self.rf_path_listener(rf_path_index)
 
-        return (input_switch_state_change_thread.result() and output_switch_state_change_thread.result())
+        if self.logger and self.logger.isEnabled(Logger.LogLevel.INFO):
+            self.logger.logMessage(f"RF path {rf_path_index} switching time: {self.last_switching_report.getLatency() / 1e3:.1f} us, "
+                                   f"skew between switches: {self.last_switching_report.getSkew() / 1e3:.1f} us", Logger.LogLevel.INFO)
+
+        return self.last_switching_report.is_successful
+
+    def getActiveRFPath(self):
+        # None if no RF path has been activated yet or the last activation failed
+        if self.input_switch.active_rf_output != self.output_switch.active_rf_output:
+            return None
+        return self.input_switch.active_rf_output
 
 class FilterSwitch(RFSwitchWrapper):
 
+    METRICS_NAME = "filter"
+
     def enableFilter(self, filter_index):
         return self.activateRFPath(filter_index) 
     
 class LNASwitch(RFSwitchWrapper):
 
-    def __init__(self, input_switch_pinout, output_switch_pinout, switch_truth_table, use_mock_gpio = False, log_filename = None):
-        super().__init__(input_switch_pinout, output_switch_pinout, switch_truth_table, use_mock_gpio, log_filename)
-        self.is_active = False
+    # RF paths of the SPDT switches: the signal bypasses the LNA or passes through it
+    BYPASS_RF_PATH = 1
+    LNA_RF_PATH = 2
+
+    METRICS_NAME = "lna"
+
+    def __init__(self, input_switch_pinout, output_switch_pinout, switch_truth_table, use_mock_gpio = False, log_filename = None,
+                 switching_engine = None, gpio_backend = None, is_active = None):
+        # is_active: LNA state the switches are initialized to, None - not set
+        initial_rf_path = None if is_active is None else self.getRFPath(is_active)
+        super().__init__(input_switch_pinout, output_switch_pinout, switch_truth_table, use_mock_gpio, log_filename, switching_engine,
+                         gpio_backend, initial_rf_path)
+        self.is_active = self.getActiveRFPath() == self.LNA_RF_PATH
+
+    @staticmethod
+    def getRFPath(is_active):
+        return LNASwitch.LNA_RF_PATH if is_active else LNASwitch.BYPASS_RF_PATH
 
     def toggleLNA(self):
         # Toggle is_active value
         self.is_active = not self.is_active  
-        activation_status = self.activateRFPath(2 if self.is_active else 1)
+        activation_status = self.activateRFPath(self.getRFPath(self.is_active))
         
         if not activation_status:
             self.is_active = False
         
-        return self.is_active
\ No newline at end of file
+        return self.is_active
+
+    def setLNAState(self, is_active):
+        # Unlike toggleLNA(), the RF path is activated even if is_active 
+        # already matches, so the switches are always left in a known state
+        activation_status = self.activateRFPath(self.getRFPath(is_active))
+        self.is_active = is_active and activation_status
+        return activation_status
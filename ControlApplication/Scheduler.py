@@ -0,0 +1,239 @@
+import math
+import numpy
+import os
+import threading
+import time
+from ControlApplication.Logger import *
+
+class ScheduleStep:
+    # filter_number / lna_state are None if the step does not change them.
+    # Frequencies are resolved to filter numbers when the schedule is loaded,
+    # so the timing loop only switches the GPIO pins
+    def __init__(self, step_time, is_absolute_time, filter_number, lna_state, line_number = None):
+        self.step_time = step_time
+        self.is_absolute_time = is_absolute_time
+        self.filter_number = filter_number
+        self.lna_state = lna_state
+        self.line_number = line_number
+
+class StepResult:
+    # Times are time.perf_counter_ns() values
+    def __init__(self, step, scheduled_time, applied_time, is_successful):
+        self.step = step
+        self.scheduled_time = scheduled_time
+        self.applied_time = applied_time
+        self.is_successful = is_successful
+
+    def getJitter(self):
+        # Positive if the step was applied after the scheduled time, ns
+        return self.applied_time - self.scheduled_time
+
+class ScheduleReport:
+
+    JITTER_PERCENTILES = [50, 90, 99]
+
+    def __init__(self, step_results, is_realtime_priority):
+        self.step_results = step_results
+        self.is_realtime_priority = is_realtime_priority
+
+    def getJitterStatistics(self):
+        # Jitter distribution, us
+        if not self.step_results:
+            return {}
+
+        jitter = numpy.array([step_result.getJitter() for step_result in self.step_results]) / 1e3
+        jitter_statistics = {"min_us": float(jitter.min()), "max_us": float(jitter.max()),
+                             "mean_us": float(jitter.mean())}
+        for percentile in self.JITTER_PERCENTILES:
+            jitter_statistics[f"p{percentile}_us"] = float(numpy.percentile(jitter, percentile))
+        return jitter_statistics
+
+    def getFailedStepsCount(self):
+        return sum(1 for step_result in self.step_results if not step_result.is_successful)
+
+    def getSummary(self):
+        summary = f"Steps applied: {len(self.step_results)}, failed: {self.getFailedStepsCount()}\n"
+        summary += f"Realtime priority: {'yes' if self.is_realtime_priority else 'no'}\n"
+        summary += "Jitter: " + ", ".join(f"{name[:-3]} {value:.1f} us" for name, value in self.getJitterStatistics().items())
+        return summary
+
+class HoppingScheduler:
+    # Applies the schedule steps to the device at the given times from a
+    # dedicated timing thread. The thread sleeps until SPIN_THRESHOLD_NS
+    # before the step and then polls the clock, so the step does not depend
+    # on the sleep granularity of the system.
+    #
+    # Schedule file, one step per line:
+    #   <TIME> [filter <N>] [freq <MHz>] [lna <on|off>]
+    # <TIME> is the offset in seconds from the schedule start or @<UNIX TIME>
+    # for an absolute time, e.g.:
+    #   0.000 freq 145.5 lna on
+    #   0.250 filter 2
+    #   @1760000000.5 freq 433.92 lna off
+    # Empty lines and lines starting with # are skipped
+
+    SPIN_THRESHOLD_NS = 2_000_000
+    # SCHED_FIFO priority of the timing thread, used if the process is
+    # allowed to change the scheduling policy (root or CAP_SYS_NICE)
+    REALTIME_PRIORITY = 50
+
+    def __init__(self, device, steps, lead_time = 0.0, log_filename = None):
+        # lead_time (s): each step is applied this much earlier than its
+        # time, so the filter is switched before rpitx changes frequency
+        self.device = device
+        self.steps = list(steps)
+        self.lead_time_ns = int(lead_time * 1e9)
+        self.step_results = []
+        self.is_realtime_priority = False
+        self.stop_event = threading.Event()
+        self.timing_thread = None
+
+        if log_filename:
+            self.logger = Logger.getLogger(log_filename)
+        else:
+            self.logger = None
+
+    @staticmethod
+    def loadSchedule(schedule_path, device):
+        with open(schedule_path) as schedule_file:
+            return HoppingScheduler.parseSchedule(schedule_file.read().splitlines(), device)
+
+    @staticmethod
+    def parseSchedule(schedule_lines, device):
+        # Raises ValueError with the number of the wrong line
+        steps = []
+
+        for line_number, line in enumerate(schedule_lines, start=1):
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+
+            step_arguments = line.split()
+            try:
+                steps.append(HoppingScheduler.__parseStep(step_arguments, device, line_number))
+            except (ValueError, IndexError) as error:
+                raise ValueError(f"Schedule line {line_number}: {error}") from None
+
+        return steps
+
+    @staticmethod
+    def __parseStep(step_arguments, device, line_number):
+        step_time = step_arguments[0]
+        is_absolute_time = step_time.startswith("@")
+        step_time = float(step_time[1:] if is_absolute_time else step_time)
+        if not math.isfinite(step_time) or step_time < 0:
+            raise ValueError("step time must be a finite number of seconds, not negative")
+
+        filter_number = None
+        lna_state = None
+        arguments = step_arguments[1:]
+        if not arguments or len(arguments) % 2:
+            raise ValueError("expected pairs of 'filter <N>', 'freq <MHz>' or 'lna <on|off>'")
+
+        for argument_name, argument_value in zip(arguments[::2], arguments[1::2]):
+            argument_name = argument_name.lower()
+            if argument_name == "filter":
+                filter_number = int(argument_value)
+                if not 1 <= filter_number <= len(device.filters) or device.filters[filter_number - 1].model_number is None:
+                    raise ValueError(f"filter {filter_number} is not installed")
+            elif argument_name == "freq":
+                frequency = float(argument_value)
+                if not math.isfinite(frequency):
+                    raise ValueError(f"invalid frequency {argument_value} MHz")
+                filter_number = device.getFilterForFrequency(frequency)
+                if filter_number is None:
+                    raise ValueError(f"no filter for {argument_value} MHz")
+            elif argument_name == "lna":
+                if argument_value.lower() not in ("on", "off"):
+                    raise ValueError("expected 'lna on' or 'lna off'")
+                if not device.DEVICE_TYPE_MAPPING[device.model_name][device.LNA_SWITCH_TRUTH_TABLE]:
+                    raise ValueError("board has no LNA")
+                lna_state = argument_value.lower() == "on"
+            else:
+                raise ValueError(f"unknown step argument: {argument_name}")
+
+        return ScheduleStep(step_time, is_absolute_time, filter_number, lna_state, line_number)
+
+    def start(self, start_time = None):
+        # start_time: time.perf_counter_ns() value of the schedule start,
+        # offsets are counted from it. By default the schedule starts now
+        if start_time is None:
+            start_time = time.perf_counter_ns()
+
+        self.step_results = []
+        self.stop_event.clear()
+        self.timing_thread = threading.Thread(target=self.__runTimingLoop, args=(start_time,),
+                                              name="HoppingScheduler", daemon=True)
+        self.timing_thread.start()
+
+    def join(self):
+        if self.timing_thread is not None:
+            self.timing_thread.join()
+        return ScheduleReport(self.step_results, self.is_realtime_priority)
+
+    def stop(self):
+        # Steps not applied yet are skipped
+        self.stop_event.set()
+        return self.join()
+
+    def run(self, start_time = None):
+        self.start(start_time)
+        return self.join()
+
+    def __setRealtimePriority(self):
+        # Applies to the calling (timing) thread only
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.REALTIME_PRIORITY))
+            return True
+        except (AttributeError, OSError):
+            return False
+
+    def __getScheduledTime(self, step, start_time, wall_clock_offset):
+        if step.is_absolute_time:
+            scheduled_time = int(step.step_time * 1e9) - wall_clock_offset
+        else:
+            scheduled_time = start_time + int(step.step_time * 1e9)
+        return scheduled_time - self.lead_time_ns
+
+    def __waitUntil(self, scheduled_time):
+        # Returns False if the scheduler has been stopped while waiting
+        while True:
+            remaining_time = scheduled_time - time.perf_counter_ns()
+            if remaining_time <= 0:
+                return True
+            if remaining_time > self.SPIN_THRESHOLD_NS:
+                if self.stop_event.wait((remaining_time - self.SPIN_THRESHOLD_NS) / 1e9):
+                    return False
+            elif self.stop_event.is_set():
+                return False
+
+    def __applyStep(self, step):
+        is_successful = True
+        if step.filter_number is not None:
+            is_successful = self.device.filter_switch.enableFilter(step.filter_number) and is_successful
+        if step.lna_state is not None:
+            is_successful = self.device.lna_switch.setLNAState(step.lna_state) and is_successful
+        return is_successful
+
+    def __runTimingLoop(self, start_time):
+        self.is_realtime_priority = self.__setRealtimePriority()
+        # Absolute step times (time.time_ns()) are converted to time.perf_counter_ns()
+        wall_clock_offset = time.time_ns() - time.perf_counter_ns()
+
+        if self.logger:
+            self.logger.logMessage(f"Schedule started: {len(self.steps)} steps, realtime priority: {self.is_realtime_priority}",
+                                   Logger.LogLevel.INFO, True, True)
+
+        # Steps with offsets and absolute times may be mixed in one schedule
+        scheduled_steps = sorted(((self.__getScheduledTime(step, start_time, wall_clock_offset), step) for step in self.steps),
+                                 key=lambda scheduled_step: scheduled_step[0])
+
+        for scheduled_time, step in scheduled_steps:
+            if not self.__waitUntil(scheduled_time):
+                break
+
+            is_successful = self.__applyStep(step)
+            self.step_results.append(StepResult(step, scheduled_time, time.perf_counter_ns(), is_successful))
+
+        if self.logger:
+            self.logger.logMessage(f"Schedule finished: {len(self.step_results)} steps applied", Logger.LogLevel.INFO, True, True)
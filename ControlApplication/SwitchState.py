@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+from ControlApplication.DeviceConfiguration import *
+from ControlApplication.Logger import *
+
+class SwitchStateStore:
+    # Last applied filter and LNA state of a board, kept in a JSON file next to
+    # the other boards' states (one file per saved configuration):
+    # {"schema_version": 1, "board": "rpitx-expansion-board-SP6T-LNA",
+    #  "configuration": "2m-70cm", "filter": 3, "lna": true}
+    # "filter" / "lna" are null until the first switching. The switches are
+    # initialized directly to the saved state (Device.initRFSwitches). Each
+    # change is written before the switching returns, the file is replaced
+    # atomically and synced to the storage (DeviceConfiguration.writeJson).
+    # The file is also written when the board is loaded (markUsed), the
+    # most recently written file belongs to the board used last
+    SCHEMA_VERSION = 1
+    FILE_EXTENSION = ".json"
+
+    def __init__(self, state_path, model_name, configuration_name, log_filename = None):
+        self.state_path = state_path
+        if log_filename:
+            self.logger = Logger.getLogger(log_filename)
+        else:
+            self.logger = None
+
+        self.state = {
+            "schema_version": self.SCHEMA_VERSION,
+            "board": model_name,
+            "configuration": configuration_name,
+            "filter": None,
+            "lna": None
+        }
+        self.is_closed = False
+        # The writes of the switching threads follow the order of the changes
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def getStatePath(state_dir, model_name, configuration_name):
+        # Named as the configuration file, the configuration of a state is found by the name
+        return os.path.join(state_dir, DeviceConfiguration.getFilename(model_name, configuration_name))
+
+    @staticmethod
+    def findLatest(state_dir):
+        # Path of the most recently written state file (the board used last) or None
+        if not os.path.isdir(state_dir):
+            return None
+        with os.scandir(state_dir) as directory_entries:
+            state_files = [(directory_entry.stat().st_mtime_ns, directory_entry.path) for directory_entry in directory_entries
+                           if directory_entry.name.endswith(SwitchStateStore.FILE_EXTENSION) and directory_entry.is_file()]
+        return max(state_files)[1] if state_files else None
+
+    def load(self):
+        # (<FILTER NUMBER>, <IS LNA ACTIVE>) saved for the board, None if it is
+        # not known. A missing or damaged file or the state of another board
+        # type is not used
+        try:
+            with open(self.state_path) as state_file:
+                state_data = json.load(state_file)
+        except FileNotFoundError:
+            return None, None
+        except (OSError, ValueError) as error:
+            if self.logger:
+                self.logger.logMessage(f"Switch state {self.state_path} not loaded: {error}", Logger.LogLevel.ERROR)
+            return None, None
+
+        if (not isinstance(state_data, dict) or state_data.get("schema_version") != self.SCHEMA_VERSION or
+            state_data.get("board") != self.state["board"]):
+            if self.logger:
+                self.logger.logMessage(f"Switch state {self.state_path} does not match {self.state['board']}", Logger.LogLevel.ERROR)
+            return None, None
+
+        filter_number = state_data.get("filter")
+        is_lna_active = state_data.get("lna")
+        if not isinstance(filter_number, int) or isinstance(filter_number, bool):
+            filter_number = None
+        if not isinstance(is_lna_active, bool):
+            is_lna_active = None
+
+        self.state["filter"] = filter_number
+        self.state["lna"] = is_lna_active
+        return filter_number, is_lna_active
+
+    def setFilter(self, filter_number):
+        self.__update("filter", filter_number)
+
+    def setLNAState(self, is_lna_active):
+        self.__update("lna", is_lna_active)
+
+    def markUsed(self):
+        # The board is loaded: its state file becomes the most recent one,
+        # the board is resumed on the next start even if it is not switched
+        with self.lock:
+            if not self.is_closed:
+                self.__write()
+
+    def __update(self, key, value):
+        with self.lock:
+            if self.is_closed or self.state[key] == value:
+                return
+            self.state[key] = value
+            self.__write()
+
+    def close(self):
+        # Later changes are not saved
+        with self.lock:
+            self.is_closed = True
+
+    def __write(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+            DeviceConfiguration.writeJson(self.state_path, self.state)
+        except OSError as error:
+            if self.logger:
+                self.logger.logMessage(f"Switch state {self.state_path} not saved: {error}", Logger.LogLevel.ERROR)
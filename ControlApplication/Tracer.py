@@ -0,0 +1,121 @@
+import atexit
+import functools
+import itertools
+import os
+import threading
+import time
+
+class Tracer:
+    # Spans of the traced functions (the start and the duration of each call
+    # in each thread) saved in the Chrome trace event format when the
+    # application exits. Enabled by the environment variable:
+    #   RPITX_TRACE=/tmp/rpitx-trace.json rpitx-control ...
+    # The file is opened in chrome://tracing, ui.perfetto.dev or speedscope:
+    # the threads are shown one under another, overlapping spans of the pool
+    # threads show whether the work is done in parallel. Without the variable
+    # the functions are not wrapped and tracing costs nothing
+    ENVIRONMENT_VARIABLE = "RPITX_TRACE"
+    # Text arguments of a span are shortened to this length
+    MAX_ARGUMENT_LENGTH = 80
+
+    trace_path = os.environ.get(ENVIRONMENT_VARIABLE) or None
+    # (<NAME>, <CATEGORY>, <START NS>, <END NS>, <THREAD ID>, <ARGUMENTS>),
+    # list.append() is atomic, spans are added without a lock
+    spans = []
+    # <THREAD ID> : <THREAD NAME>
+    thread_names = {}
+    start_time = time.perf_counter_ns()
+
+    @staticmethod
+    def isEnabled():
+        return Tracer.trace_path is not None
+
+    @staticmethod
+    def traced(category):
+        # Decorator of a traced function or method, the span is named after
+        # its qualified name (e.g. RFSwitch.activateRFOutput). Arguments of
+        # simple types (str, int, float, bool) are saved with the span
+        def decorate(function):
+            if not Tracer.isEnabled():
+                return function
+
+            import inspect
+
+            span_name = function.__qualname__
+            # Names of the positional arguments, the signature is not bound on each call
+            argument_names = [parameter.name for parameter in inspect.signature(function).parameters.values()
+                              if parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)]
+
+            @functools.wraps(function)
+            def tracedFunction(*args, **kwargs):
+                start_time = time.perf_counter_ns()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    Tracer.addSpan(span_name, category, start_time, time.perf_counter_ns(),
+                                   Tracer.__getArguments(argument_names, args, kwargs))
+
+            return tracedFunction
+        return decorate
+
+    @staticmethod
+    def addSpan(name, category, start_time, end_time, arguments = None):
+        # Identifier of a finished thread can be reused by a new one
+        thread = threading.current_thread()
+        if Tracer.thread_names.get(thread.ident) != thread.name:
+            Tracer.thread_names[thread.ident] = thread.name
+        thread_id = thread.ident
+        Tracer.spans.append((name, category, start_time, end_time, thread_id, arguments))
+
+    @staticmethod
+    def __getArguments(argument_names, args, kwargs):
+        arguments = {}
+        for argument_name, value in itertools.chain(zip(argument_names, args), kwargs.items()):
+            if argument_name == "self" or not isinstance(value, (str, int, float, bool)):
+                continue
+            if isinstance(value, str) and len(value) > Tracer.MAX_ARGUMENT_LENGTH:
+                value = value[:Tracer.MAX_ARGUMENT_LENGTH] + "..."
+            arguments[argument_name] = value
+        return arguments
+
+    @staticmethod
+    def getTraceEvents():
+        # Complete events ("X") with the time in microseconds from the start
+        # of the process and the thread names ("M" metadata events)
+        process_id = os.getpid()
+        trace_events = [{"name": "thread_name", "ph": "M", "pid": process_id, "tid": thread_id, "args": {"name": thread_name}}
+                        for thread_id, thread_name in list(Tracer.thread_names.items())]
+        for name, category, start_time, end_time, thread_id, arguments in list(Tracer.spans):
+            trace_event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start_time - Tracer.start_time) / 1e3,
+                "dur": (end_time - start_time) / 1e3,
+                "pid": process_id,
+                "tid": thread_id
+            }
+            if arguments:
+                trace_event["args"] = arguments
+            trace_events.append(trace_event)
+        return trace_events
+
+    @staticmethod
+    def write(trace_path = None):
+        # Spans recorded up to now are written to the file of the environment
+        # variable, called when the application exits or before the process is
+        # replaced by an rpitx program
+        import json
+
+        trace_path = trace_path or Tracer.trace_path
+        if trace_path is None:
+            return
+        try:
+            with open(trace_path, "w") as trace_file:
+                json.dump({"traceEvents": Tracer.getTraceEvents(), "displayTimeUnit": "ms"}, trace_file)
+        except OSError:
+            # The application is not stopped because of the trace
+            pass
+
+if Tracer.isEnabled():
+    atexit.register(Tracer.write)
@@ -0,0 +1,324 @@
+import atexit
+import textwrap
+from ControlApplication.Tracer import *
+
+class WhiptailBackend():
+    # Each dialog is shown by a separate whiptail process. whiptail can not
+    # keep anything on the screen between the dialogs, so the status is
+    # shown in a message box that must be confirmed
+    NAME = "whiptail"
+    # The entered text is searched only after OK, see CursesBackend.searchbox()
+    HAS_INCREMENTAL_SEARCH = False
+
+    def __init__(self, title):
+        from whiptail import Whiptail
+
+        self.whiptail_interface = Whiptail(title=title)
+
+    @Tracer.traced("ui")
+    def menu(self, prompt, items):
+        # (<CHOSEN TAG>, <BUTTON>)
+        return self.whiptail_interface.menu(prompt, items)
+
+    @Tracer.traced("ui")
+    def msgbox(self, text):
+        self.whiptail_interface.msgbox(text, extra_args=["--scrolltext"])
+
+    @Tracer.traced("ui")
+    def inputbox(self, prompt, default = ""):
+        # (<ENTERED TEXT>, <BUTTON>)
+        return self.whiptail_interface.inputbox(prompt, default)
+
+    @Tracer.traced("ui")
+    def showStatus(self, text):
+        self.msgbox(text)
+
+    def close(self):
+        pass
+
+class CursesBackend():
+    # Dialogs are drawn by curses in the application process: the terminal is
+    # initialized once and the screen is redrawn in place for every dialog.
+    # The status set by showStatus() is kept on the lines under the title
+    # and is shown together with the following dialogs, no confirmation is
+    # needed.
+    # Keys: Up/Down (k/j), PgUp/PgDn, Home/End - move, Enter - OK,
+    # Esc - Cancel (the same buttons as in the whiptail dialogs)
+    NAME = "curses"
+    HAS_INCREMENTAL_SEARCH = True
+
+    OK_BUTTON = 0
+    CANCEL_BUTTON = 1
+    # Esc is reported after ESCAPE_DELAY_MS if no escape sequence follows it
+    ESCAPE_DELAY_MS = 25
+    ESCAPE_KEY = "\x1b"
+    ENTER_KEYS = ("\n", "\r")
+    BACKSPACE_KEYS = ("\b", "\x7f")
+
+    MENU_HELP = "Up/Down: select   Enter: OK   Esc: Cancel"
+    MSGBOX_HELP = "Up/Down: scroll   Enter: OK"
+    INPUTBOX_HELP = "Enter: OK   Esc: Cancel"
+    SEARCHBOX_HELP = "Type to search   Up/Down: select   Enter: OK   Esc: Cancel"
+    SEARCHBOX_NOTHING_FOUND = "Nothing found"
+
+    def __init__(self, title):
+        # Raises curses.error if the terminal can not be used
+        import curses
+
+        self.curses = curses
+        self.title = title
+        self.status_lines = []
+        self.screen = curses.initscr()
+        self.is_closed = False
+
+        try:
+            curses.noecho()
+            curses.cbreak()
+            curses.set_escdelay(self.ESCAPE_DELAY_MS)
+            self.screen.keypad(True)
+            self.__setCursorVisible(False)
+        except curses.error:
+            self.close()
+            raise
+
+        # The terminal is restored even if the application exits from a dialog
+        atexit.register(self.close)
+
+    @Tracer.traced("ui")
+    def menu(self, prompt, items):
+        tags, labels = self.__getTagsAndLabels(items)
+        selected_item = 0
+        first_visible_item = 0
+
+        while True:
+            lines_count = self.__drawDialog(prompt, self.MENU_HELP)
+            items_row, visible_items_count = self.__getFreeArea(lines_count)
+            first_visible_item = self.__drawItems(items_row, visible_items_count, labels, selected_item, first_visible_item)
+            self.screen.refresh()
+
+            key = self.__readKey()
+            if key in self.ENTER_KEYS or key == self.curses.KEY_ENTER:
+                if labels:
+                    return tags[selected_item], self.OK_BUTTON
+            elif key == self.ESCAPE_KEY:
+                return "", self.CANCEL_BUTTON
+            elif key in (self.curses.KEY_UP, "k"):
+                selected_item = max(selected_item - 1, 0)
+            elif key in (self.curses.KEY_DOWN, "j"):
+                selected_item = min(selected_item + 1, max(len(labels) - 1, 0))
+            elif key == self.curses.KEY_PPAGE:
+                selected_item = max(selected_item - visible_items_count, 0)
+            elif key == self.curses.KEY_NPAGE:
+                selected_item = min(selected_item + visible_items_count, max(len(labels) - 1, 0))
+            elif key == self.curses.KEY_HOME:
+                selected_item = 0
+            elif key == self.curses.KEY_END:
+                selected_item = max(len(labels) - 1, 0)
+
+    @Tracer.traced("ui")
+    def msgbox(self, text):
+        text_lines = self.__wrapText(text)
+        first_visible_line = 0
+
+        while True:
+            lines_count = self.__drawDialog("", self.MSGBOX_HELP)
+            text_row, visible_lines_count = self.__getFreeArea(lines_count)
+            first_visible_line = min(first_visible_line, max(len(text_lines) - visible_lines_count, 0))
+            for row, text_line in enumerate(text_lines[first_visible_line:first_visible_line + visible_lines_count]):
+                self.__drawLine(text_row + row, text_line)
+            self.screen.refresh()
+
+            key = self.__readKey()
+            if key in self.ENTER_KEYS or key in (self.curses.KEY_ENTER, self.ESCAPE_KEY, " "):
+                return
+            elif key in (self.curses.KEY_UP, "k"):
+                first_visible_line = max(first_visible_line - 1, 0)
+            elif key in (self.curses.KEY_DOWN, "j"):
+                first_visible_line += 1
+            elif key == self.curses.KEY_PPAGE:
+                first_visible_line = max(first_visible_line - visible_lines_count, 0)
+            elif key == self.curses.KEY_NPAGE:
+                first_visible_line += visible_lines_count
+
+    @Tracer.traced("ui")
+    def inputbox(self, prompt, default = ""):
+        value = str(default)
+        self.__setCursorVisible(True)
+
+        try:
+            while True:
+                lines_count = self.__drawDialog(prompt, self.INPUTBOX_HELP)
+                input_row, _ = self.__getFreeArea(lines_count)
+                _, width = self.screen.getmaxyx()
+                # The end of a long value is shown
+                visible_value = value[-max(width - 4, 1):]
+                self.__drawLine(input_row, f"> {visible_value}")
+                self.screen.move(input_row, min(len(visible_value) + 2, width - 1))
+                self.screen.refresh()
+
+                key = self.__readKey()
+                if key in self.ENTER_KEYS or key == self.curses.KEY_ENTER:
+                    return value, self.OK_BUTTON
+                elif key == self.ESCAPE_KEY:
+                    return value, self.CANCEL_BUTTON
+                elif key in self.BACKSPACE_KEYS or key == self.curses.KEY_BACKSPACE:
+                    value = value[:-1]
+                elif isinstance(key, str) and key.isprintable():
+                    value += key
+        finally:
+            self.__setCursorVisible(False)
+
+    @Tracer.traced("ui")
+    def searchbox(self, prompt, find_items):
+        # Input line with the items found for the entered text listed under
+        # it, the list is updated after every key. find_items(<TEXT>) returns
+        # the menu items, its ValueError is shown instead of the items (e.g.
+        # a query that is not typed to the end yet). Letters are typed into
+        # the input line, so only the arrow keys move the selection
+        value = ""
+        found_value = None
+        error_message = None
+        tags, labels = [], []
+        selected_item = 0
+        first_visible_item = 0
+        self.__setCursorVisible(True)
+
+        try:
+            while True:
+                if value != found_value:
+                    try:
+                        tags, labels = self.__getTagsAndLabels(find_items(value))
+                        error_message = None
+                    except ValueError as error:
+                        tags, labels = [], []
+                        error_message = str(error)
+                    found_value = value
+                    selected_item = 0
+                    first_visible_item = 0
+
+                lines_count = self.__drawDialog(prompt, self.SEARCHBOX_HELP)
+                input_row, visible_lines_count = self.__getFreeArea(lines_count)
+                items_row = input_row + 2
+                visible_items_count = max(visible_lines_count - 2, 1)
+                if labels:
+                    first_visible_item = self.__drawItems(items_row, visible_items_count, labels, selected_item, first_visible_item)
+                elif error_message:
+                    self.__drawLine(items_row, f" {error_message}", self.curses.A_DIM)
+                elif value.strip():
+                    self.__drawLine(items_row, f" {self.SEARCHBOX_NOTHING_FOUND}", self.curses.A_DIM)
+
+                _, width = self.screen.getmaxyx()
+                # The end of a long value is shown
+                visible_value = value[-max(width - 4, 1):]
+                self.__drawLine(input_row, f"> {visible_value}")
+                self.screen.move(input_row, min(len(visible_value) + 2, width - 1))
+                self.screen.refresh()
+
+                key = self.__readKey()
+                if key in self.ENTER_KEYS or key == self.curses.KEY_ENTER:
+                    if labels:
+                        return tags[selected_item], self.OK_BUTTON
+                elif key == self.ESCAPE_KEY:
+                    return "", self.CANCEL_BUTTON
+                elif key == self.curses.KEY_UP:
+                    selected_item = max(selected_item - 1, 0)
+                elif key == self.curses.KEY_DOWN:
+                    selected_item = min(selected_item + 1, max(len(labels) - 1, 0))
+                elif key == self.curses.KEY_PPAGE:
+                    selected_item = max(selected_item - visible_items_count, 0)
+                elif key == self.curses.KEY_NPAGE:
+                    selected_item = min(selected_item + visible_items_count, max(len(labels) - 1, 0))
+                elif key in self.BACKSPACE_KEYS or key == self.curses.KEY_BACKSPACE:
+                    value = value[:-1]
+                elif isinstance(key, str) and key.isprintable():
+                    value += key
+        finally:
+            self.__setCursorVisible(False)
+
+    @Tracer.traced("ui")
+    def showStatus(self, text):
+        # The status lines are redrawn at once, the rest of the screen is
+        # updated by the next dialog
+        self.status_lines = self.__wrapText(text)
+        for row, status_line in enumerate(self.status_lines):
+            self.__drawLine(1 + row, status_line, self.curses.A_BOLD)
+        self.screen.refresh()
+
+    def close(self):
+        if not self.is_closed:
+            self.is_closed = True
+            self.curses.endwin()
+
+    def __readKey(self):
+        # Characters are returned as str, special keys as int. None - the
+        # terminal has been resized, the dialog is redrawn with the new size
+        try:
+            key = self.screen.get_wch()
+        except self.curses.error:
+            return None
+        return None if key == self.curses.KEY_RESIZE else key
+
+    def __drawDialog(self, prompt, help_text):
+        # Draws the title, the status and the prompt, returns the number of used lines
+        height, width = self.screen.getmaxyx()
+        self.screen.erase()
+        self.__drawLine(0, self.title.center(width - 1), self.curses.A_REVERSE)
+
+        row = 1
+        for status_line in self.status_lines:
+            self.__drawLine(row, status_line, self.curses.A_BOLD)
+            row += 1
+        if self.status_lines:
+            row += 1
+
+        for prompt_line in self.__wrapText(prompt):
+            self.__drawLine(row, prompt_line)
+            row += 1
+
+        self.__drawLine(height - 1, help_text, self.curses.A_DIM)
+        return row + 1 if prompt else row
+
+    def __getTagsAndLabels(self, items):
+        # Menu items are tags or (<TAG>, <DESCRIPTION>) as in the whiptail menu
+        tags = [item[0] if isinstance(item, (tuple, list)) else item for item in items]
+        labels = [f"{item[0]} - {item[1]}" if isinstance(item, (tuple, list)) else str(item) for item in items]
+        return tags, labels
+
+    def __drawItems(self, items_row, visible_items_count, labels, selected_item, first_visible_item):
+        # Draws the visible part of the list, returns the new first visible item
+        # The selected item is always visible
+        first_visible_item = min(max(first_visible_item, selected_item - visible_items_count + 1), selected_item)
+        for row, item_index in enumerate(range(first_visible_item, min(len(labels), first_visible_item + visible_items_count))):
+            attributes = self.curses.A_REVERSE if item_index == selected_item else self.curses.A_NORMAL
+            self.__drawLine(items_row + row, f" {labels[item_index]}", attributes)
+        return first_visible_item
+
+    def __getFreeArea(self, lines_count):
+        # (<FIRST ROW>, <ROWS COUNT>) between the prompt and the help line
+        height, _ = self.screen.getmaxyx()
+        first_row = min(lines_count, height - 2)
+        return first_row, max(height - 1 - first_row, 1)
+
+    def __drawLine(self, row, text, attributes = 0):
+        height, width = self.screen.getmaxyx()
+        if not 0 <= row < height:
+            return
+        try:
+            # The last cell of the screen can not be written without an error
+            self.screen.addnstr(row, 0, text, width - 1, attributes)
+        except self.curses.error:
+            pass
+
+    def __wrapText(self, text):
+        _, width = self.screen.getmaxyx()
+        lines = []
+        for text_line in str(text).splitlines():
+            lines += textwrap.wrap(text_line, max(width - 1, 1)) or [""]
+        return lines
+
+    def __setCursorVisible(self, is_visible):
+        try:
+            self.curses.curs_set(1 if is_visible else 0)
+        except self.curses.error:
+            # Some terminals can not hide the cursor
+            pass
@@ -1,9 +1,12 @@
 import os
-import pickle
+import sys
 from ControlApplication.Components import *
 from ControlApplication.Device import *
+from ControlApplication.DeviceConfiguration import *
+from ControlApplication.FilterSetOptimizer import *
 from ControlApplication.Logger import *
-from whiptail import Whiptail
+from ControlApplication.ParametricQuery import *
+from ControlApplication.UIBackend import *
 
 # Which button was pressed?
 OK_BUTTON = 0
@@ -20,22 +23,52 @@ CONFIGS_DIR = f"{APPLICATION_DIR}/SavedConfiguration/"
 APPLICATION_TITLE = "rpitx-expansion-board control application"
 FAREWELL_MESSAGE = "Thanks for using rpitx-expansion-board project!"
 CONFIGURATION_CREATED_ABORTED = "Configuration creation aborted!"
+# Maximum number of components shown in the search results
+SEARCH_RESULTS_LIMIT = 200
+# How the filters of a new configuration are chosen
+FILTER_SELECTION_METHODS = [
+    ("Manual", "Choose the case and the model of each filter"),
+    ("Optimize", "Find the filters covering the target bands")
+]
+
+# <BACKEND NAME> : <BACKEND CLASS>
+UI_BACKENDS = {
+    CursesBackend.NAME: CursesBackend,
+    WhiptailBackend.NAME: WhiptailBackend
+}
 
 class UserInterface:
 
-    def __init__(self, log_filename = None):
-        self.whiptail_interface = Whiptail(title=APPLICATION_TITLE)
+    def __init__(self, log_filename = None, ui_backend_name = WhiptailBackend.NAME):
         self.log_filename = log_filename
         
         if log_filename:
-            self.logger = Logger(log_filename)
-            self.displayInfo(f"Debug mode enabled!\n\nLogs will be writed to: {log_filename}")
-            self.logger.logMessage(f"Application running!", Logger.LogLevel.INFO, True, True)
+            self.logger = Logger.getLogger(log_filename)
         else:
             self.logger = None
 
+        self.ui_backend = self.__createUIBackend(ui_backend_name)
+
+        if self.logger:
+            self.displayInfo(f"Debug mode enabled!\n\nLogs will be writed to: {log_filename}")
+            self.logger.logMessage(f"Application running!", Logger.LogLevel.INFO, True, True)
+
+    def __createUIBackend(self, ui_backend_name):
+        # curses needs a terminal, without it the whiptail dialogs are used
+        if ui_backend_name == CursesBackend.NAME:
+            try:
+                if not (sys.stdin.isatty() and sys.stdout.isatty()):
+                    raise OSError("standard input and output are not a terminal")
+                return CursesBackend(APPLICATION_TITLE)
+            except Exception as error:
+                if self.logger:
+                    self.logger.logMessage(f"curses interface is not available, whiptail is used: {error}", Logger.LogLevel.ERROR)
+                ui_backend_name = WhiptailBackend.NAME
+
+        return UI_BACKENDS[ui_backend_name](APPLICATION_TITLE)
+
     def chooseItem(self, prompt, items, exit_if_cancel_pressed = False):
-        user_action = self.whiptail_interface.menu(prompt, items)
+        user_action = self.ui_backend.menu(prompt, items)
         # <Cancel> button has been pressed
         if (user_action[BUTTONS_STATE] == CANCEL_BUTTON):
             if exit_if_cancel_pressed:
@@ -45,52 +78,84 @@ class UserInterface:
         return user_action[USER_CHOICE]
 
     def displayInfo(self, info):
-        self.whiptail_interface.msgbox(info, extra_args=["--scrolltext"])
+        self.ui_backend.msgbox(info)
+
+    def displayStatus(self, status):
+        # Result of an action: curses keeps it on the screen above the next
+        # dialog, whiptail shows it in a message box
+        self.ui_backend.showStatus(status)
 
     def displayFarewellMessageAndExit(self):
         self.displayInfo(FAREWELL_MESSAGE)
+        self.ui_backend.close()
         
         if self.logger:
             self.logger.logMessage(f"Application stopped!", Logger.LogLevel.INFO, True, True)
         exit(0)
 
-    def loadDeviceConfiguration(self):
-        if not os.path.exists(CONFIGS_DIR) or not any(file.endswith('.pkl') for file in os.listdir(CONFIGS_DIR)):
+    def loadDeviceConfiguration(self, filters_catalog, amplifiers_catalog):
+        # Names and board types are taken from the index, the configuration 
+        # files are not opened until one of them is selected
+        configurations = ConfigurationIndex(CONFIGS_DIR).getConfigurations()
+
+        if not configurations:
+            # Configurations of the previous versions are converted only on request
+            if DeviceConfiguration.findLegacyConfigurations(CONFIGS_DIR):
+                self.displayInfo(f"Configurations saved by a previous version (.pkl) found in the directory: {CONFIGS_DIR}"
+                                 "\n\nConvert them with 'rpitx-control migrate' or create a new device configuration!")
+                return None
             self.displayInfo(f"No configuration files found in the directory: {CONFIGS_DIR}"
                                 "\n\nPlease create a new device configuration!")
             return None
 
-        configuration_files_list = [file for file in os.listdir(CONFIGS_DIR) if file.endswith(".pkl")]
+        configurations_list = [(os.path.splitext(filename)[0], f"{entry['name']}, {entry['board']}")
+                               for filename, entry in configurations]
 
-        configuration_path = self.chooseItem(
-            "Select a configuration file:", configuration_files_list)
+        configuration_name = self.chooseItem("Select a configuration file:", configurations_list)
 
-        if not configuration_path:
+        if not configuration_name:
             return None
         
-        with open(f"{CONFIGS_DIR}/{configuration_path}", 'rb') as device_configuration_file:
-            device = pickle.load(device_configuration_file)
+        configuration_path = os.path.join(CONFIGS_DIR, configuration_name + DeviceConfiguration.FILE_EXTENSION)
+        try:
+            device = DeviceConfiguration.load(configuration_path).createDevice(filters_catalog, amplifiers_catalog, self.log_filename)
+        except (OSError, ValueError) as error:
+            if self.logger:
+                self.logger.logMessage(f"Unable to load device configuration {configuration_path}: {error}", Logger.LogLevel.ERROR)
+            self.displayInfo(f"Unable to load the configuration!\n\n{error}")
+            return None
 
         if self.logger:
-            self.logger.logMessage(f"Device configuration loaded: {CONFIGS_DIR}/{configuration_path}", Logger.LogLevel.INFO)
+            self.logger.logMessage(f"Device configuration loaded: {configuration_path}", Logger.LogLevel.INFO)
 
         self.displayInfo("Configuration loaded succesfully!")
         
         return device
 
     def saveDeviceConfiguration(self, device):
-        os.makedirs(CONFIGS_DIR, exist_ok=True)
+        user_input = self.ui_backend.inputbox("Enter the configuration name:", DeviceConfiguration.DEFAULT_NAME)
+        # <Cancel> button has been pressed
+        if user_input[BUTTONS_STATE] == CANCEL_BUTTON or not user_input[USER_CHOICE].strip():
+            self.displayInfo("Configuration not saved!")
+            return None
 
-        file_path = os.path.join(CONFIGS_DIR, f"{device.model_name}.pkl")
-        
-        with open(file_path, 'wb') as device_configuration_file:
-            pickle.dump(device, device_configuration_file)
+        try:
+            file_path = DeviceConfiguration.fromDevice(device, user_input[USER_CHOICE].strip()).save(CONFIGS_DIR)
+        except (OSError, ValueError) as error:
+            if self.logger:
+                self.logger.logMessage(f"Device configuration not saved: {error}", Logger.LogLevel.ERROR)
+            self.displayInfo(f"Configuration not saved!\n\n{error}")
+            return None
+        # The switch state of the device is saved under the configuration name
+        device.configuration_name = user_input[USER_CHOICE].strip()
         
         if self.logger:
             self.logger.logMessage(f"Device configuration info saved: {file_path}", Logger.LogLevel.INFO)
         
         self.displayInfo(f"Configuration saved!\n\nFile: {file_path}")
 
+        return file_path
+
     def __createActionsList(self, device):
         actions_list = [(f"Activate filter {i + 1}", f"{filter_obj.model_number}, {filter_obj.description}") 
                         for i, filter_obj in enumerate(device.filters) 
@@ -118,11 +183,22 @@ class UserInterface:
         
         active_filter = "Not selected!"
         is_lna_activated = False
+        # The switches may have been initialized to the saved state
+        filter_id = device.filter_switch.getActiveRFPath()
+        if filter_id is not None:
+            device_filter = device.filters[filter_id - 1]
+            active_filter = f"{filter_id} - {device_filter.model_number}, {device_filter.description}"
+        if device.lna_switch is not None:
+            is_lna_activated = device.lna_switch.is_active
 
         while True:
             
             board_status = self.__updateBoardInfo(active_filter, is_lna_activated, device)
-            user_choice = self.chooseItem(board_status, ACTIONS_LIST, True)
+            user_choice = self.chooseItem(board_status, ACTIONS_LIST)
+
+            if user_choice is None:
+                # The user pressed <Cancel>, we return to the main menu, the board keeps its state
+                return
 
             if "Activate filter" in user_choice:
                 filter_id = int(user_choice[-1])
@@ -130,23 +206,27 @@ class UserInterface:
                 active_filter = f"{filter_id} - {device_filter.model_number}, {device_filter.description}"
 
                 if device.filter_switch.enableFilter(filter_id):
-                    self.displayInfo(f"Filter {active_filter} enabled!")
+                    self.displayStatus(f"Filter {active_filter} enabled!")
                 else:
                     self.displayInfo("Error in device configuration!")
             
             elif "Toggle LNA" in user_choice:
                 is_lna_activated = device.lna_switch.toggleLNA()
-                self.displayInfo("LNA enabled!" if is_lna_activated else "LNA disabled!")
+                self.displayStatus("LNA enabled!" if is_lna_activated else "LNA disabled!")
 
     def selectComponent(self, components_list, prompt, may_be_not_installed = False):
+        # Case styles and the components of each case are taken from the catalog
+        # indexes, the catalog is not scanned for every dialog
+        unique_case_styles = components_list.getCaseStyles()
+
         while True:
-            unique_case_styles = sorted(set(component.case_style for component in components_list))
-            
             NOT_INSTALLED_ITEM = "<Not installed>"
+            SEARCH_ITEM = "<Search>"
+            menu_items = [SEARCH_ITEM] + unique_case_styles
             if may_be_not_installed:
-                unique_case_styles.insert(0, NOT_INSTALLED_ITEM)
+                menu_items.insert(0, NOT_INSTALLED_ITEM)
             
-            selected_case_style = self.chooseItem(prompt, unique_case_styles, False)
+            selected_case_style = self.chooseItem(prompt, menu_items, False)
             
             if not selected_case_style:
                 # The user pressed <Cancel>, we display info message and return to the initial menu
@@ -158,16 +238,76 @@ class UserInterface:
                 # We note that the component is not installed on the expansion board
                 return BaseModel(None, None, None)
 
-            available_model_numbers = [component.model_number for component in components_list if component.case_style == selected_case_style]
+            if selected_case_style == SEARCH_ITEM:
+                selected_component = self.__searchComponent(components_list)
+                if selected_component is None:
+                    # The user clicked <Cancel> or nothing was found, we suggest selecting the case type again
+                    continue
+                return selected_component
+
+            component_indexes = components_list.getCaseStyleIndexes(selected_case_style)
+            available_model_numbers = [components_list.columns["model_number"][index] for index in component_indexes]
             selected_model_number = self.chooseItem(f"Available models for '{selected_case_style}' case:", available_model_numbers, False)
             
             if not selected_model_number:
                 # The user clicked <Cancel>, we suggest selecting the case type again
                 continue
 
-            for component in components_list:
-                if (component.model_number == selected_model_number) and (component.case_style == selected_case_style):
-                    return component
+            # The device refers to the catalog record, values are not copied
+            return components_list.getReference(int(component_indexes[available_model_numbers.index(selected_model_number)]))
+
+    def __searchComponent(self, components_list):
+        # Components found by model number, case style, description or frequency (MHz),
+        # queries with parameter conditions are evaluated by ParametricQuery
+        search_prompt = ("Search (model number, description, frequency in MHz or parameters, "
+                         "e.g. nf<1 gain>15 430mhz current<60 sort:-oip3):")
+        if self.ui_backend.HAS_INCREMENTAL_SEARCH:
+            # The found components are shown while the query is typed
+            selected_item = self.ui_backend.searchbox(search_prompt, lambda search_query: self.__findComponents(components_list, search_query))
+            selected_model_number = selected_item[USER_CHOICE] if selected_item[BUTTONS_STATE] == OK_BUTTON else None
+        else:
+            user_input = self.ui_backend.inputbox(search_prompt, "")
+            if user_input[BUTTONS_STATE] == CANCEL_BUTTON or not user_input[USER_CHOICE].strip():
+                return None
+
+            search_query = user_input[USER_CHOICE].strip()
+            try:
+                found_items = self.__findComponents(components_list, search_query)
+            except ValueError as error:
+                self.displayInfo(f"Invalid query '{search_query}': {error}")
+                return None
+            if not found_items:
+                self.displayInfo(f"No components found for '{search_query}'!")
+                return None
+            selected_model_number = self.chooseItem(f"Components found for '{search_query}':", found_items, False)
+
+        component_index = components_list.findComponentIndex(selected_model_number) if selected_model_number else None
+        if component_index is None:
+            return None
+
+        return components_list.getReference(component_index)
+
+    def __findComponents(self, components_list, search_query):
+        # Menu items (<MODEL NUMBER>, <CASE STYLE AND DESCRIPTION>) of the components
+        # found for the query, raises ValueError if the parametric query is not valid
+        search_query = search_query.strip()
+        if not search_query:
+            return []
+
+        parameter_columns = []
+        if ParametricQuery.isParametric(search_query):
+            parametric_query = ParametricQuery.parse(search_query, components_list.model_type)
+            found_indexes = components_list.query(parametric_query, SEARCH_RESULTS_LIMIT)
+            # The values of the queried parameters are shown with the components
+            parameter_columns = parametric_query.getColumnNames()
+        else:
+            found_indexes = components_list.search(search_query, SEARCH_RESULTS_LIMIT)
+
+        # Model numbers are unique in the catalog
+        return [(components_list.columns["model_number"][index],
+                 ", ".join([str(components_list.getCategory("case_style", index)), str(components_list.columns["description"][index])] +
+                           [f"{column_name} {components_list.columns[column_name][index]:g}" for column_name in parameter_columns]))
+                for index in found_indexes]
 
     def __noValidComponents(self, device_filters):
         for filter in device_filters:
@@ -177,12 +317,58 @@ class UserInterface:
         
         return True
 
+    def __optimizeFilters(self, filters_count, filter_objects):
+        # Filters of all slots covering the bands entered by the user, None if
+        # the user pressed <Cancel> or did not accept the found filters
+        bands_input = self.ui_backend.inputbox("Target bands in MHz, e.g. 28-29.7 144-146 430-440:", "")
+        if bands_input[BUTTONS_STATE] == CANCEL_BUTTON or not bands_input[USER_CHOICE].strip():
+            return None
+        case_styles_input = self.ui_backend.inputbox("Case styles of the stocked filters separated by spaces (empty - any case):", "")
+        if case_styles_input[BUTTONS_STATE] == CANCEL_BUTTON:
+            return None
+        rejection_input = self.ui_backend.inputbox("Minimum rejection of the 2nd and 3rd harmonics, dB:", 
+                                                   f"{FilterSetOptimizer.MIN_REJECTION_DB:g}")
+        if rejection_input[BUTTONS_STATE] == CANCEL_BUTTON:
+            return None
+
+        try:
+            bands = FilterSetOptimizer.parseBands(bands_input[USER_CHOICE])
+            filter_set = FilterSetOptimizer(filter_objects, log_filename=self.log_filename).optimize(
+                bands, filters_count, case_styles_input[USER_CHOICE].split(), float(rejection_input[USER_CHOICE]))
+        except ValueError as error:
+            self.displayInfo(f"Unable to choose the filters: {error}")
+            return None
+
+        if not filter_set.model_numbers:
+            self.displayInfo("No filter covers the bands with the given case styles and rejection!")
+            return None
+        if self.chooseItem(f"{filter_set.getDescription()}\n\nUse these filters?", ["Yes", "No"]) != "Yes":
+            return None
+
+        if self.logger:
+            self.logger.logMessage(f"Filters chosen for the bands {bands}: {filter_set.model_numbers}", Logger.LogLevel.INFO)
+        return filter_set.getFilters(filters_count)
+
     def createDeviceConfiguration(self, selected_board, filter_objects, amplifier_objects):
         device = Device(selected_board, self.log_filename)
+        filters_count = device.DEVICE_TYPE_MAPPING[selected_board][0]
+
+        selection_method = self.chooseItem("Choose how the filters are selected:", FILTER_SELECTION_METHODS)
+        if selection_method is None:
+            self.displayInfo(CONFIGURATION_CREATED_ABORTED)
+            return None
+
+        if selection_method == FILTER_SELECTION_METHODS[1][0]:
+            # The found filters are placed in the slots, the remaining slots are not installed
+            optimized_filters = self.__optimizeFilters(filters_count, filter_objects)
+            if optimized_filters is None:
+                self.displayInfo(CONFIGURATION_CREATED_ABORTED)
+                return None
+            device.filters = optimized_filters
 
         # Fill in information about the filters used
-        for i in range(device.DEVICE_TYPE_MAPPING[selected_board][0]):
-            selected_filter = self.selectComponent(filter_objects, f"Choose filter case for filter {i + 1} from {device.DEVICE_TYPE_MAPPING[selected_board][0]}:", True)
+        for i in range(len(device.filters), filters_count):
+            selected_filter = self.selectComponent(filter_objects, f"Choose filter case for filter {i + 1} from {filters_count}:", True)
             if selected_filter is None:
                 return None
             device.filters.append(selected_filter)
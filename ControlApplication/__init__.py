@@ -1,6 +1,282 @@
 # -----------------------------------------------------------
 # Changelog:
 # -----------------------------------------------------------
+# Version 0.6: 
+# -----------------------------------------------------------
+# Columnar components catalog
+# ComponentsList.data is now a ComponentsCatalog object that 
+# stores the information from the .csv files as NumPy arrays. 
+# Frequency values such as "DC-5800", "DC -435" or "140-1000" 
+# are parsed into numeric low/high edges of the passband and 
+# stopbands, case style and filter type are stored as 
+# categorical codes. All .csv files are converted in a single 
+# vectorized pass, Filter and Amplifier objects are created 
+# only when a specific component is requested.
+# 
+# Dumps created by previous versions of the application are 
+# rebuilt automatically.
+# 
+# Frequency queries over the filters catalog
+# ComponentsList.findFilters(frequency, harmonics) returns the 
+# filters whose passband contains the frequency (MHz) and whose 
+# stopbands cover the given harmonics, e.g. (2, 3) for 2f and 3f. 
+# Queries are answered by the interval trees from 
+# FrequencyIndex.py which are built once on the first query. 
+# The scaling of the index can be checked on a synthetic 
+# catalog of up to 100k filters:
+# python -m Benchmarks.FrequencyIndexBenchmark
+# 
+# Automatic filter selection by the transmit frequency
+# Device.enableFilterForFrequency(frequency) activates the filter 
+# whose passband contains the frequency (MHz) and which gives the 
+# deepest rejection of the 2nd and 3rd harmonics. The choice is 
+# made using a lookup table with a 10 kHz step built once for the 
+# installed filters when the filter switch is initialized, so 
+# retuning costs a single array lookup. Filters marked as 
+# "<Not installed>" are never selected.
+# 
+# Memory-mapped components dump
+# The .pkl dumps of the components lists have been replaced by 
+# FiltersListDump.bin and AmplifierDump.bin files (CatalogCache.py).
+# The dump stores a fingerprint of the .csv files it was built 
+# from (names, sizes and modification times), so edited or added 
+# .csv files cause the dump to be rebuilt. The catalog columns are 
+# used directly from the memory-mapped file without deserializing 
+# it, the file is replaced atomically and can be shared read-only 
+# between several processes. Cold and warm startup can be compared 
+# with the previous pickle dumps:
+# python -m Benchmarks.CatalogCacheBenchmark
+# 
+# Deferred imports of heavy modules
+# pandas is imported only when a catalog is built from the .csv 
+# files, gpiozero - when the RF switches are initialized, 
+# colorama - when a components initialization error is displayed, 
+# whiptail - when the user interface is created. Frequency values 
+# are parsed with NumPy only, so loading the application with 
+# up-to-date dumps does not import pandas at all. Startup time, 
+# import time of the heavy modules and peak RSS for the cold and 
+# warm paths are checked against thresholds by:
+# python -m Benchmarks.StartupBenchmark
+# 
+# Buffered logger
+# Logger no longer opens and closes the log file for every 
+# message. Messages are put into a queue and written by a 
+# background thread in batches, the file is flushed at least 
+# once per second and when the application exits. The log file 
+# is rotated when it grows beyond 5 MB (DebugInfo.log.1, ...). 
+# Messages are filtered by level (LOG_LEVEL in main.py) before 
+# being formatted, the state of each GPIO pin is logged only at 
+# the DEBUG level. All application objects share one logger 
+# obtained with Logger.getLogger(log_filename).
+# 
+# Switching engine
+# RFSwitchWrapper.activateRFPath() no longer creates a pool of two 
+# threads for every switching. A SwitchingEngine created once per 
+# device drives the input and output switches one right after 
+# another from the calling thread and reports when each of them 
+# was applied (RFSwitchWrapper.last_switching_report), so the 
+# latency and the skew between the switches are visible in the 
+# log. Latency percentiles on the simulated GPIO ports:
+# python -m Benchmarks.SwitchingBenchmark
+# 
+# Diff-only GPIO writes
+# RF switch truth tables are compiled into bitmasks when the 
+# RFSwitch is created and the current state of the pins is 
+# tracked as a mask. Switching writes only the pins whose state 
+# changes (1.67 writes instead of 3 on average for SP6T). If 
+# several pins change, they are written in the order that passes 
+# through as few other RF paths as possible, e.g. SP3T path 
+# 2 -> 3 no longer passes through path 1. After a failed 
+# activation the RF path is activated again on the next request 
+# instead of being reported as already active.
+# 
+# Benchmark suite
+# python -m Benchmarks.BenchmarkSuite measures filter and LNA 
+# switching on the simulated GPIO, cold and warm loading of the 
+# components lists, saving and loading of device configurations 
+# and the startup up to the first menu. Results are written to 
+# BenchmarkResults.json, the --compare option shows the changes 
+# relative to the results of a previous run.
+# 
+# Headless control daemon
+# rpitx-control daemon <CONFIGURATION> loads a saved device 
+# configuration, initializes the RF switches once and accepts 
+# commands from the Unix socket /tmp/rpitx-control.sock 
+# (ControlServer.py): "filter 3", "lna on", "freq 145.5" and 
+# "state". Each command line gets one "OK ..." or "ERROR ..." 
+# response line, commands may be pipelined. 
+# rpitx-control send <COMMAND> ... sends commands from the shell. 
+# Throughput can be checked with:
+# python -m Benchmarks.ControlServerBenchmark
+# 
+# Timed frequency hopping
+# rpitx-control schedule <CONFIGURATION> <SCHEDULE> [--lead MS] 
+# switches filters and LNA at the times from a schedule file 
+# (Scheduler.py), one step per line: 
+# "<TIME> [filter <N>] [freq <MHz>] [lna <on|off>]", where TIME is 
+# an offset in seconds or @<UNIX TIME>. Steps are applied by a 
+# dedicated timing thread (SCHED_FIFO if permitted) that sleeps 
+# until 2 ms before the step and then polls the clock. The actual 
+# time of each step is recorded and the jitter distribution is 
+# printed at the end. Jitter can be checked with:
+# python -m Benchmarks.SchedulerBenchmark
+# 
+# rpitx process wrapper
+# rpitx-control run -- sendiq -f 145.5e6 ... finds the transmit 
+# frequency in the command line of the rpitx program, switches 
+# to the best filter and then replaces itself with the program 
+# (ProcessWrapper.py). Programs can be chained with ";", the 
+# filter is switched before each of them. The filter is switched 
+# by the running daemon, or directly with --config <CONFIGURATION>. 
+# --freq <MHz> sets the frequency for unknown programs. Modules 
+# using NumPy are no longer imported by main.py at startup, so the 
+# wrapper adds about 30 ms to the Python startup when the daemon 
+# is running:
+# python -m Benchmarks.ProcessWrapperBenchmark
+# 
+# Declarative device configurations
+# Device configurations are saved as small JSON files with the 
+# board type and the model numbers of the installed components 
+# (DeviceConfiguration.py) instead of pickled Device objects. 
+# Components are taken from the components lists when the 
+# configuration is loaded. Each configuration has a name, so 
+# several configurations can be saved for the same board. The 
+# configuration picker reads the names from 
+# SavedConfiguration/index.json without opening every file. 
+# Configurations saved by previous versions (.pkl) are converted 
+# by "rpitx-control migrate", the files are not unpickled when 
+# the picker is opened. <BOARD>.pkl is saved as the configuration 
+# "legacy", existing JSON configurations are not replaced. A name 
+# whose file name matches another configuration (e.g. "a b" and 
+# "a-b") is rejected when the configuration is saved.
+# 
+# Several boards in one process
+# A device configuration may set the GPIO pinout of the board 
+# ("pinout" with the filter_input, filter_output, lna_input and 
+# lna_output pins), the pins that are not set are taken from 
+# main.DEFAULT_PINOUT. The daemon accepts several configurations 
+# and keeps the boards in a DeviceRegistry (DeviceRegistry.py): 
+# each command is applied to all boards at the same time from a 
+# thread pool, or to some of them with the @<NAME>[,<NAME>] prefix. 
+# Configurations with the same name saved for different boards 
+# are named <BOARD>_<NAME> in the daemon. Boards whose pin writes release the GIL (e.g. GPIO expanders) 
+# are switched in about the time of a single board:
+# python -m Benchmarks.DeviceRegistryBenchmark
+# 
+# GPIO backends
+# All RF switches of a device share one GPIO backend 
+# (GPIOBackend.py) instead of creating a pin factory each. The 
+# gpiozero backend writes the pin objects directly, without the 
+# OutputDevice.value property. With GPIOMEM_PATH = "/dev/gpiomem" 
+# in main.py the pins are written through the memory-mapped GPIO 
+# registers (Raspberry Pi 1-4): the input and output switches of 
+# an RF path are changed together with one GPSET0 and one GPCLR0 
+# write, so there is no skew between them. A plain file can stand 
+# in for /dev/gpiomem:
+# python -m Benchmarks.GPIOBackendBenchmark
+# 
+# Compact component records
+# BaseModel, Filter and Amplifier use __slots__, repeated text 
+# values (case style, filter type, description, frequencies) are 
+# interned. Devices hold ComponentReference objects (catalog, index 
+# and model number) instead of copies of the records, the other 
+# values are read from the catalog columns when they are needed, 
+# and the frequency table of a device is built from the already 
+# parsed catalog columns:
+# python -m Benchmarks.ComponentsMemoryBenchmark
+# 
+# Component search
+# The component picker takes the case styles and the models of a 
+# case from indexes built once per catalog instead of passing over 
+# all components for every menu. The <Search> item finds components 
+# by model number, case style, description or frequency in MHz 
+# ("lp-216", "cs 1", "433.92mhz") using the word prefix and trigram 
+# indexes from ComponentSearch.py. The indexes are built from a few 
+# thousand components at a time, the memory used while the catalog is 
+# indexed does not grow with the length of the longest description:
+# python -m Benchmarks.ComponentSearchBenchmark
+# 
+# In-process dialogs
+# The dialogs are drawn by curses in the application process 
+# (UIBackend.py) instead of starting a whiptail process for every 
+# screen. The screen is kept between the dialogs and the result of 
+# a filter or LNA switching is shown in the status lines above the 
+# next menu, without a confirmation dialog. The components found by 
+# the <Search> item are listed while the query is typed. The whiptail 
+# dialogs are used with --ui whiptail (UI_BACKEND in main.py) or when 
+# there is no terminal, the query is then entered in one dialog and 
+# the components are listed in the next one:
+# python -m Benchmarks.UIBackendBenchmark
+# 
+# Parametric amplifier search
+# All numeric columns of the amplifier .csv files (NF, P1dB, OIP3, 
+# VSWR, voltage and current) are stored in the catalog, the values 
+# of the amplifiers with several operating points ("5/3" V) are 
+# stored as the lowest and the highest one. The <Search> item 
+# accepts parameter conditions with ranking 
+# ("nf<1 gain>15 430mhz current<60 sort:-oip3"), evaluated over 
+# the catalog columns by ParametricQuery.py:
+# python -m Benchmarks.ParametricQueryBenchmark
+# 
+# Incremental catalog updates
+# The dump keeps the size, modification time and number of rows of 
+# every .csv file: only new and changed files are parsed and merged 
+# with the rows of the unchanged files, text columns are copied 
+# without decoding. Files are parsed in chunks of CSV_CHUNK_ROWS 
+# rows. While the menu is running, .csv files added to FiltersList/ 
+# and AmplifiersList/ are picked up by CatalogWatcher.py (inotify, 
+# polling on other systems):
+# python -m Benchmarks.IncrementalCatalogBenchmark
+# 
+# Harmonic coverage map
+# rpitx-control coverage <CONFIGURATION> sweeps the fundamental 
+# frequency from 0 to 1.5 GHz (the end of the frequency table of 
+# the device, no filter is switched above it) and shows which 
+# filter the board switches to in each band and how it rejects 
+# the 2nd - 5th harmonics, with the gaps and the weakly rejected 
+# ranges of the operating bands (--band 144-146). All filters are 
+# evaluated at all points at once (HarmonicCoverage.py):
+# python -m Benchmarks.HarmonicCoverageBenchmark
+# 
+# Filter set optimization
+# The filters of a new configuration can be chosen for the target 
+# bands: the menu option "Optimize" or rpitx-control optimize 
+# <BOARD> --band 144-146 --band 430-440 [--case-style ...] 
+# [--min-rejection 20]. Candidates are found with the frequency 
+# index, filters covering a subset of the points of another one 
+# are dropped, and the sets are searched by branch and bound with 
+# the top-level branches spread over a process pool 
+# (FilterSetOptimizer.py):
+# python -m Benchmarks.FilterSetOptimizerBenchmark
+# 
+# Switch state resume
+# The last enabled filter and LNA state of each saved configuration 
+# are saved on every change (SwitchState/<CONFIGURATION>.json, 
+# replaced atomically and synced before the switching returns). The 
+# file is also written when a board is loaded, on the next start 
+# the board used last is opened in the board menu without dialogs, 
+# its GPIO pins are created directly in the saved state instead of 
+# all HIGH followed by the RF path activation (SwitchState.py). 
+# The Cancel button of the board menu returns to the main menu:
+# python -m Benchmarks.SwitchStateBenchmark
+# 
+# Runtime metrics
+# RF path switches per path, RF output activations, failed and 
+# redundant activations of each switch, histograms of the switching 
+# latency and of the catalog load time. Values are recorded to 
+# per-thread shards without a lock and exported in the Prometheus 
+# text format: --metrics-port <PORT> (http://127.0.0.1:<PORT>/metrics) 
+# or --metrics-file <PATH> (Metrics.py):
+# python -m Benchmarks.MetricsBenchmark
+# 
+# Tracing
+# RPITX_TRACE=<FILE> saves the spans of the catalog loading (each 
+# .csv file worker and dump), of the RF path and RF output 
+# activations and of the dialogs in the Chrome trace event format, 
+# the thread pools can be checked in chrome://tracing or Perfetto. 
+# Without the variable the functions are not wrapped (Tracer.py):
+# python -m Benchmarks.TracerBenchmark
+# -----------------------------------------------------------
 # Version 0.5: 
 # -----------------------------------------------------------
 # Handling the situation when the filter is not installed
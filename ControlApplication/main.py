@@ -1,12 +1,26 @@
-from concurrent.futures import ThreadPoolExecutor
-from ControlApplication.Device import *
-from ControlApplication.UserInterface import *
-from ControlApplication.Components import *
+import argparse
+import os
+import signal
+import sys
+from ControlApplication.ControlServer import *
+from ControlApplication.Logger import *
+from ControlApplication.ProcessWrapper import *
+from ControlApplication.UIBackend import *
+
+# Components, Device, Scheduler and UserInterface (and NumPy with them) are 
+# imported only by the commands that use them, so the commands working 
+# through the daemon (send, run) start without loading them
+
+# Absolute path to the directory with the program source files
+APPLICATION_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Output debugging information to a file
 SHOW_DEBUG_INFO = True
 # Log file save location
 LOG_FILENAME = f"{APPLICATION_DIR}/DebugInfo.log" if SHOW_DEBUG_INFO else None
+# Messages less important than LOG_LEVEL are not written to the log file
+# (ERROR < INFO < DEBUG, DEBUG also writes the state of each GPIO pin)
+LOG_LEVEL = Logger.LogLevel.DEBUG
 
 # Using MockFactory to simulate real GPIO ports.This allows the 
 # application to run on devices other than RaspberryPi without 
@@ -20,36 +34,452 @@ MOCK_GPIO_USED_INFO = (
     "Disable this mode if you want to control the expansion board!"
 ) if IS_MOCK_GPIO_USED else None
 
+# Writing the switch pins directly through the memory-mapped GPIO registers 
+# (Raspberry Pi 1-4) instead of gpiozero: all pins of an RF path are switched 
+# with one register write. None - gpiozero is used. Not used together with 
+# the GPIO port simulation
+GPIOMEM_PATH = None
+
+# Dialogs of the interactive interface: CursesBackend.NAME - drawn in the 
+# application process, the screen is kept between the dialogs and the result 
+# of a switching is shown without a confirmation; WhiptailBackend.NAME - a 
+# whiptail process for each dialog. Can be changed with the --ui option
+UI_BACKEND = CursesBackend.NAME
+
 # Information related to the configuration of RF filter switches
 FILTER_MODELS_DIR = f"{APPLICATION_DIR}/FiltersList"
-FILTER_DUMP_FILE = "FiltersListDump.pkl"
+FILTER_DUMP_FILE = "FiltersListDump.bin"
 FILTER_INPUT_SWITCH_GPIO_PINS = [17, 27, 22]
 FILTER_OUTPUT_SWITCH_GPIO_PINS = [0, 5, 6]
 
 # Information related to the configuration of LNA switches
 AMPLIFIER_MODELS_DIR = f"{APPLICATION_DIR}/AmplifiersList"
-AMPLIFIER_DUMP_FILE = "AmplifierDump.pkl"
+AMPLIFIER_DUMP_FILE = "AmplifierDump.bin"
 LNA_INPUT_SWITCH_GPIO_PINS = [23, 24]
 LNA_OUTPUT_SWITCH_GPIO_PINS = [16, 26]
 
+# Pinout of the boards whose configuration does not set it. Each board 
+# controlled by the daemon must use its own pins
+DEFAULT_PINOUT = {
+    "filter_input": FILTER_INPUT_SWITCH_GPIO_PINS,
+    "filter_output": FILTER_OUTPUT_SWITCH_GPIO_PINS,
+    "lna_input": LNA_INPUT_SWITCH_GPIO_PINS,
+    "lna_output": LNA_OUTPUT_SWITCH_GPIO_PINS
+}
+
+# Switch counters, switching latency and catalog load time histograms in the 
+# Prometheus text format: served at http://127.0.0.1:<METRICS_PORT>/metrics 
+# and/or written to METRICS_FILE (e.g. for the node_exporter textfile 
+# collector). None - not exported. Can be set with --metrics-port and 
+# --metrics-file
+METRICS_PORT = None
+METRICS_FILE = None
+
+# Last filter and LNA state of each saved configuration, the board used last 
+# is restored on startup (pins are created in the saved state) and the 
+# interactive interface opens its menu without choosing the configuration
+SWITCH_STATE_DIR = f"{APPLICATION_DIR}/SwitchState"
+RESUME_LAST_DEVICE = True
+
 # List of actions available to perform for a specific device
 APPLICATION_ACTIONS = ["Create a new device configuration", "Load device configuration"]
 
-def main():
+def printError(error_info):
+    from colorama import Fore, Style
+    print(f"{Fore.RED}{error_info}{Style.RESET_ALL}")
 
-    user_interface = UserInterface(LOG_FILENAME)
+def getConfigurationPath(configuration):
+    # Configuration is set by the file path, by the name of the file saved 
+    # in CONFIGS_DIR (the extension may be omitted) or by the configuration 
+    # name if it is used only for one board
+    from ControlApplication.DeviceConfiguration import ConfigurationIndex, DeviceConfiguration
+    from ControlApplication.UserInterface import CONFIGS_DIR
 
-    # Displays an information message indicating that GPIO port simulation is being used
-    if IS_MOCK_GPIO_USED:
-        user_interface.displayInfo(MOCK_GPIO_USED_INFO)
+    if os.path.isfile(configuration):
+        return configuration
+
+    configuration_path = os.path.join(CONFIGS_DIR, configuration)
+    if not configuration_path.endswith(DeviceConfiguration.FILE_EXTENSION):
+        configuration_path += DeviceConfiguration.FILE_EXTENSION
+    if os.path.isfile(configuration_path):
+        return configuration_path
+
+    configuration_filename = ConfigurationIndex(CONFIGS_DIR).findConfiguration(configuration)
+    return os.path.join(CONFIGS_DIR, configuration_filename) if configuration_filename else None
+
+def startMetricsExport(metrics_port, metrics_file):
+    # Returns False if the metrics endpoint can not be started
+    from ControlApplication.Metrics import MetricsFileWriter, MetricsServer
+
+    if metrics_port is not None:
+        try:
+            MetricsServer(metrics_port, log_filename=LOG_FILENAME).start()
+        except OSError as error:
+            printError(f"Unable to serve the metrics on port {metrics_port}: {error}")
+            return False
+    if metrics_file:
+        MetricsFileWriter(metrics_file, log_filename=LOG_FILENAME).start()
+    return True
+
+def loadComponentsLists():
+    from concurrent.futures import ThreadPoolExecutor
+    from ControlApplication.Components import ComponentsList
 
     # Initializing available filter and amplifier models
     with ThreadPoolExecutor(max_workers=2) as executor:
         filters_future = executor.submit(ComponentsList, ComponentsList.FILTER, FILTER_MODELS_DIR, FILTER_DUMP_FILE, LOG_FILENAME)
         amplifiers_future = executor.submit(ComponentsList, ComponentsList.AMPLIFIER, AMPLIFIER_MODELS_DIR, AMPLIFIER_DUMP_FILE, LOG_FILENAME)
 
-        filters_list = filters_future.result()
-        amplifiers_list = amplifiers_future.result()
+        return filters_future.result(), amplifiers_future.result()
+
+def getSwitchState(device):
+    # Switch state store of a device loaded from a saved configuration, None 
+    # for a configuration that has not been saved
+    from ControlApplication.SwitchState import SwitchStateStore
+
+    if device.configuration_name is None:
+        return None
+    return SwitchStateStore(SwitchStateStore.getStatePath(SWITCH_STATE_DIR, device.model_name, device.configuration_name),
+                            device.model_name, device.configuration_name, LOG_FILENAME)
+
+def resumeLastDevice(filters_catalog, amplifiers_catalog):
+    # Device of the most recently saved switch state with the initialized RF 
+    # switches, None if there is no state or its configuration can not be used
+    from ControlApplication.DeviceConfiguration import DeviceConfiguration
+    from ControlApplication.SwitchState import SwitchStateStore
+    from ControlApplication.UserInterface import CONFIGS_DIR
+
+    state_path = SwitchStateStore.findLatest(SWITCH_STATE_DIR)
+    if state_path is None:
+        return None
+    # The state file is named as the configuration file
+    configuration_path = os.path.join(CONFIGS_DIR, os.path.basename(state_path))
+    try:
+        device = DeviceConfiguration.load(configuration_path).createDevice(filters_catalog, amplifiers_catalog, LOG_FILENAME)
+        device.initRFSwitches(DEFAULT_PINOUT, IS_MOCK_GPIO_USED, GPIOMEM_PATH, getSwitchState(device))
+    except (OSError, ValueError) as error:
+        if LOG_FILENAME:
+            Logger.getLogger(LOG_FILENAME).logMessage(f"Last device {configuration_path} not resumed: {error}", Logger.LogLevel.ERROR)
+        return None
+
+    if LOG_FILENAME:
+        Logger.getLogger(LOG_FILENAME).logMessage(f"Last device {configuration_path} resumed", Logger.LogLevel.INFO)
+    return device
+
+def loadDevice(configuration, components_lists = None, init_rf_switches = True):
+    from ControlApplication.DeviceConfiguration import DeviceConfiguration
+
+    configuration_path = getConfigurationPath(configuration)
+    if configuration_path is None:
+        printError(f"Device configuration {configuration} not found!")
+        exit(1)
+
+    # Components are taken from the catalogs by the model numbers saved in the configuration
+    filters_list, amplifiers_list = components_lists if components_lists else loadComponentsLists()
+    try:
+        device = DeviceConfiguration.load(configuration_path).createDevice(filters_list.data, amplifiers_list.data, LOG_FILENAME)
+    except (OSError, ValueError) as error:
+        printError(f"Unable to load device configuration {configuration_path}: {error}")
+        exit(1)
+
+    if not init_rf_switches:
+        return device
+
+    try:
+        device.initRFSwitches(DEFAULT_PINOUT, IS_MOCK_GPIO_USED, GPIOMEM_PATH, getSwitchState(device))
+    except (OSError, ValueError) as error:
+        printError(f"Unable to initialize the GPIO of {configuration_path}: {error}")
+        exit(1)
+    return device
+
+def loadDeviceRegistry(configurations):
+    # Boards are named after their configurations. A name saved for several 
+    # boards is not unique, such boards are named after their configuration 
+    # files (<BOARD>_<NAME>)
+    from ControlApplication.DeviceRegistry import DeviceRegistry
+
+    components_lists = loadComponentsLists()
+    device_registry = DeviceRegistry(LOG_FILENAME)
+    devices = [(configuration, loadDevice(configuration, components_lists)) for configuration in configurations]
+    configuration_names = [device.configuration_name for _, device in devices]
+    for configuration, device in devices:
+        if configuration_names.count(device.configuration_name) == 1:
+            device_name = device.configuration_name
+        else:
+            device_name = os.path.splitext(os.path.basename(getConfigurationPath(configuration)))[0]
+        try:
+            device_registry.addDevice(device_name, device)
+        except ValueError as error:
+            printError(f"Unable to add device configuration {configuration}: {error}")
+            exit(1)
+    return device_registry
+
+def runDaemon(configurations, socket_path):
+    # Configurations are loaded and the GPIO pins are initialized once, 
+    # then the devices are controlled by the commands from the socket
+    control_server = ControlServer(loadDeviceRegistry(configurations), socket_path, LOG_FILENAME)
+
+    # SIGTERM (kill, systemctl stop) stops the daemon in the same way as Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signal_number, frame: sys.exit(0))
+    try:
+        control_server.serveForever()
+    except KeyboardInterrupt:
+        pass
+
+def sendCommands(commands, socket_path):
+    try:
+        with ControlClient(socket_path) as control_client:
+            responses = control_client.sendCommands(commands)
+    except (OSError, ValueError) as error:
+        printError(f"Unable to send commands to the rpitx-control daemon: {error}")
+        return 1
+
+    print("\n".join(responses))
+    return 1 if any(response.startswith("ERROR") for response in responses) else 0
+
+def runSchedule(configuration, schedule_path, lead_time_ms):
+    from ControlApplication.Scheduler import HoppingScheduler
+
+    device = loadDevice(configuration)
+    try:
+        steps = HoppingScheduler.loadSchedule(schedule_path, device)
+    except (OSError, ValueError) as error:
+        printError(f"Unable to load the schedule: {error}")
+        return 1
+
+    scheduler = HoppingScheduler(device, steps, lead_time_ms / 1e3, LOG_FILENAME)
+    try:
+        schedule_report = scheduler.run()
+    except KeyboardInterrupt:
+        schedule_report = scheduler.stop()
+
+    print(schedule_report.getSummary())
+    return 1 if schedule_report.getFailedStepsCount() else 0
+
+def runCoverage(configuration, operating_bands, max_frequency, step, harmonics, min_rejection):
+    # The GPIO pins are not used, the analysis runs next to the daemon controlling the board
+    from ControlApplication.HarmonicCoverage import HarmonicCoverage
+
+    device = loadDevice(configuration, init_rf_switches=False)
+    try:
+        operating_bands = [tuple(float(frequency) for frequency in band.split("-", 1)) for band in operating_bands]
+        harmonics = [int(harmonic) for harmonic in harmonics.split(",")]
+    except ValueError as error:
+        printError(f"Invalid band or harmonics: {error}")
+        return 2
+    if any(len(band) != 2 or band[0] > band[1] for band in operating_bands) or step <= 0 or any(harmonic < 2 for harmonic in harmonics):
+        printError("Bands must be set as <LOW>-<HIGH> MHz, the step must be positive and harmonics start from 2!")
+        return 2
+
+    harmonic_coverage = HarmonicCoverage(device, max_frequency, 1 / step, harmonics, min_rejection)
+    print(harmonic_coverage.getSummary(operating_bands))
+    # Operating bands with gaps or weak ranges are reported by the exit code
+    return 1 if any(harmonic_coverage.getGaps(low, high) for low, high in operating_bands) else 0
+
+def runOptimize(board, bands, case_styles, min_rejection, harmonics, lna_model_number, name, max_workers, dry_run):
+    # The filters covering the bands are chosen from the catalog and saved as a new configuration
+    from ControlApplication.Device import Device
+    from ControlApplication.DeviceConfiguration import DeviceConfiguration
+    from ControlApplication.FilterSetOptimizer import FilterSetOptimizer
+    from ControlApplication.UserInterface import CONFIGS_DIR
+
+    if board not in Device.SUPPORTED_DEVICES:
+        printError(f"Unsupported board {board}, supported boards: {', '.join(Device.SUPPORTED_DEVICES)}")
+        return 2
+    filters_count, _, lna_truth_table = Device.DEVICE_TYPE_MAPPING[board]
+    if lna_truth_table and not lna_model_number:
+        printError(f"{board} has an LNA, set its model number with --lna!")
+        return 2
+    try:
+        bands = FilterSetOptimizer.parseBands(" ".join(bands))
+        harmonics = [int(harmonic) for harmonic in harmonics.split(",")]
+    except ValueError as error:
+        printError(f"Invalid band or harmonics: {error}")
+        return 2
+
+    filters_list, amplifiers_list = loadComponentsLists()
+    if lna_truth_table and amplifiers_list.data.findComponentIndex(lna_model_number) is None:
+        printError(f"Amplifier {lna_model_number} not found in the components list!")
+        return 2
+    try:
+        filter_set = FilterSetOptimizer(filters_list.data, log_filename=LOG_FILENAME).optimize(
+            bands, filters_count, case_styles, min_rejection, harmonics, max_workers)
+    except ValueError as error:
+        printError(f"Unable to choose the filters: {error}")
+        return 2
+    if not filter_set.model_numbers:
+        printError("No filter covers the bands with the given case styles and rejection!")
+        return 1
+
+    print(filter_set.getDescription())
+    if not dry_run:
+        configuration = DeviceConfiguration(name or DeviceConfiguration.DEFAULT_NAME, board, filter_set.getFilterModelNumbers(filters_count),
+                                            [lna_model_number] if lna_truth_table else [])
+        try:
+            print(f"Configuration saved: {configuration.save(CONFIGS_DIR)}")
+        except (OSError, ValueError) as error:
+            printError(f"Unable to save the configuration: {error}")
+            return 2
+    # Bands that are not covered completely are reported by the exit code
+    return 0 if filter_set.isComplete() else 1
+
+def runMigrate():
+    # Configurations pickled by the previous versions are converted to JSON
+    from ControlApplication.DeviceConfiguration import DeviceConfiguration
+    from ControlApplication.UserInterface import CONFIGS_DIR
+
+    migrated_configurations, failed_configurations = DeviceConfiguration.migrateLegacyConfigurations(CONFIGS_DIR)
+    for legacy_path, configuration_path in migrated_configurations:
+        print(f"Configuration migrated: {legacy_path} -> {configuration_path}")
+    for legacy_path, error in failed_configurations:
+        printError(f"Configuration {legacy_path} not migrated: {error}")
+    if not migrated_configurations and not failed_configurations:
+        print(f"No configurations of the previous versions (.pkl) found in {CONFIGS_DIR}")
+    return 1 if failed_configurations else 0
+
+def runTransmitter(commands, configuration, socket_path, frequency):
+    # The filter is switched either by the running daemon (a single command, 
+    # the GPIO pins are already initialized) or directly by this process
+    if configuration:
+        enable_filter_for_frequency = loadDevice(configuration).enableFilterForFrequency
+    else:
+        try:
+            control_client = ControlClient(socket_path)
+        except OSError as error:
+            printError(f"rpitx-control daemon is not available ({error}), start it or use --config!")
+            return 1
+
+        # "OK filter 3" or "OK filter tx1=3 tx2=5" if the daemon controls several boards
+        def enable_filter_for_frequency(frequency):
+            response = control_client.sendCommand(f"freq {frequency}")
+            return response.split(maxsplit=2)[-1] if response.startswith("OK") else None
+
+    process_wrapper = ProcessWrapper(enable_filter_for_frequency, LOG_FILENAME)
+    return process_wrapper.run(ProcessWrapper.splitCommands(commands), frequency)
+
+def parseArguments(arguments):
+    parser = argparse.ArgumentParser(prog="rpitx-control", description="rpitx-expansion-board control application")
+    parser.add_argument("--ui", choices=[CursesBackend.NAME, WhiptailBackend.NAME],
+                        help=f"dialogs of the interactive interface (default: {UI_BACKEND})")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT, 
+                        help="serve the switching and catalog metrics at http://127.0.0.1:<PORT>/metrics")
+    parser.add_argument("--metrics-file", default=METRICS_FILE, 
+                        help="write the switching and catalog metrics to a file (Prometheus text format)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    daemon_parser = subparsers.add_parser("daemon", help="control the boards with the commands from a Unix socket")
+    daemon_parser.add_argument("configurations", nargs="+", metavar="configuration",
+                               help="saved device configuration (name, file name or path), one per board")
+    daemon_parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help=f"control socket path (default: {DEFAULT_SOCKET_PATH})")
+
+    send_parser = subparsers.add_parser("send", help="send commands to the running daemon, e.g. send 'filter 3' 'lna on'")
+    send_parser.add_argument("commands", nargs="+", help="[@<BOARD>] filter <N>, lna <on|off>, freq <MHz> or state")
+    send_parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help=f"control socket path (default: {DEFAULT_SOCKET_PATH})")
+
+    schedule_parser = subparsers.add_parser("schedule", help="switch filters and LNA at the times from a schedule file")
+    schedule_parser.add_argument("configuration", help="saved device configuration (name, file name or path)")
+    schedule_parser.add_argument("schedule", help="schedule file, lines '<TIME> [filter <N>] [freq <MHz>] [lna <on|off>]'")
+    schedule_parser.add_argument("--lead", type=float, default=0.0, help="apply each step this many milliseconds early")
+
+    coverage_parser = subparsers.add_parser("coverage", help="show which filter passes each frequency and how it rejects the harmonics")
+    coverage_parser.add_argument("configuration", help="saved device configuration (name, file name or path)")
+    coverage_parser.add_argument("--band", action="append", default=[], metavar="LOW-HIGH",
+                                 help="operating band in MHz whose gaps are listed, e.g. --band 144-146, can be repeated")
+    coverage_parser.add_argument("--max", type=float, default=1500,
+                                 help="highest analyzed frequency in MHz, no filter is used above 1500 (default: 1500)")
+    coverage_parser.add_argument("--step", type=float, default=0.1, help="frequency step in MHz (default: 0.1)")
+    coverage_parser.add_argument("--harmonics", default="2,3,4,5", help="analyzed harmonics (default: 2,3,4,5)")
+    coverage_parser.add_argument("--min-rejection", type=float, default=20, help="rejection in dB of a clean range (default: 20)")
+
+    optimize_parser = subparsers.add_parser("optimize", help="choose the filters of a board covering the target bands and save the configuration")
+    optimize_parser.add_argument("board", help="board type, e.g. rpitx-expansion-board-SP6T")
+    optimize_parser.add_argument("--band", action="append", required=True, metavar="LOW-HIGH",
+                                 help="target band in MHz, e.g. --band 144-146, can be repeated")
+    optimize_parser.add_argument("--case-style", action="append", default=[], 
+                                 help="case style of the stocked filters, can be repeated (default: any case)")
+    optimize_parser.add_argument("--min-rejection", type=float, default=20, help="rejection of each harmonic in dB (default: 20)")
+    optimize_parser.add_argument("--harmonics", default="2,3", help="rejected harmonics (default: 2,3)")
+    optimize_parser.add_argument("--lna", help="LNA model number, needed for the boards with LNA")
+    optimize_parser.add_argument("--name", help="configuration name (default: default)")
+    optimize_parser.add_argument("--workers", type=int, help="search processes (default: one per CPU core)")
+    optimize_parser.add_argument("--dry-run", action="store_true", help="show the chosen filters without saving the configuration")
+
+    subparsers.add_parser("migrate", help="convert the configurations saved by the previous versions (.pkl) to JSON, "
+                                           "only the files created on this station must be left in the directory")
+
+    run_parser = subparsers.add_parser("run", help="switch the filter for the transmit frequency and start an rpitx program, "
+                                                   "e.g. run -- sendiq -f 145.5e6 -i iq.bin")
+    run_parser.add_argument("--config", help="saved device configuration, by default the filter is switched by the running daemon")
+    run_parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help=f"control socket path (default: {DEFAULT_SOCKET_PATH})")
+    run_parser.add_argument("--freq", type=float, help="transmit frequency in MHz, by default it is taken from the program arguments")
+    run_parser.add_argument("program", nargs=argparse.REMAINDER, 
+                            help=f"program and its arguments, several programs are chained with '{ProcessWrapper.COMMAND_SEPARATOR}'")
+
+    return parser.parse_args(arguments)
+
+def main(arguments = None):
+    # Without a command the interactive interface is started
+    arguments = parseArguments(sys.argv[1:] if arguments is None else arguments)
+
+    # The client does not use the logger
+    if arguments.command == "send":
+        return sendCommands(arguments.commands, arguments.socket)
+
+    # A single logger is shared by all application objects
+    if LOG_FILENAME:
+        Logger.getLogger(LOG_FILENAME, LOG_LEVEL)
+
+    # Catalogs are loaded after the export is started, their load time is recorded
+    if (arguments.metrics_port is not None or arguments.metrics_file) and not startMetricsExport(arguments.metrics_port, 
+                                                                                               arguments.metrics_file):
+        return 2
+
+    if arguments.command == "daemon":
+        return runDaemon(arguments.configurations, arguments.socket)
+    if arguments.command == "schedule":
+        return runSchedule(arguments.configuration, arguments.schedule, arguments.lead)
+    if arguments.command == "coverage":
+        return runCoverage(arguments.configuration, arguments.band, arguments.max, arguments.step, 
+                           arguments.harmonics, arguments.min_rejection)
+    if arguments.command == "optimize":
+        return runOptimize(arguments.board, arguments.band, arguments.case_style, arguments.min_rejection, arguments.harmonics,
+                           arguments.lna, arguments.name, arguments.workers, arguments.dry_run)
+    if arguments.command == "migrate":
+        return runMigrate()
+    if arguments.command == "run":
+        # "--" separating the program from the rpitx-control options is optional
+        program = arguments.program[1:] if arguments.program[:1] == ["--"] else arguments.program
+        if not program:
+            printError("Program to run is not set!")
+            return 2
+        return runTransmitter(program, arguments.config, arguments.socket, arguments.freq)
+
+    runUserInterface(arguments.ui or UI_BACKEND)
+
+def runUserInterface(ui_backend_name):
+    from ControlApplication.Device import Device
+    from ControlApplication.UserInterface import UserInterface
+
+    user_interface = UserInterface(LOG_FILENAME, ui_backend_name)
+
+    # Displays an information message indicating that GPIO port simulation is being used
+    if IS_MOCK_GPIO_USED:
+        user_interface.displayInfo(MOCK_GPIO_USED_INFO)
+
+    filters_list, amplifiers_list = loadComponentsLists()
+    # .csv files added while the application is running are shown in the next
+    # dialogs, the catalogs are read through filters_list.data / amplifiers_list.data
+    from ControlApplication.CatalogWatcher import CatalogWatcher
+    CatalogWatcher([filters_list, amplifiers_list], LOG_FILENAME).start()
+    # Device whose RF switches are initialized
+    active_device = None
+
+    # The board used last is opened in the state it was left in, <Cancel> 
+    # in its menu leads to the main menu
+    if RESUME_LAST_DEVICE:
+        active_device = resumeLastDevice(filters_list.data, amplifiers_list.data)
+        if active_device is not None:
+            user_interface.chooseBoardAction(active_device)
 
     while True:
         user_action = user_interface.chooseItem("Choose an action:", APPLICATION_ACTIONS, True)
@@ -67,16 +497,24 @@ def main():
 
         # "Load device configuration" has been choosen
         elif (user_action == APPLICATION_ACTIONS[1]):
-            device = user_interface.loadDeviceConfiguration()
+            device = user_interface.loadDeviceConfiguration(filters_list.data, amplifiers_list.data)
             # <Cancel> button has been pressed or configuration files are missing
             if device is None:
                 continue
         
-        # RF switches are initialized for all types of expansion boards
-        device.initFilterRFSwitches(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS, IS_MOCK_GPIO_USED)
+        # Pins of the previously used device are released
+        if active_device is not None:
+            active_device.releaseRFSwitches()
+            active_device = None
 
-        # The LNA will only be initialized if the currently selected expansion board supports it
-        device.initLNA(LNA_INPUT_SWITCH_GPIO_PINS, LNA_OUTPUT_SWITCH_GPIO_PINS, IS_MOCK_GPIO_USED)
+        # RF switches are initialized for all types of expansion boards, the LNA 
+        # only if the currently selected expansion board supports it
+        try:
+            device.initRFSwitches(DEFAULT_PINOUT, IS_MOCK_GPIO_USED, GPIOMEM_PATH, getSwitchState(device))
+        except (OSError, ValueError) as error:
+            user_interface.displayInfo(f"Unable to initialize the GPIO: {error}")
+            continue
+        active_device = device
         
         # Displaying text information about the active device configuration
         user_interface.displayInfo(device.getConfigurationInfo())
@@ -84,4 +522,4 @@ def main():
         user_interface.chooseBoardAction(device)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,24 @@
+import atexit
+import os
+import shutil
+import tempfile
+import ControlApplication
+from Benchmarks.BenchmarkSuite import copyCatalogs, loadBenchmarkCatalogs
+
+# Usage: python -m unittest discover -s Tests -t .
+# Behavior tests of the control application on the simulated GPIO
+# (MockFactory), the dialogs are answered by the whiptail stub of the
+# benchmarks. Files and directories are created in temporary directories.
+
+__catalogs = None
+
+def loadCatalogs():
+    # (<FILTERS CATALOG>, <AMPLIFIERS CATALOG>) built once from the shipped
+    # .csv files copied to a temporary directory
+    global __catalogs
+    if __catalogs is None:
+        catalogs_dir = tempfile.mkdtemp(prefix="rpitx-tests-")
+        atexit.register(shutil.rmtree, catalogs_dir, True)
+        copyCatalogs(os.path.dirname(os.path.abspath(ControlApplication.__file__)), catalogs_dir)
+        __catalogs = loadBenchmarkCatalogs(catalogs_dir)
+    return __catalogs
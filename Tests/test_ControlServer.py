@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from ControlApplication.ControlServer import *
+from ControlApplication.DeviceConfiguration import *
+from ControlApplication.DeviceRegistry import *
+from Tests import loadCatalogs
+
+BOARD = "rpitx-expansion-board-SP6T-LNA"
+FILTER_MODEL_NUMBERS = ["SCLF-25+", "SXLP-90+", "RLP-176+", "LFCG-42+", "LFCG-800+", None]
+LNA_MODEL_NUMBERS = ["PHA-13LN+"]
+FILTER_INPUT_SWITCH_GPIO_PINS = [17, 27, 22]
+FILTER_OUTPUT_SWITCH_GPIO_PINS = [0, 5, 6]
+LNA_INPUT_SWITCH_GPIO_PINS = [23, 24]
+LNA_OUTPUT_SWITCH_GPIO_PINS = [16, 26]
+
+class ControlServerTest(unittest.TestCase):
+
+    def setUp(self):
+        filters_catalog, amplifiers_catalog = loadCatalogs()
+        self.device = DeviceConfiguration("tx", BOARD, FILTER_MODEL_NUMBERS, LNA_MODEL_NUMBERS).createDevice(
+            filters_catalog, amplifiers_catalog)
+        self.device.initFilterRFSwitches(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS, True)
+        self.device.initLNA(LNA_INPUT_SWITCH_GPIO_PINS, LNA_OUTPUT_SWITCH_GPIO_PINS, True)
+        self.addCleanup(self.device.releaseRFSwitches)
+
+        self.device_registry = DeviceRegistry()
+        self.addCleanup(self.device_registry.close)
+        self.device_registry.addDevice("tx", self.device)
+        self.socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.socket_dir, True)
+        self.control_server = ControlServer(self.device_registry, os.path.join(self.socket_dir, "rpitx-control.sock"))
+
+    def testCommandsAreApplied(self):
+        self.assertEqual(self.control_server.executeCommand("filter 2"), "OK filter 2")
+        self.assertEqual(self.device.filter_switch.getActiveRFPath(), 2)
+        self.assertEqual(self.control_server.executeCommand("FREQ 145.5"), f"OK filter {self.device.getFilterForFrequency(145.5)}")
+        self.assertEqual(self.control_server.executeCommand("lna on"), "OK lna on")
+
+    def testMalformedArgumentsAreRejected(self):
+        malformed_commands = {
+            "filter ²": "ERROR usage: filter <N>",
+            "filter ٣": "ERROR usage: filter <N>",
+            "filter 0": "ERROR usage: filter <N>",
+            "filter +2": "ERROR usage: filter <N>",
+            "filter 6": "ERROR filter 6 is not installed",
+            "freq inf": "ERROR usage: freq <MHz>",
+            "freq nan": "ERROR usage: freq <MHz>",
+            "lna maybe": "ERROR usage: lna <on|off>",
+            "@rx filter 1": "ERROR unknown device: rx",
+            "hop 1": "ERROR unknown command: hop"
+        }
+        for command_line, response in malformed_commands.items():
+            with self.subTest(command_line=command_line):
+                self.assertEqual(self.control_server.executeCommand(command_line), response)
+        self.assertIsNone(self.device.filter_switch.getActiveRFPath())
+
+    def testFailedCommandGetsErrorResponse(self):
+        def failEnableFilter(filter_number):
+            raise RuntimeError("GPIO is gone")
+
+        self.device.filter_switch.enableFilter = failEnableFilter
+        self.control_server.start()
+        server_thread = threading.Thread(target=self.control_server.serveForever, daemon=True)
+        server_thread.start()
+        self.addCleanup(server_thread.join)
+        self.addCleanup(self.control_server.shutdown)
+
+        # The connection is kept after the failed command and after a malformed one
+        with ControlClient(self.control_server.socket_path) as control_client:
+            self.assertEqual(control_client.sendCommands(["filter 2", "filter ²", "lna on"]),
+                             ["ERROR filter failed: GPIO is gone", "ERROR usage: filter <N>", "OK lna on"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+from ControlApplication.DeviceConfiguration import *
+from Tests import loadCatalogs
+
+BOARD = "rpitx-expansion-board-SP6T-LNA"
+FILTER_MODEL_NUMBERS = ["SCLF-25+", "SXLP-90+", "RLP-176+", "LFCG-42+", "LFCG-800+", "LFCN-2600D+"]
+LNA_MODEL_NUMBERS = ["PHA-13LN+"]
+
+class FilterForFrequencyTest(unittest.TestCase):
+
+    def setUp(self):
+        filters_catalog, amplifiers_catalog = loadCatalogs()
+        self.device = DeviceConfiguration("lookup", BOARD, FILTER_MODEL_NUMBERS, LNA_MODEL_NUMBERS).createDevice(
+            filters_catalog, amplifiers_catalog)
+
+    def testFrequenciesInsideTable(self):
+        self.assertIsNotNone(self.device.getFilterForFrequency(145))
+        self.assertIsNotNone(self.device.getFilterForFrequency(0))
+
+    def testFrequenciesOutsideTableHaveNoFilter(self):
+        for frequency in (-1, Device.FREQUENCY_TABLE_MAX_MHZ, 2400, 1e300):
+            with self.subTest(frequency=frequency):
+                self.assertIsNone(self.device.getFilterForFrequency(frequency))
+
+    def testNonFiniteFrequenciesHaveNoFilter(self):
+        for frequency in (float("nan"), float("inf"), float("-inf")):
+            with self.subTest(frequency=frequency):
+                self.assertIsNone(self.device.getFilterForFrequency(frequency))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from Benchmarks.WhiptailStub import *
+from ControlApplication.DeviceConfiguration import *
+from Tests import loadCatalogs
+
+BOARD = "rpitx-expansion-board-SP6T-LNA"
+FILTER_MODEL_NUMBERS = ["LFCG-42+", None, "LFCG-320+", "LFCG-360+", None, "LFCG-490+"]
+LNA_MODEL_NUMBERS = ["GALI-39+"]
+PINOUT = {"filter_input": [2, 3, 4], "filter_output": [7, 8, 9], "lna_input": [10, 11], "lna_output": [12, 13]}
+
+class DeviceConfigurationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.configs_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.configs_dir, True)
+        self.filters_catalog, self.amplifiers_catalog = loadCatalogs()
+
+    def createConfiguration(self, name = "2m-70cm", pinout = None):
+        return DeviceConfiguration(name, BOARD, list(FILTER_MODEL_NUMBERS), list(LNA_MODEL_NUMBERS), pinout)
+
+    def testRoundTrip(self):
+        configuration_path = self.createConfiguration(pinout=PINOUT).save(self.configs_dir)
+        self.assertEqual(os.path.basename(configuration_path), f"{BOARD}_2m-70cm.json")
+
+        loaded_configuration = DeviceConfiguration.load(configuration_path)
+        self.assertEqual(loaded_configuration.toDict(), self.createConfiguration(pinout=PINOUT).toDict())
+
+        device = loaded_configuration.createDevice(self.filters_catalog, self.amplifiers_catalog)
+        self.assertEqual(device.model_name, BOARD)
+        self.assertEqual(device.configuration_name, "2m-70cm")
+        self.assertEqual(device.pinout, PINOUT)
+        self.assertEqual([filter_obj.model_number for filter_obj in device.filters], FILTER_MODEL_NUMBERS)
+        self.assertEqual([lna.model_number for lna in device.lna], LNA_MODEL_NUMBERS)
+        # The saved device gives the same configuration
+        self.assertEqual(DeviceConfiguration.fromDevice(device, "2m-70cm").toDict(), loaded_configuration.toDict())
+
+    def testInvalidConfigurationsAreRejected(self):
+        valid_data = self.createConfiguration(pinout=PINOUT).toDict()
+        invalid_changes = {
+            "schema version": {"schema_version": 2},
+            "board": {"board": "rpitx-expansion-board-SP8T"},
+            "filters count": {"filters": FILTER_MODEL_NUMBERS[:5]},
+            "no installed filter": {"filters": [None] * 6},
+            "LNA count": {"lna": []},
+            "model number type": {"filters": [42] + FILTER_MODEL_NUMBERS[1:]},
+            "pinout key": {"pinout": {"filter_middle": [2, 3, 4]}},
+            "pins count": {"pinout": {"filter_input": [2, 3]}},
+            "pin used twice": {"pinout": {"filter_input": [2, 3, 4], "filter_output": [4, 5, 6]}}
+        }
+        for change_name, invalid_change in invalid_changes.items():
+            with self.subTest(change_name=change_name):
+                with self.assertRaises(ValueError):
+                    DeviceConfiguration.fromDict({**valid_data, **invalid_change})
+
+    def testMissingComponentIsReported(self):
+        configuration = self.createConfiguration()
+        configuration.filter_model_numbers[0] = "NOT-IN-CATALOG+"
+        with self.assertRaisesRegex(ValueError, "NOT-IN-CATALOG"):
+            configuration.createDevice(self.filters_catalog, self.amplifiers_catalog)
+
+    def testSameNameReplacesConfiguration(self):
+        configuration = self.createConfiguration()
+        configuration_path = configuration.save(self.configs_dir)
+        configuration.filter_model_numbers[1] = "LFCG-92+"
+        self.assertEqual(configuration.save(self.configs_dir), configuration_path)
+        self.assertEqual(DeviceConfiguration.load(configuration_path).filter_model_numbers[1], "LFCG-92+")
+
+    def testNamesOfTheSameFileAreRejected(self):
+        configuration_path = self.createConfiguration("a b").save(self.configs_dir)
+        with open(configuration_path) as configuration_file:
+            saved_data = configuration_file.read()
+
+        for other_name in ("a-b", "a  b", "a/b"):
+            with self.subTest(other_name=other_name):
+                self.assertEqual(DeviceConfiguration.getFilename(BOARD, other_name), os.path.basename(configuration_path))
+                with self.assertRaises(ValueError):
+                    self.createConfiguration(other_name).save(self.configs_dir)
+        # The saved configuration is not changed
+        with open(configuration_path) as configuration_file:
+            self.assertEqual(configuration_file.read(), saved_data)
+        # Without the allowed characters the name gives the file of the default configuration
+        self.createConfiguration(DeviceConfiguration.DEFAULT_NAME).save(self.configs_dir)
+        with self.assertRaises(ValueError):
+            self.createConfiguration("...").save(self.configs_dir)
+
+    def testIndexListsSavedConfigurations(self):
+        self.createConfiguration("2m").save(self.configs_dir)
+        self.createConfiguration("70cm").save(self.configs_dir)
+        configuration_index = ConfigurationIndex(self.configs_dir)
+        self.assertEqual([(filename, entry["name"], entry["board"]) for filename, entry in configuration_index.getConfigurations()],
+                         [(f"{BOARD}_2m.json", "2m", BOARD), (f"{BOARD}_70cm.json", "70cm", BOARD)])
+        self.assertEqual(configuration_index.findConfiguration("70cm"), f"{BOARD}_70cm.json")
+
+        os.remove(os.path.join(self.configs_dir, f"{BOARD}_2m.json"))
+        self.assertEqual([filename for filename, _ in ConfigurationIndex(self.configs_dir).getConfigurations()], [f"{BOARD}_70cm.json"])
+
+class LegacyConfigurationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.configs_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.configs_dir, True)
+        self.filters_catalog, self.amplifiers_catalog = loadCatalogs()
+
+    def saveLegacyConfiguration(self, filename, filter_model_numbers):
+        # Device pickled by the previous versions: Filter and Amplifier objects, not catalog references
+        device = Device(BOARD)
+        device.filters = [self.filters_catalog.getComponent(self.filters_catalog.findComponentIndex(model_number))
+                          if model_number else BaseModel(None, None, None) for model_number in filter_model_numbers]
+        device.lna = [self.amplifiers_catalog.getComponent(self.amplifiers_catalog.findComponentIndex(LNA_MODEL_NUMBERS[0]))]
+        legacy_path = os.path.join(self.configs_dir, filename)
+        with open(legacy_path, "wb") as legacy_file:
+            pickle.dump(device, legacy_file)
+        return legacy_path
+
+    def testLegacyName(self):
+        self.assertEqual(DeviceConfiguration.getLegacyName(f"{BOARD}.pkl", BOARD), DeviceConfiguration.LEGACY_NAME)
+        self.assertEqual(DeviceConfiguration.getLegacyName(f"/configs/{BOARD}-70cm.pkl", BOARD), "70cm")
+        self.assertEqual(DeviceConfiguration.getLegacyName("station.pkl", BOARD), "station")
+
+    def testMigration(self):
+        legacy_path = self.saveLegacyConfiguration(f"{BOARD}.pkl", FILTER_MODEL_NUMBERS)
+        copy_path = self.saveLegacyConfiguration(f"{BOARD}-70cm.pkl", ["LFCG-92+"] + FILTER_MODEL_NUMBERS[1:])
+
+        migrated_configurations, failed_configurations = DeviceConfiguration.migrateLegacyConfigurations(self.configs_dir)
+        self.assertEqual(failed_configurations, [])
+        self.assertEqual(sorted((os.path.basename(legacy), os.path.basename(configuration)) for legacy, configuration in migrated_configurations),
+                         [(f"{BOARD}-70cm.pkl", f"{BOARD}_70cm.json"), (f"{BOARD}.pkl", f"{BOARD}_legacy.json")])
+
+        for path in (legacy_path, copy_path):
+            self.assertFalse(os.path.exists(path))
+            self.assertTrue(os.path.exists(path + DeviceConfiguration.MIGRATED_FILE_EXTENSION))
+        configuration = DeviceConfiguration.load(os.path.join(self.configs_dir, f"{BOARD}_legacy.json"))
+        self.assertEqual(configuration.filter_model_numbers, FILTER_MODEL_NUMBERS)
+        self.assertEqual(configuration.lna_model_numbers, LNA_MODEL_NUMBERS)
+        self.assertEqual(DeviceConfiguration.load(os.path.join(self.configs_dir, f"{BOARD}_70cm.json")).filter_model_numbers[0], "LFCG-92+")
+
+        # Nothing is left to migrate
+        self.assertEqual(DeviceConfiguration.migrateLegacyConfigurations(self.configs_dir), ([], []))
+
+    def testExistingConfigurationIsNotReplaced(self):
+        configuration_path = DeviceConfiguration(DeviceConfiguration.LEGACY_NAME, BOARD, ["LFCG-92+"] + FILTER_MODEL_NUMBERS[1:],
+                                                 LNA_MODEL_NUMBERS).save(self.configs_dir)
+        legacy_path = self.saveLegacyConfiguration(f"{BOARD}.pkl", FILTER_MODEL_NUMBERS)
+
+        migrated_configurations, failed_configurations = DeviceConfiguration.migrateLegacyConfigurations(self.configs_dir)
+        self.assertEqual(migrated_configurations, [])
+        self.assertEqual([legacy for legacy, _ in failed_configurations], [legacy_path])
+        self.assertTrue(os.path.exists(legacy_path))
+        self.assertEqual(DeviceConfiguration.load(configuration_path).filter_model_numbers[0], "LFCG-92+")
+
+    def testDamagedFileIsLeft(self):
+        legacy_path = os.path.join(self.configs_dir, f"{BOARD}.pkl")
+        with open(legacy_path, "wb") as legacy_file:
+            legacy_file.write(b"not a pickle")
+        migrated_configurations, failed_configurations = DeviceConfiguration.migrateLegacyConfigurations(self.configs_dir)
+        self.assertEqual(migrated_configurations, [])
+        self.assertEqual(len(failed_configurations), 1)
+        self.assertTrue(os.path.exists(legacy_path))
+
+    def testLoadDialogDoesNotUnpickle(self):
+        import ControlApplication.UserInterface as user_interface_module
+
+        installWhiptailStub()
+        legacy_path = self.saveLegacyConfiguration(f"{BOARD}.pkl", FILTER_MODEL_NUMBERS)
+        configs_dir = user_interface_module.CONFIGS_DIR
+        user_interface_module.CONFIGS_DIR = self.configs_dir
+        self.addCleanup(setattr, user_interface_module, "CONFIGS_DIR", configs_dir)
+
+        def failUnpickling(*args, **kwargs):
+            raise AssertionError("legacy configuration unpickled by the load dialog")
+
+        pickle_load = pickle.load
+        pickle.load = failUnpickling
+        self.addCleanup(setattr, pickle, "load", pickle_load)
+
+        user_interface = user_interface_module.UserInterface(None, user_interface_module.WhiptailBackend.NAME)
+        self.assertIsNone(user_interface.loadDeviceConfiguration(self.filters_catalog, self.amplifiers_catalog))
+        self.assertTrue(os.path.exists(legacy_path))
+        self.assertEqual(os.listdir(self.configs_dir), [os.path.basename(legacy_path)])
+
+if __name__ == "__main__":
+    unittest.main()
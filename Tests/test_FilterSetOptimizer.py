@@ -0,0 +1,58 @@
+import random
+import unittest
+from Benchmarks.FilterSetOptimizerBenchmark import bruteForce, loopCoverage
+from ControlApplication.FilterSetOptimizer import *
+from Tests import loadCatalogs
+
+# (<BANDS>, <FILTERS>) searched in the shipped catalog
+CHECKED_CASES = [
+    ("28-29.7 144-146 430-440 1240-1300", 3),
+    ("1.8-2 3.5-3.8 7-7.2 14-14.35 21-21.45 28-29.7", 2)
+]
+RANDOM_CASES_COUNT = 200
+
+class FilterSetSearchTest(unittest.TestCase):
+
+    def testSearchFindsBestCoverage(self):
+        # Random bit sets ordered by the number of points, as the optimizer passes them
+        random_generator = random.Random(1)
+        for case_number in range(RANDOM_CASES_COUNT):
+            points_count = random_generator.randint(1, 40)
+            masks = sorted((random_generator.getrandbits(points_count) for _ in range(random_generator.randint(1, 9))),
+                           key=lambda mask: -bin(mask).count("1"))
+            filters_count = random_generator.randint(1, 4)
+            best_covered, _ = bruteForce(masks, filters_count)
+            best_set = FilterSetSearch(masks, filters_count, points_count).search()
+            with self.subTest(case_number=case_number, masks=masks, filters_count=filters_count):
+                if best_covered == 0:
+                    self.assertIsNone(best_set)
+                    continue
+                covered, candidates = best_set
+                self.assertEqual(covered, best_covered)
+                self.assertLessEqual(len(candidates), filters_count)
+                covered_mask = 0
+                for candidate in candidates:
+                    covered_mask |= masks[candidate]
+                self.assertEqual(bin(covered_mask).count("1"), covered)
+
+    def testKnownBoundIsNotReported(self):
+        masks = [0b1111, 0b0011, 0b1100]
+        self.assertIsNone(FilterSetSearch(masks, 2, 4, best_covered=4).search())
+        self.assertEqual(FilterSetSearch(masks, 2, 4, best_covered=3).search(), (4, [0]))
+
+class FilterSetOptimizerTest(unittest.TestCase):
+
+    def testOptimizerMatchesAllCombinations(self):
+        filters_catalog, _ = loadCatalogs()
+        for bands_text, filters_count in CHECKED_CASES:
+            bands = FilterSetOptimizer.parseBands(bands_text)
+            points = numpy.concatenate([numpy.linspace(low, high, FilterSetOptimizer.POINTS_PER_BAND) for low, high in bands])
+            best_covered, best_filters_count = bruteForce(loopCoverage(filters_catalog, points), filters_count)
+
+            filter_set = FilterSetOptimizer(filters_catalog).optimize(bands, filters_count, max_workers=1)
+            with self.subTest(bands=bands_text, filters_count=filters_count):
+                self.assertEqual(round(sum(filter_set.bands_coverage) * FilterSetOptimizer.POINTS_PER_BAND), best_covered)
+                self.assertEqual(len(filter_set.model_numbers), best_filters_count)
+
+if __name__ == "__main__":
+    unittest.main()
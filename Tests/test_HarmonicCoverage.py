@@ -0,0 +1,42 @@
+import numpy
+import unittest
+from ControlApplication.DeviceConfiguration import *
+from ControlApplication.HarmonicCoverage import *
+from Tests import loadCatalogs
+
+BOARD = "rpitx-expansion-board-SP6T-LNA"
+FILTER_MODEL_NUMBERS = ["SCLF-25+", "SXLP-90+", "RLP-176+", "LFCG-42+", "LFCG-800+", "LFCN-2600D+"]
+LNA_MODEL_NUMBERS = ["PHA-13LN+"]
+
+class HarmonicCoverageTest(unittest.TestCase):
+
+    def setUp(self):
+        filters_catalog, amplifiers_catalog = loadCatalogs()
+        self.device = DeviceConfiguration("coverage", BOARD, FILTER_MODEL_NUMBERS, LNA_MODEL_NUMBERS).createDevice(
+            filters_catalog, amplifiers_catalog)
+
+    def testSweepEndsWithFrequencyTable(self):
+        harmonic_coverage = HarmonicCoverage(self.device)
+        self.assertEqual(harmonic_coverage.frequencies[-1], Device.FREQUENCY_TABLE_MAX_MHZ)
+
+    def testFiltersMatchDevice(self):
+        # The device table cell of a point is passed only if the whole cell is in the passband,
+        # the compared points lie between the whole MHz edges of the filters
+        harmonic_coverage = HarmonicCoverage(self.device, 7000, resolution=2)
+        compared_points = numpy.flatnonzero(harmonic_coverage.frequencies % 1 == 0.5)
+        device_filters = [self.device.getFilterForFrequency(frequency) or Device.NO_FILTER
+                          for frequency in harmonic_coverage.frequencies[compared_points]]
+        self.assertEqual(harmonic_coverage.filter_numbers[compared_points].tolist(), device_filters)
+        self.assertEqual(set(device_filters), set(range(len(FILTER_MODEL_NUMBERS) + 1)))
+
+    def testNoFilterAboveFrequencyTable(self):
+        harmonic_coverage = HarmonicCoverage(self.device, 7000)
+        above_table = harmonic_coverage.frequencies >= Device.FREQUENCY_TABLE_MAX_MHZ
+        self.assertTrue(numpy.all(harmonic_coverage.filter_numbers[above_table] == Device.NO_FILTER))
+        self.assertTrue(numpy.all(numpy.isnan(harmonic_coverage.harmonics_rejection[:, above_table])))
+        # LFCN-2600D+ passes 2.4 GHz, the board does not switch to it
+        self.assertIsNone(self.device.getFilterForFrequency(2400))
+        self.assertEqual([(gap.low_mhz, gap.filter_number) for gap in harmonic_coverage.getGaps(2400, 2450)], [(2400, Device.NO_FILTER)])
+
+if __name__ == "__main__":
+    unittest.main()
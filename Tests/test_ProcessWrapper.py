@@ -0,0 +1,33 @@
+import unittest
+from ControlApplication.ProcessWrapper import *
+
+class FrequencyTest(unittest.TestCase):
+
+    def testFrequencyIsFound(self):
+        commands = {
+            ("sendiq", "-i", "iq.bin", "-f", "433.92e6"): 433.92,
+            ("rpitx", "-m", "RF", "-f", "144800"): 144.8,
+            ("pifmrds", "-freq", "107.9"): 107.9,
+            ("pisstv", "picture.rgb", "144500000"): 144.5,
+            ("transmitter", "--frequency=145.5"): 145.5,
+            ("transmitter", "-f", "433920000"): 433.92
+        }
+        for command, frequency in commands.items():
+            with self.subTest(command=command):
+                self.assertEqual(ProcessWrapper.getFrequency(list(command)), frequency)
+
+    def testInvalidFrequencyIsNotFound(self):
+        for value in ("inf", "-inf", "nan", "Infinity", "0", "-145", "145MHz"):
+            for command in (["sendiq", "-f", value], ["transmitter", f"-f={value}"], ["transmitter", "--frequency", value],
+                            ["morse", value, "message.txt"]):
+                with self.subTest(command=command):
+                    self.assertIsNone(ProcessWrapper.getFrequency(command))
+
+    def testCommandWithoutFrequencyIsNotStarted(self):
+        enabled_frequencies = []
+        process_wrapper = ProcessWrapper(lambda frequency: enabled_frequencies.append(frequency) or 1)
+        self.assertEqual(process_wrapper.run([["transmitter", "-f", "nan"]]), 2)
+        self.assertEqual(enabled_frequencies, [])
+
+if __name__ == "__main__":
+    unittest.main()
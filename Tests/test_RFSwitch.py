@@ -0,0 +1,200 @@
+import itertools
+import os
+import tempfile
+import unittest
+from ControlApplication.RFSwitch import *
+
+FILTER_INPUT_SWITCH_GPIO_PINS = [17, 27, 22]
+FILTER_OUTPUT_SWITCH_GPIO_PINS = [0, 5, 6]
+TRUTH_TABLES = {
+    "SPDT": RFSwitch.SPDT_SWITCH_TRUTH_TABLE,
+    "SP3T": RFSwitch.SP3T_SWITCH_TRUTH_TABLE,
+    "SP4T": RFSwitch.SP4T_SWITCH_TRUTH_TABLE,
+    "SP6T": RFSwitch.SP6T_SWITCH_TRUTH_TABLE
+}
+
+def countUnintendedStates(rf_switch, current_output, target_output, write_order):
+    # Intermediate pin states of the write order that match another RF output
+    pins_state = list(rf_switch.switch_truth_table[current_output])
+    other_states = [tuple(pins_state) for rf_output, pins_state in rf_switch.switch_truth_table.items()
+                    if rf_output not in (current_output, target_output)]
+    unintended_states = 0
+    for pin_index, gpio_state in write_order[:-1]:
+        pins_state[pin_index] = gpio_state
+        unintended_states += tuple(pins_state) in other_states
+    return unintended_states
+
+def getPinStates(rf_switch):
+    return tuple(output_device.pin.state for output_device in rf_switch.switch_control)
+
+def countPinChanges(rf_switch):
+    # MockPin records a state only when it changes
+    return [len(output_device.pin.states) for output_device in rf_switch.switch_control]
+
+class RFSwitchTransitionTest(unittest.TestCase):
+
+    def createSwitch(self, truth_table, initial_rf_output = None):
+        rf_switch = RFSwitch(FILTER_INPUT_SWITCH_GPIO_PINS[:len(next(iter(truth_table.values())))], truth_table, True,
+                             initial_rf_output=initial_rf_output)
+        self.addCleanup(rf_switch.release)
+        return rf_switch
+
+    def testMasksMatchTruthTable(self):
+        for table_name, truth_table in TRUTH_TABLES.items():
+            rf_switch = self.createSwitch(truth_table)
+            for rf_output, pins_state in truth_table.items():
+                with self.subTest(table_name=table_name, rf_output=rf_output):
+                    self.assertEqual(rf_switch.rf_output_masks[rf_output],
+                                     sum(1 << pin_index for pin_index, gpio_state in enumerate(pins_state) if gpio_state))
+
+    def testEveryTransitionReachesTargetState(self):
+        for table_name, truth_table in TRUTH_TABLES.items():
+            rf_switch = self.createSwitch(truth_table)
+            for current_output, target_output in itertools.permutations(truth_table, 2):
+                with self.subTest(table_name=table_name, current_output=current_output, target_output=target_output):
+                    self.assertTrue(rf_switch.activateRFOutput(current_output))
+                    self.assertEqual(getPinStates(rf_switch), truth_table[current_output])
+                    self.assertTrue(rf_switch.activateRFOutput(target_output))
+                    self.assertEqual(getPinStates(rf_switch), truth_table[target_output])
+                    self.assertEqual(rf_switch.active_rf_output, target_output)
+
+    def testOnlyChangedPinsAreWritten(self):
+        rf_switch = self.createSwitch(RFSwitch.SP6T_SWITCH_TRUTH_TABLE, 1)
+        for current_output, target_output in itertools.permutations(RFSwitch.SP6T_SWITCH_TRUTH_TABLE, 2):
+            rf_switch.activateRFOutput(current_output)
+            writes_before = countPinChanges(rf_switch)
+            rf_switch.activateRFOutput(target_output)
+            changed_pins = [current_state != target_state for current_state, target_state in
+                            zip(RFSwitch.SP6T_SWITCH_TRUTH_TABLE[current_output], RFSwitch.SP6T_SWITCH_TRUTH_TABLE[target_output])]
+            with self.subTest(current_output=current_output, target_output=target_output):
+                self.assertEqual([writes - writes_before_pin for writes, writes_before_pin in zip(countPinChanges(rf_switch), writes_before)],
+                                 [int(is_changed) for is_changed in changed_pins])
+
+    def testWriteOrderPassesFewestOtherOutputs(self):
+        # The chosen order is compared with every possible order of the changed pins
+        for table_name, truth_table in TRUTH_TABLES.items():
+            rf_switch = self.createSwitch(truth_table)
+            for current_output, target_output in itertools.permutations(truth_table, 2):
+                write_order = rf_switch.transitions[(rf_switch.rf_output_masks[current_output], rf_switch.rf_output_masks[target_output])]
+                best_unintended_states = min(countUnintendedStates(rf_switch, current_output, target_output, list(order))
+                                             for order in itertools.permutations(write_order))
+                with self.subTest(table_name=table_name, current_output=current_output, target_output=target_output):
+                    self.assertEqual(countUnintendedStates(rf_switch, current_output, target_output, write_order), best_unintended_states)
+
+    def testRedundantActivationWritesNothing(self):
+        rf_switch = self.createSwitch(RFSwitch.SP6T_SWITCH_TRUTH_TABLE)
+        rf_switch.activateRFOutput(3)
+        writes_before = countPinChanges(rf_switch)
+        self.assertTrue(rf_switch.activateRFOutput(3))
+        self.assertEqual(countPinChanges(rf_switch), writes_before)
+
+    def testUnknownOutputIsRejected(self):
+        rf_switch = self.createSwitch(RFSwitch.SP3T_SWITCH_TRUTH_TABLE, 2)
+        self.assertFalse(rf_switch.activateRFOutput(4))
+        self.assertEqual(rf_switch.active_rf_output, 2)
+        self.assertEqual(getPinStates(rf_switch), RFSwitch.SP3T_SWITCH_TRUTH_TABLE[2])
+
+    def testFailedWriteForgetsPinState(self):
+        # After a failed write all pins of the next RF output are written
+        rf_switch = self.createSwitch(RFSwitch.SP6T_SWITCH_TRUTH_TABLE, 1)
+
+        def failWrites(compiled_writes):
+            raise OSError("GPIO write failed")
+
+        rf_switch.gpio_backend.applyWrites = failWrites
+        self.assertFalse(rf_switch.activateRFOutput(4))
+        self.assertIsNone(rf_switch.pins_state_mask)
+        self.assertIsNone(rf_switch.active_rf_output)
+
+        del rf_switch.gpio_backend.applyWrites
+        written_pins = []
+        applyWrites = rf_switch.gpio_backend.applyWrites
+
+        def recordWrites(compiled_writes):
+            written_pins.extend(pin for pin, _ in compiled_writes)
+            applyWrites(compiled_writes)
+
+        rf_switch.gpio_backend.applyWrites = recordWrites
+        self.assertTrue(rf_switch.activateRFOutput(1))
+        self.assertEqual(getPinStates(rf_switch), RFSwitch.SP6T_SWITCH_TRUTH_TABLE[1])
+        self.assertEqual(written_pins, [output_device.pin for output_device in rf_switch.switch_control])
+
+class RFSwitchWrapperTest(unittest.TestCase):
+
+    def testInitialRFPathIsSetWithoutIntermediateStates(self):
+        filter_switch = FilterSwitch(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS,
+                                     RFSwitch.SP6T_SWITCH_TRUTH_TABLE, True, initial_rf_path=4)
+        self.addCleanup(filter_switch.output_switch.release)
+        self.addCleanup(filter_switch.input_switch.release)
+
+        self.assertEqual(filter_switch.getActiveRFPath(), 4)
+        for rf_switch in (filter_switch.input_switch, filter_switch.output_switch):
+            self.assertEqual(getPinStates(rf_switch), RFSwitch.SP6T_SWITCH_TRUTH_TABLE[4])
+            # MockPin starts as a LOW input and records only the changes of the state
+            for output_device in rf_switch.switch_control:
+                self.assertTrue(all(pin_state.state == output_device.pin.state for pin_state in output_device.pin.states[1:]))
+
+    def testListenerIsCalledOnlyWhenRFPathChanges(self):
+        filter_switch = FilterSwitch(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS,
+                                     RFSwitch.SP6T_SWITCH_TRUTH_TABLE, True)
+        self.addCleanup(filter_switch.output_switch.release)
+        self.addCleanup(filter_switch.input_switch.release)
+        activated_rf_paths = []
+        filter_switch.rf_path_listener = activated_rf_paths.append
+
+        for filter_number in (2, 2, 5, 1, 1):
+            self.assertTrue(filter_switch.enableFilter(filter_number))
+        self.assertEqual(activated_rf_paths, [2, 5, 1])
+
+class BatchedSwitchingTest(unittest.TestCase):
+    # Memory-mapped GPIO backend on a plain file standing in for /dev/gpiomem
+
+    def setUp(self):
+        registers_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(registers_dir.cleanup)
+        registers_path = os.path.join(registers_dir.name, "gpiomem")
+        with open(registers_path, "wb") as registers_file:
+            registers_file.write(bytes(MemoryMappedGPIOBackend.MAP_SIZE))
+        self.gpio_backend = MemoryMappedGPIOBackend(registers_path)
+        self.addCleanup(self.gpio_backend.close)
+        self.filter_switch = FilterSwitch(FILTER_INPUT_SWITCH_GPIO_PINS, FILTER_OUTPUT_SWITCH_GPIO_PINS,
+                                          RFSwitch.SP6T_SWITCH_TRUTH_TABLE, gpio_backend=self.gpio_backend)
+        self.addCleanup(self.filter_switch.output_switch.release)
+        self.addCleanup(self.filter_switch.input_switch.release)
+        self.activated_rf_paths = []
+        self.filter_switch.rf_path_listener = self.activated_rf_paths.append
+
+    def testStateChangesAfterBatchIsApplied(self):
+        self.assertTrue(self.filter_switch.enableFilter(2))
+        self.assertEqual(self.filter_switch.getActiveRFPath(), 2)
+        for rf_switch in (self.filter_switch.input_switch, self.filter_switch.output_switch):
+            self.assertEqual(rf_switch.pins_state_mask, rf_switch.rf_output_masks[2])
+            self.assertIsNone(rf_switch.pending_rf_output)
+        self.assertEqual(self.activated_rf_paths, [2])
+
+    def testFailedBatchForgetsState(self):
+        self.assertTrue(self.filter_switch.enableFilter(2))
+        endBatch = self.gpio_backend.endBatch
+
+        def failEndBatch():
+            endBatch()
+            raise OSError("GPIO write failed")
+
+        self.gpio_backend.endBatch = failEndBatch
+        self.assertFalse(self.filter_switch.enableFilter(5))
+        self.assertIsNone(self.filter_switch.getActiveRFPath())
+        for rf_switch in (self.filter_switch.input_switch, self.filter_switch.output_switch):
+            self.assertIsNone(rf_switch.pins_state_mask)
+            self.assertIsNone(rf_switch.active_rf_output)
+            self.assertIsNone(rf_switch.pending_rf_output)
+        # The RF path that was not set is not reported to the listener (saved as the switch state)
+        self.assertEqual(self.activated_rf_paths, [2])
+
+        # The next activation is not skipped as redundant and writes all pins
+        del self.gpio_backend.endBatch
+        self.assertTrue(self.filter_switch.enableFilter(2))
+        self.assertEqual(self.filter_switch.getActiveRFPath(), 2)
+        self.assertEqual(self.activated_rf_paths, [2, 2])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from ControlApplication.DeviceConfiguration import *
+from ControlApplication.Scheduler import *
+from Tests import loadCatalogs
+
+BOARD = "rpitx-expansion-board-SP6T-LNA"
+FILTER_MODEL_NUMBERS = ["SCLF-25+", "SXLP-90+", "RLP-176+", "LFCG-42+", "LFCG-800+", None]
+LNA_MODEL_NUMBERS = ["PHA-13LN+"]
+
+class ScheduleParsingTest(unittest.TestCase):
+
+    def setUp(self):
+        filters_catalog, amplifiers_catalog = loadCatalogs()
+        self.device = DeviceConfiguration("schedule", BOARD, FILTER_MODEL_NUMBERS, LNA_MODEL_NUMBERS).createDevice(
+            filters_catalog, amplifiers_catalog)
+
+    def testStepsAreParsed(self):
+        steps = HoppingScheduler.parseSchedule(["# hops", "", "0.000 freq 145.5 lna on", "0.250 filter 2  # 2 m",
+                                                "@1760000000.5 LNA off"], self.device)
+        self.assertEqual([(step.step_time, step.is_absolute_time, step.filter_number, step.lna_state, step.line_number) for step in steps],
+                         [(0.0, False, self.device.getFilterForFrequency(145.5), True, 3), (0.25, False, 2, None, 4),
+                          (1760000000.5, True, None, False, 5)])
+
+    def testInvalidLinesAreReported(self):
+        invalid_lines = ["nan filter 1", "@nan filter 1", "inf filter 1", "-1 filter 1", "0 freq inf", "0 freq -inf",
+                         "0 freq nan", "0 freq 2400", "0 filter 6", "0 filter", "0 lna maybe", "0 hop 1", "x filter 1"]
+        for invalid_line in invalid_lines:
+            with self.subTest(invalid_line=invalid_line):
+                with self.assertRaisesRegex(ValueError, "^Schedule line 2: "):
+                    HoppingScheduler.parseSchedule(["0 filter 1", invalid_line], self.device)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from Benchmarks.BenchmarkSuite import copyCatalogs
+from Benchmarks.WhiptailStub import *
+from ControlApplication.DeviceConfiguration import *
+from ControlApplication.SwitchState import *
+from Tests import loadCatalogs
+
+BOARD = "rpitx-expansion-board-SP6T-LNA"
+FILTER_MODEL_NUMBERS = ["LFCG-42+", None, "LFCG-320+", "LFCG-360+", None, "LFCG-490+"]
+LNA_MODEL_NUMBERS = ["GALI-39+"]
+
+class SwitchStateStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.state_dir, True)
+        self.state_path = SwitchStateStore.getStatePath(self.state_dir, BOARD, "2m-70cm")
+
+    def createStore(self, model_name = BOARD):
+        switch_state = SwitchStateStore(self.state_path, model_name, "2m-70cm")
+        self.addCleanup(switch_state.close)
+        return switch_state
+
+    def testStateIsSavedAndLoaded(self):
+        self.assertEqual(self.createStore().load(), (None, None))
+
+        switch_state = self.createStore()
+        for filter_number in (1, 3, 4):
+            switch_state.setFilter(filter_number)
+            # Every change is in the file when the switching returns
+            self.assertEqual(self.createStore().load(), (filter_number, None))
+        switch_state.setLNAState(True)
+        switch_state.close()
+        # Changes after close() are not saved
+        switch_state.setFilter(6)
+
+        self.assertEqual(os.path.basename(self.state_path), DeviceConfiguration.getFilename(BOARD, "2m-70cm"))
+        self.assertEqual(self.createStore().load(), (4, True))
+        self.assertEqual(os.listdir(self.state_dir), [os.path.basename(self.state_path)])
+
+    def testInvalidStateIsNotUsed(self):
+        switch_state = self.createStore()
+        switch_state.setFilter(2)
+        self.assertEqual(self.createStore("rpitx-expansion-board-SP3T").load(), (None, None))
+
+        invalid_states = {
+            "damaged file": "{",
+            "schema version": json.dumps({"schema_version": 2, "board": BOARD, "filter": 2, "lna": True}),
+            "value types": json.dumps({"schema_version": 1, "board": BOARD, "filter": True, "lna": 1})
+        }
+        for state_name, state_text in invalid_states.items():
+            with self.subTest(state_name=state_name):
+                with open(self.state_path, "w") as state_file:
+                    state_file.write(state_text)
+                self.assertEqual(self.createStore().load(), (None, None))
+
+    def testLatestStateIsFound(self):
+        self.assertIsNone(SwitchStateStore.findLatest(os.path.join(self.state_dir, "missing")))
+        state_paths = [SwitchStateStore.getStatePath(self.state_dir, BOARD, name) for name in ("2m", "70cm", "23cm")]
+        for modification_time, state_path in zip((300, 100, 200), state_paths):
+            with open(state_path, "w") as state_file:
+                state_file.write("{}")
+            os.utime(state_path, ns=(modification_time * 10**9, modification_time * 10**9))
+        with open(os.path.join(self.state_dir, "notes.txt"), "w") as notes_file:
+            notes_file.write("newest, but not a state")
+
+        self.assertEqual(SwitchStateStore.findLatest(self.state_dir), state_paths[0])
+        # A loaded board is the latest one, its state is kept
+        switch_state = SwitchStateStore(state_paths[1], BOARD, "70cm")
+        switch_state.markUsed()
+        self.assertEqual(SwitchStateStore.findLatest(self.state_dir), state_paths[1])
+        self.assertEqual(switch_state.load(), (None, None))
+
+class ResumeTest(unittest.TestCase):
+    # The application runs with the configurations, the switch states and the
+    # catalogs in temporary directories, the dialogs are answered by the stub
+
+    def setUp(self):
+        installWhiptailStub()
+        import ControlApplication.main as application
+        import ControlApplication.UserInterface as user_interface_module
+
+        self.application = application
+        self.user_interface_module = user_interface_module
+        self.application_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.application_dir, True)
+        self.configs_dir = os.path.join(self.application_dir, "SavedConfiguration")
+        self.state_dir = os.path.join(self.application_dir, "SwitchState")
+        os.makedirs(self.configs_dir)
+
+        self.setModuleValue(user_interface_module, "CONFIGS_DIR", self.configs_dir)
+        self.setModuleValue(application, "SWITCH_STATE_DIR", self.state_dir)
+        self.setModuleValue(application, "LOG_FILENAME", None)
+        self.setModuleValue(application, "IS_MOCK_GPIO_USED", True)
+        self.setModuleValue(application, "GPIOMEM_PATH", None)
+        self.setModuleValue(application, "RESUME_LAST_DEVICE", True)
+        self.filters_catalog, self.amplifiers_catalog = loadCatalogs()
+
+        # Devices shown in the board menu, their pins are released after the test
+        self.board_devices = []
+        choose_board_action = user_interface_module.UserInterface.chooseBoardAction
+        def chooseBoardAction(user_interface, device):
+            self.board_devices.append(device)
+            return choose_board_action(user_interface, device)
+        self.setModuleValue(user_interface_module.UserInterface, "chooseBoardAction", chooseBoardAction)
+        self.addCleanup(self.releaseDevices)
+
+    def setModuleValue(self, module, name, value):
+        self.addCleanup(setattr, module, name, getattr(module, name))
+        setattr(module, name, value)
+
+    def releaseDevices(self):
+        for device in self.board_devices:
+            device.releaseRFSwitches()
+
+    def saveConfiguration(self, name, filter_number, is_lna_active):
+        configuration_path = DeviceConfiguration(name, BOARD, FILTER_MODEL_NUMBERS, LNA_MODEL_NUMBERS).save(self.configs_dir)
+        switch_state = SwitchStateStore(SwitchStateStore.getStatePath(self.state_dir, BOARD, name), BOARD, name)
+        switch_state.setFilter(filter_number)
+        switch_state.setLNAState(is_lna_active)
+        switch_state.close()
+        return configuration_path
+
+    def testLastDeviceIsResumedInSavedState(self):
+        self.saveConfiguration("2m-70cm", 3, True)
+        device = self.application.resumeLastDevice(self.filters_catalog, self.amplifiers_catalog)
+        self.board_devices.append(device)
+
+        self.assertEqual(device.configuration_name, "2m-70cm")
+        self.assertEqual(device.filter_switch.getActiveRFPath(), 3)
+        self.assertTrue(device.lna_switch.is_active)
+        # The pins are created in the saved state, the switches do not pass the default state
+        for rf_switch in (device.filter_switch.input_switch, device.filter_switch.output_switch):
+            for output_device in rf_switch.switch_control:
+                self.assertTrue(all(pin_state.state == output_device.pin.state for pin_state in output_device.pin.states[1:]))
+
+        # Every change is saved for the next start
+        device.filter_switch.enableFilter(6)
+        device.lna_switch.toggleLNA()
+        with open(device.switch_state.state_path) as state_file:
+            state_data = json.load(state_file)
+        self.assertEqual((state_data["filter"], state_data["lna"]), (6, False))
+
+    def testLoadedBoardIsResumed(self):
+        self.saveConfiguration("2m", 1, False)
+        configuration_path = DeviceConfiguration("70cm", BOARD, FILTER_MODEL_NUMBERS, LNA_MODEL_NUMBERS).save(self.configs_dir)
+        os.utime(SwitchStateStore.getStatePath(self.state_dir, BOARD, "2m"), ns=(0, 0))
+
+        # The board is loaded, but not switched
+        device = DeviceConfiguration.load(configuration_path).createDevice(self.filters_catalog, self.amplifiers_catalog)
+        self.board_devices.append(device)
+        device.initRFSwitches(self.application.DEFAULT_PINOUT, True, None, self.application.getSwitchState(device))
+        device.releaseRFSwitches()
+
+        resumed_device = self.application.resumeLastDevice(self.filters_catalog, self.amplifiers_catalog)
+        self.board_devices.append(resumed_device)
+        self.assertEqual(resumed_device.configuration_name, "70cm")
+        self.assertIsNone(resumed_device.filter_switch.getActiveRFPath())
+
+    def testMissingConfigurationIsNotResumed(self):
+        configuration_path = self.saveConfiguration("2m-70cm", 3, True)
+        os.remove(configuration_path)
+        self.assertIsNone(self.application.resumeLastDevice(self.filters_catalog, self.amplifiers_catalog))
+
+    def testCancelInResumedBoardMenuShowsMainMenu(self):
+        copyCatalogs(os.path.dirname(os.path.abspath(self.application.__file__)), self.application_dir)
+        self.setModuleValue(self.application, "FILTER_MODELS_DIR", os.path.join(self.application_dir, "FiltersList"))
+        self.setModuleValue(self.application, "AMPLIFIER_MODELS_DIR", os.path.join(self.application_dir, "AmplifiersList"))
+        self.saveConfiguration("2m", 1, False)
+        self.saveConfiguration("70cm", 4, True)
+        os.utime(SwitchStateStore.getStatePath(self.state_dir, BOARD, "2m"), ns=(0, 0))
+
+        # <Cancel> in the menu of the resumed board, the other configuration is loaded,
+        # filter 3 is enabled and <Cancel> is pressed in its menu
+        installWhiptailStub([None, self.application.APPLICATION_ACTIONS[1], os.path.splitext(DeviceConfiguration.getFilename(BOARD, "2m"))[0],
+                             "Activate filter 3", None])
+        with self.assertRaises(FirstMenuReached):
+            self.application.runUserInterface(self.user_interface_module.WhiptailBackend.NAME)
+
+        menu_prompts = WhiptailStub.menu_prompts
+        self.assertEqual(len(menu_prompts), 6)
+        self.assertIn("Active filter: 4 - LFCG-360+", menu_prompts[0])
+        self.assertEqual(menu_prompts[1], "Choose an action:")
+        self.assertEqual(menu_prompts[2], "Select a configuration file:")
+        self.assertIn("Active filter: 1 - LFCG-42+", menu_prompts[3])
+        self.assertIn("Active filter: 3 - LFCG-320+", menu_prompts[4])
+        self.assertEqual(menu_prompts[5], "Choose an action:")
+        self.assertEqual([device.configuration_name for device in self.board_devices], ["70cm", "2m"])
+
+        # The board opened from the main menu keeps its new state for the next start
+        self.assertEqual(SwitchStateStore(SwitchStateStore.getStatePath(self.state_dir, BOARD, "2m"), BOARD, "2m").load(), (3, False))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import pty
+import select
+import shutil
+import tempfile
+import time
+import unittest
+from ControlApplication.UIBackend import *
+
+TITLE = "UIBackend test"
+TERMINAL_TIMEOUT = 20
+MODEL_NUMBERS = ["LFCG-42+", "LFCG-92+", "LFCG-320+", "LFCN-80+", "ZX75LP-216-S+"]
+ENTER_KEY = b"\r"
+ESCAPE_KEY = b"\x1b"
+
+def getDownKey():
+    # Sequence sent by the Down key of the terminal in the keypad mode, e.g. "\x1bOB"
+    import curses
+    curses.setupterm(os.environ["TERM"], -1)
+    return curses.tigetstr("kcud1")
+
+def findModelNumbers(search_text):
+    if "<" in search_text:
+        raise ValueError("incomplete condition")
+    return [(model_number, "Filter") for model_number in MODEL_NUMBERS
+            if search_text.strip() and model_number.lower().startswith(search_text.strip().lower())]
+
+class CursesSearchboxTest(unittest.TestCase):
+    # The search box runs in a child process on a pseudo terminal, the keys
+    # are written to the terminal once the dialog is drawn
+
+    def setUp(self):
+        os.environ.setdefault("TERM", "xterm")
+        self.result_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.result_dir, True)
+
+    def runSearchbox(self, key_feed):
+        result_path = os.path.join(self.result_dir, "result.json")
+        child_pid, terminal_fd = pty.fork()
+        if child_pid == 0:
+            exit_code = 1
+            try:
+                searched_texts = []
+                ui_backend = CursesBackend(TITLE)
+                try:
+                    selected_item = ui_backend.searchbox("Search:", lambda search_text: searched_texts.append(search_text) or
+                                                         findModelNumbers(search_text))
+                finally:
+                    ui_backend.close()
+                with open(result_path, "w") as result_file:
+                    json.dump({"selected_item": selected_item, "searched_texts": searched_texts}, result_file)
+                exit_code = 0
+            finally:
+                os._exit(exit_code)
+
+        screen_output = b""
+        deadline = time.monotonic() + TERMINAL_TIMEOUT
+        while time.monotonic() < deadline:
+            if not select.select([terminal_fd], [], [], 1.0)[0]:
+                continue
+            try:
+                output = os.read(terminal_fd, 65536)
+            except OSError:
+                # The child process has exited
+                break
+            if not output:
+                break
+            if TITLE.encode() not in screen_output and TITLE.encode() in screen_output + output:
+                os.write(terminal_fd, key_feed)
+            screen_output += output
+
+        if time.monotonic() >= deadline:
+            os.kill(child_pid, 9)
+        os.waitpid(child_pid, 0)
+        os.close(terminal_fd)
+        self.assertTrue(os.path.exists(result_path), "search box did not return")
+        with open(result_path) as result_file:
+            result = json.load(result_file)
+        return tuple(result["selected_item"]), result["searched_texts"]
+
+    def testItemsAreFoundWhileTyping(self):
+        selected_item, searched_texts = self.runSearchbox(b"lfc" + getDownKey() + ENTER_KEY)
+        self.assertEqual(selected_item, ("LFCG-92+", CursesBackend.OK_BUTTON))
+        self.assertEqual(searched_texts, ["", "l", "lf", "lfc"])
+
+    def testTextIsEditedAndErrorIsShown(self):
+        # Enter does nothing while nothing is found
+        selected_item, searched_texts = self.runSearchbox(b"lfcx" + ENTER_KEY + b"\x7f" + b"n<" + ENTER_KEY + b"\x7f" + ENTER_KEY)
+        self.assertEqual(selected_item, ("LFCN-80+", CursesBackend.OK_BUTTON))
+        self.assertEqual(searched_texts, ["", "l", "lf", "lfc", "lfcx", "lfc", "lfcn", "lfcn<", "lfcn"])
+
+    def testEscapeCancels(self):
+        selected_item, _ = self.runSearchbox(b"lfcg" + ESCAPE_KEY)
+        self.assertEqual(selected_item, ("", CursesBackend.CANCEL_BUTTON))
+
+if __name__ == "__main__":
+    unittest.main()
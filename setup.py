@@ -8,7 +8,7 @@ setup(
     author_email='igor.nikolaevich.96@gmail.com',
     license='GPL-3.0',
     url='https://github.com/IgrikXD/rpitx-expansion-board',
-    packages=find_packages(),
+    packages=find_packages(exclude=["Benchmarks", "Tests"]),
     package_data={
         'ControlApplication': [
             'AmplifiersList/*.csv',
@@ -18,6 +18,7 @@ setup(
     install_requires=[
         'colorama',
         'gpiozero',
+        'numpy',
         'pandas',
         'whiptail-dialogs @ https://github.com/IgrikXD/whiptail-dialogs/archive/master.tar.gz',
     ],